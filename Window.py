@@ -5,6 +5,8 @@ import time
 import datetime
 import json
 import serial
+import atexit
+import argparse
 import configparser
 from middileware.Logger import Logger
 from PySide6.QtWidgets import (
@@ -32,8 +34,9 @@ from PySide6.QtWidgets import (
     QMessageBox,
     QMainWindow,
     QSplashScreen,
+    QInputDialog,
 )
-from PySide6.QtCore import Qt, QTimer, QThreadPool, QEvent, QThread, QMimeData, QRunnable, Signal, QObject
+from PySide6.QtCore import Qt, QTimer, QThreadPool, QEvent, QThread, QMimeData, QRunnable, Signal, QObject, QMetaObject
 from PySide6.QtGui import (
     QTextDocument,
     QTextCursor,
@@ -54,6 +57,21 @@ import utils.common as common
 from components.ConfigManager import read_config as read_app_config, write_config as write_app_config
 from components.QSSLoader import QSSLoader
 from components.DataReceiver import DataReceiver
+from components.ReceivePipeline import ReceivePipeline
+from components.ReceiveLogView import ReceiveLogView, ReceiveLogModel, DEFAULT_MAX_LINES
+from components.LargeFileViewer import LargeFileViewer
+from components.RenderScheduler import RenderScheduler, DEFAULT_MAX_FPS
+from components.PerformancePanel import PerformancePanel
+from components.ReceivePipeline import PIPELINE_BATCHES
+from utils import metrics, profiler
+from utils.metrics_export import MetricsServer, SnapshotWriter
+from utils.line_store import DIRECTION_TX, DIRECTION_TX_HEX, DEFAULT_COMPRESSION
+from utils.segment_file import CODECS
+from utils.capture import CaptureWriter
+from utils.protocol_replay import SCHEME as REPLAY_SCHEME, replay_url
+from utils.log_writer import FSYNC_NEVER, FSYNC_POLICIES
+from utils.log_rotation import RotationPolicy, DEFAULT_NAME_TEMPLATE
+from utils.session_log import SessionLog, DATA_BASE64, EVENT_OPEN, EVENT_CLOSE
 from components.FileSender import FileSender
 from components.CommandExecutor import CommandExecutor
 from components.SearchReplaceDialog import SearchReplaceDialog
@@ -85,6 +103,14 @@ logger = Logger(
     backup_count=3
 ).get_logger("Window")
 
+GUI_BATCHES = metrics.counter("gui_batches_total", "framesReady batches handled by the GUI thread")
+# 流水线已发出、GUI线程尚未处理的 framesReady 信号数（排队的跨线程信号）
+metrics.gauge("frames_ready_queue_depth", "framesReady signals queued for the GUI thread",
+              lambda: max(PIPELINE_BATCHES.value - GUI_BATCHES.value, 0))
+RX_RING_BACKLOG = metrics.gauge("rx_ring_backlog_bytes", "Received bytes waiting in the ring buffer for the pipeline")
+LINE_CAPACITY = metrics.gauge("line_capacity_bytes_per_second", "Theoretical line capacity at the current baud rate")
+PORT_OPENS = metrics.counter("port_opens_total", "Serial port opens (every open after the first is a reconnect)")
+
 
 class MyWidget(QWidget):
     def __init__(self):
@@ -109,33 +135,18 @@ class MyWidget(QWidget):
         self.data_receiver = None
         self.command_executor = None
 
-        ## Update main text area - 优化的缓冲区管理
-        self.full_data_store = []  # Complete history
-        self.hex_buffer = []  # 用于存储十六进制数据
-        self.raw_data_buffer = []  # 用于存储原始数据
-        self.buffer_size = 2000  # Maximum stored lines
-        self.visible_lines = 500  # 可见行数
-        self.current_offset = 0  # Scroll position tracker
-
-        ## 添加UI更新优化相关变量
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.batch_update_ui)
-        self.update_timer.setSingleShot(True)
-        self.pending_updates = []
-        self.last_ui_update_time = time.time()
-        self.ui_update_interval = 0.1  # 100ms最小更新间隔
-
-        ## 性能监控和缓冲区配置
-        self.performance_stats = {
-            'updates_per_second': 0,
-            'last_stats_time': time.time(),
-            'update_count': 0,
-        }
+        ## 接收处理流水线（分段、解码、格式化在独立线程完成，GUI只追加显示行）
+        self.receive_pipeline = None
+        self.receive_pipeline_thread = None
+        # 结构化会话日志（utils.session_log），串口打开期间有效
+        self.session_log = None
+
+        ## 性能面板（utils.metrics 的实时显示），首次打开时创建
+        self.performance_panel = None
+        # 指标导出（utils.metrics_export），按 MoreSettings.MetricsPort / MetricsSnapshotSec 开启
+        self.metrics_server = None
+        self.metrics_snapshot_writer = None
 
-        # 增大缓冲区以减少数据丢失
-        self.buffer_size = 10000  # 从2000增加到10000
-        self.visible_lines = 500
-        self.max_pending_updates = 20  # 限制待处理更新的最大数量，从200降低到20
         # Before init the UI, read the Configurations of SCOM from the config.ini
         # Use the centralized ConfigManager to fully control config lifecycle
         try:
@@ -419,6 +430,15 @@ class MyWidget(QWidget):
         self.string_ascii_convert_action.triggered.connect(self.string_ascii_convert)
         self.custom_toggle_switch_action = self.tools_menu.addAction("Record MODE")
         self.custom_toggle_switch_action.triggered.connect(self.custom_toggle_switch)
+        self.replay_capture_action = self.tools_menu.addAction("Replay Capture")
+        self.replay_capture_action.triggered.connect(self.replay_capture)
+        self.performance_panel_action = self.tools_menu.addAction("Performance Panel")
+        self.performance_panel_action.triggered.connect(self.show_performance_panel)
+        self.profiling_action = self.tools_menu.addAction("Start Profiling")
+        self.profiling_action.triggered.connect(self.toggle_profiling)
+        self.memory_snapshot_action = self.tools_menu.addAction("Memory Snapshot")
+        self.memory_snapshot_action.triggered.connect(self.take_memory_snapshot)
+        self.update_profiling_actions()
         
         # Create About menu
         self.about_menu = self.menu_bar.addMenu("About")
@@ -541,6 +561,8 @@ class MyWidget(QWidget):
         self.checkbox_data_received.stateChanged.connect(
             self.handle_data_received_checkbox
         )
+        self.input_path_data_received.textChanged.connect(self.update_receive_pipeline_settings)
+        self.input_path_data_received.textChanged.connect(self.update_log_rotation)
 
         self.port_button = QPushButton("Open Port")
         self.port_button.clicked.connect(self.port_on)
@@ -603,13 +625,31 @@ class MyWidget(QWidget):
         self.command_send_as_hex_checkbox.setChecked(False)
         self.command_send_as_hex_checkbox.setToolTip("Send command as hexadecimal data")
 
-        self.received_data_textarea = QTextEdit()
-        self.received_data_textarea.setAcceptRichText(True)
-        self.received_data_textarea.installEventFilter(self)  # Install event filter
-        # self.received_data_textarea.setDocument(QTextDocument(None))
+        # 接收区：虚拟化视图，只绘制可见行，历史行数上限见 MoreSettings.MaxReceiveLines（0 为不限制）；
+        # 较旧的历史按 MoreSettings.ScrollbackCompression 压缩，超出 MoreSettings.ScrollbackMemoryMB 后写入
+        # tmps/ 下的磁盘分段
+        compression = self.config.get("MoreSettings", "ScrollbackCompression", fallback=DEFAULT_COMPRESSION).lower()
+        if compression not in CODECS:
+            logger.warning(f"Unknown ScrollbackCompression '{compression}', using {DEFAULT_COMPRESSION}")
+            compression = DEFAULT_COMPRESSION
+        self.received_data_textarea = ReceiveLogView(
+            ReceiveLogModel(
+                self.config.getint("MoreSettings", "MaxReceiveLines", fallback=DEFAULT_MAX_LINES),
+                spill_dir=os.path.join(self.app_data_dir, "tmps"),
+                memory_budget=self.config.getint("MoreSettings", "ScrollbackMemoryMB", fallback=64) * 1024 * 1024,
+                compression=compression,
+            )
+        )
+        self.received_data_textarea.setObjectName("received_data_view")
+        # 显示刷新调度：合并接收到的记录，按 MoreSettings.MaxFPS 每帧追加一次
+        self.render_scheduler = RenderScheduler(
+            self.received_data_textarea.append_records,
+            self.config.getint("MoreSettings", "MaxFPS", fallback=DEFAULT_MAX_FPS),
+            self,
+        )
+        self.update_log_writer_settings()
         shortcut = QShortcut(Qt.ControlModifier | Qt.Key_F, self)
         shortcut.activated.connect(self.show_search_dialog)
-        # self.received_data_textarea.setReadOnly(True)
 
         # Create a group box for the settings section
         self.settings_groupbox = QGroupBox("Settings")
@@ -889,14 +929,9 @@ class MyWidget(QWidget):
         layout_2.addLayout(layout_2_main)
 
         layout_3 = QVBoxLayout()
-        self.label_layout_3 = QLabel("temp.log")
-        self.text_input_layout_3 = QTextEdit()
-        self.text_input_layout_3.setDocument(QTextDocument(None))
-        self.text_input_layout_3.setLineWrapMode(QTextEdit.WidgetWidth)
-        layout_3.addWidget(self.label_layout_3)
-        layout_3.addWidget(self.text_input_layout_3)
-        self.text_input_layout_3.setObjectName("text_input_layout_3")
-        self.text_input_layout_3.setAcceptRichText(False)
+        self.large_file_viewer = LargeFileViewer()
+        self.large_file_viewer.setObjectName("large_file_viewer")
+        layout_3.addWidget(self.large_file_viewer)
 
         layout_4 = QVBoxLayout()
         self.label_layout_4 = QLabel("No TimeStamp")
@@ -1190,54 +1225,6 @@ class MyWidget(QWidget):
         except Exception as e:
             logger.error(f"Error saving config: {e}")
 
-    def apply_style(self, data):
-        text = self.received_data_textarea.toPlainText()
-        doc = self.received_data_textarea.document()
-        cursor = QTextCursor(doc)
-
-        # 创建字符格式对象
-        ok_char_format = QTextCharFormat()
-        ok_char_format.setForeground(QBrush(QColor("#198754")))
-        ok_char_format.setFontWeight(QFont.Bold)
-
-        error_char_format = QTextCharFormat()
-        error_char_format.setForeground(QBrush(QColor("#dc3545")))
-        error_char_format.setFontWeight(QFont.Bold)
-
-        # 匹配字符串 "OK" 并设置样式
-        pattern_ok = r"OK\n"
-        matches_ok = re.finditer(pattern_ok, text, re.MULTILINE)
-        for match in matches_ok:
-            start_pos = match.start()
-            end_pos = match.end()
-            cursor.setPosition(start_pos)
-            cursor.movePosition(
-                QTextCursor.NextCharacter, QTextCursor.KeepAnchor, end_pos - start_pos
-            )
-            existing_format = cursor.charFormat()
-            new_format = QTextCharFormat(existing_format)
-            new_format.setForeground(ok_char_format.foreground())
-            new_format.setFontWeight(ok_char_format.fontWeight())
-            cursor.setCharFormat(new_format)
-
-        # 匹配字符串 "ERROR" 并设置样式
-        pattern_error = r"ERROR\n"
-        matches_error = re.finditer(pattern_error, text, re.MULTILINE)
-        for match in matches_error:
-            start_pos = match.start()
-            end_pos = match.end()
-            cursor.setPosition(start_pos)
-            cursor.movePosition(
-                QTextCursor.NextCharacter, QTextCursor.KeepAnchor, end_pos - start_pos
-            )
-            existing_format = cursor.charFormat()
-            new_format = QTextCharFormat(existing_format)
-            new_format.setForeground(error_char_format.foreground())
-            new_format.setFontWeight(error_char_format.fontWeight())
-            cursor.setCharFormat(new_format)
-
-        self.received_data_textarea.setDocument(doc)
-
     def update_hotkeys_groupbox(self):
         # Clear existing buttons
         for i in reversed(range(self.hotkeys_layout.count())):
@@ -1287,29 +1274,22 @@ class MyWidget(QWidget):
             if self.handle_at_command_page_leave():
                 return  # 用户取消了切换
         
+        # 离开Log页面时释放文件映射，避免日志无法轮转或清空
+        if current_index == 2 and index != 2:
+            self.large_file_viewer.release()
+
         # 切换到ATCommand页面时的处理
         if index == 1:
             self.handle_at_command_page_enter()
-        elif index == 2 or current_index == 2:
-            # Log页面 - 从日志文件读取完整日志（优先使用输入框里的路径），失败时回退到组件内容
-            log_path = ""
-            try:
-                if hasattr(self, 'input_path_data_received'):
-                    log_path = self.input_path_data_received.text()
-                else:
-                    log_path = self.config.get('Set', 'PathDataReceived', fallback='')
-
-                if log_path and os.path.exists(log_path):
-                    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
-                        content = f.read()
-                else:
-                    # 回退到接收组件中的内容
-                    content = self.received_data_textarea.toPlainText()
-            except Exception as e:
-                logger.error(f"Error reading log file {log_path}: {e}")
-                content = self.received_data_textarea.toPlainText()
-
-            self.text_input_layout_3.setPlainText(content)
+        elif index == 2:
+            # Log页面 - 映射日志文件按需显示（优先使用输入框里的路径）
+            if hasattr(self, 'input_path_data_received'):
+                log_path = self.input_path_data_received.text()
+            else:
+                log_path = self.config.get('Set', 'PathDataReceived', fallback='')
+            common.flush_log()
+            self.large_file_viewer.set_timestamp_regex(self.config.get('MoreSettings', 'TimestampRegex', fallback=''))
+            self.large_file_viewer.activate(log_path)
 
         elif index == 3 or current_index == 3:
             # NoTimeStamp页面 - 基于日志文件内容去除时间戳后显示
@@ -1320,6 +1300,7 @@ class MyWidget(QWidget):
                 else:
                     log_path = self.config.get('Set', 'PathDataReceived', fallback='')
 
+                common.flush_log()
                 if log_path and os.path.exists(log_path):
                     with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
                         content = f.read()
@@ -1613,6 +1594,77 @@ class MyWidget(QWidget):
         self.custom_toggle_switch_dialog = CustomToggleSwitchDialog(self)
         self.custom_toggle_switch_dialog.show()
 
+    def replay_capture(self):
+        """选择 .scap 抓包文件和回放速度，作为串口打开，数据走与真实串口相同的接收和显示路径"""
+        path, _ = QFileDialog.getOpenFileName(self, "Replay Capture", os.path.join(self.app_data_dir, "logs"),
+                                              "Raw capture (*.scap)")
+        if not path:
+            return
+        speeds = {"Original timing": 1.0, "2x": 2.0, "10x": 10.0, "As fast as possible": None}
+        speed, ok = QInputDialog.getItem(self, "Replay Capture", "Replay speed:", list(speeds), 0, False)
+        if not ok:
+            return
+        if self.main_Serial is not None and self.main_Serial.is_open:
+            self.port_off()
+        url = replay_url(path, speeds[speed])
+        if self.serial_port_combo.findText(url) < 0:
+            self.serial_port_combo.addItem(url)
+        self.serial_port_combo.setCurrentText(url)
+        self.port_on()
+
+    def show_performance_panel(self):
+        """显示非模态的性能面板，关闭后只是隐藏，再次打开时保留速率计算的基准"""
+        if self.performance_panel is None:
+            self.performance_panel = PerformancePanel(parent=self)
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
+    def update_profiling_actions(self):
+        """按当前是否有分析会话（可能由启动参数 --profile 开始）更新菜单项"""
+        session = profiler.active_session()
+        self.profiling_action.setText("Stop Profiling" if session is not None else "Start Profiling")
+        self.memory_snapshot_action.setEnabled(session is not None and session.trace_memory)
+
+    def toggle_profiling(self):
+        """开始或停止 cProfile / tracemalloc 分析会话，结果写入 tmps/"""
+        if profiler.active_session() is None:
+            profiler.start_profiling(os.path.join(self.app_data_dir, "tmps"))
+            logger.info("Profiling started")
+            self.set_status_label("Profiling", "info")
+        else:
+            result = self.stop_profiling()
+            ErrorDialog.show_info(
+                parent=self,
+                title="Profiling Stopped",
+                message=f"Profile written to {result.summary_path}",
+                details=f"Duration: {result.duration:.1f} s\n"
+                        f"Threads: {', '.join(result.threads)}\n"
+                        f"Statistics: {result.stats_path}",
+            )
+        self.update_profiling_actions()
+
+    def stop_profiling(self):
+        """停止分析会话并记录输出文件，没有会话时返回 None"""
+        result = profiler.stop_profiling()
+        if result is not None:
+            logger.info(f"Profiling stopped after {result.duration:.1f} s: {result.summary_path}")
+            self.set_status_label("Open" if self.main_Serial else "Closed",
+                                  "connected" if self.main_Serial else "disconnected")
+        return result
+
+    def take_memory_snapshot(self):
+        """拍摄 tracemalloc 快照，把与会话开始时相比的内存增长写入 tmps/"""
+        session = profiler.active_session()
+        if session is None:
+            return
+        try:
+            path = session.memory_snapshot()
+        except RuntimeError as e:
+            ErrorDialog.show_warning(parent=self, title="Memory Snapshot", message=str(e))
+            return
+        logger.info(f"Memory snapshot written to {path}")
+        self.set_status_label("Snapshot saved", "info")
+
     def show_help_info(self):
         help_dialog = HelpDialog()
         help_dialog.exec()
@@ -1659,6 +1711,7 @@ class MyWidget(QWidget):
                 self.data_receiver.is_show_control_char = False
         else:
             self.control_char_checkbox.setChecked(state)
+        self.update_receive_pipeline_settings()
 
     def timeStamp_state_changed(self, state):
         if self.main_Serial:
@@ -1668,6 +1721,7 @@ class MyWidget(QWidget):
                 self.data_receiver.is_show_timeStamp = False
         else:
             self.timeStamp_checkbox.setChecked(state)
+        self.update_receive_pipeline_settings()
 
     def received_hex_data_state_changed(self, state):
         if self.main_Serial:
@@ -1675,6 +1729,7 @@ class MyWidget(QWidget):
                 self.data_receiver.is_show_hex = True
             else:
                 self.data_receiver.is_show_hex = False
+        self.update_receive_pipeline_settings()
 
     def show_more_options(self):
         # 切换更多设置区域的可见性
@@ -1734,18 +1789,18 @@ class MyWidget(QWidget):
         try:
             Ender = self.config.get("MoreSettings", "Ender", fallback="0D0A")
 
-            if send_with_ender:
-                common.port_write(command, serial_port, ender=Ender)
-            else:
-                common.port_write(command, serial_port, ender='')
+            tx_bytes = common.port_write(command, serial_port, ender=Ender if send_with_ender else '')
             self.data_receiver.is_new_data_written = True
+
+            # 原始抓包和会话日志中记录实际发送的字节（无效的结束符不会被发送）
+            self.data_receiver.capture_tx(tx_bytes)
+            self.log_session_tx(tx_bytes)
             
             # If `ShowCommandEcho` is enabled, show the command in the received data area
             if self.config.getboolean("MoreSettings", "ShowCommandEcho"):
-                command_withTimestamp = '(' + common.get_current_time() + ')--> ' + command
-                # 只直接添加到显示区域，不加到 full_data_store 避免重复
-                self.received_data_textarea.append(command_withTimestamp)
-                # self.apply_style(command)
+                # 回显记录与接收数据一起按帧追加到接收区（不经过接收处理流水线，也不写入接收日志），
+                # 显示时格式化为 (时间)--> 命令
+                self.render_scheduler.submit([(command.encode("utf-8"), 0, time.time(), DIRECTION_TX)])
         except Exception as e:
             logger.error(f"Error sending command: {e}")
             self.set_status_label("Failed", "error")
@@ -1771,40 +1826,28 @@ class MyWidget(QWidget):
             # 处理结束符
             Ender = self.config.get("MoreSettings", "Ender", fallback="0D0A")
 
+            tx_bytes = hex_bytes
             if send_with_ender and Ender:
                 try:
-                    ender_bytes = common.hex_str_to_bytes(Ender)
-                    serial_port.write(hex_bytes + ender_bytes)
+                    tx_bytes += common.hex_str_to_bytes(Ender)
                 except ValueError:
-                    # 如果结束符格式无效，仅发送数据
-                    serial_port.write(hex_bytes)
-            else:
-                serial_port.write(hex_bytes)
+                    pass  # 如果结束符格式无效，仅发送数据
+            serial_port.write(tx_bytes)
+            common.TX_BYTES.inc(len(tx_bytes))
+            common.TX_COMMANDS.inc()
             
-            # 标记有新数据写入
+            # 标记有新数据写入，并在原始抓包中记录发送的字节
             if hasattr(self, 'data_receiver') and self.data_receiver:
                 self.data_receiver.is_new_data_written = True
+                self.data_receiver.capture_tx(tx_bytes)
+            self.log_session_tx(tx_bytes)
             
             # 处理命令回显 - 支持不同的显示格式
             if self.config.getboolean("MoreSettings", "ShowCommandEcho"):
-                # 创建格式化的十六进制显示
-                hex_display = ' '.join([f'{b:02X}' for b in hex_bytes])
-                
-                # 如果包含结束符，也显示结束符
-                if send_with_ender and Ender:
-                    try:
-                        ender_bytes = common.hex_str_to_bytes(Ender)
-                        ender_display = ' '.join([f'{b:02X}' for b in ender_bytes])
-                        hex_display += f" {ender_display}"
-                    except ValueError:
-                        pass  # 忽略无效的结束符
-                
-                # 构造回显消息
-                command_withTimestamp = f'({common.get_current_time()})-->[HEX] {hex_display}'
-                
-                # 只直接添加到显示区域，不加到 full_data_store 避免重复
-                if hasattr(self, 'received_data_textarea'):
-                    self.received_data_textarea.append(command_withTimestamp)
+                # 回显记录与接收数据一起按帧追加到接收区（不经过接收处理流水线，也不写入接收日志），
+                # 显示时格式化为 (时间)-->[HEX] 41 54 0D 0A，包含结束符
+                if hasattr(self, 'render_scheduler'):
+                    self.render_scheduler.submit([(tx_bytes, 0, time.time(), DIRECTION_TX_HEX)])
                 
         except Exception as e:
             logger.error(f"Error sending hex command: {e}")
@@ -1843,6 +1886,7 @@ class MyWidget(QWidget):
             self.input_path_data_received.setReadOnly(False)
         else:
             self.input_path_data_received.setReadOnly(True)
+        self.update_receive_pipeline_settings()
 
     def save_received_file(self):
         file_path = self.input_path_data_received.text()
@@ -2173,157 +2217,25 @@ class MyWidget(QWidget):
             self.serial_port_combo.addItem("No devices found")
         QComboBox.showPopup(self.serial_port_combo)
 
-    def _process_hex_data(self, hex_data: str) -> str:
+    def handle_frames_ready(self, records, encoding):
         """
-        将字节数据转换为两部分：
-        第一部分：十六进制值
-        第二部分：对应的字符（包括控制字符的转义形式）
-
-        Args:
-            data (bytes): 字节数据
-
-        Returns:
-            tuple[str, str]: 包含两部分的元组，第一部分是十六进制值，第二部分是对应字符
+        接收处理流水线分好的帧记录，交给显示刷新调度器按帧合并存入接收区。分段、时间戳推算和日志写入均已在
+        流水线线程完成，显示行在可见时才格式化。
         """
-        try:
-            # 将十六进制字符串转换为字节数组
-            hex_bytes = bytes.fromhex(hex_data)
-
-            # 第一行：十六进制值
-            hex_line =  "Received: "
-            char_line = "ASCII   : "
-
-            for byte in hex_bytes:
-                # 十六进制部分，固定宽度为两位大写十六进制
-                hex_line += f"{byte:02X} "
-
-                # 字符部分，处理控制字符和可打印字符
-                if 32 <= byte <= 126:  # 可打印ASCII字符
-                    char_line += f"{chr(byte)}  "  # 每个字符后加两个空格对齐
-                elif byte == 0x0D:  # \r
-                    char_line += "\\r "
-                elif byte == 0x0A:  # \n
-                    char_line += "\\n "
-                elif byte == 0x09:  # \t
-                    char_line += "\\t "
-                elif byte == 0x08:  # \b
-                    char_line += "\\b "
-                elif byte == 0x07:  # \a
-                    char_line += "\\a "
-                elif byte == 0x0C:  # \f
-                    char_line += "\\f "
-                elif byte == 0x0B:  # \v
-                    char_line += "\\v "
-                elif byte == 0x00:  # \0
-                    char_line += "\\0 "
-                else:  # 不可打印字符
-                    char_line += f"\\x{byte:02x} "
-
-            # 确保两行长度一致（填充空格）
-            hex_line = hex_line.strip()
-            char_line = char_line.strip()
-            max_length = max(len(hex_line), len(char_line))
-            hex_line = hex_line.ljust(max_length)
-            char_line = char_line.ljust(max_length)
-
-            # 返回两行格式化结果
-            return hex_line, char_line
+        # 编码检测完成后按锁定的编码显示
+        model = self.received_data_textarea.model()
+        if encoding and encoding != model.encoding:
+            model.set_encoding(encoding)
 
-        except ValueError as e:
-            return f"Invalid hex data: {str(e)}\n"
-
-    def load_older_data(self):
-        """Load previous data chunks when scrolling up"""
-        lines_in_view = self.received_data_textarea.height() // self.received_data_textarea.fontMetrics().lineSpacing()
-        if self.current_offset + lines_in_view < len(self.full_data_store):
-            # 增加 current_offset
-            self.current_offset += lines_in_view // 2  # 向上滚动，增加偏移量
-            self.current_offset = min(self.current_offset, len(self.full_data_store) - lines_in_view)  # 确保不超出范围
-            self.efficient_update_display()
-
-    def load_newer_data(self):
-        """Load next data chunks when scrolling down"""
-        if self.current_offset > 0:
-            scrollbar = self.received_data_textarea.verticalScrollBar()
-            previous_scroll_value = scrollbar.value()
-            lines_in_view = self.received_data_textarea.height() // self.received_data_textarea.fontMetrics().lineSpacing()
-            top_line_index = self.current_offset + (previous_scroll_value // self.received_data_textarea.fontMetrics().lineSpacing())
-            self.current_offset -= lines_in_view // 2  # Overlap half the actual visible lines for better context
-            self.current_offset = max(0, self.current_offset)  # Ensure offset doesn't go below 0
-            self.efficient_update_display()
-            new_scroll_value = (top_line_index - self.current_offset) * self.received_data_textarea.fontMetrics().lineSpacing()
-            # scrollbar.setValue(max(0, new_scroll_value))
-
-    def fetch_new_data(self):
-        """Method to fetch new data, adjust implementation based on your data source."""
-        if hasattr(self, 'data_receiver') and self.data_receiver:
-            try:
-                # Assuming your DataReceiver class has a fetch_data method
-                new_data = self.data_receiver.fetch_latest_data()
-                if new_data:
-                    # Add new data to the display buffer
-                    self.full_data_store.append(new_data)
-                    if len(self.full_data_store) > self.buffer_size:
-                        del self.full_data_store[0]
-                else:
-                    # If no new data is available, do nothing
-                    pass
-            except Exception as e:
-                # logger.error(f"Error occurred while fetching new data: {e}")
-                pass
+        GUI_BATCHES.inc()
 
-    def _flush_accumulator(self):
-        """强制刷新累积缓冲区中的数据（超时处理）"""
-        if not hasattr(self, 'data_accumulator') or not self.data_accumulator:
-            return
-        
-        # 获取当前时间作为数据起始时间
-        current_time = datetime.datetime.now()
-        
-        # 将累积的数据作为一个完整的数据包处理，添加特殊标记表示这是超时数据
-        accumulated_data = bytes(self.data_accumulator)
-        self.data_accumulator = bytearray()  # 清空缓冲区
-        
-        # 添加到待处理队列，使用特殊标记 (data, time, is_timeout=True)
-        if not hasattr(self, 'pending_updates'):
-            self.pending_updates = []
-        
-        # 用三元组标记这是超时数据，需要直接处理而不是重新进入累积流程
-        self.pending_updates.append((accumulated_data, current_time, True))
-        
-        # 触发UI更新
-        if not hasattr(self, 'update_timer'):
-            self.update_timer = QTimer()
-            self.update_timer.setSingleShot(True)
-            self.update_timer.timeout.connect(self.batch_update_ui)
-        
-        if not self.update_timer.isActive():
-            self.update_timer.start(10)  # 很快就更新，因为这是强制刷新
-
-    def batch_update_ui(self):
-        """批量更新UI，pending_updates只存储(bytes, start_time)，每条日志都带精确时间戳。"""
-        if not self.pending_updates:
-            return
-
-        # 数据丢失检测
-        if len(self.pending_updates) > 100:
-            logger.warning(f"Too many pending updates ({len(self.pending_updates)} items), potential data loss risk")
-
-        # 性能统计
-        current_time = time.time()
-        self.performance_stats['update_count'] += len(self.pending_updates)
-        time_diff = current_time - self.performance_stats['last_stats_time']
-        if time_diff >= 1.0:
-            self.performance_stats['updates_per_second'] = self.performance_stats['update_count'] / time_diff
-            self.performance_stats['update_count'] = 0
-            self.performance_stats['last_stats_time'] = current_time
-            if self.performance_stats['updates_per_second'] > 50:
-                self.ui_update_interval = 0.05  # 高速数据时更频繁更新，从0.2改为0.05
-            elif self.performance_stats['updates_per_second'] > 20:
-                self.ui_update_interval = 0.08  # 从0.15改为0.08
-            else:
-                self.ui_update_interval = 0.1
+        # 每帧最多追加、重绘一次；视图只重绘可见行，开销与历史行数无关
+        self.render_scheduler.submit(records)
 
+    def receive_pipeline_settings(self) -> dict:
+        """
+        生成接收处理流水线的显示设置快照（在GUI线程读取控件和配置）
+        """
         # 获取串口配置
         try:
             baudrate = int(self.baud_rate_combo.currentText())
@@ -2346,362 +2258,127 @@ class MyWidget(QWidget):
         # 计算每字节的位数，如默认8N1配置：1起始位 + 8数据位 + 1停止位 + 0校验位 = 10位
         bits_per_byte = 1 + bytesize + stop_bits + parity_bits
 
-        # 处理所有待更新的数据
-        for update_item in self.pending_updates:
-            # 检查是否是超时数据（三元组）还是普通数据（二元组）
-            if len(update_item) == 3:
-                data_bytes, start_time, is_timeout = update_item
-            else:
-                data_bytes, start_time = update_item
-                is_timeout = False
-            
-            # 获取结束符
-            ender = self.config.get("MoreSettings", "Ender", fallback="\r\n")
-            end_bytes = common.hex_str_to_bytes(ender) if ender else b""
-
-            # 如果是超时数据或没有结束符，直接处理整个数据
-            if is_timeout or not end_bytes:
-                segments = [data_bytes]
-                # print(f"直接处理数据:{segments} 超时={is_timeout}, 无结束符={not end_bytes}, 数据长度={len(data_bytes)}")
-            else:
-                # 使用累积缓冲区来处理跨数据包的消息
-                if not hasattr(self, 'data_accumulator'):
-                    self.data_accumulator = bytearray()
-                
-                # 初始化累积定时器（如果不存在）
-                if not hasattr(self, 'accumulator_timer'):
-                    self.accumulator_timer = QTimer()
-                    self.accumulator_timer.setSingleShot(True)
-                    self.accumulator_timer.timeout.connect(self._flush_accumulator)
-                
-                # 将新数据添加到累积缓冲区
-                self.data_accumulator.extend(data_bytes)
-                
-                # 按结束符分割数据
-                temp_data = bytes(self.data_accumulator)
-                segments = temp_data.split(end_bytes)
-                
-                # 最后一个段可能是不完整的，保留在缓冲区中
-                if len(segments) > 1:
-                    # 保留最后一个不完整的段
-                    incomplete_segment = segments[-1]
-                    segments = segments[:-1]  # 移除不完整的段
-                    
-                    # 清空累积缓冲区，保留不完整的段
-                    self.data_accumulator = bytearray(incomplete_segment)
-                    
-                    # 停止之前的定时器
-                    self.accumulator_timer.stop()
-                    
-                    # 如果有不完整的段，启动超时定时器
-                    if incomplete_segment:
-                        self.accumulator_timer.start(30)
-
-                    # 为完整的段添加结束符（用于正确显示）
-                    complete_segments = []
-                    for seg in segments:
-                        # 不过滤空段，保留空行（它们可能是有意义的数据）
-                        complete_segments.append(seg + end_bytes)
-                    segments = complete_segments
-                else:
-                    # 没有找到完整的消息，启动或重启超时定时器
-                    self.accumulator_timer.stop()
-                    self.accumulator_timer.start(30)
-                    segments = []
-                
-            # 调试信息 - 可以临时启用来诊断问题
-            # if segments:
-            #     for i, seg in enumerate(segments):
-            #         print(f"段 {i}: {repr(seg[:100])}{'...' if len(seg) > 100 else ''}")
-            # else:
-            #     if hasattr(self, 'data_accumulator') and self.data_accumulator:
-            #         print(f"累积缓冲区内容: {repr(bytes(self.data_accumulator)[:100])}")
-                
-            # print(f"Segments: {segments} | Data Bytes: {data_bytes} | End Bytes: {end_bytes}")
-            byte_offset = 0  # 字节偏移量，用于计算每段的起始时间戳
-            
-            
-            # 1. 如果要串口数据以十六进制显示
-            if self.received_hex_data_checkbox.isChecked():
-                for i, seg in enumerate(segments):
-
-                    ## 解析十六进制数据
-                    hex_line, char_line = self._process_hex_data(seg.hex())
-
-                    ## 构建显示行
-                    if self.timeStamp_checkbox.isChecked():
-                        ### 计算时间戳
-                        seg_start_time = common.calculate_timestamp(start_time, byte_offset, bits_per_byte / baudrate)
-                        ts = seg_start_time.strftime("%Y-%m-%d_%H:%M:%S.%f")[:-3]
-                        byte_offset += len(seg) + (len(end_bytes) if i < len(segments) - 1 else 0)
-
-                        display_line = f"[{ts}]{hex_line}"
-                        display_line += f"\n[{ts}]{char_line}"
-                    else:
-                        display_line = f"{hex_line}"
-                        display_line += f"\n{char_line}"
-
-                    ## 添加到缓冲区（移除直接append到UI，统一由efficient_update_display处理）
-                    self.full_data_store.append(display_line)
-
-                    ## 文件日志记录，同步写入
-                    if self.checkbox_data_received.isChecked():
-                        file_path = self.input_path_data_received.text()
-                        common.print_write(display_line, file_path)
-            
-            
-            # 2. 如果要显示控制字符
-            elif self.control_char_checkbox.isChecked():
-                for i, seg in enumerate(segments):
-                    if self.timeStamp_checkbox.isChecked():
-                        # 计算时间戳
-                        seg_start_time = common.calculate_timestamp(start_time, byte_offset, bits_per_byte / baudrate)
-                        ts = seg_start_time.strftime("%Y-%m-%d_%H:%M:%S.%f")[:-3]
-                        byte_offset += len(seg) + (len(end_bytes) if i < len(segments) - 1 else 0)
-
-                        display_line = f"[{ts}]{common.force_decode(seg, handle_control_char='escape')}"
-                    else:
-                        display_line = common.force_decode(seg, handle_control_char='escape')
-
-                    # 添加到缓冲区，不过滤空行，保留所有数据
-                    self.full_data_store.append(display_line)
-
-                    # 文件日志记录，同步写入
-                    if self.checkbox_data_received.isChecked():
-                        file_path = self.input_path_data_received.text()
-                        common.print_write(display_line, file_path)
-                
-
-            # 3. 否则，直接按照串口数据格式来显示
-            else:
-                for i, seg in enumerate(segments):
-                    if self.timeStamp_checkbox.isChecked():
-                        # 计算时间戳
-                        seg_start_time = common.calculate_timestamp(start_time, byte_offset, bits_per_byte / baudrate)
-                        ts = seg_start_time.strftime("%Y-%m-%d_%H:%M:%S.%f")[:-3]
-                        byte_offset += len(seg) + (len(end_bytes) if i < len(segments) - 1 else 0)
-
-                        display_line = f"[{ts}]{common.force_decode(seg, handle_control_char='interpret')}"
-                    else:
-                        display_line = f"{common.force_decode(seg, handle_control_char='interpret')}"
-
-                    # 添加到缓冲区，不过滤空行，保留所有数据
-                    self.full_data_store.append(display_line)
-
-                    # 文件日志记录，同步写入
-                    if self.checkbox_data_received.isChecked():
-                        file_path = self.input_path_data_received.text()
-                        common.print_write(display_line, file_path)
-
-        self.pending_updates.clear()
-
-        # 维护缓冲区大小
-        if len(self.full_data_store) > self.buffer_size:
-            excess = len(self.full_data_store) - self.buffer_size
-            del self.full_data_store[:excess]
-            
-            # 安全地删除hex_buffer，确保索引不越界
-            if hasattr(self, 'hex_buffer') and len(self.hex_buffer) > excess:
-                del self.hex_buffer[:excess]
-            elif hasattr(self, 'hex_buffer'):
-                self.hex_buffer.clear()  # 如果长度不一致，清空重建
-
-            # 调整 current_offset，保持当前显示内容不被挤到后面
-            self.current_offset = max(0, self.current_offset - excess)
-
-        # 更新显示（只有在触底时才更新）
-        self.efficient_update_display()
-        
-    def efficient_update_display(self):
-        """高效的UI更新方法"""
-        # 获取滚动条
-        scrollbar = self.received_data_textarea.verticalScrollBar()
-        scroll_value = scrollbar.value()
-        max_scroll_value = scrollbar.maximum()
-
-        # 判断是否快要触底（比如10像素以内）
-        will_at_bottom = max_scroll_value - scroll_value <= 20
-
-        # 如果快要触底，更新显示范围以显示最新数据
-        if will_at_bottom:
-            self.current_offset = 0  # 重置偏移量，显示最新数据
-        else:
-            # 如果没有触底，保持 current_offset 不变
-            return  # 不更新显示内容
-
-        # 计算显示范围
-        end_idx = len(self.full_data_store) - self.current_offset
-        end_idx = max(0, end_idx)
-        start_idx = max(0, end_idx - min(self.visible_lines, len(self.full_data_store)))
-        text_lines = self.full_data_store[start_idx:end_idx]
-        
-        # 不过滤空行，保留原始数据的完整性
-        # text_lines = [line for line in text_lines if line.strip()]
-
-        # 更新滚动条范围
-        # scrollbar.setMaximum(len(self.full_data_store) * self.received_data_textarea.fontMetrics().lineSpacing())
-
-        # 打印调试信息
-        # print(f"efficient_update_display: start_idx={start_idx}, end_idx={end_idx}, current_offset={self.current_offset}, will_at_bottom={will_at_bottom}")
-
-        # 如果没有新数据，直接返回
-        if (hasattr(self, '_last_start_idx') and 
-            start_idx == self._last_start_idx and 
-            end_idx == self._last_end_idx):
-            return
-
-        # 保存上次索引用于增量更新判断
-        prev_start = getattr(self, '_last_start_idx', None)
-        prev_end = getattr(self, '_last_end_idx', None)
-
-        self._last_start_idx = start_idx
-        self._last_end_idx = end_idx
-
-        # 禁用更新以提高性能
-        self.received_data_textarea.setUpdatesEnabled(False)
-        try:
-            current_font = self.received_data_textarea.font()
+        # 获取结束符
+        ender = self.config.get("MoreSettings", "Ender", fallback="\r\n")
+
+        return {
+            'show_hex': self.received_hex_data_checkbox.isChecked(),
+            'hex_layout': self.config.get("MoreSettings", "HexLayout", fallback="Columns"),
+            'show_control_char': self.control_char_checkbox.isChecked(),
+            'show_timestamp': self.timeStamp_checkbox.isChecked(),
+            'encoding': self.config.get("MoreSettings", "Encoding", fallback="Auto"),
+            'encoding_detect_bytes': self.config.getint("MoreSettings", "EncodingDetectKB", fallback=4) * 1024,
+            'framing': self.config.get("MoreSettings", "Framing", fallback="Ender"),
+            'ender': common.hex_str_to_bytes(ender) if ender else b"",
+            'frame_length': self.config.getint("MoreSettings", "FrameLength", fallback=16),
+            'length_prefix_size': self.config.getint("MoreSettings", "LengthPrefixSize", fallback=2),
+            'frame_idle_timeout_ms': self.config.getint("MoreSettings", "FrameIdleTimeoutMs", fallback=30),
+            'max_frame_size': self.config.getint("MoreSettings", "MaxFrameSize", fallback=65536),
+            'time_per_byte': bits_per_byte / baudrate,
+            'log_file': self.input_path_data_received.text() if self.checkbox_data_received.isChecked() else None,
+            'session_log': self.session_log,
+        }
 
-            # 如果还没有持久化文档或视图范围发生了复杂变化，重建文档
-            need_rebuild = False
-            if not hasattr(self, '_display_document'):
-                need_rebuild = True
-            else:
-                # 如果请求的 start 与上次不同，或者出现回退（prev_end > end_idx），需要重建
-                if prev_start is None or start_idx != prev_start or (prev_end is not None and prev_end > end_idx):
-                    need_rebuild = True
-
-            if need_rebuild:
-                # 重建整个文档（第一次或范围不连续时）
-                self._display_document = QTextDocument()
-                self._display_document.setDefaultFont(current_font)
-                cursor = QTextCursor(self._display_document)
-                for i, line in enumerate(text_lines):
-                    clean_line = line.rstrip('\n\r')
-                    cursor.insertText(clean_line)
-                    if i < len(text_lines) - 1:
-                        cursor.insertText('\n')
-                self.received_data_textarea.setDocument(self._display_document)
-            else:
-                # 尝试增量追加：当 start_idx 与 prev_start 相同且 end_idx > prev_end
-                if prev_end is not None and end_idx > prev_end:
-                    # 新增的行在 text_lines 中的起始位置
-                    new_from = prev_end - start_idx
-                    if new_from < 0:
-                        # 退化为重建以避免不一致
-                        self._display_document = QTextDocument()
-                        self._display_document.setDefaultFont(current_font)
-                        cursor = QTextCursor(self._display_document)
-                        for i, line in enumerate(text_lines):
-                            clean_line = line.rstrip('\n\r')
-                            cursor.insertText(clean_line)
-                            if i < len(text_lines) - 1:
-                                cursor.insertText('\n')
-                        self.received_data_textarea.setDocument(self._display_document)
-                    else:
-                        cursor = QTextCursor(self._display_document)
-                        cursor.movePosition(QTextCursor.End)
-                        new_lines = text_lines[new_from:]
-                        for idx, line in enumerate(new_lines):
-                            clean_line = line.rstrip('\n\r')
-                            # 如果文档不是空的并且当前不是首行，先插入换行
-                            if cursor.position() != 0 or (idx > 0):
-                                cursor.insertText('\n')
-                            cursor.insertText(clean_line)
-                else:
-                    # 没有新增内容可追加，或无法增量处理，安全重建
-                    self._display_document = QTextDocument()
-                    self._display_document.setDefaultFont(current_font)
-                    cursor = QTextCursor(self._display_document)
-                    for i, line in enumerate(text_lines):
-                        clean_line = line.rstrip('\n\r')
-                        cursor.insertText(clean_line)
-                        if i < len(text_lines) - 1:
-                            cursor.insertText('\n')
-                    self.received_data_textarea.setDocument(self._display_document)
-        finally:
-            self.received_data_textarea.setUpdatesEnabled(True)
-
-        # 如果快要触底，自动滚动到底部
-        if will_at_bottom:
-            # 如果是增量追加情况下，document 未被替换，可以立即滚到底
-            if prev_start == start_idx and prev_end is not None and end_idx > prev_end:
-                self.received_data_textarea.verticalScrollBar().setValue(self.received_data_textarea.verticalScrollBar().maximum())
-            else:
-                # 否则延后到事件循环末尾再滚动，确保布局完成
-                QTimer.singleShot(0, lambda: self.received_data_textarea.verticalScrollBar().setValue(self.received_data_textarea.verticalScrollBar().maximum()))
+    def update_receive_pipeline_settings(self, *args):
+        """控件或配置变化后，把新的显示设置快照推送给接收处理流水线，接收区按新设置重新显示全部历史"""
+        settings = self.receive_pipeline_settings()
+        if getattr(self, 'receive_pipeline', None) is not None:
+            self.receive_pipeline.update_settings(settings)
+        self.received_data_textarea.model().set_display_settings(settings)
+
+    def update_receive_view_settings(self):
+        """配置变化后更新接收区的历史行数上限、内存预算和最大刷新帧率"""
+        model = self.received_data_textarea.model()
+        model.set_max_lines(self.config.getint("MoreSettings", "MaxReceiveLines", fallback=DEFAULT_MAX_LINES))
+        model.set_memory_budget(self.config.getint("MoreSettings", "ScrollbackMemoryMB", fallback=64) * 1024 * 1024)
+        self.render_scheduler.set_max_fps(self.config.getint("MoreSettings", "MaxFPS", fallback=DEFAULT_MAX_FPS))
+        self.update_log_writer_settings()
+
+    def update_log_writer_settings(self):
+        """按 MoreSettings.LogFlushIntervalMs / LogFsync 配置日志写入服务"""
+        fsync = self.config.get("MoreSettings", "LogFsync", fallback=FSYNC_NEVER).lower()
+        if fsync not in FSYNC_POLICIES:
+            logger.warning(f"Unknown LogFsync '{fsync}', using {FSYNC_NEVER}")
+            fsync = FSYNC_NEVER
+        common.configure_log_writer(
+            flush_interval=self.config.getint("MoreSettings", "LogFlushIntervalMs", fallback=500) / 1000,
+            fsync=fsync,
+        )
+        self.update_log_rotation()
+        self.update_metrics_export()
 
-    def update_main_textarea(self, raw_data: bytes):
+    def update_metrics_export(self):
+        """
+        按 MoreSettings.MetricsPort（0 为关闭）开启本机 Prometheus 端点，
+        按 MoreSettings.MetricsSnapshotSec（0 为关闭）定期把 JSON 快照写入 logs/metrics_<时间>.jsonl；
+        设置变化时重启对应的导出
         """
-        接收串口线程传来的原始bytes数据，计算精确起始时间戳，加入pending_updates，等待批量UI刷新。
+        port = self.config.getint("MoreSettings", "MetricsPort", fallback=0)
+        server = self.metrics_server
+        if server is not None and server.port != port:
+            server.stop()
+            self.metrics_server = server = None
+        if port > 0 and server is None:
+            server = MetricsServer(port)
+            try:
+                server.start()
+                self.metrics_server = server
+            except OSError as e:
+                logger.warning(f"Cannot start metrics endpoint on port {port}: {e}")
+
+        interval = self.config.getfloat("MoreSettings", "MetricsSnapshotSec", fallback=0)
+        writer = self.metrics_snapshot_writer
+        if writer is not None and writer.interval != interval:
+            writer.stop()
+            self.metrics_snapshot_writer = writer = None
+        if interval > 0 and writer is None:
+            path = os.path.join(self.app_data_dir, "logs", f"metrics_{datetime.datetime.now():%Y%m%d_%H%M%S}.jsonl")
+            self.metrics_snapshot_writer = SnapshotWriter(path, interval)
+            self.metrics_snapshot_writer.start()
+            logger.info(f"Writing metrics snapshots every {interval:g} s to {path}")
+
+    def stop_metrics_export(self):
+        """停止指标导出，快照文件中写入最后一份快照"""
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self.metrics_snapshot_writer is not None:
+            self.metrics_snapshot_writer.stop()
+            self.metrics_snapshot_writer = None
+
+    def update_log_rotation(self, *args):
         """
-        # 初始化缓冲区（如果不存在）
-        if not hasattr(self, 'full_data_store'):
-            self.full_data_store = []
-            self.hex_buffer = []
-            self.buffer_size = 10000  # 使用更大的缓冲区
-            self.visible_lines = 500
-            self.current_offset = 0
-        if not hasattr(self, 'pending_updates'):
-            self.pending_updates = []
-        if not hasattr(self, 'last_ui_update_time'):
-            self.last_ui_update_time = time.time()
-        if not hasattr(self, 'ui_update_interval'):
-            self.ui_update_interval = 0.1
-        if not hasattr(self, 'update_timer'):
-            self.update_timer = QTimer()
-            self.update_timer.setSingleShot(True)
-            self.update_timer.timeout.connect(self.batch_update_ui)
-
-        # 获取原始数据打印
-        # print(f"Received raw data: {raw_data}")
-
-        # 计算数据起始时间戳（基于波特率和数据长度）
-        baudrate = 115200  # 默认波特率
+        按 MoreSettings.LogRotateMB / LogRotateIntervalMin / LogRotateName / LogCompression / LogKeepFiles /
+        LogKeepGB 为接收数据日志设置轮转策略，按 MoreSettings.LogTimeIndex 开启时间戳索引；
+        日志路径变化后旧路径不再轮转和索引
+        """
+        path = self.input_path_data_received.text().strip()
+        previous = getattr(self, "rotated_log_path", None)
+        if previous and previous != path:
+            common.set_log_rotation(previous, None)
+            common.set_log_index(previous, False)
+        self.rotated_log_path = path
+        if not path:
+            return
+        common.set_log_index(path, self.config.getboolean("MoreSettings", "LogTimeIndex", fallback=True))
         try:
-            baudrate = int(self.baud_rate_combo.currentText())
-        except Exception:
-            pass
-        # 1字节=10bit（含起止位），耗时=10/baudrate
-        byte_count = len(raw_data)
-        duration = byte_count * 10.0 / baudrate
-        end_time = time.time()
-        start_time = end_time - duration if duration < 1 else end_time - min(duration, 1)
-        # 用datetime对象，方便格式化
-        start_dt = datetime.datetime.fromtimestamp(start_time)
-
-        # 只存储(bytes, start_time)元组
-        self.pending_updates.append((raw_data, start_dt))
-        
-        # 调试pending_updates内容
-        # print(f"Pending updates: {self.pending_updates}")
-
-        # 检查是否应该立即更新（基于时间或数量阈值）
-        current_time = time.time()
-        time_since_last_update = current_time - self.last_ui_update_time
-        
-        # 详细调试信息
-        # print(f"调试信息: len(pending_updates)={len(self.pending_updates)}, "
-        #       f"time_since_last_update={time_since_last_update:.3f}, "
-        #       f"ui_update_interval={self.ui_update_interval}, "
-        #       f"max_pending_updates={self.max_pending_updates}")
-        
-        # 降低触发阈值，确保数据能及时显示
-        condition1 = len(self.pending_updates) >= 1  # 改为1，有数据就更新
-        condition2 = time_since_last_update >= 0.01  # 降低到10ms
-        condition3 = len(self.pending_updates) > self.max_pending_updates
-        
-        # print(f"触发条件: 数量>=1: {condition1}, 时间间隔>=0.01: {condition2}, 超过最大缓存: {condition3}")
-        
-        should_update = condition1 or condition2 or condition3
-        
-        if should_update:
-            # 直接调用batch_update_ui，不使用定时器
-            self.batch_update_ui()
-            self.last_ui_update_time = current_time
-        else:
-            # 动态调整阈值，但保持在合理范围内
-            self.max_pending_updates = max(5, min(50, len(self.pending_updates) * 3))
+            policy = RotationPolicy(
+                max_bytes=self.config.getint("MoreSettings", "LogRotateMB", fallback=0) * 1024 * 1024,
+                interval=self.config.getint("MoreSettings", "LogRotateIntervalMin", fallback=0) * 60,
+                name_template=self.config.get("MoreSettings", "LogRotateName", fallback=DEFAULT_NAME_TEMPLATE),
+                compression=self.config.get("MoreSettings", "LogCompression", fallback="gzip"),
+                keep_files=self.config.getint("MoreSettings", "LogKeepFiles", fallback=0),
+                keep_bytes=int(self.config.getfloat("MoreSettings", "LogKeepGB", fallback=0) * 1024 ** 3),
+            )
+        except ValueError as e:
+            logger.warning(f"Invalid log rotation settings, rotation disabled: {e}")
+            policy = None
+        common.set_log_rotation(path, policy)
+
+    def reset_receive_pipeline(self):
+        """在流水线线程中清空未完成分段的累积缓冲区"""
+        if getattr(self, 'receive_pipeline', None) is not None:
+            QMetaObject.invokeMethod(self.receive_pipeline, "reset", Qt.QueuedConnection)
 
     def show_search_dialog(self):
         if self.stacked_widget.currentIndex() == 0:
@@ -2709,7 +2386,8 @@ class MyWidget(QWidget):
         elif self.stacked_widget.currentIndex() == 1:
             dialog = SearchReplaceDialog(self.text_input_layout_2, self)
         elif self.stacked_widget.currentIndex() == 2:
-            dialog = SearchReplaceDialog(self.text_input_layout_3, self)
+            self.large_file_viewer.focus_search()
+            return
         elif self.stacked_widget.currentIndex() == 3:
             dialog = SearchReplaceDialog(self.text_input_layout_4, self)
         dialog.show()
@@ -2754,6 +2432,7 @@ class MyWidget(QWidget):
                 flowcontrol=flow_control,
             )
             if self.main_Serial:
+                PORT_OPENS.inc()
                 # Clear old connection
                 self.port_button.clicked.connect(self.port_off)
                 self.port_button.setText("Close Port")
@@ -2779,8 +2458,29 @@ class MyWidget(QWidget):
                 for input in self.input_fields:
                     input.setEnabled(True)
 
-            self.data_receiver = DataReceiver(self.main_Serial)
-            self.data_receiver.dataReceived.connect(self.update_main_textarea)
+            receive_mode = self.config.get("MoreSettings", "ReceiveMode", fallback="Blocking")
+            ring_capacity = self.config.getint("MoreSettings", "ReceiveBufferKB", fallback=4096) * 1024
+            self.data_receiver = DataReceiver(self.main_Serial, receive_mode=receive_mode, ring_capacity=ring_capacity)
+            RX_RING_BACKLOG.set_function(self.data_receiver.ring.readable)
+            LINE_CAPACITY.set(1 / self.data_receiver.byte_transmission_time())
+            # 回放抓包时不再重复抓包
+            if (self.config.getboolean("MoreSettings", "RawCapture", fallback=False)
+                    and not serial_port.startswith(REPLAY_SCHEME)):
+                self.data_receiver.capture = self.open_raw_capture()
+
+            self.session_log = self.open_session_log(serial_port, baud_rate)
+
+            # 处理流水线在独立线程中从环形缓冲区取数据并整理成显示行
+            self.receive_pipeline = ReceivePipeline(self.data_receiver.ring, self.receive_pipeline_settings())
+            self.receive_pipeline_thread = QThread()
+            self.receive_pipeline.moveToThread(self.receive_pipeline_thread)
+            self.receive_pipeline_thread.finished.connect(self.receive_pipeline.deleteLater)
+            self.data_receiver.dataAvailable.connect(self.receive_pipeline.process_available)
+            # 显示区按需格式化，流水线只在写日志时格式化
+            self.receive_pipeline.format_lines = False
+            self.receive_pipeline.framesReady.connect(self.handle_frames_ready)
+            self.receive_pipeline_thread.start()
+
             self.data_receive_thread = QThread()
             self.data_receiver.moveToThread(self.data_receive_thread)
             self.data_receive_thread.started.connect(self.data_receiver.run)
@@ -2794,19 +2494,75 @@ class MyWidget(QWidget):
             logger.error(f"Error opening serial port: {e}")
             self.set_status_label("Failed", "error")
 
+    def open_raw_capture(self):
+        """在 logs/ 下创建本次会话的原始抓包文件（.scap），失败时不抓包"""
+        path = os.path.join(self.app_data_dir, "logs", f"capture_{datetime.datetime.now():%Y%m%d_%H%M%S}.scap")
+        try:
+            capture = CaptureWriter(path)
+        except OSError as e:
+            logger.error(f"Failed to create raw capture {path}: {e}")
+            return None
+        logger.info(f"Raw capture: {path}")
+        return capture
+
+    def close_raw_capture(self):
+        """关闭原始抓包，写入索引"""
+        capture = self.data_receiver.capture if self.data_receiver is not None else None
+        if capture is None:
+            return
+        self.data_receiver.capture = None
+        capture.close()
+        if capture.error is not None:
+            logger.error(f"Raw capture {capture.path} failed: {capture.error}")
+        logger.info(f"Raw capture closed: {capture.path}, {capture.records} records, "
+                    f"{capture.payload_bytes} bytes, {capture.dropped_records} records dropped")
+
+    def open_session_log(self, port: str, baud_rate: int):
+        """按 MoreSettings.SessionLog 在 logs/ 下创建本次会话的结构化日志（JSON Lines），未开启或失败时为 None"""
+        if not self.config.getboolean("MoreSettings", "SessionLog", fallback=False):
+            return None
+        path = os.path.join(self.app_data_dir, "logs", f"session_{datetime.datetime.now():%Y%m%d_%H%M%S}.jsonl")
+        try:
+            session_log = SessionLog(path, port, self.config.get("MoreSettings", "SessionLogData", fallback=DATA_BASE64))
+        except ValueError as e:
+            logger.warning(f"Invalid session log settings, session log disabled: {e}")
+            return None
+        session_log.event(EVENT_OPEN, baudrate=baud_rate, data=session_log.data_encoding)
+        logger.info(f"Session log: {path}")
+        return session_log
+
+    def close_session_log(self):
+        """写入会话结束记录"""
+        session_log, self.session_log = self.session_log, None
+        if session_log is None:
+            return
+        session_log.event(EVENT_CLOSE, records=session_log.records)
+        logger.info(f"Session log closed: {session_log.path}, {session_log.records} records")
+
+    def log_session_tx(self, data: bytes, text: str = None):
+        """把发送的数据写入会话日志（在GUI线程调用）"""
+        if self.session_log is not None:
+            self.session_log.write(DIRECTION_TX, data, text=text)
+
     def port_off(self):
         self.data_receiver.stop_thread()
         self.data_receive_thread.quit()
         # No wait for the thread to finish, it will finish itself
         # self.data_receive_thread.wait()
 
-        # 清空数据累积缓冲区
-        if hasattr(self, 'data_accumulator'):
-            self.data_accumulator = bytearray()
-            
-        # 停止累积定时器
-        if hasattr(self, 'accumulator_timer'):
-            self.accumulator_timer.stop()
+        # 停止处理流水线，未完成的分段随流水线一起丢弃
+        if self.receive_pipeline_thread is not None:
+            self.data_receiver.dataAvailable.disconnect(self.receive_pipeline.process_available)
+            self.receive_pipeline_thread.quit()
+            self.receive_pipeline_thread.wait()
+            self.receive_pipeline = None
+            self.receive_pipeline_thread = None
+        self.close_raw_capture()
+        self.close_session_log()
+        RX_RING_BACKLOG.set_function(None)
+        LINE_CAPACITY.set(None)
+        logger.info(f"Render stats: {self.render_scheduler.stats()}")
+        logger.info(f"Scrollback stats: {self.received_data_textarea.model().store.stats()}")
 
         try:
             self.main_Serial = common.port_off(self.main_Serial)
@@ -2846,32 +2602,16 @@ class MyWidget(QWidget):
     """
 
     def clear_log(self):
-        self.current_offset = 0
-        self.full_data_store = []
-        self.hex_buffer = []
-        
-        # 清空数据累积缓冲区
-        if hasattr(self, 'data_accumulator'):
-            self.data_accumulator = bytearray()
-        
-        # 停止累积定时器
-        if hasattr(self, 'accumulator_timer'):
-            self.accumulator_timer.stop()
+        # 清空处理流水线中未完成的分段
+        self.reset_receive_pipeline()
         
+        self.render_scheduler.clear()
         self.received_data_textarea.clear()
         
         # 清除日志文件逻辑，改为如果在moresettings中选中了Clear_Log_With_File则一并清除文件
+        # 由日志写入线程按提交顺序清空，清空前已排队的行不会再写入
         if self.config.getboolean("MoreSettings", "Clear_Log_With_File", fallback=False):
-            if self.input_path_data_received.text():
-                with open(self.input_path_data_received.text(), "w", encoding="utf-8") as f:
-                    f.write("")
-            else:
-                with open(
-                    common.get_resource_path("tmps/temp.log"),
-                    "w",
-                    encoding="utf-8",
-                ) as f:
-                    f.write("")
+            common.truncate_log(self.input_path_data_received.text() or None)
 
     def read_ATCommand(self):
         try:
@@ -3080,41 +2820,9 @@ class MyWidget(QWidget):
                         self.handle_middle_click()
                         return True
 
-        # Handle wheel events for text area scrolling
-        if watched == self.received_data_textarea and event.type() == QEvent.Wheel:
-            self.handle_scroll_event(event)
-            return True
-
         # Let the parent class handle other events
         return super().eventFilter(watched, event)
 
-    def handle_scroll_event(self, event):
-        """Detect scroll direction and update current_offset"""
-        scrollbar = self.received_data_textarea.verticalScrollBar()
-        scroll_value = scrollbar.value()
-        max_scroll_value = scrollbar.maximum()
-
-        # 打印调试信息
-        # print(f"Scroll event: value={scroll_value}, max={max_scroll_value}, current_offset={self.current_offset}")
-
-        # 滚动到顶部时加载旧数据
-        if event.angleDelta().y() > 0 and scroll_value <= scrollbar.singleStep():
-            self.load_older_data()
-
-        # 滚动到底部时加载新数据
-        elif event.angleDelta().y() < 0 and scroll_value >= max_scroll_value - scrollbar.singleStep():
-            self.fetch_new_data()
-            self.current_offset = 0  # 重置偏移量以显示最新内容
-            self.efficient_update_display()
-
-        # 中间滚动时同步更新 current_offset
-        else:
-            # 计算当前顶部行的索引
-            top_line_index = scroll_value // self.received_data_textarea.fontMetrics().lineSpacing()
-            # 更新 current_offset
-            self.current_offset = max(0, len(self.full_data_store) - top_line_index - self.visible_lines)
-            # print(f"Updated current_offset: {self.current_offset}")
-
     def handle_left_click(self):
         if self.prompt_index >= 0 and self.prompt_index < len(self.input_fields) - 1:
             # Left button click to SEND
@@ -3340,6 +3048,7 @@ class MyWidget(QWidget):
                 self.main_Serial,
                 self.total_times,
             )
+            self.command_executor.session_log = self.session_log
             self.command_executor.commandExecuted.connect(self.handle_command_executed)
             self.command_executor.totalTimes.connect(
                 self.handle_command_executed_total_times
@@ -3436,12 +3145,6 @@ class MyWidget(QWidget):
             self.save_config(self.config)
             logger.info("Configuration settings saved successfully")
             
-            # 停止累积定时器
-            if hasattr(self, 'accumulator_timer'):
-                logger.info("Stopping accumulator timer...")
-                self.accumulator_timer.stop()
-                logger.info("Accumulator timer stopped")
-                
             # Properly stop and wait for the data receive thread
             try:
                 if hasattr(self, "data_receiver") and self.data_receiver:
@@ -3476,6 +3179,14 @@ class MyWidget(QWidget):
                 logger.info("All threads finished successfully")
             else:
                 logger.info("No active threads to wait for")
+
+            # 删除接收历史的磁盘分段
+            self.received_data_textarea.model().store.close()
+            self.large_file_viewer.release()
+            self.stop_metrics_export()
+            self.stop_profiling()
+            # 写入日志队列中剩余的行
+            common.get_log_writer().close()
                 
             logger.info("Application exit completed successfully")
             event.accept()
@@ -3484,8 +3195,25 @@ class MyWidget(QWidget):
             event.ignore()
 
 
+def parse_args(argv=None):
+    """解析命令行参数：--profile 从启动开始分析，退出时把结果写入 tmps/"""
+    parser = argparse.ArgumentParser(description="SCOM serial port tool")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile all threads with cProfile and tracemalloc from startup; results go to tmps/")
+    parser.add_argument("--profile-no-memory", action="store_true",
+                        help="with --profile, skip tracemalloc (lower overhead)")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
 def main():
     try:
+        args = parse_args()
+        if args.profile:
+            profiler.start_profiling(os.path.join(common.ensure_user_directories(), "tmps"),
+                                     trace_memory=not args.profile_no_memory)
+            # 未经窗口关闭而退出时也写入结果
+            atexit.register(profiler.stop_profiling)
        
         # 添加控制台输出
         logger.info("Application starting...")
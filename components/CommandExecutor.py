@@ -1,7 +1,11 @@
 from PySide6.QtCore import QThread, Signal, QMutex, QWaitCondition
-from utils import common
+from utils import common, metrics, profiler
+from utils.line_store import DIRECTION_TX
 from middileware.Logger import init_logging, Logger
 
+COMMANDS_PASSED = metrics.counter("commands_passed_total", "Batch commands sent successfully")
+COMMANDS_FAILED = metrics.counter("commands_failed_total", "Batch commands that raised an error")
+
 
 class CommandExecutor(QThread):
     # Signal to emit index only
@@ -17,6 +21,8 @@ class CommandExecutor(QThread):
         self.mutex = QMutex()
         self.cond = QWaitCondition()
         self.error_occurred = False
+        # 结构化会话日志（utils.session_log.SessionLog），为空时不记录发送的命令
+        self.session_log = None
         # initialize logger for this component; if global logger not initialized, create it
         try:
             self.logger = Logger.get_logger('CommandExecutor', 'command_executor.log')
@@ -27,6 +33,7 @@ class CommandExecutor(QThread):
         
     def execute_commands(self):
         for command_dict in self.commands:
+            profiler.sync("CommandExecutor")
             index = command_dict.get('index', 0)
             command = command_dict.get('command', '')
             interval = command_dict.get('interval', '')
@@ -43,7 +50,10 @@ class CommandExecutor(QThread):
             # Execute the command and emit detailed errors on failure
             try:
                 # execution log suppressed; only errors will be logged
-                common.port_write(command, self.serial_port, with_enter)
+                data = common.port_write(command, self.serial_port, with_enter)
+                if self.session_log is not None:
+                    self.session_log.write(DIRECTION_TX, data, text=command)
+                COMMANDS_PASSED.inc()
                 self.commandExecuted.emit(index+1)
                 # interval is treated as milliseconds now. If it's provided, try to parse it
                 # as a number (may be string) representing ms. Fallback default is 3000 ms.
@@ -59,6 +69,7 @@ class CommandExecutor(QThread):
             except Exception as e:
                 # Emit error detail, set error flag, and log exception with traceback
                 self.error_occurred = True
+                COMMANDS_FAILED.inc()
                 msg = f"Error executing command {index+1}: {e}"
                 self.logger.exception(msg)
                 self.commandExecuted.emit(-1)
@@ -1,15 +1,35 @@
 import datetime
 import time
-from utils import common
+from middileware.Logger import Logger, ExceptionBackoff
+from utils import common, metrics, profiler
+from utils.byte_ring import ByteRing, DEFAULT_RING_CAPACITY
+from utils.capture import DIRECTION_RX, DIRECTION_TX
 from PySide6.QtCore import QThread, Signal, QMutex, QWaitCondition, QMutexLocker, QTimer
 from serial import SerialTimeoutException
 
+logger = Logger(
+    app_name="DataReceiver",
+    log_dir="logs",
+    max_bytes=10 * 1024 * 1024,
+    backup_count=3
+).get_logger("DataReceiver")
+
+RX_BYTES = metrics.counter("rx_bytes_total", "Bytes read from the serial port")
+RX_READ_SIZE = metrics.histogram("rx_read_size_bytes", metrics.SIZE_BUCKETS, "Bytes returned by each serial read")
+RX_NOTIFICATIONS = metrics.counter("rx_notifications_total", "dataAvailable signals emitted to the receive pipeline")
+RX_ERRORS = metrics.counter("rx_errors_total", "Exceptions raised in the receive loop")
+
 
 class DataReceiver(QThread):
-    dataReceived = Signal(bytes)
+    # 只通知“数据已写到环形缓冲区偏移N”，数据本身由消费者从 ring 中取出
+    dataAvailable = Signal(object)
     exceptionOccurred = Signal(str)
 
-    def __init__(self, serial_port):
+    # 接收模式：阻塞读（默认，事件驱动）或轮询（兼容回退）
+    RECEIVE_MODE_BLOCKING = "blocking"
+    RECEIVE_MODE_POLLING = "polling"
+
+    def __init__(self, serial_port, receive_mode=RECEIVE_MODE_BLOCKING, ring_capacity=DEFAULT_RING_CAPACITY):
         super().__init__()
         self._last_data_size = 0
         self._curr_data_size = 0
@@ -25,8 +45,15 @@ class DataReceiver(QThread):
         self.cond = QWaitCondition()
         self._last_read_time = datetime.datetime.now()
         
+        # 接收环形缓冲区：串口数据经 readinto 直接写入，消费者按通知的偏移量取出
+        self.ring = ByteRing(ring_capacity)
+        self._notified_offset = 0
+        self._pending_reads = 0
+
+        # 原始抓包（utils.capture.CaptureWriter），为空时不抓包；每个读取块在读取线程中写入一条记录
+        self.capture = None
+
         # 批处理相关配置 - 调整为更实时的处理
-        self.batch_buffer = []
         self.batch_timeout = 0.02  # 减少到20ms批处理超时，提高实时性
         self.batch_max_size = 30   # 减少批处理最大条目数，更频繁地发送
         self.last_emit_time = time.time()
@@ -43,6 +70,18 @@ class DataReceiver(QThread):
             'bytes_per_second': 0
         }
 
+        # 阻塞读模式相关配置，具体数值由波特率推导
+        self.receive_mode = str(receive_mode or self.RECEIVE_MODE_BLOCKING).lower()
+        self.idle_read_timeout = common.SERIAL_READ_TIMEOUT  # 线路空闲时的读超时，仅用于及时响应暂停/停止
+        self.read_batch_size = 2048
+        self.pending_poll_interval = 0.001  # 有未通知的批数据时检查 in_waiting 的间隔
+
+        # 连续重复的相同异常（如串口被拔出后每次读取都失败）只通知一次，并指数退避，避免占满CPU
+        self.exception_backoff = ExceptionBackoff()
+        if self.receive_mode == self.RECEIVE_MODE_BLOCKING:
+            self.configure_read_timing()
+            self.ensure_read_timeout()
+
     def pause_thread(self):
         with QMutexLocker(self.mutex):
             self.is_paused = True
@@ -58,7 +97,71 @@ class DataReceiver(QThread):
             self.cond.wakeAll()
 
     def run(self):
+        if self.receive_mode == self.RECEIVE_MODE_POLLING:
+            self._run_polling()
+        else:
+            self._run_blocking()
+
+    def _run_blocking(self):
+        """阻塞读模式：在串口上带超时地等待首字节，到达后立即取走缓冲区中的剩余数据"""
         while not self.is_stopped:
+            profiler.sync("DataReceiver")
+            with QMutexLocker(self.mutex):
+                if self.is_paused:
+                    self.cond.wait(self.mutex)
+
+            if self.is_new_data_written:
+                with QMutexLocker(self.mutex):
+                    self.is_new_data_written = False
+                    self.cond.wakeAll()
+                self._last_read_time = datetime.datetime.now()
+
+            try:
+                if self.is_paused or self.is_stopped:
+                    continue
+                if not self.serial_port.is_open:
+                    QThread.msleep(int(self.idle_read_timeout * 1000))
+                    continue
+
+                read_limit = self.read_limit(self.read_batch_size)
+                if read_limit <= 0:
+                    self.wait_for_ring_space()
+                    continue
+                chunk_start = self.ring.write_offset
+                if self.has_pending_batch():
+                    # 有未发送的批数据时不阻塞在串口上（也不修改串口超时），只取走已到达的数据，
+                    # 没有新数据时短暂等待，到批超时后通知
+                    waiting_bytes = self.serial_port.in_waiting
+                    if waiting_bytes > 0:
+                        received = self.ring.fill_from(self.serial_port, min(waiting_bytes, read_limit))
+                    else:
+                        self.wait_for_batch_deadline()
+                        received = 0
+                else:
+                    # 线路空闲时阻塞等待首字节（打开串口时设置的固定读超时），空闲时几乎不占用CPU
+                    received = self.ring.fill_from(self.serial_port, 1)
+                    if received:
+                        waiting_bytes = self.serial_port.in_waiting
+                        if waiting_bytes > 0:
+                            received += self.ring.fill_from(self.serial_port, min(waiting_bytes, read_limit - 1))
+                if received:
+                    # 在读取线程记录该块的读取时刻，UI繁忙时也不影响时间戳精度
+                    read_time_ns = time.monotonic_ns()
+                    self.ring.mark(read_time_ns)
+                    self.capture_chunk(chunk_start, read_time_ns)
+                    self.add_to_batch(received)
+                    self.update_data_rate_monitor(received)
+                    self._last_read_time = datetime.datetime.now()
+
+                self.check_and_emit_batch()
+                self.exception_backoff.reset()
+            except Exception as e:
+                self.handle_exception(e)
+
+    def _run_polling(self):
+        """轮询模式：检查in_waiting后按数据速率休眠5~20ms（回退模式）"""
+        while not self.is_stopped:
+            profiler.sync("DataReceiver")
             with QMutexLocker(self.mutex):
                 if self.is_paused:
                     self.cond.wait(self.mutex)
@@ -72,13 +175,21 @@ class DataReceiver(QThread):
             try:
                 if not self.is_paused and self.serial_port.is_open:
                     waiting_bytes = self.serial_port.in_waiting
+                    max_read_size = self.read_limit(2048)
+                    if max_read_size <= 0:
+                        self.wait_for_ring_space()
+                        continue
                     if waiting_bytes > 0:
                         # 分批读取数据，避免单次读取过多造成阻塞
-                        max_read_size = min(waiting_bytes, 2048)  # 减少到2048，更频繁地发送数据
-                        raw_data = self.serial_port.read(max_read_size)
-                        if raw_data:
-                            self.add_to_batch(raw_data)
-                            self.update_data_rate_monitor(len(raw_data))
+                        max_read_size = min(waiting_bytes, max_read_size)  # 减少到2048，更频繁地发送数据
+                        chunk_start = self.ring.write_offset
+                        received = self.ring.fill_from(self.serial_port, max_read_size)
+                        if received:
+                            read_time_ns = time.monotonic_ns()
+                            self.ring.mark(read_time_ns)
+                            self.capture_chunk(chunk_start, read_time_ns)
+                            self.add_to_batch(received)
+                            self.update_data_rate_monitor(received)
                             
                             # 如果还有数据等待，立即处理而不是等待下次循环
                             if self.serial_port.in_waiting > 0:
@@ -88,15 +199,53 @@ class DataReceiver(QThread):
                     sleep_ms = self.calculate_optimized_sleep_interval()
                     QThread.msleep(sleep_ms)
                     self._last_read_time = datetime.datetime.now()
+                    self.exception_backoff.reset()
             except Exception as e:
                 self.handle_exception(e)
 
-    def add_to_batch(self, data_bytes):
-        """添加原始bytes到批处理缓冲区"""
-        if not isinstance(data_bytes, bytes):
-            raise ValueError("DataReceiver 只应接收 bytes 类型数据")
-        self.batch_buffer.append(data_bytes)
-        if len(self.batch_buffer) >= self.batch_max_size:
+    @property
+    def overflow_bytes(self) -> int:
+        """消费者跟不上导致被丢弃的字节数"""
+        return self.ring.overflow_bytes
+
+    def read_limit(self, size: int) -> int:
+        """
+        本次最多读取的字节数
+
+        启用 RTS/CTS 硬件流控时（包括尽可能快的抓包回放）只读取环形缓冲区能容纳的数据，缓冲区满时
+        暂停读取，由流控让发送方等待，而不是读出后丢弃；否则总是读取，跟不上时丢弃并计入 overflow_bytes。
+        """
+        if getattr(self.serial_port, "rtscts", False):
+            return min(size, self.ring.writable())
+        return size
+
+    def wait_for_ring_space(self):
+        """缓冲区已满时通知消费者取走数据并短暂等待"""
+        self.emit_batch()
+        QThread.msleep(1)
+
+    def capture_chunk(self, chunk_start: int, read_time_ns: int):
+        """把刚写入环形缓冲区的读取块原样写入抓包（直接引用环形缓冲区，不复制）"""
+        capture = self.capture
+        if capture is not None:
+            parts = self.ring.slices(chunk_start, self.ring.write_offset)
+            if parts:
+                capture.write(DIRECTION_RX, *parts, monotonic_ns=read_time_ns)
+
+    def capture_tx(self, data):
+        """把发送的数据写入抓包（可在GUI线程调用）"""
+        capture = self.capture
+        if capture is not None:
+            capture.write(DIRECTION_TX, data)
+
+    def has_pending_batch(self) -> bool:
+        """环形缓冲区中是否有尚未通知消费者的数据"""
+        return self.ring.write_offset > self._notified_offset
+
+    def add_to_batch(self, byte_count):
+        """记录一次已写入环形缓冲区的读取，达到批大小时立即通知"""
+        self._pending_reads += 1
+        if self._pending_reads >= self.batch_max_size:
             self.emit_batch()
 
     def check_and_emit_batch(self):
@@ -104,19 +253,25 @@ class DataReceiver(QThread):
         current_time = time.time()
         
         # 如果有数据且超过批处理超时时间，发送数据
-        if self.batch_buffer and (current_time - self.last_emit_time) >= self.batch_timeout:
+        if self.has_pending_batch() and (current_time - self.last_emit_time) >= self.batch_timeout:
             self.emit_batch()
 
     def emit_batch(self):
-        """发送批处理数据（原始bytes输出）"""
-        if self.batch_buffer:
-            combined_data = b''.join(self.batch_buffer)
-            self.dataReceived.emit(combined_data)
-            self.batch_buffer.clear()
-            self.last_emit_time = time.time()
+        """通知消费者数据已写到的偏移量，上一次通知尚未被消费时合并到下一次"""
+        if not self.has_pending_batch():
+            return
+        if self.ring.read_offset < self._notified_offset:
+            return  # 消费者仍在处理上一批，它会一次取走全部可读数据
+        self._notified_offset = self.ring.write_offset
+        self._pending_reads = 0
+        RX_NOTIFICATIONS.inc()
+        self.dataAvailable.emit(self._notified_offset)
+        self.last_emit_time = time.time()
 
     def update_data_rate_monitor(self, bytes_received):
         """更新数据速率监控"""
+        RX_BYTES.inc(bytes_received)
+        RX_READ_SIZE.observe(bytes_received)
         current_time = time.time()
         self.data_rate_monitor['data_count'] += bytes_received
         
@@ -132,6 +287,34 @@ class DataReceiver(QThread):
         bits_per_byte = 10  # 1起始 + 8数据 + 1停止
         return bits_per_byte / self.baud_rate
 
+    def configure_read_timing(self):
+        """根据波特率推导阻塞读的批超时和单次读取大小"""
+        byte_time = self.byte_transmission_time()
+        # 批超时：约64个字符帧的时间，限制在2ms~20ms之间
+        self.batch_timeout = min(max(byte_time * 64, 0.002), 0.02)
+        # 单次读取大小：20ms内线路最多能传输的字节数，限制在256~65536之间
+        self.read_batch_size = int(min(max(0.02 / byte_time, 256), 65536))
+        # 批数据等待期间检查 in_waiting 的间隔：约16个字符帧的时间，限制在0.5ms~2ms之间
+        self.pending_poll_interval = min(max(byte_time * 16, 0.0005), 0.002)
+
+    def ensure_read_timeout(self):
+        """
+        串口没有有限的读超时（如未经 common.port_on 打开）时设置一次，在启动线程之前调用
+
+        之后接收线程不再修改超时：每次修改都会重新配置串口（Windows 的 SetCommTimeouts、POSIX 的 termios），
+        而且会与GUI线程的写入同时操作同一个句柄。
+        """
+        timeout = self.serial_port.timeout
+        if timeout is None or timeout <= 0:
+            self.serial_port.timeout = self.idle_read_timeout
+
+    def wait_for_batch_deadline(self):
+        """有未通知的批数据而串口暂无新数据时，等到批超时或下一个轮询间隔"""
+        remaining = self.last_emit_time + self.batch_timeout - time.time()
+        # 已过批超时（消费者仍在处理上一批，未能通知）时也等待一个轮询间隔，避免空转
+        delay = min(remaining, self.pending_poll_interval) if remaining > 0 else self.pending_poll_interval
+        QThread.usleep(int(delay * 1_000_000))
+
     def process_raw_data(self, raw_data, read_time):
         """兼容旧接口，直接返回bytes，后续不再使用"""
         if not isinstance(raw_data, bytes):
@@ -166,6 +349,16 @@ class DataReceiver(QThread):
 
     def handle_exception(self, error):
         """Centralized exception handling"""
+        RX_ERRORS.inc()
+        delay = self.exception_backoff.record(error)
+        if delay:
+            # 与上一次相同的异常：不再重复通知，等待后重试
+            repeats = self.exception_backoff.repeats
+            if repeats & (repeats - 1) == 0:
+                logger.warning(f"Receive error repeated {repeats} times, backing off {delay * 1000:.0f} ms: {error}")
+            QThread.msleep(int(delay * 1000))
+            return
+        logger.error(f"Receive error: {error!r}")
         error_msg = str(error)
         # Handle exceptions based on type
         if isinstance(error, SerialTimeoutException):
@@ -0,0 +1,454 @@
+"""
+大文件查看页
+
+替代原来把整个日志读进 QTextEdit 的 Log 页。文件通过 utils.mapped_file 映射，行索引在后台线程中
+建立（数 GB 的日志几秒内完成，建立过程中已索引的部分即可浏览），显示复用 ReceiveLogView，
+每次只解码视口内的行。支持跳转到行号、跳转到时刻（有 .tsidx 时经索引定位）和在整个文件中搜索，
+搜索同样在后台线程中进行，可以中途停止。
+
+文件仍在写入时（接收日志）定时检查大小，只为新增部分建立索引，停在底部时跟随最新的行。
+离开页面时释放映射（Windows 上映射中的文件不能被轮转改名或清空），重新进入时沿用已有的索引。
+"""
+
+import os
+import re
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QThread, QTimer, Signal
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QCheckBox, QFileDialog
+)
+from components.ReceiveLogView import ReceiveLogView
+from utils.mapped_file import open_mapped_file, compile_search, RESET, MAX_MATCHES
+from utils.log_index import TimestampMatcher, parse_timestamp
+
+# 检查文件是否变长的间隔（毫秒）
+REFRESH_INTERVAL_MS = 1000
+
+
+class FileTask(QThread):
+    """
+    在后台线程中执行建立索引、搜索等耗时操作
+
+    function 以 (cancelled, progress) 调用：cancelled() 在 requestInterruption() 后返回 True，
+    progress(int) 报告 0~100 的进度。
+    """
+    progressUpdated = Signal(int)
+    taskFinished = Signal(object)
+
+    def __init__(self, function, parent=None):
+        super().__init__(parent)
+        self._function = function
+
+    def run(self):
+        self.taskFinished.emit(self._function(self.isInterruptionRequested, self.progressUpdated.emit))
+
+    def cancel(self):
+        """请求停止并等待线程结束"""
+        self.requestInterruption()
+        self.wait()
+
+
+class MappedFileModel(QAbstractListModel):
+    """
+    映射文件的行模型，提供 ReceiveLogView 需要的接口
+
+    行数只在界面线程中随 sync() 增长，后台线程建立索引时视图看到的行数保持一致。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self._row_count = 0
+
+    def set_source(self, source):
+        self.beginResetModel()
+        self.source = source
+        self._row_count = source.row_count if source is not None else 0
+        self.endResetModel()
+
+    def sync(self):
+        """按文件源已索引的行数追加行"""
+        count = self.source.row_count if self.source is not None else 0
+        if count > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+            self._row_count = count
+            self.endInsertRows()
+        elif count < self._row_count:
+            self.set_source(self.source)
+
+    # ---- QAbstractListModel ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid() and 0 <= index.row() < self._row_count:
+            return self.row_text(index.row())
+        return None
+
+    # ---- ReceiveLogView 使用的接口 ----
+
+    def locate(self, row: int):
+        return row, 0
+
+    def record_row(self, record: int) -> int:
+        return record
+
+    def row_text(self, row: int) -> str:
+        rows = self.rows(row, row + 1)
+        return rows[0] if rows else ""
+
+    def rows(self, first: int, last: int) -> list:
+        if self.source is None:
+            return []
+        return self.source.rows(first, min(last, self._row_count))
+
+    def text(self) -> str:
+        return "\n".join(self.rows(0, self._row_count))
+
+
+class LargeFileViewer(QWidget):
+    """
+    大文件查看页：文件栏、跳转和搜索栏、只绘制可见行的视图以及状态栏
+
+    属性：
+    model (MappedFileModel): 行模型
+    view (ReceiveLogView): 显示视图
+    path (str): 当前打开的文件，未打开时为空
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = MappedFileModel(self)
+        self.view = ReceiveLogView(self.model, self)
+        self.view.setObjectName("large_file_view")
+        self.path = ""
+        self.matcher = TimestampMatcher()
+        self._chosen_path = None  # 通过 Open 打开的文件，为空时显示接收日志
+        self._default_path = ""
+        self._task = None
+        self._indexing = False
+        self._results = []
+        self._result_index = -1
+
+        self.path_label = QLabel("No file")
+        self.path_label.setObjectName("large_file_path_label")
+        self.path_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.open_button = QPushButton("Open...")
+        self.open_button.setToolTip("Open a log or capture (.scap) file")
+        self.open_button.clicked.connect(self.choose_file)
+        self.log_button = QPushButton("Received Log")
+        self.log_button.setToolTip("Show the received-data log")
+        self.log_button.clicked.connect(self.show_default_file)
+        self.reload_button = QPushButton("Reload")
+        self.reload_button.clicked.connect(self.refresh)
+
+        file_layout = QHBoxLayout()
+        file_layout.addWidget(self.path_label, 1)
+        file_layout.addWidget(self.open_button)
+        file_layout.addWidget(self.log_button)
+        file_layout.addWidget(self.reload_button)
+
+        self.line_input = QLineEdit()
+        self.line_input.setPlaceholderText("Line")
+        self.line_input.setMaximumWidth(100)
+        self.line_input.returnPressed.connect(self.go_to_line)
+        self.time_input = QLineEdit()
+        self.time_input.setPlaceholderText("YYYY-MM-DD HH:MM:SS.mmm")
+        self.time_input.setMaximumWidth(200)
+        self.time_input.returnPressed.connect(self.go_to_time)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search the whole file")
+        self.search_input.returnPressed.connect(self.start_search)
+        self.regex_checkbox = QCheckBox("Regex")
+        self.ignore_case_checkbox = QCheckBox("Ignore case")
+        self.search_button = QPushButton("Find")
+        self.search_button.clicked.connect(self.toggle_search)
+        self.prev_button = QPushButton("↑")
+        self.prev_button.clicked.connect(lambda: self.step_result(-1))
+        self.next_button = QPushButton("↓")
+        self.next_button.clicked.connect(lambda: self.step_result(1))
+        self.result_label = QLabel("")
+        self.result_label.setObjectName("large_file_result_label")
+
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Go to line:"))
+        search_layout.addWidget(self.line_input)
+        search_layout.addWidget(QLabel("time:"))
+        search_layout.addWidget(self.time_input)
+        search_layout.addWidget(self.search_input, 1)
+        search_layout.addWidget(self.regex_checkbox)
+        search_layout.addWidget(self.ignore_case_checkbox)
+        search_layout.addWidget(self.search_button)
+        search_layout.addWidget(self.prev_button)
+        search_layout.addWidget(self.next_button)
+        search_layout.addWidget(self.result_label)
+
+        self.status_label = QLabel("")
+        self.status_label.setObjectName("large_file_status_label")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(file_layout)
+        layout.addLayout(search_layout)
+        layout.addWidget(self.view, 1)
+        layout.addWidget(self.status_label)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self._poll)
+
+    # ---- 打开与释放 ----
+
+    def set_timestamp_regex(self, regex: str):
+        """跳转到时刻时用于匹配行首时间戳的正则表达式（MoreSettings.TimestampRegex）"""
+        if regex and regex != self.matcher.regex:
+            self.matcher = TimestampMatcher(regex)
+
+    def activate(self, default_path: str):
+        """
+        进入页面时调用：打开通过 Open 选择的文件，没有时打开接收日志
+
+        参数：
+        default_path (str): 接收日志路径
+        """
+        self._default_path = default_path
+        path = self._chosen_path or default_path
+        if path and os.path.isfile(path):
+            self.open_file(path)
+        else:
+            self._close_source()
+            self.path_label.setText(path or "No file")
+            self.status_label.setText("File not found" if path else "")
+        self.refresh_timer.start()
+
+    def release(self):
+        """离开页面时调用：停止后台任务并释放映射，保留索引"""
+        self.refresh_timer.stop()
+        self._cancel_task()
+        if self.model.source is not None:
+            self.model.source.close()
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open File", os.path.dirname(self.path or self._default_path),
+                                              "Log and capture files (*.log *.txt *.scap);;All files (*)")
+        if path:
+            self._chosen_path = path
+            self.open_file(path)
+
+    def show_default_file(self):
+        self._chosen_path = None
+        self.activate(self._default_path)
+
+    def open_file(self, path: str):
+        """打开文件并在后台建立索引；是当前文件时沿用已有的索引"""
+        self._cancel_task()
+        source = self.model.source
+        try:
+            if source is not None and os.path.abspath(path) == os.path.abspath(source.path):
+                if source.refresh() == RESET:
+                    self.model.set_source(source)
+                    self._clear_results()
+            else:
+                self._close_source()
+                source = open_mapped_file(path)
+                self.model.set_source(source)
+        except (OSError, ValueError) as e:
+            self._close_source()
+            self.status_label.setText(f"Cannot open {path}: {e}")
+            return
+        self.path = path
+        self.path_label.setText(path)
+        self._start_indexing()
+
+    def refresh(self):
+        """文件变长后为新增部分建立索引"""
+        if self.path and os.path.isfile(self.path):
+            self.open_file(self.path)
+
+    def _poll(self):
+        source = self.model.source
+        if self._task is not None or not self.isVisible():
+            return
+        if source is None:
+            # 接收日志在打开串口后才创建
+            path = self._chosen_path or self._default_path
+            if path and os.path.isfile(path):
+                self.open_file(path)
+            return
+        try:
+            size = os.path.getsize(source.path)
+        except OSError:
+            return
+        if size != source.size:
+            self.refresh()
+
+    def _close_source(self):
+        self._cancel_task()
+        if self.model.source is not None:
+            self.model.source.close()
+            self.model.set_source(None)
+        self._clear_results()
+        self.path = ""
+
+    # ---- 后台任务 ----
+
+    def _run_task(self, function, on_finished):
+        self._cancel_task()
+        task = FileTask(function, self)
+        task.progressUpdated.connect(lambda percent: self._on_progress(task, percent))
+        task.taskFinished.connect(lambda result: self._on_task_finished(task, on_finished, result))
+        self._task = task
+        task.start()
+
+    def _cancel_task(self):
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            self._indexing = False
+            self._update_controls()
+
+    def _on_progress(self, task, percent):
+        if task is not self._task:
+            return
+        if self._indexing:
+            self.model.sync()
+        self._update_status(f"{'Indexing' if self._indexing else 'Searching'} {percent}%")
+
+    def _on_task_finished(self, task, on_finished, result):
+        if task is not self._task:
+            return
+        task.wait()
+        self._task = None
+        on_finished(result)
+        self._update_controls()
+
+    def _start_indexing(self):
+        source = self.model.source
+        self._indexing = True
+        self._update_controls()
+        self._run_task(source.build, self._on_indexed)
+
+    def _on_indexed(self, completed):
+        self._indexing = False
+        self.model.sync()
+        self._update_status("" if completed else "Indexing stopped")
+
+    def _update_controls(self):
+        busy = self._task is not None
+        self.time_input.setEnabled(not self._indexing)
+        self.search_button.setText("Stop" if busy and not self._indexing else "Find")
+        self.search_button.setEnabled(not self._indexing)
+
+    def _update_status(self, activity: str = ""):
+        source = self.model.source
+        if source is None:
+            self.status_label.setText(activity)
+            return
+        parts = [f"{self.model.rowCount():,} lines", f"{source.size / (1024 * 1024):.1f} MB"]
+        if activity:
+            parts.append(activity)
+        self.status_label.setText(" | ".join(parts))
+
+    # ---- 跳转 ----
+
+    def show_row(self, row: int):
+        """选中并显示第 row 行（从 0 开始）"""
+        count = self.model.rowCount()
+        if not count:
+            return
+        row = min(max(row, 0), count - 1)
+        self.view.set_follow_tail(False)
+        self.view.set_current_match(row, 0, len(self.model.row_text(row)))
+
+    def go_to_line(self):
+        try:
+            line = int(self.line_input.text().replace(",", "").strip())
+        except ValueError:
+            self._update_status("Invalid line number")
+            return
+        self.show_row(line - 1)
+
+    def go_to_time(self):
+        source = self.model.source
+        timestamp = parse_timestamp(self.time_input.text())
+        if source is None:
+            return
+        if timestamp is None:
+            self._update_status("Invalid time, expected YYYY-MM-DD HH:MM:SS[.mmm]")
+            return
+        matcher = self.matcher
+        self._run_task(lambda cancelled, progress: source.row_for_time(timestamp, matcher), self._on_time_found)
+
+    def _on_time_found(self, row):
+        if row >= self.model.rowCount():
+            self._update_status("No line at or after that time")
+            row = self.model.rowCount() - 1
+        else:
+            self._update_status()
+        self.show_row(row)
+
+    # ---- 搜索 ----
+
+    def focus_search(self):
+        """
+        Ctrl+F：把焦点移到搜索栏
+
+        本页不使用搜索替换对话框，它在界面线程中同步扫描，数 GB 的文件会卡住界面；
+        搜索栏的搜索在后台线程中进行。
+        """
+        self.search_input.setFocus(Qt.ShortcutFocusReason)
+        self.search_input.selectAll()
+
+    def toggle_search(self):
+        if self._task is not None and not self._indexing:
+            self._cancel_task()
+            self._update_status("Search stopped")
+        else:
+            self.start_search()
+
+    def start_search(self):
+        source = self.model.source
+        text = self.search_input.text()
+        if source is None or not text or self._indexing:
+            return
+        try:
+            regex = compile_search(text, self.regex_checkbox.isChecked(), not self.ignore_case_checkbox.isChecked())
+        except re.error as e:
+            self._update_status(f"Invalid regular expression: {e}")
+            return
+        self._clear_results()
+        self.view.set_highlight_pattern(regex)
+        self._run_task(lambda cancelled, progress: source.search(regex, cancelled), self._on_search_finished)
+        self._update_controls()
+
+    def _on_search_finished(self, results):
+        self._results = results
+        if not results:
+            self.result_label.setText("No matches")
+            self._update_status()
+            return
+        more = "+" if len(results) >= MAX_MATCHES else ""
+        self.result_label.setText(f"{len(results):,}{more} matches")
+        self._update_status()
+        # 从当前视口开始的第一个结果
+        top = self.view.verticalScrollBar().value()
+        self._result_index = next((i for i, result in enumerate(results) if result[0] >= top), 0)
+        self._show_result()
+
+    def step_result(self, step: int):
+        if self._results:
+            self._result_index = (self._result_index + step) % len(self._results)
+            self._show_result()
+
+    def _show_result(self):
+        row, start, end = self._results[self._result_index]
+        self.view.set_follow_tail(False)
+        self.view.set_current_match(row, start, end)
+        more = "+" if len(self._results) >= MAX_MATCHES else ""
+        self.result_label.setText(f"{self._result_index + 1:,}/{len(self._results):,}{more}")
+
+    def _clear_results(self):
+        self._results = []
+        self._result_index = -1
+        self.result_label.setText("")
+        self.view.set_highlight_pattern(None)
@@ -396,6 +396,11 @@ class MoreSettingsDialog(QDialog):
         self.config["MoreSettings"] = new_settings
         write_config(self.config, "config.ini")
         self.parent.config = self.config
+        # 结束符等接收显示设置需同步给接收处理流水线
+        if hasattr(self.parent, "update_receive_pipeline_settings"):
+            self.parent.update_receive_pipeline_settings()
+        if hasattr(self.parent, "update_receive_view_settings"):
+            self.parent.update_receive_view_settings()
 
         # Reinitialize UI if needed
         if self.isReconstructUI:
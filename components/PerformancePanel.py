@@ -0,0 +1,156 @@
+"""
+性能面板
+
+每秒读取一次 utils.metrics 的快照，显示各指标的当前值、每秒速率，以及直方图在最近一秒内的分位数，
+用于在高负载下查看时间花在哪里：读取线程每秒读到多少字节、每次读取多大，流水线和显示刷新每批耗时，
+framesReady 信号的积压，日志写入的积压，以及接收速率占波特率理论容量的比例。
+面板隐藏时停止刷新，不占用 CPU。
+"""
+
+import time
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QAbstractItemView)
+from utils import metrics
+from utils.metrics import COUNTER, HISTOGRAM
+
+REFRESH_INTERVAL_MS = 1000
+COLUMNS = ["Metric", "Value", "Rate/s", "p50", "p95", "Max"]
+
+
+def format_number(value) -> str:
+    """以 K/M/G 缩写显示数值，None 显示为 -"""
+    if value is None:
+        return "-"
+    if isinstance(value, float) and not value.is_integer() and abs(value) < 1000:
+        return f"{value:.3g}"
+    for unit, scale in (("G", 1e9), ("M", 1e6), ("K", 1e3)):
+        if abs(value) >= scale:
+            return f"{value / scale:.2f}{unit}"
+    return f"{value:.0f}" if isinstance(value, float) else str(value)
+
+
+def line_utilization(rates: dict, snapshot: dict):
+    """
+    接收速率占线路理论容量（波特率 / 每字节位数）的比例
+
+    返回：
+    float | None: 0~1 之间的比例，串口未打开时为 None
+    """
+    capacity = snapshot.get("line_capacity_bytes_per_second")
+    if not capacity:
+        return None
+    return rates.get("rx_bytes_total", 0.0) / capacity
+
+
+class PerformancePanel(QDialog):
+    """
+    非模态的性能面板窗口
+
+    属性：
+    table (QTableWidget): 每个指标一行
+    summary_label (QLabel): 一行摘要：接收速率、线路利用率、帧率、显示耗时
+    """
+
+    def __init__(self, registry: metrics.MetricsRegistry = None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance")
+        self.setWindowFlag(Qt.Tool)
+        self.setModal(False)
+        self.resize(640, 480)
+        self.registry = registry or metrics.REGISTRY
+        self._previous = None
+        self._previous_time = None
+
+        layout = QVBoxLayout()
+        self.summary_label = QLabel("-")
+        self.summary_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(COLUMNS)):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.reset_button = QPushButton("Reset")
+        self.reset_button.setToolTip("Clear all counters and histograms")
+        self.reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(self.reset_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def reset(self):
+        self.registry.reset()
+        self._previous = None
+        self.refresh()
+
+    def refresh(self, now: float = None):
+        """读取快照并更新表格；速率和分位数按与上一次刷新之间的增量计算"""
+        now = time.monotonic() if now is None else now
+        snapshot = self.registry.snapshot()
+        previous = self._previous or {}
+        rates = metrics.rates(previous, snapshot, now - self._previous_time, self.registry) \
+            if self._previous else {}
+        self._previous, self._previous_time = snapshot, now
+
+        rows = []
+        for metric in self.registry.metrics():
+            value = snapshot.get(metric.name)
+            rate = rates.get(metric.name)
+            if metric.kind == HISTOGRAM:
+                counts = value["counts"]
+                before = previous.get(metric.name)
+                if before is not None:
+                    counts = [count - old for count, old in zip(counts, before["counts"])]
+                rows.append((metric, value["count"], rate, metric.quantile(0.5, counts),
+                             metric.quantile(0.95, counts), value["max"]))
+            else:
+                rows.append((metric, value, rate if metric.kind == COUNTER else None, None, None, None))
+
+        self.table.setRowCount(len(rows))
+        for row, (metric, *values) in enumerate(rows):
+            name_item = QTableWidgetItem(metric.name)
+            name_item.setToolTip(metric.help)
+            self.table.setItem(row, 0, name_item)
+            for column, value in enumerate(values, 1):
+                item = QTableWidgetItem(format_number(value))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.summary_label.setText(self.summary(snapshot, rates))
+
+    def summary(self, snapshot: dict, rates: dict) -> str:
+        """生成摘要行"""
+        parts = [f"RX {format_number(rates.get('rx_bytes_total'))}B/s"]
+        utilization = line_utilization(rates, snapshot)
+        if utilization is not None:
+            parts.append(f"line {utilization:.0%}")
+        parts.append(f"{format_number(rates.get('rx_frames_total'))} frames/s")
+        parts.append(f"{format_number(rates.get('lines_rendered_total'))} lines/s")
+        render = self.registry.get("render_frame_ms")
+        if render is not None and render.count:
+            parts.append(f"render max {render.max:.1f} ms")
+        depth = snapshot.get("frames_ready_queue_depth")
+        if depth:
+            parts.append(f"queued batches {depth}")
+        return " · ".join(parts)
@@ -0,0 +1,714 @@
+"""
+虚拟化的接收显示区
+
+ReceiveLogModel 以 QAbstractListModel 对外提供可视行；数据保存在 utils.line_store.LineStore 中
+（原始字节 + 并行数组），可视行由 RowFormatter 在需要时按当前显示设置生成。切换 HEX、控制字符
+或时间戳显示时只重建可视行索引（通常行数一致，无需重建），整段历史立即按新设置显示。
+
+ReceiveLogView 基于 QAbstractScrollArea 自绘，行高固定，每次重绘只排版和绘制视口内的可见行，
+追加数据时只更新滚动条范围，因此每帧的开销与历史行数无关。垂直滚动条以行为单位覆盖全部历史，
+停在底部时自动跟随最新数据（tail-follow），向上滚动后保持当前位置不动。
+
+替代原来每次刷新都重建 QTextDocument 的 QTextEdit 接收区，并提供 toPlainText/append/clear
+等兼容方法供窗口其余部分使用。
+"""
+
+import time
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QEvent, QRect, Signal
+from PySide6.QtGui import QPainter, QPalette, QColor, QKeySequence, QGuiApplication, QAction
+from PySide6.QtWidgets import QAbstractScrollArea, QMenu
+from components.ReceivePipeline import default_settings
+from utils.line_store import (
+    LineStore, RowFormatter, display_mode, DEFAULT_MEMORY_BUDGET, DEFAULT_COMPRESSION,
+    DIRECTION_RX, DIRECTION_TX_HEX, DIRECTION_TEXT,
+)
+
+DEFAULT_MAX_LINES = 1000000
+# 文本左侧留白（像素）
+TEXT_MARGIN = 4
+# 搜索结果的高亮颜色，与 SearchReplaceDialog 保持一致
+MATCH_COLOR = QColor(255, 255, 0)
+CURRENT_MATCH_COLOR = QColor(0, 255, 0)
+
+
+class ReceiveLogModel(QAbstractListModel):
+    """
+    接收历史模型，每个可视行一项；记录数超过 max_lines 时从头部成批丢弃，max_lines 为 0 时不限制
+
+    一条记录（一帧或一次回显）可能显示为多行（如十六进制的两行布局）。各记录行数相同时
+    直接按除法定位，否则维护各记录起始行号的前缀和数组（array('Q')）并二分查找。
+
+    属性：
+    store (LineStore): 原始数据存储
+    max_lines (int): 最多保留的记录数，0 表示不限制
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, parent=None,
+                 spill_dir: str = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 compression: str = DEFAULT_COMPRESSION):
+        """
+        参数：
+        max_lines (int): 最多保留的记录数，0 表示不限制
+        parent (QObject): 父对象
+        spill_dir (str): 超出内存预算的历史写入该目录下的磁盘分段，为空时只保存在内存中
+        memory_budget (int): 内存中历史数据的预算（字节）
+        compression (str): 较旧历史在内存中的压缩方式，"zlib" / "lzma" / "none"
+        """
+        super().__init__(parent)
+        self.store = LineStore(spill_dir, memory_budget, compression)
+        self.max_lines = max(0, int(max_lines))
+        self.encoding = None
+        self._settings = default_settings()
+        self._formatter = RowFormatter(self.store, self._settings)
+        self._mode = self._formatter.mode
+        # 决定各记录行数是否一致的计数
+        self._non_rx = 0          # 非接收记录数
+        self._long_rx = 0         # 超过16字节的接收记录数（经典转储布局多于一行）
+        self._rx_multiline = 0    # 帧内含换行的接收记录数
+        self._text_multiline = 0  # 含换行的回显 / 文本记录数
+        self._reset_index()
+
+    # ---- QAbstractListModel ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid() and 0 <= index.row() < self._row_count:
+            return self.row_text(index.row())
+        return None
+
+    # ---- 可视行 ----
+
+    def locate(self, row: int):
+        """可视行 row 对应的 (记录序号, 记录内行号)"""
+        if self._uniform:
+            return divmod(row, self._uniform)
+        starts = self._row_starts
+        target = row + starts[0]
+        record = bisect_right(starts, target) - 1
+        return record, target - starts[record]
+
+    def record_row(self, record: int) -> int:
+        """记录 record 的第一个可视行"""
+        if self._uniform:
+            return record * self._uniform
+        return self._row_starts[record] - self._row_starts[0]
+
+    def row_text(self, row: int) -> str:
+        """返回第 row 行的文本"""
+        record, sub = self.locate(row)
+        return self._formatter.rows(record)[sub]
+
+    def rows(self, first: int, last: int) -> list:
+        """返回 [first, last) 范围内的行"""
+        last = min(last, self._row_count)
+        if first >= last:
+            return []
+        record, sub = self.locate(first)
+        result = []
+        needed = last - first
+        while len(result) < needed:
+            result.extend(self._formatter.rows(record)[sub:])
+            record += 1
+            sub = 0
+        del result[needed:]
+        return result
+
+    # ---- 追加与丢弃 ----
+
+    def append_records(self, records, encoding: str = None) -> int:
+        """
+        追加记录
+
+        参数：
+        records (list[tuple]): (原始字节, 数据流偏移, Unix时间戳, 方向[, 上一帧带入的字节数]) 记录
+        encoding (str): 接收流水线已锁定的编码，为空时保持不变
+
+        返回：
+        int: 追加的可视行数
+        """
+        if encoding and encoding != self.encoding:
+            self.set_encoding(encoding)
+        if not records:
+            return 0
+        store = self.store
+        start = len(store)
+        store.extend(records)
+        end = len(store)
+        for index in range(start, end):
+            self._count_record(index, 1)
+
+        first_row = self._row_count
+        uniform = self._uniform_rows()
+        if uniform and uniform == self._uniform:
+            added = (end - start) * uniform
+        else:
+            if self._uniform:
+                # 行数不再一致，改为前缀和索引
+                self._build_index(end=start)
+            mode = self._mode
+            starts = accumulate((store.row_count(index, mode) for index in range(start, end)),
+                                initial=self._row_starts[-1])
+            next(starts)  # 跳过已有的结束行号
+            self._row_starts.extend(starts)
+            added = self._row_starts[-1] - self._row_starts[0] - first_row
+
+        self.beginInsertRows(QModelIndex(), first_row, first_row + added - 1)
+        self._row_count += added
+        self.endInsertRows()
+        self._trim()
+        return added
+
+    def append_lines(self, lines) -> int:
+        """追加已格式化的文本行（原样显示，行内换行拆分为多个可视行）"""
+        now = time.time()
+        return self.append_records([(line.encode("utf-8"), 0, now, DIRECTION_TEXT) for line in lines])
+
+    def set_max_lines(self, max_lines: int):
+        """修改最多保留的记录数（0 表示不限制），超出部分立即丢弃"""
+        self.max_lines = max(0, int(max_lines))
+        self._trim(force=True)
+
+    def set_memory_budget(self, memory_budget: int):
+        """修改内存中历史数据的预算（字节），下次追加时超出部分写入磁盘分段"""
+        self.store.memory_budget = max(1, int(memory_budget))
+
+    def clear(self):
+        """清空全部历史"""
+        self.beginResetModel()
+        self.store.clear()
+        self._non_rx = self._long_rx = self._rx_multiline = self._text_multiline = 0
+        self._formatter = RowFormatter(self.store, self._settings, self.encoding)
+        self._reset_index()
+        self.endResetModel()
+
+    def _trim(self, force: bool = False):
+        # 头部删除需要移动数组剩余元素，超出上限一定比例后再成批丢弃以摊薄开销
+        if not self.max_lines:
+            return
+        excess = len(self.store) - self.max_lines
+        if excess <= 0 or (not force and excess < max(1, self.max_lines // 8)):
+            return
+        removed_rows = self.record_row(excess)
+        self.beginRemoveRows(QModelIndex(), 0, removed_rows - 1)
+        for index in range(excess):
+            self._count_record(index, -1)
+        self.store.trim(excess)
+        self._row_count -= removed_rows
+        if not self._uniform:
+            if self._uniform_rows():
+                # 导致行数不一致的记录已被丢弃，不再需要前缀和索引
+                self._reset_index(self._row_count)
+            else:
+                del self._row_starts[:excess]
+        self.endRemoveRows()
+
+    # ---- 显示设置 ----
+
+    def set_display_settings(self, settings: dict):
+        """
+        按新的显示设置重新显示全部历史
+
+        参数：
+        settings (dict): 显示设置（show_hex / hex_layout / show_control_char / show_timestamp）
+        """
+        settings = dict(default_settings(), **settings)
+        mode = display_mode(settings)
+        if mode == self._mode and settings['show_timestamp'] == self._settings['show_timestamp']:
+            self._settings = settings
+            return
+        self._settings = settings
+        self.layoutAboutToBeChanged.emit()
+        self._formatter = RowFormatter(self.store, settings, self.encoding)
+        self._mode = mode
+        self._build_index()
+        self.layoutChanged.emit()
+
+    def set_encoding(self, encoding: str):
+        """接收编码锁定后按新编码重新解码显示"""
+        self.encoding = encoding
+        self._formatter = RowFormatter(self.store, self._settings, encoding)
+        if self._row_count:
+            self.dataChanged.emit(self.index(0), self.index(self._row_count - 1))
+
+    # ---- 搜索与导出 ----
+
+    def find_all(self, regex) -> list:
+        """
+        在全部历史中查找匹配
+
+        参数：
+        regex (re.Pattern): 已编译的正则表达式
+
+        返回：
+        list[tuple[int, int, int]]: (行号, 起始列, 结束列)，空匹配被忽略
+        """
+        results = []
+        row = 0
+        for record in range(len(self.store)):
+            for text in self._formatter.format(record):
+                for match in regex.finditer(text):
+                    start, end = match.span()
+                    if end > start:
+                        results.append((row, start, end))
+                row += 1
+        return results
+
+    def text(self) -> str:
+        """全部历史拼接为纯文本"""
+        formatter = self._formatter
+        return "\n".join(row for record in range(len(self.store)) for row in formatter.format(record))
+
+    # ---- 行索引 ----
+
+    def _count_record(self, index: int, sign: int):
+        store = self.store
+        direction = store.direction(index)
+        if direction == DIRECTION_RX:
+            if store.length(index) > 16:
+                self._long_rx += sign
+            if b"\n" in store.data(index).rstrip(b"\r\n"):
+                self._rx_multiline += sign
+        else:
+            self._non_rx += sign
+            if direction != DIRECTION_TX_HEX and b"\n" in store.data(index).rstrip(b"\r\n"):
+                self._text_multiline += sign
+
+    def _uniform_rows(self) -> int:
+        """当前显示方式下各记录行数一致时返回该行数，否则返回 0"""
+        control_char_mode, hex_dump = self._mode
+        if control_char_mode is None:
+            if self._non_rx:
+                return 0
+            if hex_dump:
+                return 0 if self._long_rx else 1
+            return 2
+        if control_char_mode == 'interpret' and self._rx_multiline:
+            return 0
+        return 0 if self._text_multiline else 1
+
+    def _reset_index(self, row_count: int = 0):
+        self._uniform = self._uniform_rows()
+        self._row_starts = array('Q', [0])
+        self._row_count = row_count
+
+    def _build_index(self, end: int = None):
+        """按当前显示方式重建前 end 条记录的行索引"""
+        store = self.store
+        end = len(store) if end is None else end
+        uniform = self._uniform_rows() if end == len(store) else 0
+        if uniform:
+            self._reset_index(end * uniform)
+            return
+        mode = self._mode
+        self._uniform = 0
+        self._row_starts = array('Q', accumulate((store.row_count(index, mode) for index in range(end)), initial=0))
+        self._row_count = self._row_starts[-1]
+
+
+class ReceiveLogView(QAbstractScrollArea):
+    """
+    只绘制可见行的只读日志视图
+
+    垂直滚动条的值即顶部行号；支持按字符选择、复制、全选、搜索结果高亮和 tail-follow。
+    """
+    # tail-follow 状态变化（停在底部时为 True）
+    followTailChanged = Signal(bool)
+
+    def __init__(self, model: ReceiveLogModel = None, parent=None):
+        super().__init__(parent)
+        self._model = None
+        self._follow_tail = True
+        self._line_height = 1
+        self._ascent = 0
+        self._max_width = 0  # 已绘制过的最宽行，用于水平滚动范围
+        self._anchor = None  # 选择起点 (行, 列)
+        self._cursor = None  # 选择终点 (行, 列)
+        self._highlight = None  # 需要高亮的正则表达式
+        self._current_match = None  # 当前搜索结果 (行, 起始列, 结束列)
+        self._layout_anchor = None  # 显示设置变化前顶部的记录
+
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.verticalScrollBar().valueChanged.connect(self._on_vertical_scroll)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self._update_metrics()
+        self.setModel(model if model is not None else ReceiveLogModel(parent=self))
+
+    # ---- 模型 ----
+
+    def model(self) -> ReceiveLogModel:
+        return self._model
+
+    def setModel(self, model: ReceiveLogModel):
+        if self._model is not None:
+            self._model.rowsInserted.disconnect(self._on_rows_inserted)
+            self._model.rowsRemoved.disconnect(self._on_rows_removed)
+            self._model.modelReset.disconnect(self._on_model_reset)
+            self._model.layoutAboutToBeChanged.disconnect(self._on_layout_about_to_change)
+            self._model.layoutChanged.disconnect(self._on_layout_changed)
+            self._model.dataChanged.disconnect(self.viewport().update)
+        self._model = model
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.modelReset.connect(self._on_model_reset)
+        model.layoutAboutToBeChanged.connect(self._on_layout_about_to_change)
+        model.layoutChanged.connect(self._on_layout_changed)
+        model.dataChanged.connect(self.viewport().update)
+        self._on_model_reset()
+
+    def append_lines(self, lines) -> int:
+        """追加已格式化的文本行，见 ReceiveLogModel.append_lines"""
+        return self._model.append_lines(lines)
+
+    def append_records(self, records) -> int:
+        """追加原始记录，见 ReceiveLogModel.append_records"""
+        return self._model.append_records(records)
+
+    # ---- 与 QTextEdit 兼容的方法 ----
+
+    def append(self, text: str):
+        self._model.append_lines([text])
+
+    def clear(self):
+        self._model.clear()
+
+    def toPlainText(self) -> str:
+        return self._model.text()
+
+    # ---- tail-follow 与滚动 ----
+
+    @property
+    def follow_tail(self) -> bool:
+        return self._follow_tail
+
+    def set_follow_tail(self, follow: bool):
+        """开启时立即滚动到底部"""
+        if follow:
+            self.scroll_to_bottom()
+        elif self._follow_tail:
+            self._follow_tail = False
+            self.followTailChanged.emit(False)
+
+    def scroll_to_bottom(self):
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
+        self._set_follow_tail(True)
+
+    def scroll_to_row(self, row: int, center: bool = True):
+        """让第 row 行可见，center 为 True 且该行不在视口内时把它放到视口中间"""
+        bar = self.verticalScrollBar()
+        top = bar.value()
+        visible = self._visible_rows()
+        if top <= row < top + visible:
+            return
+        bar.setValue(row - visible // 2 if center else row)
+
+    def _visible_rows(self) -> int:
+        """视口内能完整显示的行数"""
+        return max(1, self.viewport().height() // self._line_height)
+
+    def _set_follow_tail(self, follow: bool):
+        if follow != self._follow_tail:
+            self._follow_tail = follow
+            self.followTailChanged.emit(follow)
+
+    def _on_vertical_scroll(self, value):
+        self._set_follow_tail(value >= self.verticalScrollBar().maximum())
+        self.viewport().update()
+
+    def _update_scrollbars(self):
+        visible = self._visible_rows()
+        vbar = self.verticalScrollBar()
+        vbar.setPageStep(visible)
+        vbar.setSingleStep(1)
+        vbar.setRange(0, max(0, self._model.rowCount() - visible))
+        hbar = self.horizontalScrollBar()
+        hbar.setPageStep(self.viewport().width())
+        hbar.setSingleStep(max(1, self.fontMetrics().averageCharWidth()))
+        hbar.setRange(0, max(0, self._max_width + 2 * TEXT_MARGIN - self.viewport().width()))
+
+    def _on_rows_inserted(self, parent, first, last):
+        follow = self._follow_tail
+        self._update_scrollbars()
+        if follow:
+            self.scroll_to_bottom()
+        if first < self.verticalScrollBar().value() + self._visible_rows() + 1:
+            self.viewport().update()
+
+    def _on_rows_removed(self, parent, first, last):
+        count = last - first + 1
+        if first == 0 and not self._follow_tail:
+            # 头部丢弃的行使后续行号整体前移，保持视口内容不动
+            bar = self.verticalScrollBar()
+            bar.setValue(bar.value() - count)
+        self._anchor = self._shift_position(self._anchor, first, count)
+        self._cursor = self._shift_position(self._cursor, first, count)
+        if self._anchor is None or self._cursor is None:
+            self._anchor = self._cursor = None
+        if self._current_match is not None:
+            row, start, end = self._current_match
+            self._current_match = (row - count, start, end) if row > last else None
+        follow = self._follow_tail
+        self._update_scrollbars()
+        if follow:
+            self.scroll_to_bottom()
+        self.viewport().update()
+
+    @staticmethod
+    def _shift_position(position, first, count):
+        if position is None or position[0] < first:
+            return position
+        if position[0] < first + count:
+            return None
+        return (position[0] - count, position[1])
+
+    def _on_layout_about_to_change(self, *args):
+        # 显示设置变化后各记录的行数可能改变，记住顶部的记录以便恢复位置
+        top = self.verticalScrollBar().value()
+        self._layout_anchor = self._model.locate(top)[0] if top < self._model.rowCount() else None
+        self._anchor = self._cursor = None
+        self._current_match = None
+
+    def _on_layout_changed(self, *args):
+        follow = self._follow_tail
+        self._max_width = 0
+        self._update_scrollbars()
+        if follow:
+            self.scroll_to_bottom()
+        elif self._layout_anchor is not None:
+            self.verticalScrollBar().setValue(self._model.record_row(self._layout_anchor))
+        self.viewport().update()
+
+    def _on_model_reset(self):
+        self._anchor = self._cursor = None
+        self._current_match = None
+        self._max_width = 0
+        self._update_scrollbars()
+        self.scroll_to_bottom()
+        self.viewport().update()
+
+    # ---- 搜索 ----
+
+    def find_all(self, regex) -> list:
+        """在全部历史中查找，见 ReceiveLogModel.find_all"""
+        return self._model.find_all(regex)
+
+    def set_highlight_pattern(self, regex):
+        """高亮可见行中的全部匹配，regex 为 None 时取消高亮"""
+        self._highlight = regex
+        if regex is None:
+            self._current_match = None
+        self.viewport().update()
+
+    def set_current_match(self, row: int, start: int, end: int):
+        """选中并显示一个搜索结果"""
+        self._current_match = (row, start, end)
+        self._anchor = (row, start)
+        self._cursor = (row, end)
+        self.scroll_to_row(row)
+        self._ensure_column_visible(row, start, end)
+        self.viewport().update()
+
+    def _ensure_column_visible(self, row, start, end):
+        text = self._model.row_text(row)
+        metrics = self.fontMetrics()
+        left = metrics.horizontalAdvance(text[:start])
+        right = left + metrics.horizontalAdvance(text[start:end])
+        self._max_width = max(self._max_width, metrics.horizontalAdvance(text))
+        self._update_scrollbars()
+        bar = self.horizontalScrollBar()
+        width = self.viewport().width() - 2 * TEXT_MARGIN
+        if left < bar.value() or right > bar.value() + width:
+            bar.setValue(left - width // 3)
+
+    # ---- 选择与复制 ----
+
+    def has_selection(self) -> bool:
+        return self._anchor is not None and self._cursor is not None and self._anchor != self._cursor
+
+    def selected_text(self) -> str:
+        if not self.has_selection():
+            return ""
+        (first_row, first_col), (last_row, last_col) = sorted((self._anchor, self._cursor))
+        rows = self._model.rows(first_row, last_row + 1)
+        if len(rows) == 1:
+            return rows[0][first_col:last_col]
+        rows[0] = rows[0][first_col:]
+        rows[-1] = rows[-1][:last_col]
+        return "\n".join(rows)
+
+    def copy(self):
+        if self.has_selection():
+            QGuiApplication.clipboard().setText(self.selected_text())
+
+    def select_all(self):
+        count = self._model.rowCount()
+        if count:
+            self._anchor = (0, 0)
+            self._cursor = (count - 1, len(self._model.row_text(count - 1)))
+            self.viewport().update()
+
+    def _position_at(self, point):
+        """视口坐标对应的 (行, 列)，没有数据时返回 None"""
+        count = self._model.rowCount()
+        if not count:
+            return None
+        row = self.verticalScrollBar().value() + point.y() // self._line_height
+        row = min(max(row, 0), count - 1)
+        text = self._model.row_text(row)
+        x = point.x() - TEXT_MARGIN + self.horizontalScrollBar().value()
+        metrics = self.fontMetrics()
+        # 二分查找 x 所在的字符边界
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high) // 2
+            if metrics.horizontalAdvance(text[:mid + 1]) - metrics.horizontalAdvance(text[mid]) / 2 <= x:
+                low = mid + 1
+            else:
+                high = mid
+        return (row, low)
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return super().mousePressEvent(event)
+        position = self._position_at(event.position().toPoint())
+        if position is not None:
+            if not (event.modifiers() & Qt.ShiftModifier) or self._anchor is None:
+                self._anchor = position
+            self._cursor = position
+            self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        if not (event.buttons() & Qt.LeftButton) or self._anchor is None:
+            return super().mouseMoveEvent(event)
+        point = event.position().toPoint()
+        # 拖出视口时逐行滚动
+        bar = self.verticalScrollBar()
+        if point.y() < 0:
+            bar.setValue(bar.value() - 1)
+        elif point.y() > self.viewport().height():
+            bar.setValue(bar.value() + 1)
+        position = self._position_at(point)
+        if position is not None:
+            self._cursor = position
+            self.viewport().update()
+
+    def mouseDoubleClickEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return super().mouseDoubleClickEvent(event)
+        position = self._position_at(event.position().toPoint())
+        if position is not None:
+            row = position[0]
+            self._anchor = (row, 0)
+            self._cursor = (row, len(self._model.row_text(row)))
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy()
+        elif event.matches(QKeySequence.SelectAll):
+            self.select_all()
+        elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            self.verticalScrollBar().setValue(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            self.scroll_to_bottom()
+        else:
+            super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy")
+        copy_action.setEnabled(self.has_selection())
+        copy_action.triggered.connect(self.copy)
+        menu.addAction("Select All").triggered.connect(self.select_all)
+        menu.addSeparator()
+        follow_action = QAction("Follow Tail", menu)
+        follow_action.setCheckable(True)
+        follow_action.setChecked(self._follow_tail)
+        follow_action.toggled.connect(self.set_follow_tail)
+        menu.addAction(follow_action)
+        menu.exec(event.globalPos())
+
+    # ---- 绘制 ----
+
+    def _update_metrics(self):
+        metrics = self.fontMetrics()
+        self._line_height = max(1, metrics.lineSpacing())
+        self._ascent = metrics.ascent()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.FontChange:
+            self._update_metrics()
+            self._max_width = 0
+            if self._model is not None:
+                self._update_scrollbars()
+        super().changeEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        follow = self._follow_tail
+        self._update_scrollbars()
+        if follow:
+            self.scroll_to_bottom()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        metrics = self.fontMetrics()
+        line_height = self._line_height
+        top = self.verticalScrollBar().value()
+        rows = self._model.rows(top, top + self.viewport().height() // line_height + 2)
+        x0 = TEXT_MARGIN - self.horizontalScrollBar().value()
+
+        if self.has_selection():
+            selection = sorted((self._anchor, self._cursor))
+        else:
+            selection = None
+
+        max_width = self._max_width
+        for i, text in enumerate(rows):
+            row = top + i
+            y = i * line_height
+            width = metrics.horizontalAdvance(text)
+            if width > max_width:
+                max_width = width
+
+            if self._highlight is not None:
+                for match in self._highlight.finditer(text):
+                    self._fill_span(painter, metrics, text, x0, y, match.start(), match.end(), MATCH_COLOR)
+            if self._current_match is not None and self._current_match[0] == row:
+                self._fill_span(painter, metrics, text, x0, y, self._current_match[1], self._current_match[2], CURRENT_MATCH_COLOR)
+
+            if selection is not None and selection[0][0] <= row <= selection[1][0]:
+                start = selection[0][1] if row == selection[0][0] else 0
+                end = selection[1][1] if row == selection[1][0] else len(text)
+                # 跨行选择时行尾多画一个字符宽度，表示选中了换行
+                extra = metrics.averageCharWidth() if row != selection[1][0] else 0
+                rect = self._span_rect(metrics, text, x0, y, start, end)
+                painter.fillRect(rect.adjusted(0, 0, extra, 0), palette.color(QPalette.Highlight))
+                painter.setPen(palette.color(QPalette.Text))
+                painter.drawText(x0, y + self._ascent, text[:start])
+                painter.setPen(palette.color(QPalette.HighlightedText))
+                painter.drawText(rect.x(), y + self._ascent, text[start:end])
+                painter.setPen(palette.color(QPalette.Text))
+                painter.drawText(rect.x() + rect.width(), y + self._ascent, text[end:])
+            else:
+                painter.setPen(palette.color(QPalette.Text))
+                painter.drawText(x0, y + self._ascent, text)
+        painter.end()
+
+        if max_width > self._max_width:
+            self._max_width = max_width
+            self._update_scrollbars()
+
+    def _span_rect(self, metrics, text, x0, y, start, end) -> QRect:
+        left = x0 + metrics.horizontalAdvance(text[:start])
+        return QRect(left, y, metrics.horizontalAdvance(text[start:end]), self._line_height)
+
+    def _fill_span(self, painter, metrics, text, x0, y, start, end, color):
+        painter.fillRect(self._span_rect(metrics, text, x0, y, start, end), color)
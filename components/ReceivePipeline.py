@@ -0,0 +1,342 @@
+"""
+接收数据处理流水线
+
+DataReceiver 只负责把串口数据写入环形缓冲区；ReceivePipeline 运行在独立的 QThread 中，
+负责从环形缓冲区取出数据、分帧（utils.framing）、推算每帧的时间戳并写入日志文件，
+最后通过 framesReady 信号把原始帧交给 GUI 线程存入 utils.line_store，显示行在可见时才格式化。
+需要格式化好的显示行时（如测试、其他消费者）仍可连接 linesReady。
+"""
+
+import time
+from bisect import bisect_right
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from middileware.Logger import Logger
+from utils import common, metrics, profiler
+from utils.framing import create_framer, DEFAULT_MAX_FRAME_SIZE, FRAMING_ENDER
+from utils.line_store import DIRECTION_RX, display_mode, timestamp_prefix, format_frame
+from utils.session_decoder import SessionDecoder, ENCODING_AUTO, DEFAULT_DETECT_BYTES
+
+logger = Logger(
+    app_name="ReceivePipeline",
+    log_dir="logs",
+    max_bytes=10 * 1024 * 1024,
+    backup_count=3
+).get_logger("ReceivePipeline")
+
+PIPELINE_MS = metrics.histogram("pipeline_batch_ms", metrics.LATENCY_BUCKETS_MS,
+                                "Time spent framing, decoding and logging one received batch")
+PIPELINE_BATCHES = metrics.counter("pipeline_batches_total", "framesReady signals emitted to the GUI thread")
+RX_FRAMES = metrics.counter("rx_frames_total", "Frames produced by the receive framer")
+RX_OVERFLOW = metrics.counter("rx_overflow_bytes_total", "Bytes dropped because the receive ring buffer was full")
+RX_DECODE_ERRORS = metrics.counter("rx_decode_errors_total", "Frames the framer could not decode (passed through raw)")
+RX_OVERSIZE_FRAMES = metrics.counter("rx_oversize_frames_total", "Frames over the maximum frame size (force-split, or dropped for SLIP/COBS)")
+
+HEX_LAYOUT_COLUMNS = "columns"  # 十六进制行 + 字符行
+HEX_LAYOUT_DUMP = "dump"        # 偏移/每行16字节/ASCII 的经典转储（见 utils.line_store.display_mode）
+
+
+def default_settings() -> dict:
+    """流水线的默认显示设置"""
+    return {
+        'show_hex': False,           # 以十六进制显示
+        'hex_layout': HEX_LAYOUT_COLUMNS,  # 十六进制显示布局：十六进制行+字符行 / 经典转储
+        'show_control_char': False,  # 显示转义后的控制字符
+        'show_timestamp': False,     # 每行添加时间戳
+        'encoding': ENCODING_AUTO,   # 接收编码，Auto 时在会话开始时检测后锁定
+        'encoding_detect_bytes': DEFAULT_DETECT_BYTES,  # 自动检测编码使用的字节数
+        'framing': FRAMING_ENDER,    # 分帧方式，见 utils.framing.create_framer
+        'ender': b"\r\n",            # 分段结束符，为空时每批数据直接输出
+        'frame_length': 16,          # FixedLength 分帧的帧长
+        'length_prefix_size': 2,     # LengthPrefixed 分帧的长度头字节数
+        'frame_idle_timeout_ms': 30,  # 未完成行的输出超时 / IdleTimeout 分帧的空闲时间
+        'max_frame_size': DEFAULT_MAX_FRAME_SIZE,  # 单帧最大字节数
+        'time_per_byte': 10 / 115200,  # 每字节传输时间（秒），用于推算行内时间戳
+        'log_file': None,            # 日志文件路径，为空时不写日志
+        'session_log': None,         # 结构化会话日志（utils.session_log.SessionLog），为空时不写
+    }
+
+
+class ReceivePipeline(QObject):
+    """
+    在工作线程中把环形缓冲区里的原始数据整理成显示行
+
+    设置由 GUI 线程通过 update_settings() 整体替换（字典快照），工作线程每处理一批数据
+    只读取一次当前快照，因此不需要加锁。分帧相关设置变化时重建分帧器。
+    """
+    # 原始帧记录 list[(帧数据, 数据流偏移, Unix时间戳, DIRECTION_RX, 上一帧带入的字节数)] 和已锁定的接收编码（检测中为 None）
+    framesReady = Signal(list, object)
+    # 格式化好的显示行（list[str]），format_lines 为 False 时不发出
+    linesReady = Signal(list)
+
+    # 影响分帧器的设置项，变化时重建分帧器
+    FRAMER_SETTINGS = ('framing', 'ender', 'frame_length', 'length_prefix_size', 'frame_idle_timeout_ms', 'max_frame_size')
+
+    def __init__(self, ring=None, settings: dict = None):
+        super().__init__()
+        self.ring = ring
+        # 是否格式化显示行并发出 linesReady；显示区按需格式化时关闭，只在写日志时格式化
+        self.format_lines = True
+        self._settings = dict(default_settings(), **(settings or {}))
+        self._reported_overflow_bytes = 0
+        self._flush_timer = None
+        self.framer = None
+        self._framer_key = None
+        self.decoder = None
+        self._decoder_key = None
+        self._stream_offset = 0  # 已喂给分帧器的累计字节数
+        # 未成帧数据的读取时刻记录（块结束的数据流偏移 / 读取时刻ns，并行数组）
+        self._mark_ends = []
+        self._mark_times = []
+        self._ensure_framer(self._settings)
+        self._ensure_decoder(self._settings)
+
+    def update_settings(self, settings: dict):
+        """替换显示设置快照（可在任意线程调用）"""
+        self._settings = dict(default_settings(), **settings)
+
+    def _ensure_framer(self, settings: dict):
+        """按设置创建分帧器，分帧设置变化时丢弃未完成的数据并重建"""
+        key = tuple(settings[name] for name in self.FRAMER_SETTINGS)
+        if key == self._framer_key:
+            return
+        if self.framer is not None:
+            self.reset()
+        self.framer = create_framer(
+            settings['framing'],
+            ender=settings['ender'],
+            frame_length=settings['frame_length'],
+            length_prefix_size=settings['length_prefix_size'],
+            idle_timeout_ms=settings['frame_idle_timeout_ms'],
+            max_frame_size=settings['max_frame_size'],
+            byte_time=settings['time_per_byte'],
+        )
+        # 新分帧器的偏移和错误计数从0开始计
+        self._framer_errors = (0, 0)
+        self._stream_offset = 0
+        self._mark_ends = []
+        self._mark_times = []
+        self._framer_key = key
+
+    def _ensure_decoder(self, settings: dict):
+        """按设置创建会话解码器，编码设置变化时重新检测"""
+        key = (settings['encoding'], settings['encoding_detect_bytes'])
+        if key == self._decoder_key:
+            return
+        try:
+            self.decoder = SessionDecoder(settings['encoding'], settings['encoding_detect_bytes'])
+        except LookupError:
+            logger.warning(f"Unknown receive encoding: {settings['encoding']}, falling back to auto detection")
+            self.decoder = SessionDecoder(ENCODING_AUTO, settings['encoding_detect_bytes'])
+        self._decoder_key = key
+
+    @Slot()
+    def reset(self):
+        """丢弃分帧器中未完成的数据、解码器中未完成的字符及其读取时刻记录"""
+        if self.framer is not None:
+            self.framer.reset()
+        if self.decoder is not None:
+            self.decoder.reset()
+        self._mark_ends = []
+        self._mark_times = []
+        self._stop_flush_timer()
+
+    @Slot(object)
+    def process_available(self, write_offset=None):
+        """
+        DataReceiver 通知环形缓冲区已写到 write_offset，一次取走全部已记录读取时刻的数据并处理
+        """
+        if self.ring is None:
+            return
+        profiler.sync("ReceivePipeline")
+        data, chunk_ends, chunk_times = self.ring.read_marked()
+
+        # 消费者跟不上时环形缓冲区会丢弃数据，这里报告精确的丢弃字节数
+        overflow = self.ring.overflow_bytes
+        if overflow != self._reported_overflow_bytes:
+            logger.warning(f"Receive buffer overflow: {overflow - self._reported_overflow_bytes} bytes dropped ({overflow} total)")
+            RX_OVERFLOW.inc(max(overflow - self._reported_overflow_bytes, 0))
+            self._reported_overflow_bytes = overflow
+
+        if data:
+            self.process(data, chunk_ends, chunk_times)
+
+    @Slot()
+    def flush(self):
+        """强制输出分帧器中尚未完成的数据（超时处理）"""
+        self._emit_frames(self.framer.flush(), self._settings)
+
+    def process(self, data: bytes, chunk_ends, chunk_times) -> list:
+        """
+        把一批原始数据分帧，发出 framesReady，按需整理成显示行写入日志并发出 linesReady
+
+        参数：
+        data (bytes): 原始数据
+        chunk_ends (Sequence[int]): 各读取块的结束偏移（相对 data 起点）
+        chunk_times (Sequence[int]): 各读取块的读取时刻（time.monotonic_ns）
+
+        返回：
+        list[str]: 本批生成的显示行（未格式化时为空）
+        """
+        start = time.perf_counter_ns()
+        settings = self._settings
+        self._ensure_framer(settings)
+        self._ensure_decoder(settings)
+        framer = self.framer
+
+        # 读取时刻换算为数据流偏移，供成帧后推算每帧的时间戳
+        base = self._stream_offset
+        self._mark_ends.extend(base + end for end in chunk_ends)
+        self._mark_times.extend(chunk_times)
+        self._stream_offset += len(data)
+
+        if framer.time_based:
+            # 按读取块逐块喂入，分帧器根据读取时刻判断空闲间隔
+            frames = []
+            view = memoryview(data)
+            chunk_start = 0
+            for end, timestamp_ns in zip(chunk_ends, chunk_times):
+                frames.extend(framer.feed(view[chunk_start:end], timestamp_ns))
+                chunk_start = end
+        else:
+            frames = framer.feed(data)
+
+        # 有未完成的数据时（重新）启动超时定时器
+        self._stop_flush_timer()
+        if framer.pending and framer.flush_timeout_ms is not None:
+            self._start_flush_timer(framer.flush_timeout_ms)
+
+        lines = self._emit_frames(frames, settings)
+        self._count_framer_errors()
+        PIPELINE_MS.observe((time.perf_counter_ns() - start) / 1e6)
+        return lines
+
+    def _count_framer_errors(self):
+        """把分帧器的解码错误和强制切分计数的增量计入指标"""
+        framer = self.framer
+        errors = (getattr(framer, "decode_errors", 0), framer.oversize_frames)
+        if errors != self._framer_errors:
+            RX_DECODE_ERRORS.inc(errors[0] - self._framer_errors[0])
+            RX_OVERSIZE_FRAMES.inc(errors[1] - self._framer_errors[1])
+            self._framer_errors = errors
+
+    def _emit_frames(self, frames, settings: dict) -> list:
+        """推算帧时间戳、按需格式化并写日志，发出 framesReady / linesReady，然后丢弃已不再需要的读取时刻记录"""
+        timestamps_ns = self.frame_timestamps_ns(frames, self._mark_ends, self._mark_times, settings['time_per_byte'])
+        timestamps = [common.monotonic_ns_to_epoch(timestamp_ns) for timestamp_ns in timestamps_ns]
+
+        # 只保留仍未成帧数据所在读取块的记录
+        pending_offset = self.framer.pending_offset
+        keep_from = bisect_right(self._mark_ends, pending_offset)
+        if keep_from:
+            del self._mark_ends[:keep_from]
+            del self._mark_times[:keep_from]
+
+        decoder = self.decoder
+        detecting = decoder.detecting
+        log_file = settings['log_file']
+        session_log = settings['session_log']
+        # 解码器有状态，每帧只解码一次，格式化和会话日志沿用；同时记下每帧开始时解码器中缓存的上一帧字节数，
+        # 显示区据此按同样的方式解码跨帧的多字节字符
+        carries = []
+        texts = []
+        for _, frame in frames:
+            carries.append(decoder.pending)
+            texts.append(decoder.decode(frame))
+        if self.format_lines or log_file:
+            lines = self.format_frames(frames, timestamps, settings, decoder, texts)
+        else:
+            lines = []
+        if detecting and not decoder.detecting:
+            logger.info(f"Receive encoding locked to {decoder.encoding}")
+
+        # 文件日志记录：整批一次放入日志写入队列，由写入线程落盘（拆行规则与 print_write 相同）
+        if log_file and lines:
+            common.log_write_lines([piece for line in lines for piece in line.strip().split("\n")], log_file)
+        if session_log is not None:
+            session_log.write_frames(frames, timestamps_ns, texts)
+
+        if frames:
+            RX_FRAMES.inc(len(frames))
+            PIPELINE_BATCHES.inc()
+            self.framesReady.emit(
+                [(frame, offset, timestamp, DIRECTION_RX, carry)
+                 for (offset, frame), timestamp, carry in zip(frames, timestamps, carries)],
+                decoder.encoding,
+            )
+        if lines and self.format_lines:
+            self.linesReady.emit(lines)
+        return lines
+
+    @staticmethod
+    def frame_timestamps_ns(frames, mark_ends, mark_times, time_per_byte: float) -> list:
+        """
+        推算每帧第一个字节的到达时刻
+
+        参数：
+        frames (list[tuple[int, bytes]]): (数据流偏移, 帧数据)
+        mark_ends (Sequence[int]): 读取块结束的数据流偏移
+        mark_times (Sequence[int]): 读取块读取时刻（time.monotonic_ns）
+        time_per_byte (float): 每字节传输时间（秒）
+
+        返回：
+        list[int]: 到达时刻（time.monotonic_ns）
+        """
+        if not mark_ends:
+            return [time.monotonic_ns()] * len(frames)
+        return [common.frame_timestamp_ns(offset, time_per_byte, mark_ends, mark_times) for offset, _ in frames]
+
+    @staticmethod
+    def frame_timestamps(frames, mark_ends, mark_times, time_per_byte: float) -> list:
+        """
+        推算每帧第一个字节的到达时刻，参数同 frame_timestamps_ns
+
+        返回：
+        list[float]: Unix 时间戳（秒）
+        """
+        return [
+            common.monotonic_ns_to_epoch(timestamp_ns)
+            for timestamp_ns in ReceivePipeline.frame_timestamps_ns(frames, mark_ends, mark_times, time_per_byte)
+        ]
+
+    @staticmethod
+    def format_frames(frames, timestamps, settings: dict, decoder=None, texts=None) -> list:
+        """
+        按显示设置把帧格式化为显示行
+
+        参数：
+        frames (list[tuple[int, bytes]]): (数据流偏移, 帧数据)
+        timestamps (Sequence[float]): 各帧的 Unix 时间戳
+        settings (dict): 显示设置快照
+        decoder (SessionDecoder): 会话解码器，为空时每帧单独用 common.force_decode 解码
+        texts (Sequence[str]): 已解码的各帧文本，不为空时不再解码
+
+        返回：
+        list[str]: 显示行
+        """
+        control_char_mode, hex_dump = display_mode(settings)
+        show_timestamp = settings['show_timestamp']
+        lines = []
+        for i, ((offset, frame), timestamp) in enumerate(zip(frames, timestamps)):
+            prefix = timestamp_prefix(timestamp) if show_timestamp else ""
+            if control_char_mode is None:
+                text = None
+            elif texts is not None:
+                text = texts[i]
+            elif decoder is None:
+                text = common.force_decode(frame, handle_control_char='ignore')
+            else:
+                text = decoder.decode(frame)
+            lines.append(format_frame(frame, offset, prefix, control_char_mode, hex_dump, text))
+        return lines
+
+    def _start_flush_timer(self, timeout_ms):
+        # 定时器需在工作线程中创建，首次使用时才创建
+        if self._flush_timer is None:
+            self._flush_timer = QTimer(self)
+            self._flush_timer.setSingleShot(True)
+            self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start(timeout_ms)
+
+    def _stop_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
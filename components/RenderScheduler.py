@@ -0,0 +1,136 @@
+"""
+显示刷新调度器
+
+接收处理流水线每输出一批帧记录就会发出一次 framesReady，高速率时每秒可达数百次。
+RenderScheduler 把这些行先累积起来，由单个 QTimer 按最大帧率（MaxFPS）统一交给显示区，
+每帧最多追加和重绘一次，显示的 CPU 开销不再随数据包数量增长；数据接收和处理仍全速进行。
+没有待显示的行时定时器自动停止，空闲时不占用 CPU。
+"""
+
+import time
+from PySide6.QtCore import Qt, QObject, QTimer
+from utils import metrics
+
+DEFAULT_MAX_FPS = 30
+
+RENDER_MS = metrics.histogram("render_frame_ms", metrics.LATENCY_BUCKETS_MS, "Time spent rendering one display frame")
+LINES_RENDERED = metrics.counter("lines_rendered_total", "Display lines appended to the receive view")
+
+
+class RenderScheduler(QObject):
+    """
+    按最大帧率合并显示行的调度器（GUI线程中使用）
+
+    属性：
+    frames_rendered (int): 已渲染的帧数
+    lines_rendered (int): 已渲染的行数
+    last_lines_per_frame (int): 最近一帧的行数
+    max_lines_per_frame (int): 单帧最多的行数
+    batches_coalesced (int): 被合并进同一帧、没有单独重绘的批次数
+    frames_skipped (int): GUI线程繁忙导致错过的帧数
+    """
+
+    def __init__(self, render, max_fps: int = DEFAULT_MAX_FPS, parent=None):
+        """
+        参数：
+        render (Callable[[list], Any]): 每帧调用一次，参数为本帧累积的全部显示行
+        max_fps (int): 最大帧率
+        parent (QObject): 父对象
+        """
+        super().__init__(parent)
+        self._render = render
+        self._pending = []
+        self._pending_batches = 0
+        self._last_frame_time = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_frame)
+        self.interval_ms = 0
+        self.set_max_fps(max_fps)
+        self.reset_stats()
+
+    def set_max_fps(self, max_fps: int):
+        """修改最大帧率，小于等于0时按默认帧率处理"""
+        max_fps = int(max_fps) if max_fps and int(max_fps) > 0 else DEFAULT_MAX_FPS
+        self.max_fps = max_fps
+        self.interval_ms = max(1, round(1000 / max_fps))
+        self._timer.setInterval(self.interval_ms)
+
+    def submit(self, lines: list):
+        """加入待显示的行，在下一帧统一渲染"""
+        if not lines:
+            return
+        self._pending.extend(lines)
+        self._pending_batches += 1
+        if not self._timer.isActive():
+            self._last_frame_time = None
+            self._timer.start()
+
+    def flush(self):
+        """立即渲染所有待显示的行"""
+        if self._pending:
+            self._render_pending()
+
+    def clear(self):
+        """丢弃所有待显示的行"""
+        self._pending = []
+        self._pending_batches = 0
+        self._timer.stop()
+
+    @property
+    def pending_lines(self) -> int:
+        return len(self._pending)
+
+    def reset_stats(self):
+        self.frames_rendered = 0
+        self.lines_rendered = 0
+        self.last_lines_per_frame = 0
+        self.max_lines_per_frame = 0
+        self.batches_coalesced = 0
+        self.frames_skipped = 0
+
+    def stats(self) -> dict:
+        """返回统计计数的快照"""
+        frames = self.frames_rendered
+        return {
+            'max_fps': self.max_fps,
+            'frames_rendered': frames,
+            'lines_rendered': self.lines_rendered,
+            'lines_per_frame': self.lines_rendered / frames if frames else 0.0,
+            'last_lines_per_frame': self.last_lines_per_frame,
+            'max_lines_per_frame': self.max_lines_per_frame,
+            'batches_coalesced': self.batches_coalesced,
+            'frames_skipped': self.frames_skipped,
+            'pending_lines': len(self._pending),
+        }
+
+    def _on_frame(self):
+        now = time.monotonic()
+        if self._last_frame_time is not None:
+            # 两次定时器触发间隔超过一帧，说明GUI线程繁忙，中间的帧被跳过
+            missed = int((now - self._last_frame_time) * 1000 / self.interval_ms + 0.5) - 1
+            if missed > 0:
+                self.frames_skipped += missed
+        self._last_frame_time = now
+
+        if not self._pending:
+            # 没有新数据，停止定时器直到下一次 submit
+            self._timer.stop()
+            return
+        self._render_pending()
+
+    def _render_pending(self):
+        lines = self._pending
+        self.batches_coalesced += self._pending_batches - 1
+        self._pending = []
+        self._pending_batches = 0
+
+        self.frames_rendered += 1
+        self.lines_rendered += len(lines)
+        self.last_lines_per_frame = len(lines)
+        if len(lines) > self.max_lines_per_frame:
+            self.max_lines_per_frame = len(lines)
+        LINES_RENDERED.inc(len(lines))
+        start = time.perf_counter_ns()
+        self._render(lines)
+        RENDER_MS.observe((time.perf_counter_ns() - start) / 1e6)
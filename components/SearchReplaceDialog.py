@@ -8,12 +8,15 @@ from PySide6.QtGui import (
     QTextCursor, QTextCharFormat, QColor, QAction
 )
 from PySide6.QtCore import Qt
+from components.ReceiveLogView import ReceiveLogView
 
 class SearchReplaceDialog(QDialog):
     def __init__(self, text_edit, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Search and Replace")
         self.text_edit = text_edit
+        # 接收区是只读的虚拟化视图：在模型中逐行搜索，只高亮可见行，不支持替换
+        self.is_log_view = isinstance(text_edit, ReceiveLogView)
         self.last_search = ""
         self.results = []
         self.current_result_index = -1
@@ -69,6 +72,9 @@ class SearchReplaceDialog(QDialog):
         self.next_button.clicked.connect(self.next_match)
         self.replace_button.clicked.connect(self.replace)
         self.replace_all_button.clicked.connect(self.replace_all)
+        if self.is_log_view:
+            for widget in (self.replace_input, self.replace_button, self.replace_all_button):
+                widget.setEnabled(False)
 
         # Initialize highlighting
         self.highlight_format = QTextCharFormat()
@@ -93,11 +99,13 @@ class SearchReplaceDialog(QDialog):
         return text
 
     def clear_highlights(self):
+        if self.is_log_view:
+            self.text_edit.set_highlight_pattern(None)
+            return
         self.text_edit.setExtraSelections([])
 
     def find_text(self):
         pattern = self.get_pattern()
-        text = self.text_edit.toPlainText()
         flags = self.get_flags()
 
         try:
@@ -106,6 +114,18 @@ class SearchReplaceDialog(QDialog):
             QMessageBox.warning(self, "Regex Error", f"Invalid regular expression: {e}")
             return
 
+        if self.is_log_view:
+            # 结果为 (行号, 起始列, 结束列)
+            self.results = self.text_edit.find_all(regex)
+            self.current_result_index = -1
+            if self.results:
+                self.text_edit.set_highlight_pattern(regex)
+                self.next_match()
+            else:
+                self.clear_highlights()
+            return
+
+        text = self.text_edit.toPlainText()
         self.results = [match.span() for match in regex.finditer(text)]
         self.current_result_index = -1
         self.highlight_matches()
@@ -146,6 +166,11 @@ class SearchReplaceDialog(QDialog):
         else:
             self.current_result_index = (self.current_result_index + direction) % len(self.results)
 
+        if self.is_log_view:
+            self.text_edit.set_current_match(*self.results[self.current_result_index])
+            self.text_edit.setFocus(Qt.TabFocusReason)
+            return
+
         start, end = self.results[self.current_result_index]
         cursor = self.text_edit.textCursor()
         cursor.setPosition(start)
@@ -166,7 +191,7 @@ class SearchReplaceDialog(QDialog):
         self.navigate_match(1)
 
     def replace(self):
-        if not self.results or self.current_result_index == -1:
+        if self.is_log_view or not self.results or self.current_result_index == -1:
             return
 
         start, end = self.results[self.current_result_index]
@@ -205,6 +230,8 @@ class SearchReplaceDialog(QDialog):
         self.find_text()  # Refresh search results
 
     def replace_all(self):
+        if self.is_log_view:
+            return
         text = self.text_edit.toPlainText()
         pattern = self.get_pattern()
         replacement = self.replace_input.text()
@@ -539,7 +539,7 @@ QPushButton:pressed {{
 }}
 
 /* 输入框样式 */
-QLineEdit, QTextEdit, QPlainTextEdit {{
+QLineEdit, QTextEdit, QPlainTextEdit, ReceiveLogView {{
     border: 2px solid #ced4da;
     padding: 6px 10px;
     border-radius: {config['border_radius']}px;
@@ -549,7 +549,7 @@ QLineEdit, QTextEdit, QPlainTextEdit {{
     selection-color: white;
 }}
 
-QLineEdit:focus, QTextEdit:focus, QPlainTextEdit:focus {{
+QLineEdit:focus, QTextEdit:focus, QPlainTextEdit:focus, ReceiveLogView:focus {{
     border-color: {config['accent_color']};
 }}
 
@@ -1,13 +1,17 @@
 import logging
 import os
+import re
 import sys
+import queue
+import atexit
 import traceback
 import threading
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
 from typing import Optional, Union, Dict, Any
 from functools import wraps
+from utils import metrics, profiler
 
 try:
     from PySide6.QtCore import QObject, Signal, QTimer, QThread
@@ -15,6 +19,215 @@ try:
 except ImportError:
     PYSIDE6_AVAILABLE = False
 
+# UI错误日志只收录包含这些关键字的错误（不区分大小写）
+UI_ERROR_PATTERN = re.compile(r"widget|signal|slot|layout|style|qss|pyside|qt", re.IGNORECASE)
+
+
+class UIErrorFilter(logging.Filter):
+    """只放行与UI相关的错误，在日志线程中执行"""
+
+    def filter(self, record):
+        return UI_ERROR_PATTERN.search(record.getMessage()) is not None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按调用位置（logger名称、文件、行号）和级别限流的令牌桶，挂在入队处理器上，在调用线程中执行
+
+    不按消息内容区分：本项目多以 f-string 记录日志，同一行产生的风暴每条文本都不同，按内容区分就无法限流。
+    带异常信息的 CRITICAL 记录（未捕获的异常）总是放行。
+
+    每个调用位置最多连续放行 burst 条，之后每秒补充 rate 条；被丢弃的记录只计数。
+    该位置下一条放行的记录末尾附上 "(suppressed N similar messages)"；若不再有记录放行，
+    安静 summary_interval 秒后（或 Logger.flush 时）补发一条汇总记录，经 on_summary 放入队列。
+
+    属性：
+    rate (float): 每个调用位置每秒补充的令牌数
+    burst (int): 令牌桶容量
+    suppressed_total (int): 累计丢弃的记录数
+    on_summary (Callable[[logging.LogRecord], None] | None): 接收汇总记录
+    """
+
+    SWEEP_INTERVAL = 1.0  # 检查安静的调用位置的间隔（秒）
+    IDLE_EXPIRE = 60.0    # 令牌已满且空闲超过该时间的调用位置被移除
+
+    def __init__(self, rate: float = 2.0, burst: int = 20, summary_interval: float = 5.0, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.suppressed_total = 0
+        self.on_summary = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (调用位置, 级别) -> [令牌数, 最后一次记录的时刻, 丢弃数, 最后一条被丢弃的记录]
+        self._buckets = {}
+        self._next_sweep = 0.0
+
+    def filter(self, record):
+        if record.exc_info and record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.pathname, record.lineno, record.levelno)
+        now = self._clock()
+        suppressed = 0
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0, None]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+                suppressed, bucket[2], bucket[3] = bucket[2], 0, None
+            else:
+                bucket[2] += 1
+                bucket[3] = record
+                self.suppressed_total += 1
+            summaries = self._collect(now, False) if now >= self._next_sweep else ()
+        if suppressed:
+            record.msg = f"{record.getMessage()} (suppressed {suppressed} similar messages)"
+            record.args = None
+        self._publish(summaries)
+        return allowed
+
+    def drain(self):
+        """立即为所有仍有丢弃计数的调用位置补发汇总记录"""
+        with self._lock:
+            summaries = self._collect(self._clock(), True)
+        self._publish(summaries)
+
+    def _collect(self, now: float, force: bool) -> list:
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        summaries = []
+        for key, bucket in list(self._buckets.items()):
+            idle = now - bucket[1]
+            if bucket[2] and (force or idle >= self.summary_interval):
+                summaries.append(self._summary(bucket[3], bucket[2]))
+                bucket[2], bucket[3] = 0, None
+            elif not bucket[2] and idle >= self.IDLE_EXPIRE:
+                del self._buckets[key]
+        return summaries
+
+    @staticmethod
+    def _summary(last, count: int) -> logging.LogRecord:
+        """以最后一条被丢弃的记录为模板生成汇总记录（保留其logger、级别和位置）"""
+        summary = logging.makeLogRecord(last.__dict__)
+        summary.msg = f"suppressed {count} similar messages, last: {last.getMessage()}"
+        summary.args = None
+        summary.exc_info = None
+        summary.exc_text = None
+        summary.stack_info = None
+        return summary
+
+    def _publish(self, summaries):
+        if summaries and self.on_summary is not None:
+            for summary in summaries:
+                self.on_summary(summary)
+
+
+class ExceptionBackoff:
+    """
+    连续重复的相同异常的指数退避：第一次不等待，之后从 initial 开始每次加倍，最长 maximum 秒
+
+    属性：
+    repeats (int): 当前异常连续重复的次数（第一次为 0）
+    """
+
+    def __init__(self, initial: float = 0.01, maximum: float = 1.0, factor: float = 2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.repeats = 0
+        self._key = None
+
+    def record(self, error: BaseException) -> float:
+        """
+        记录一次异常
+
+        参数：
+        error (BaseException): 捕获的异常，类型和消息都相同时视为重复
+
+        返回：
+        float: 调用方应等待的时间（秒）
+        """
+        key = (type(error), str(error))
+        if key != self._key:
+            self._key = key
+            self.repeats = 0
+            return 0.0
+        self.repeats += 1
+        return min(self.maximum, self.initial * self.factor ** (self.repeats - 1))
+
+    def reset(self):
+        """恢复正常后调用，下一次异常重新从不等待开始"""
+        if self._key is not None:
+            self._key = None
+            self.repeats = 0
+
+
+class _EnqueueHandler(QueueHandler):
+    """
+    只把日志记录放入队列的处理器，挂在根logger和独立文件的组件logger上
+
+    标准 QueueHandler.prepare 会在调用线程中格式化消息和异常堆栈；这里只合并 %-格式化参数
+    （参数可能是之后会被修改的对象），格式化和输出都留给日志线程。
+    """
+
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _RoutingListener(QueueListener):
+    """
+    日志线程：从队列中取出记录，格式化并写入文件和控制台
+
+    有独立文件的组件logger（routes 中的名称）只写入自己的处理器，其余记录写入根处理器。
+    """
+
+    def __init__(self, log_queue, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.routes = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._monitor, name="LogListener", daemon=True)
+        self._thread.start()
+
+    def handle(self, record):
+        profiler.sync("LogListener")
+        flushed = getattr(record, "flush_event", None)
+        if flushed is not None:
+            for handler in self.all_handlers():
+                handler.flush()
+            flushed.set()
+            return
+        for handler in self.routes.get(record.name, self.handlers):
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception:
+                    handler.handleError(record)
+
+    def all_handlers(self):
+        handlers = list(self.handlers)
+        for routed in self.routes.values():
+            handlers.extend(routed)
+        return handlers
+
+    def add_handler(self, handler, name: str = None):
+        """添加处理器；name 为空时添加到根处理器。替换整个元组，日志线程不需要加锁"""
+        if name is None:
+            self.handlers = self.handlers + (handler,)
+        else:
+            routes = dict(self.routes)
+            routes[name] = routes.get(name, ()) + (handler,)
+            self.routes = routes
+
+
 class Logger:
     """
     高级日志中间件 - 专为PySide6应用优化
@@ -27,9 +240,14 @@ class Logger:
     6. PySide6 UI错误专项跟踪
     7. 线程安全的Qt信号处理
     8. UI性能监控
+    9. 按调用位置限流，抑制日志风暴
+
+    各线程只通过 QueueHandler 把记录放入队列，格式化、过滤以及所有文件和控制台输出都由
+    一个日志线程（QueueListener）完成，记录日志不会阻塞在磁盘或控制台上。
     """
     
     _instance = None
+    _active = None  # 正在运行日志线程的实例，重新初始化时先停止它
     
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -44,6 +262,8 @@ class Logger:
         backup_count: int = 5,
         gui_signal=None,
         enable_ui_monitoring: bool = True,
+        rate_limit: Optional[float] = 2.0,
+        rate_burst: int = 20,
     ):
         if hasattr(self, '_initialized'):  # 确保单例只初始化一次
             return
@@ -83,9 +303,21 @@ class Logger:
             '%(asctime)s - UI-%(levelname)s - %(message)s - [Thread:%(thread)d]'
         )
         
-        # 初始化根logger
+        # 初始化根logger：只挂一个入队处理器，其余处理器都交给日志线程
         self.root_logger = logging.getLogger()
         self.root_logger.setLevel(logging.DEBUG)
+        if Logger._active is not None:
+            Logger._active.shutdown()
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = _EnqueueHandler(self.queue)
+        self.listener = _RoutingListener(self.queue)
+        # 按调用位置限流，日志风暴在入队前就被丢弃（rate_limit 为空时不限流）
+        self.rate_limiter = None
+        if rate_limit:
+            self.rate_limiter = RateLimitFilter(rate_limit, rate_burst)
+            self.rate_limiter.on_summary = self.queue_handler.enqueue
+            self.queue_handler.addFilter(self.rate_limiter)
+        self.root_logger.addHandler(self.queue_handler)
         
         # 添加文件处理器
         self._setup_file_handler(max_bytes, backup_count)
@@ -106,7 +338,10 @@ class Logger:
         # 初始化UI监控
         if enable_ui_monitoring and PYSIDE6_AVAILABLE:
             self._setup_ui_monitoring()
-            
+
+        self.listener.start()
+        Logger._active = self
+        atexit.register(self.shutdown)
         self._initialized = True
     
     def _setup_file_handler(self, max_bytes, backup_count):
@@ -115,11 +350,11 @@ class Logger:
             filename=os.path.join(self.log_dir, f"{self.app_name}.log"),
             maxBytes=max_bytes,
             backupCount=backup_count,
-            encoding='utf-8'
+            encoding='utf-8',
+            delay=True  # 在日志线程中第一次写入时才打开文件
         )
         file_handler.setFormatter(self.formatter)
-        file_handler.flush()  # 强制刷新
-        self.root_logger.addHandler(file_handler)
+        self.listener.add_handler(file_handler)
     
     def _setup_ui_handlers(self):
         """配置UI专用日志处理器"""
@@ -128,26 +363,22 @@ class Logger:
             filename=os.path.join(self.log_dir, f"{self.app_name}_ui_errors.log"),
             maxBytes=5 * 1024 * 1024,  # 5MB
             backupCount=3,
-            encoding='utf-8'
+            encoding='utf-8',
+            delay=True
         )
         ui_error_handler.setFormatter(self.ui_formatter)
         ui_error_handler.setLevel(logging.ERROR)
         
-        # 添加过滤器，只处理UI相关错误
-        class UIErrorFilter(logging.Filter):
-            def filter(self, record):
-                ui_keywords = ['widget', 'signal', 'slot', 'layout', 'style', 'qss', 'pyside', 'qt']
-                message = record.getMessage().lower()
-                return any(keyword in message for keyword in ui_keywords)
-        
+        # 添加过滤器，只处理UI相关错误（日志线程先检查级别，只有错误才会执行过滤）
         ui_error_handler.addFilter(UIErrorFilter())
-        self.root_logger.addHandler(ui_error_handler)
+        self.listener.add_handler(ui_error_handler)
         
         # 性能监控日志
         if self.enable_ui_monitoring:
             perf_handler = logging.FileHandler(
                 os.path.join(self.log_dir, f"{self.app_name}_performance.log"),
-                encoding='utf-8'
+                encoding='utf-8',
+                delay=True
             )
             perf_formatter = logging.Formatter(
                 '%(asctime)s - PERF - %(message)s'
@@ -157,9 +388,8 @@ class Logger:
             
             # 性能专用logger
             self.perf_logger = logging.getLogger('performance')
-            self.perf_logger.addHandler(perf_handler)
+            self._route(self.perf_logger, perf_handler)
             self.perf_logger.setLevel(logging.INFO)
-            self.perf_logger.propagate = False
     
     def _setup_ui_monitoring(self):
         """设置UI性能监控"""
@@ -200,7 +430,7 @@ class Logger:
         """配置控制台日志"""
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(self.formatter)
-        self.root_logger.addHandler(console_handler)
+        self.listener.add_handler(console_handler)
     
     def _setup_gui_handler(self):
         """配置GUI日志显示"""
@@ -215,7 +445,7 @@ class Logger:
                 
         gui_handler = GuiLogHandler(self.gui_signal)
         gui_handler.setFormatter(self.formatter)
-        self.root_logger.addHandler(gui_handler)
+        self.listener.add_handler(gui_handler)
     
     def _setup_exception_handler(self):
         """捕获未处理异常"""
@@ -230,6 +460,55 @@ class Logger:
             )
             
         sys.excepthook = handle_exception
+
+    def _route(self, logger: logging.Logger, handler: logging.Handler):
+        """让组件logger只写入自己的处理器：记录经同一个队列交给日志线程，不再传播到根logger"""
+        if self.queue_handler not in logger.handlers:
+            # 清除上一个实例留下的入队处理器
+            for old in [h for h in logger.handlers if isinstance(h, _EnqueueHandler)]:
+                logger.removeHandler(old)
+            logger.addHandler(self.queue_handler)
+        logger.propagate = False
+        self.listener.add_handler(handler, logger.name)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        等待日志线程处理完此前放入队列的记录，并刷新所有处理器
+
+        参数：
+        timeout (float): 最长等待时间（秒）
+
+        返回：
+        bool: 是否在超时前完成
+        """
+        if self.listener._thread is None:
+            return True
+        if self.rate_limiter is not None:
+            self.rate_limiter.drain()
+        flushed = threading.Event()
+        record = logging.makeLogRecord({"flush_event": flushed})
+        self.queue.put_nowait(record)
+        return flushed.wait(timeout)
+
+    def shutdown(self):
+        """处理完队列中剩余的记录后停止日志线程并关闭所有处理器，可重复调用"""
+        if self.listener._thread is None:
+            return
+        if self.rate_limiter is not None:
+            self.rate_limiter.drain()
+        self.root_logger.removeHandler(self.queue_handler)
+        for name in self.listener.routes:
+            logger = logging.getLogger(name)
+            logger.removeHandler(self.queue_handler)
+            logger.propagate = True
+        self.listener.stop()
+        for handler in self.listener.all_handlers():
+            try:
+                handler.close()
+            except Exception:
+                pass
+        if Logger._active is self:
+            Logger._active = None
     
     @classmethod
     def get_logger(cls, name: str, filename: Optional[str] = None, level=logging.DEBUG) -> logging.Logger:
@@ -239,19 +518,18 @@ class Logger:
         
         logger = logging.getLogger(name)
         
-        if not logger.hasHandlers():  # 确保不会重复添加处理器
-            if filename:
-                # 为该实例添加独立的文件处理器
-                handler = logging.FileHandler(
-                    os.path.join(cls._instance.log_dir, filename),
-                    encoding='utf-8'
-                )
-                handler.setLevel(level)
-                handler.setFormatter(cls._instance.formatter)
-                logger.addHandler(handler)
-            
+        # 确保不会重复添加处理器
+        if filename and name not in cls._instance.listener.routes:
+            # 为该实例添加独立的文件处理器，由日志线程写入，不再传播到根logger
+            handler = logging.FileHandler(
+                os.path.join(cls._instance.log_dir, filename),
+                encoding='utf-8',
+                delay=True
+            )
+            handler.setLevel(level)
+            handler.setFormatter(cls._instance.formatter)
+            cls._instance._route(logger, handler)
             logger.setLevel(level)
-            logger.propagate = False  # 禁用日志传播
         
         return logger
     
@@ -265,11 +543,12 @@ class Logger:
         """动态添加文件日志"""
         handler = logging.FileHandler(
             os.path.join(self.log_dir, filename),
-            encoding='utf-8'
+            encoding='utf-8',
+            delay=True
         )
         handler.setLevel(level)
         handler.setFormatter(self.formatter)
-        self.root_logger.addHandler(handler)
+        self.listener.add_handler(handler)
         return handler
 
     # PySide6 专用日志方法
@@ -370,6 +649,16 @@ def catch_ui_exceptions(widget_name: str = None):
         return wrapper
     return decorator
 
+def _suppressed_log_records():
+    active = Logger._active
+    if active is None or active.rate_limiter is None:
+        return 0
+    return active.rate_limiter.suppressed_total
+
+
+metrics.gauge("log_records_suppressed", "Log records dropped by the per-call-site rate limiter",
+              _suppressed_log_records)
+
 # 快捷访问方法（可选）
 def init_logging(*args, **kwargs):
     """初始化日志中间件（快捷方式）"""
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+控制字符处理性能测试
+对比旧的逐字符实现与 utils.common 中基于 str.translate / 正则切分的实现，
+以 1 MB 混合串口流量（AT指令回复、制表符、回车覆盖、退格、响铃、中文、二进制控制字符）
+模拟 1 MB/s 的接收速率，输出每秒数据所需的处理时间。
+
+用法：
+    python scripts/bench_control_chars.py --size-kb 1024
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import common
+
+
+def legacy_escape_control_characters(text: str, escape_extended: bool = False) -> str:
+    """旧版 common.escape_control_characters，作为对照"""
+    control_chars = {
+        '\r': '\\r',
+        '\n': '\\n',
+        '\t': '\\t',
+        '\v': '\\v',
+        '\f': '\\f',
+        '\b': '\\b',
+        '\a': '\\a',
+        '\\': '\\\\',
+    }
+    result = ""
+    for char in text:
+        if char in control_chars:
+            result += control_chars[char]
+        elif ord(char) < 32:
+            result += f'\\x{ord(char):02x}'
+        elif escape_extended and (ord(char) > 126 or not char.isprintable()):
+            if ord(char) <= 0xFF:
+                result += f'\\x{ord(char):02x}'
+            else:
+                result += f'\\u{ord(char):04x}'
+        else:
+            result += char
+    return result
+
+
+def legacy_remove_control_characters(s: str, ignore_crlf: bool = True) -> str:
+    """旧版 common.remove_control_characters，作为对照"""
+    return ''.join(
+        c for c in s
+        if not (ord(c) <= 0xFF and (ord(c) < 32 or ord(c) >= 127) and not (ignore_crlf and c in '\r\n'))
+    )
+
+
+def legacy_interpret_control_characters(s: str) -> str:
+    """旧版 common.interpret_control_characters，作为对照"""
+    result = []
+    cursor = 0
+    for char in s:
+        if char == '\r':
+            cursor = 0
+        elif char == '\n':
+            result.append('\n')
+            cursor = 0
+        elif char == '\t':
+            spaces = 8 - (cursor % 8)
+            result.append(' ' * spaces)
+            cursor += spaces
+        elif char == '\b':
+            if cursor > 0:
+                cursor -= 1
+                result.pop()
+        elif char == '\a':
+            result.append('[BEL]')
+            cursor += 5
+        elif char == '\x00':
+            result.append(' ')
+            cursor += 1
+        else:
+            result.append(char)
+            cursor += 1
+    return ''.join(result)
+
+
+# 混合流量的行模板
+SAMPLE_LINES = [
+    "AT+CSQ\r\n",
+    "+CSQ: 20,99\r\n",
+    "OK\r\n",
+    "+QSTAAPINFO: \"NewMar\",\"12345678\"\r\n",
+    "[I][wifi] connected, rssi=-42\r\n",
+    "name\tvalue\tunit\r\n",
+    "progress: 10%\rprogress: 55%\rprogress: 100%\r\n",
+    "typo\b\b\bext\r\n",
+    "\aALERT: threshold exceeded\r\n",
+    "温度:25℃ 湿度:60%\r\n",
+    "raw\x00\x01\x02\x1b[0m\x7f\\path\r\n",
+]
+
+
+def make_traffic(size: int, seed: int = 0) -> list:
+    """生成总长约 size 字符的混合流量，按行返回（接收流水线按行调用）"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = rng.choice(SAMPLE_LINES)
+        lines.append(line)
+        total += len(line)
+    return lines
+
+
+def bench(func, lines, repeat):
+    """返回 repeat 次中最快一次的耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark control-character rendering for escape/remove/interpret modes")
+    parser.add_argument("--size-kb", type=int, default=1024, help="amount of mixed traffic in KB (default: 1024, i.e. 1 s at 1 MB/s)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions, best time is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    lines = make_traffic(args.size_kb * 1024, args.seed)
+    cases = [
+        ("escape", legacy_escape_control_characters, common.escape_control_characters),
+        ("escape (extended)", lambda s: legacy_escape_control_characters(s, True),
+         lambda s: common.escape_control_characters(s, True)),
+        ("remove", legacy_remove_control_characters, common.remove_control_characters),
+        ("interpret", legacy_interpret_control_characters, common.interpret_control_characters),
+    ]
+
+    print(f"{len(lines)} lines, {args.size_kb} KB of mixed traffic, best of {args.repeat}")
+    print(f"{'mode':<20} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, legacy, new in cases:
+        # 先校验输出一致
+        for line in lines[:2000]:
+            assert new(line) == legacy(line), f"{name} output differs for {line!r}"
+        legacy_time = bench(legacy, lines, args.repeat)
+        new_time = bench(new, lines, args.repeat)
+        print(f"{name:<20} {legacy_time * 1000:10.1f} {new_time * 1000:10.1f} {legacy_time / new_time:7.1f}x")
+    print(f"\nAt 1 MB/s the ms columns are CPU time spent per second of traffic ({args.size_kb} KB).")
+
+
+if __name__ == "__main__":
+    main()
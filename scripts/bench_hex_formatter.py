@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+十六进制格式化性能测试
+对比旧的逐字节拼接实现（含 seg.hex()/bytes.fromhex 往返）与 utils.hex_formatter 的查表实现
+
+用法：
+    python scripts/bench_hex_formatter.py --frame-size 64 --frames 20000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hex_formatter import hex_columns, hex_string, hexdump
+
+
+def legacy_process_hex_data(hex_data: str):
+    """旧版 MyWidget._process_hex_data 的实现，作为对照"""
+    hex_bytes = bytes.fromhex(hex_data)
+    hex_line = "Received: "
+    char_line = "ASCII   : "
+    for byte in hex_bytes:
+        hex_line += f"{byte:02X} "
+        if 32 <= byte <= 126:
+            char_line += f"{chr(byte)}  "
+        elif byte == 0x0D:
+            char_line += "\\r "
+        elif byte == 0x0A:
+            char_line += "\\n "
+        elif byte == 0x09:
+            char_line += "\\t "
+        elif byte == 0x08:
+            char_line += "\\b "
+        elif byte == 0x07:
+            char_line += "\\a "
+        elif byte == 0x0C:
+            char_line += "\\f "
+        elif byte == 0x0B:
+            char_line += "\\v "
+        elif byte == 0x00:
+            char_line += "\\0 "
+        else:
+            char_line += f"\\x{byte:02x} "
+    hex_line = hex_line.strip()
+    char_line = char_line.strip()
+    max_length = max(len(hex_line), len(char_line))
+    return hex_line.ljust(max_length), char_line.ljust(max_length)
+
+
+def legacy_hex_string(data: bytes) -> str:
+    """旧版 port_read_hex/port_readline_hex 的实现，作为对照"""
+    return " ".join(f"{byte:02X}" for byte in data)
+
+
+def bench(func, frames, repeat):
+    """返回 repeat 次中最快一次的耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            func(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hex formatting used by the HEX receive view")
+    parser.add_argument("--frame-size", type=int, default=64, help="bytes per frame (default: 64)")
+    parser.add_argument("--frames", type=int, default=20000, help="number of frames (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions, best time is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    frames = [bytes(rng.getrandbits(8) for _ in range(args.frame_size)) for _ in range(args.frames)]
+    total_mb = args.frame_size * args.frames / (1024 * 1024)
+
+    # 先校验输出一致
+    for frame in frames[:1000]:
+        assert hex_columns(frame) == legacy_process_hex_data(frame.hex()), "hex_columns output differs from legacy"
+        assert hex_string(frame) == legacy_hex_string(frame), "hex_string output differs from legacy"
+
+    cases = [
+        ("columns (legacy)", lambda frame: legacy_process_hex_data(frame.hex())),
+        ("columns (table)", hex_columns),
+        ("hex string (legacy)", legacy_hex_string),
+        ("hex string (bytes.hex)", hex_string),
+        ("hexdump 16/row", hexdump),
+    ]
+    print(f"{args.frames} frames x {args.frame_size} bytes = {total_mb:.2f} MB, best of {args.repeat}")
+    results = {}
+    for name, func in cases:
+        elapsed = bench(func, frames, args.repeat)
+        results[name] = elapsed
+        print(f"{name:<24} {elapsed * 1000:9.1f} ms  {total_mb / elapsed:8.2f} MB/s")
+
+    print(f"\ncolumns speedup:    {results['columns (legacy)'] / results['columns (table)']:.1f}x")
+    print(f"hex string speedup: {results['hex string (legacy)'] / results['hex string (bytes.hex)']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+接收显示区每帧开销测试
+在不同的历史行数下，测量 ReceiveLogView 追加一批行并重绘（tail-follow）的耗时，
+以及在历史中随机跳转滚动的耗时，验证每帧开销与历史行数无关。
+
+用法：
+    QT_QPA_PLATFORM=offscreen python scripts/bench_receive_log_view.py --history 100000 1000000 10000000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from components.ReceiveLogView import ReceiveLogView, ReceiveLogModel
+
+
+def bench_history(app, history, batch, frames, seed):
+    """返回 (每帧追加+重绘平均耗时, 每次随机跳转+重绘平均耗时)，单位秒"""
+    model = ReceiveLogModel(max_lines=history + batch * frames)
+    view = ReceiveLogView(model)
+    view.resize(800, 600)
+    view.show()
+    # 预先填充历史
+    chunk = [f"[2024-01-01_00:00:00.000]+CSQ: {i % 32},99" for i in range(100000)]
+    while model.rowCount() < history:
+        model.append_lines(chunk[:history - model.rowCount()])
+    app.processEvents()
+
+    lines = [f"[2024-01-01_00:00:00.000]frame {i}" for i in range(batch)]
+    start = time.perf_counter()
+    for _ in range(frames):
+        view.append_lines(lines)
+        view.viewport().repaint()
+    append_time = (time.perf_counter() - start) / frames
+
+    rng = random.Random(seed)
+    bar = view.verticalScrollBar()
+    start = time.perf_counter()
+    for _ in range(frames):
+        bar.setValue(rng.randrange(bar.maximum() + 1))
+        view.viewport().repaint()
+    jump_time = (time.perf_counter() - start) / frames
+
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+    return append_time, jump_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-frame cost of the virtualized receive view")
+    parser.add_argument("--history", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="history sizes in lines (default: 10000 100000 1000000)")
+    parser.add_argument("--batch", type=int, default=100, help="lines appended per frame (default: 100)")
+    parser.add_argument("--frames", type=int, default=200, help="frames measured per history size (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{args.batch} lines per frame, {args.frames} frames")
+    print(f"{'history':>10} {'append+paint ms':>16} {'jump+paint ms':>14}")
+    for history in args.history:
+        append_time, jump_time = bench_history(app, history, args.batch, args.frames, args.seed)
+        print(f"{history:>10} {append_time * 1000:16.3f} {jump_time * 1000:14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+整条接收显示流水线吞吐量测试
+以尽可能快的速度回放抓包文件（replay://...?speed=max），数据依次经过 DataReceiver → ReceivePipeline →
+RenderScheduler → ReceiveLogView，与真实串口的路径完全相同。回放以 RTS/CTS 流控方式呈现，环形缓冲区满时
+读取方暂停而不丢数据，因此每次运行处理的数据完全一致，结果可以直接比较。
+未指定抓包文件时生成一份模拟设备输出的抓包。
+
+用法：
+    QT_QPA_PLATFORM=offscreen python scripts/bench_replay_pipeline.py --records 500000
+    QT_QPA_PLATFORM=offscreen python scripts/bench_replay_pipeline.py --capture logs/capture_20240101_120000.scap
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QObject, QThread, Slot
+from PySide6.QtWidgets import QApplication
+from utils import common
+from utils.capture import CaptureWriter, CaptureReader, DIRECTION_RX
+from utils.protocol_replay import replay_url
+from components.DataReceiver import DataReceiver
+from components.ReceivePipeline import ReceivePipeline
+from components.RenderScheduler import RenderScheduler
+from components.ReceiveLogView import ReceiveLogView, ReceiveLogModel
+
+
+def write_capture(path, records, seed):
+    """生成模拟设备输出的抓包，每个读取块包含若干行"""
+    rng = random.Random(seed)
+    templates = ["+CSQ: {},99", "OK", "STATUS: temp={}C vbat=3.{}V state=IDLE", "[app] heartbeat seq={}"]
+    base = time.monotonic_ns()
+    written = 0
+    with CaptureWriter(path) as capture:
+        while written < records:
+            count = min(rng.randrange(1, 32), records - written)
+            chunk = "".join(templates[rng.randrange(len(templates))].format(rng.randrange(32), rng.randrange(10),
+                                                                             written + i) + "\r\n"
+                            for i in range(count))
+            capture.write(DIRECTION_RX, chunk.encode(), monotonic_ns=base + written * 100000)
+            written += count
+
+
+class FrameSink(QObject):
+    """在GUI线程接收 framesReady，统计字节数后交给刷新调度器（与 Window.handle_frames_ready 相同）"""
+
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+        self.bytes = 0
+
+    @Slot(list, object)
+    def on_frames(self, records, encoding):
+        self.bytes += sum(len(record[0]) for record in records)
+        self.scheduler.submit(records)
+
+
+def capture_rx_bytes(path):
+    with CaptureReader(path) as reader:
+        return sum(len(payload) for _, direction, payload in reader.records() if direction == DIRECTION_RX)
+
+
+def run(app, path, ring_kb, max_fps, timeout):
+    expected = capture_rx_bytes(path)
+    port = common.port_on(replay_url(path, None), 3000000)
+    receiver = DataReceiver(port, ring_capacity=ring_kb * 1024)
+    pipeline = ReceivePipeline(receiver.ring, {'time_per_byte': 10 / 3000000})
+    pipeline.format_lines = False
+    pipeline_thread = QThread()
+    pipeline.moveToThread(pipeline_thread)
+    receiver.dataAvailable.connect(pipeline.process_available)
+
+    model = ReceiveLogModel(max_lines=0)
+    view = ReceiveLogView(model)
+    view.resize(800, 600)
+    view.show()
+    scheduler = RenderScheduler(view.append_records, max_fps=max_fps)
+    sink = FrameSink(scheduler)
+    pipeline.framesReady.connect(sink.on_frames)
+    pipeline_thread.start()
+    start = time.perf_counter()
+    receiver.start()
+    deadline = start + timeout
+    while sink.bytes < expected and time.perf_counter() < deadline:
+        app.processEvents()
+    scheduler.flush()
+    view.viewport().repaint()
+    elapsed = time.perf_counter() - start
+
+    receiver.stop_thread()
+    receiver.wait(2000)
+    pipeline_thread.quit()
+    pipeline_thread.wait(2000)
+    port.close()
+    result = {
+        'bytes': sink.bytes,
+        'expected': expected,
+        'records': len(model.store),
+        'elapsed': elapsed,
+        'overflow': receiver.overflow_bytes,
+        'render': scheduler.stats(),
+    }
+    view.close()
+    model.store.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the whole receive/display pipeline by replaying a capture")
+    parser.add_argument("--capture", help="capture file to replay (default: generate one)")
+    parser.add_argument("--records", type=int, default=200000, help="lines in the generated capture (default: 200000)")
+    parser.add_argument("--ring-kb", type=int, default=4096, help="receive ring buffer size in KB (default: 4096)")
+    parser.add_argument("--max-fps", type=int, default=30, help="render frame rate cap (default: 30)")
+    parser.add_argument("--runs", type=int, default=3, help="repetitions (default: 3)")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a run is abandoned (default: 120)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generated capture")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    path = args.capture
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench.scap")
+        write_capture(path, args.records, args.seed)
+
+    print(f"{'run':>3} {'MB/s':>8} {'records/s':>10} {'records':>9} {'overflow':>9} {'frames':>7} "
+          f"{'lines/frame':>12} {'skipped':>8}")
+    for run_index in range(args.runs):
+        result = run(app, path, args.ring_kb, args.max_fps, args.timeout)
+        render = result['render']
+        status = "" if result['bytes'] == result['expected'] else f"  incomplete: {result['bytes']}/{result['expected']} bytes"
+        print(f"{run_index + 1:>3} {result['bytes'] / result['elapsed'] / 1e6:8.2f} "
+              f"{result['records'] / result['elapsed']:10.0f} {result['records']:9} {result['overflow']:9} "
+              f"{render['frames_rendered']:7} {render['lines_per_frame']:12.1f} {render['frames_skipped']:8}{status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+接收历史内存占用测试
+用重复性较高的设备输出（状态行、+CSQ 轮询）填充 LineStore，比较不同压缩方式下每条记录占用的内存、
+压缩率、追加耗时和滚动读取时的解压缓存命中率，并与每行保存一个格式化 str 的做法对比。
+
+用法：
+    python scripts/bench_scrollback_memory.py --records 1000000 --compression zlib lzma none
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.line_store import LineStore, DIRECTION_RX
+
+
+def device_lines(count, seed):
+    """生成模拟的设备输出"""
+    rng = random.Random(seed)
+    templates = [
+        "+CSQ: {},99",
+        "OK",
+        "STATUS: temp={}C vbat=3.{}V state=IDLE",
+        "+CREG: 0,1",
+        "[app] heartbeat seq={}",
+    ]
+    for i in range(count):
+        template = templates[rng.randrange(len(templates))]
+        yield (template.format(rng.randrange(32), rng.randrange(10), i) + "\r\n").encode()
+
+
+def bench_store(lines, compression, block_records):
+    tracemalloc.start()
+    store = LineStore(compression=compression, block_records=block_records)
+    start = time.perf_counter()
+    for offset, line in enumerate(lines):
+        store.append(line, offset, 1700000000.0 + offset * 0.001, DIRECTION_RX)
+    store.flush()
+    append_time = time.perf_counter() - start
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # 模拟滚动浏览：随机跳到历史中的位置，读取一屏 50 行
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(200):
+        first = rng.randrange(len(store) - 50)
+        for index in range(first, first + 50):
+            store.data(index)
+    page_time = (time.perf_counter() - start) / 200
+    return store.stats(), traced, append_time, page_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrollback memory use with compressed cold blocks")
+    parser.add_argument("--records", type=int, default=1000000, help="records to store (default: 1000000)")
+    parser.add_argument("--compression", nargs="+", default=["zlib", "lzma", "none"],
+                        help="codecs to compare (default: zlib lzma none)")
+    parser.add_argument("--block-records", type=int, default=4096, help="records per cold block (default: 4096)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    lines = list(device_lines(args.records, args.seed))
+    raw = sum(map(len, lines))
+    print(f"{args.records} records, {raw / args.records:.1f} bytes per record on average")
+
+    tracemalloc.start()
+    formatted = [f"[2024-01-01_00:00:00.000]{line.decode().rstrip()}" for line in lines]
+    str_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del formatted
+    print(f"{'list[str]':>10} {str_bytes / args.records:8.1f} B/record")
+
+    print(f"{'codec':>10} {'B/record':>8} {'ratio':>7} {'append s':>9} {'page ms':>8} {'hit rate':>9}")
+    for compression in args.compression:
+        stats, traced, append_time, page_time = bench_store(lines, compression, args.block_records)
+        print(f"{compression:>10} {traced / args.records:8.1f} {stats['compression_ratio']:7.2f} "
+              f"{append_time:9.2f} {page_time * 1000:8.3f} {stats['cache_hit_rate']:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+日志时间戳索引工具
+为旧的接收日志重建 .tsidx 索引（按 MoreSettings.TimestampRegex 匹配时间戳），或通过索引二分查找，
+直接取出某个时间范围内的行，不需要扫描整个文件。
+
+用法：
+    python scripts/log_tsidx.py build logs/received.log
+    python scripts/log_tsidx.py info logs/received.log
+    python scripts/log_tsidx.py range logs/received.log --start "2024-01-01 03:12:40" --end "2024-01-01 03:12:50"
+"""
+
+import os
+import sys
+import time
+import argparse
+import configparser
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log_index import (TimestampIndex, TimestampMatcher, build_index, read_time_range, parse_timestamp,
+                             index_path, DEFAULT_STRIDE)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FALLBACK_REGEX = r"\[20(.*?)\]"
+
+
+def configured_regex() -> str:
+    """配置文件中的 MoreSettings.TimestampRegex"""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read([os.path.join(PROJECT_ROOT, "config", "config_default"), os.path.join(PROJECT_ROOT, "config.ini")],
+                encoding="utf-8")
+    return config.get("MoreSettings", "TimestampRegex", fallback=FALLBACK_REGEX)
+
+
+def parse_time_argument(text: str) -> float:
+    timestamp = parse_timestamp(text)
+    if timestamp is None:
+        raise argparse.ArgumentTypeError(f"invalid time: {text!r}, expected YYYY-MM-DD HH:MM:SS[.mmm]")
+    return timestamp
+
+
+def format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}"
+
+
+def command_build(args):
+    start = time.perf_counter()
+    index = build_index(args.log, args.regex, args.stride, args.encoding)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(args.log)
+    print(f"{index_path(args.log)}: {len(index)} entries for {size / 1e6:.1f} MB in {elapsed:.2f} s")
+
+
+def command_info(args):
+    index = TimestampIndex.load(args.log)
+    if index is None:
+        print(f"{args.log}: no usable index, run 'build' first")
+        return 1
+    print(f"{len(index)} entries, stride {index.stride} bytes")
+    if len(index):
+        print(f"first: {format_time(index.times[0])} @ {index.offsets[0]}")
+        print(f"last:  {format_time(index.times[-1])} @ {index.offsets[-1]}")
+
+
+def command_range(args):
+    matcher = TimestampMatcher(args.regex, args.encoding)
+    index = TimestampIndex.load(args.log)
+    if index is None:
+        print(f"{args.log}: no usable index, scanning from the start", file=sys.stderr)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for _, line in read_time_range(args.log, args.start, args.end, matcher, index):
+            output.write(line)
+    finally:
+        if args.output:
+            output.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query timestamp indexes (.tsidx) of received-data logs")
+    parser.add_argument("--regex", default=None, help="timestamp regex (default: MoreSettings.TimestampRegex)")
+    parser.add_argument("--encoding", default="utf-8", help="log encoding (default: utf-8)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="rebuild the index of a log file")
+    build.add_argument("log")
+    build.add_argument("--stride", type=int, default=DEFAULT_STRIDE, help="bytes between index entries")
+    build.set_defaults(func=command_build)
+
+    info = subparsers.add_parser("info", help="show the index of a log file")
+    info.add_argument("log")
+    info.set_defaults(func=command_info)
+
+    range_parser = subparsers.add_parser("range", help="print the lines within a time range")
+    range_parser.add_argument("log")
+    range_parser.add_argument("--start", type=parse_time_argument, help="first time, YYYY-MM-DD HH:MM:SS[.mmm]")
+    range_parser.add_argument("--end", type=parse_time_argument, help="last time, YYYY-MM-DD HH:MM:SS[.mmm]")
+    range_parser.add_argument("--output", help="write to a file instead of stdout")
+    range_parser.set_defaults(func=command_range)
+
+    args = parser.parse_args()
+    if args.regex is None:
+        args.regex = configured_regex()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
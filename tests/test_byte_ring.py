@@ -0,0 +1,84 @@
+import sys
+import os
+import io
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.byte_ring import ByteRing
+
+
+class TestByteRing(unittest.TestCase):
+
+    def test_fill_and_read(self):
+        """readinto写入后按偏移读取"""
+        ring = ByteRing(16)
+        source = io.BytesIO(b"hello world")
+        self.assertEqual(ring.fill_from(source, 11), 11)
+        self.assertEqual(ring.write_offset, 11)
+        self.assertEqual(ring.read(5), b"hello")
+        self.assertEqual(ring.read(), b" world")
+        self.assertEqual(ring.readable(), 0)
+
+    def test_wrap_around(self):
+        """跨越缓冲区末尾的数据应完整取出"""
+        ring = ByteRing(8)
+        ring.write(b"abcdef")
+        self.assertEqual(ring.read(), b"abcdef")
+        ring.fill_from(io.BytesIO(b"123456"), 6)
+        self.assertEqual(ring.read(), b"123456")
+        self.assertEqual(ring.write_offset, 12)
+
+    def test_slices_view_written_data(self):
+        """生产者按偏移查看刚写入的数据，回绕时分成两段，不改变读偏移"""
+        ring = ByteRing(8)
+        ring.write(b"abcdef")
+        ring.read()
+        ring.write(b"123456")
+        self.assertEqual([bytes(part) for part in ring.slices(6, 12)], [b"12", b"3456"])
+        self.assertEqual([bytes(part) for part in ring.slices(8, 10)], [b"34"])
+        self.assertEqual(ring.slices(12, 12), [])
+        self.assertEqual(ring.read(), b"123456")
+
+    def test_overflow_is_counted(self):
+        """缓冲区写满后丢弃的数据应被精确计数"""
+        ring = ByteRing(8)
+        self.assertEqual(ring.fill_from(io.BytesIO(b"0123456789ab"), 12), 12)
+        self.assertEqual(ring.readable(), 8)
+        self.assertEqual(ring.overflow_bytes, 4)
+        self.assertEqual(ring.read(), b"01234567")
+
+        self.assertEqual(ring.write(b"xxxxxxxxxx"), 8)
+        self.assertEqual(ring.overflow_bytes, 6)
+
+
+    def test_read_marked_returns_chunk_times(self):
+        """read_marked应返回与数据对应的块结束偏移和读取时刻"""
+        ring = ByteRing(16)
+        ring.write(b"abc")
+        ring.mark(100)
+        ring.write(b"defg")
+        ring.mark(200)
+        ring.write(b"hi")  # 尚未mark，不应被取出
+        data, ends, times = ring.read_marked()
+        self.assertEqual(data, b"abcdefg")
+        self.assertEqual(list(ends), [3, 7])
+        self.assertEqual(list(times), [100, 200])
+        ring.mark(300)
+        data, ends, times = ring.read_marked()
+        self.assertEqual(data, b"hi")
+        self.assertEqual(list(ends), [2])
+        self.assertEqual(list(times), [300])
+
+    def test_read_marked_skips_cleared_marks(self):
+        """clear()越过的读取记录应被丢弃"""
+        ring = ByteRing(16)
+        ring.write(b"abc")
+        ring.mark(100)
+        ring.clear()
+        self.assertEqual(ring.read_marked()[0], b"")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
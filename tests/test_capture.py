@@ -0,0 +1,117 @@
+import io
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.capture import CaptureWriter, CaptureReader, DIRECTION_RX, DIRECTION_TX, FILE_HEADER
+
+
+class ShortWriteFile(io.FileIO):
+    """每次最多写入 7 字节的原始文件，模拟 FileIO.write 的部分写入"""
+
+    def write(self, data):
+        return super().write(bytes(memoryview(data)[:7]))
+
+
+def short_write_open(path, mode, buffering=-1):
+    raw = ShortWriteFile(path, "w")
+    return raw if buffering == 0 else io.BufferedWriter(raw)
+
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.scap")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, count, **kwargs):
+        writer = CaptureWriter(self.path, **kwargs)
+        for i in range(count):
+            writer.write(DIRECTION_TX if i % 10 == 0 else DIRECTION_RX, b"chunk %d\r\n" % i, monotonic_ns=1000 * i)
+        writer.close()
+        return writer
+
+    def test_round_trip(self):
+        """记录的时刻、方向和数据原样读回，数据为 mmap 切片"""
+        writer = CaptureWriter(self.path)
+        writer.write(DIRECTION_RX, b"+CSQ: ", memoryview(b"20,99\r\n"), monotonic_ns=5000)
+        writer.write(DIRECTION_TX, b"AT\r\n", monotonic_ns=9000)
+        writer.write(DIRECTION_RX, b"", monotonic_ns=9500)
+        writer.close()
+        self.assertEqual((writer.records, writer.payload_bytes), (3, 17))
+
+        with CaptureReader(self.path) as reader:
+            self.assertTrue(reader.complete)
+            self.assertEqual(reader.record_count, 3)
+            records = list(reader.records())
+            self.assertIsInstance(records[0][2], memoryview)
+            self.assertEqual([(direction, bytes(data)) for _, direction, data in records],
+                             [(DIRECTION_RX, b"+CSQ: 20,99\r\n"), (DIRECTION_TX, b"AT\r\n"), (DIRECTION_RX, b"")])
+            self.assertEqual(records[1][0] - records[0][0], 4000)
+            self.assertEqual(reader.end_ns - reader.start_ns, 4500)
+            del records
+
+    def test_sparse_index_seeks_by_time(self):
+        """索引按文件距离稀疏记录，按时刻读取时从之前最近的索引项开始"""
+        self._write(1000, index_stride=1024)
+        with CaptureReader(self.path) as reader:
+            self.assertGreater(len(reader.index_times), 10)
+            self.assertLess(len(reader.index_times), 100)
+            start_ns = reader.start_ns + 700 * 1000
+            self.assertLessEqual(reader.offset_for_time(start_ns), reader.offset_for_time(start_ns + 1))
+            records = [bytes(data) for _, _, data in reader.records(start_ns)]
+            self.assertEqual(records[0], b"chunk 700\r\n")
+            self.assertEqual(len(records), 300)
+
+    def test_truncated_file_is_scanned(self):
+        """异常退出（没有索引尾部、最后一条记录不完整）时顺序扫描重建索引"""
+        self._write(1000, block_size=512)
+        with open(self.path, "rb") as file:
+            data = file.read()
+        with open(self.path, "wb") as file:
+            file.write(data[:FILE_HEADER.size + 5000])
+
+        with CaptureReader(self.path) as reader:
+            self.assertFalse(reader.complete)
+            records = [bytes(data) for _, _, data in reader.records()]
+            self.assertEqual(reader.record_count, len(records))
+            self.assertEqual(records, [b"chunk %d\r\n" % i for i in range(len(records))])
+
+    def test_full_buffer_drops_instead_of_blocking(self):
+        """缓冲区达到上限时丢弃记录并计数"""
+        writer = CaptureWriter(self.path, block_size=1 << 30, max_buffer=100, flush_interval=60)
+        accepted = sum(writer.write(DIRECTION_RX, b"x" * 30) for _ in range(10))
+        writer.close()
+        self.assertEqual(accepted, 3)
+        self.assertEqual((writer.dropped_records, writer.dropped_bytes), (7, 210))
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(reader.record_count, 3)
+
+    def test_partial_raw_writes_are_completed(self):
+        """底层文件只写入一部分时，记录、索引和尾部仍完整写入"""
+        with mock.patch("utils.capture.open", short_write_open, create=True):
+            self._write(200, index_stride=256, block_size=100)
+        with CaptureReader(self.path) as reader:
+            self.assertTrue(reader.complete)
+            self.assertEqual(reader.record_count, 200)
+            self.assertEqual([bytes(data) for _, _, data in reader.records()][-1], b"chunk 199\r\n")
+
+    def test_rejects_other_files(self):
+        """不是抓包文件时抛出 ValueError"""
+        with open(self.path, "wb") as file:
+            file.write(b"not a capture file at all")
+        with self.assertRaises(ValueError):
+            CaptureReader(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
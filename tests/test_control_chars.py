@@ -0,0 +1,66 @@
+import sys
+import os
+import random
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import common
+from scripts.bench_control_chars import (
+    SAMPLE_LINES,
+    legacy_escape_control_characters,
+    legacy_remove_control_characters,
+    legacy_interpret_control_characters,
+)
+
+
+def _random_texts(count=2000, seed=7):
+    """随机生成含控制字符、扩展ASCII和中文的文本"""
+    rng = random.Random(seed)
+    alphabet = "ab \\\r\n\t\b\a\x00\x01\x1b\x7f\x80\xa0\xff中℃​\U0001F600"
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(count)]
+
+
+class TestControlCharacters(unittest.TestCase):
+
+    def setUp(self):
+        self.samples = list(SAMPLE_LINES) + ["", "\t\b", "x\r\t\b\b", "abc\b\b\bxyz", "\a\b\a"] + _random_texts()
+
+    def test_escape_matches_legacy(self):
+        """escape模式与旧实现输出一致"""
+        for text in self.samples:
+            self.assertEqual(common.escape_control_characters(text), legacy_escape_control_characters(text))
+            self.assertEqual(common.escape_control_characters(text, True), legacy_escape_control_characters(text, True))
+
+    def test_remove_matches_legacy(self):
+        """remove模式与旧实现输出一致"""
+        for text in self.samples:
+            self.assertEqual(common.remove_control_characters(text), legacy_remove_control_characters(text))
+            self.assertEqual(common.remove_control_characters(text, False), legacy_remove_control_characters(text, False))
+
+    def test_interpret_matches_legacy(self):
+        """interpret模式与旧实现输出一致；旧实现退格越过开头时抛出异常，新实现忽略多余的退格"""
+        for text in self.samples:
+            try:
+                expected = legacy_interpret_control_characters(text)
+            except IndexError:
+                self.assertIsInstance(common.interpret_control_characters(text), str)
+                continue
+            self.assertEqual(common.interpret_control_characters(text), expected)
+
+    def test_interpret_backspace_units(self):
+        """退格整体删除制表符和[BEL]，普通字符只删一个"""
+        self.assertEqual(common.interpret_control_characters("ab\tc\b\b"), "ab")
+        self.assertEqual(common.interpret_control_characters("x\a\by"), "xy")
+        self.assertEqual(common.interpret_control_characters("50%\r100%\r\n"), "50%100%\n")
+
+    def test_interpret_backspace_past_start(self):
+        """退格删除了整个制表符或[BEL]后，多余的退格不会抛出异常"""
+        self.assertEqual(common.interpret_control_characters("\t\b\b"), "")
+        self.assertEqual(common.interpret_control_characters("\a\b\b\bok"), "ok")
+        self.assertEqual(common.handle_control_characters("\t\b\b\t", "interpret"), " " * 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,161 @@
+import sys
+import os
+import time
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+from PySide6.QtCore import Qt
+from components.DataReceiver import DataReceiver
+from utils.capture import CaptureWriter, CaptureReader, DIRECTION_RX, DIRECTION_TX
+
+
+class TestDataReceiver(unittest.TestCase):
+
+    def setUp(self):
+        """使用pyserial的loop://回环端口模拟串口"""
+        self.port = serial.serial_for_url("loop://", baudrate=115200)
+        self.received = []
+
+    def tearDown(self):
+        self.port.close()
+
+    def _run_receiver(self, receive_mode, payload, wait=0.5, capture=None):
+        receiver = DataReceiver(self.port, receive_mode=receive_mode)
+        receiver.capture = capture
+        # 收到偏移通知后从环形缓冲区取数据
+        receiver.dataAvailable.connect(lambda offset: self.received.append(receiver.ring.read(offset)), Qt.DirectConnection)
+        receiver.start()
+        try:
+            self.port.write(payload)
+            deadline = time.time() + wait
+            while time.time() < deadline and b"".join(self.received) != payload:
+                time.sleep(0.01)
+        finally:
+            receiver.stop_thread()
+            receiver.wait(2000)
+        return receiver
+
+    def test_read_timing_derived_from_baudrate(self):
+        """批超时和读取大小应由波特率推导"""
+        receiver = DataReceiver(self.port)
+        self.assertAlmostEqual(receiver.byte_transmission_time(), 10 / 115200)
+        self.assertGreaterEqual(receiver.batch_timeout, 0.002)
+        self.assertLessEqual(receiver.batch_timeout, 0.02)
+        self.assertEqual(receiver.read_batch_size, 256)
+
+        self.port.baudrate = 3000000
+        fast_receiver = DataReceiver(self.port)
+        self.assertEqual(fast_receiver.batch_timeout, 0.002)
+        self.assertEqual(fast_receiver.read_batch_size, 6000)
+
+    def test_blocking_mode_receives_data(self):
+        """阻塞读模式应完整收到数据"""
+        payload = b"AT+CSQ\r\n+CSQ: 20,99\r\nOK\r\n"
+        self._run_receiver(DataReceiver.RECEIVE_MODE_BLOCKING, payload)
+        self.assertEqual(b"".join(self.received), payload)
+
+    def test_read_timeout_not_changed_while_receiving(self):
+        """读超时只在启动前设置一次，接收多批数据期间不再重新配置串口"""
+        class CountingLoop(type(self.port)):
+            timeout_sets = []
+
+            @property
+            def timeout(self):
+                return serial.SerialBase.timeout.fget(self)
+
+            @timeout.setter
+            def timeout(self, value):
+                CountingLoop.timeout_sets.append(value)
+                serial.SerialBase.timeout.fset(self, value)
+
+        self.port.close()
+        self.port = CountingLoop("loop://", baudrate=115200)
+        del CountingLoop.timeout_sets[:]
+        receiver = DataReceiver(self.port)
+        self.assertEqual(CountingLoop.timeout_sets, [receiver.idle_read_timeout])
+        receiver.dataAvailable.connect(lambda offset: self.received.append(receiver.ring.read(offset)),
+                                       Qt.DirectConnection)
+        receiver.start()
+        try:
+            payload = b""
+            for i in range(5):
+                chunk = f"burst {i}\r\n".encode()
+                payload += chunk
+                self.port.write(chunk)
+                time.sleep(0.03)
+            deadline = time.time() + 1
+            while time.time() < deadline and b"".join(self.received) != payload:
+                time.sleep(0.01)
+        finally:
+            receiver.stop_thread()
+            receiver.wait(2000)
+        self.assertEqual(b"".join(self.received), payload)
+        self.assertEqual(len(CountingLoop.timeout_sets), 1)
+
+    def test_polling_mode_still_available(self):
+        """轮询模式作为回退仍然可用"""
+        payload = b"hello\r\n"
+        self._run_receiver(DataReceiver.RECEIVE_MODE_POLLING, payload)
+        self.assertEqual(b"".join(self.received), payload)
+
+    def test_raw_capture_written_in_receive_thread(self):
+        """开启原始抓包时每个读取块原样写入抓包文件，发送数据记为 TX"""
+        path = os.path.join(tempfile.mkdtemp(), "session.scap")
+        capture = CaptureWriter(path)
+        capture.write(DIRECTION_TX, b"AT+CSQ\r\n")
+        payload = b"+CSQ: 20,99\r\nOK\r\n"
+        self._run_receiver(DataReceiver.RECEIVE_MODE_BLOCKING, payload, capture=capture)
+        capture.close()
+
+        with CaptureReader(path) as reader:
+            records = [(direction, bytes(data)) for _, direction, data in reader.records()]
+        self.assertEqual(records[0], (DIRECTION_TX, b"AT+CSQ\r\n"))
+        self.assertTrue(all(direction == DIRECTION_RX for direction, _ in records[1:]))
+        self.assertEqual(b"".join(data for _, data in records[1:]), payload)
+
+    def test_overflow_counted_when_consumer_falls_behind(self):
+        """消费者不取数据时，超出缓冲区容量的字节应被精确计数"""
+        receiver = DataReceiver(self.port, ring_capacity=16)
+        receiver.start()
+        try:
+            self.port.write(b"x" * 40)
+            deadline = time.time() + 1
+            while time.time() < deadline and receiver.ring.write_offset + receiver.overflow_bytes < 40:
+                time.sleep(0.01)
+        finally:
+            receiver.stop_thread()
+            receiver.wait(2000)
+        self.assertEqual(receiver.ring.readable(), 16)
+        self.assertEqual(receiver.overflow_bytes, 24)
+
+    def test_repeated_exception_backs_off(self):
+        """串口被拔出后每次读取都失败时只通知一次，之后指数退避，不会空转占满CPU"""
+        class UnpluggedPort:
+            baudrate = 115200
+            is_open = True
+            reads = 0
+
+            @property
+            def in_waiting(self):
+                UnpluggedPort.reads += 1
+                raise serial.SerialException("ClearCommError failed (PermissionError(13, 'Access is denied.'))")
+
+        errors = []
+        receiver = DataReceiver(UnpluggedPort(), receive_mode=DataReceiver.RECEIVE_MODE_POLLING)
+        receiver.exceptionOccurred.connect(errors.append, Qt.DirectConnection)
+        receiver.start()
+        time.sleep(0.5)
+        receiver.stop_thread()
+        receiver.wait(2000)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("Access is denied", errors[0])
+        self.assertLess(UnpluggedPort.reads, 20)
+        self.assertGreater(receiver.exception_backoff.repeats, 3)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
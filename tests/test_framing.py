@@ -0,0 +1,111 @@
+import sys
+import os
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.framing import (
+    create_framer, cobs_encode, cobs_decode,
+    EnderFramer, FixedLengthFramer, LengthPrefixedFramer, IdleTimeoutFramer,
+    SlipFramer, CobsFramer, PassthroughFramer,
+)
+
+
+class TestFraming(unittest.TestCase):
+
+    def test_ender_across_chunks(self):
+        """结束符被拆在两次喂入之间时仍能正确成帧，帧偏移为数据流偏移"""
+        framer = EnderFramer(b"\r\n")
+        self.assertEqual(framer.feed(b"AT\r"), [])
+        self.assertEqual(framer.feed(b"\nOK\r\n\r\npar"), [(0, b"AT\r\n"), (4, b"OK\r\n"), (8, b"\r\n")])
+        self.assertEqual(framer.pending, 3)
+        self.assertEqual(framer.pending_offset, 10)
+        self.assertEqual(framer.flush(), [(10, b"par")])
+        self.assertEqual(framer.pending, 0)
+
+    def test_max_frame_size_bounds_memory(self):
+        """缺少结束符时按上限强制切帧"""
+        framer = EnderFramer(b"\n", max_frame_size=8)
+        frames = []
+        for _ in range(5):
+            frames += framer.feed(b"abcd")
+        self.assertEqual(frames, [(0, b"abcdabcd"), (8, b"abcdabcd")])
+        self.assertEqual(framer.pending, 4)
+        self.assertEqual(framer.oversize_frames, 2)
+
+    def test_forced_split_keeps_scan_position(self):
+        """强制切帧后只扫描新数据，已扫描过的缓冲数据不再从头重扫"""
+        framer = EnderFramer(b"\r\n", max_frame_size=8)
+        frames = framer.feed(b"x" * 21 + b"\r")
+        self.assertEqual([len(frame) for _, frame in frames], [8, 8])
+        self.assertEqual(framer._scan_pos, framer.pending)
+        self.assertEqual(framer.feed(b"\nOK\r\n"), [(16, b"xxxxx\r\n"), (23, b"OK\r\n")])
+        self.assertEqual(framer.oversize_frames, 2)
+
+    def test_oversize_slip_and_cobs_dropped(self):
+        """SLIP/COBS 的超长帧不原样输出，丢弃到下一个分隔符为止并计数"""
+        framer = SlipFramer(max_frame_size=8)
+        self.assertEqual(framer.feed(b"\xc0" + b"x" * 10), [])
+        self.assertEqual(framer.feed(b"x" * 10 + b"\xc0ok"), [])
+        self.assertEqual(framer.feed(b"\xc0"), [(22, b"ok")])
+        self.assertEqual((framer.oversize_frames, framer.discarded_bytes), (1, 20))
+
+        framer = CobsFramer(max_frame_size=8)
+        self.assertEqual(framer.feed(b"\x01" * 12), [])
+        self.assertEqual(framer.feed(b"\x00" + cobs_encode(b"xyz") + b"\x00"), [(13, b"xyz")])
+        self.assertEqual((framer.oversize_frames, framer.discarded_bytes, framer.decode_errors), (1, 12, 0))
+        framer.feed(b"\x01" * 9)
+        self.assertEqual(framer.flush(), [])
+        self.assertEqual(framer.feed(b"\x02a\x00"), [(27, b"a")])
+
+    def test_fixed_length(self):
+        """固定长度分帧"""
+        framer = FixedLengthFramer(3)
+        self.assertEqual(framer.feed(b"abcdefg"), [(0, b"abc"), (3, b"def")])
+        self.assertEqual(framer.feed(b"hi"), [(6, b"ghi")])
+
+    def test_length_prefixed(self):
+        """长度前缀分帧，非法长度时丢弃一个字节重新同步"""
+        framer = LengthPrefixedFramer(prefix_size=1, max_frame_size=8)
+        self.assertEqual(framer.feed(b"\x02ab\x01"), [(0, b"\x02ab")])
+        self.assertEqual(framer.feed(b"c\xff\x00"), [(3, b"\x01c"), (6, b"\x00")])
+        self.assertEqual(framer.resync_bytes, 1)
+
+    def test_idle_timeout(self):
+        """读取间隔超过空闲时间时结束当前帧"""
+        framer = IdleTimeoutFramer(idle_timeout_ms=10)
+        self.assertEqual(framer.feed(b"ab", 0), [])
+        self.assertEqual(framer.feed(b"cd", 5_000_000), [])
+        self.assertEqual(framer.feed(b"ef", 30_000_000), [(0, b"abcd")])
+        self.assertEqual(framer.flush(), [(4, b"ef")])
+
+    def test_slip(self):
+        """SLIP分帧反转义并忽略空帧"""
+        framer = SlipFramer()
+        frames = framer.feed(b"\xc0a\xdb\xdcb\xdb\xddc\xc0\xc0d")
+        self.assertEqual(frames, [(1, b"a\xc0b\xdbc")])
+        self.assertEqual(framer.feed(b"\xc0"), [(10, b"d")])
+
+    def test_cobs(self):
+        """COBS编解码往返及分帧"""
+        for payload in (b"", b"\x00", b"ab\x00cd", bytes(range(1, 256)) * 2, b"\x00" * 3):
+            self.assertEqual(cobs_decode(cobs_encode(payload)), payload)
+        framer = CobsFramer()
+        stream = cobs_encode(b"a\x00b") + b"\x00" + cobs_encode(b"xyz") + b"\x00"
+        self.assertEqual(framer.feed(stream), [(0, b"a\x00b"), (5, b"xyz")])
+        framer.feed(b"\x05a\x00")
+        self.assertEqual(framer.decode_errors, 1)
+
+    def test_create_framer(self):
+        """按配置名称创建分帧器"""
+        self.assertIsInstance(create_framer("Ender", ender=b"\r\n"), EnderFramer)
+        self.assertIsInstance(create_framer("Ender", ender=b""), PassthroughFramer)
+        self.assertIsInstance(create_framer("Fixed_Length"), FixedLengthFramer)
+        self.assertIsInstance(create_framer("COBS"), CobsFramer)
+        with self.assertRaises(ValueError):
+            create_framer("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,42 @@
+import sys
+import os
+import random
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hex_formatter import hex_columns, hex_string, hexdump
+from scripts.bench_hex_formatter import legacy_process_hex_data, legacy_hex_string
+
+
+class TestHexFormatter(unittest.TestCase):
+
+    def test_columns_match_legacy(self):
+        """查表实现与旧的逐字节实现输出完全一致"""
+        rng = random.Random(1)
+        samples = [b"", b" ", b"AT\r\n", bytes(range(256))]
+        samples += [bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 100))) for _ in range(200)]
+        for data in samples:
+            self.assertEqual(hex_columns(data), legacy_process_hex_data(data.hex()))
+
+    def test_hex_string(self):
+        """大写空格分隔的十六进制字符串"""
+        self.assertEqual(hex_string(b"AT\r\n"), "41 54 0D 0A")
+        self.assertEqual(hex_string(b""), "")
+        self.assertEqual(hex_string(bytearray(b"\xab\xcd"), sep=""), "ABCD")
+        data = bytes(range(256))
+        self.assertEqual(hex_string(data), legacy_hex_string(data))
+
+    def test_hexdump_layout(self):
+        """经典转储布局：偏移、每行16字节、8字节分组、ASCII列"""
+        rows = hexdump(b"0123456789ABCDEF\x00\r\nX", start_offset=0x10)
+        self.assertEqual(rows, [
+            "00000010  30 31 32 33 34 35 36 37  38 39 41 42 43 44 45 46  |0123456789ABCDEF|",
+            "00000020  00 0D 0A 58                                       |...X|",
+        ])
+        self.assertEqual(hexdump(b""), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,240 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from components.LargeFileViewer import LargeFileViewer
+from utils.capture import CaptureWriter, CaptureReader, DIRECTION_RX, DIRECTION_TX
+from utils.line_store import timestamp_prefix
+from utils.log_index import build_index
+from utils.mapped_file import (open_mapped_file, compile_search, MappedFile, MappedTextFile, MappedCaptureFile,
+                               UNCHANGED, GROWN, RESET, MAX_LINE_BYTES)
+
+START = 1704081600.0
+
+
+def log_lines(first, count):
+    lines = []
+    for i in range(first, first + count):
+        lines.append(f"{timestamp_prefix(START + i * 0.01)}+CSQ: {i % 32},99 seq={i}")
+        if i % 5 == 0:
+            lines.append("    续行 continuation")
+    return lines
+
+
+class TestMappedFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "received.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, lines, mode="w", newline="\n"):
+        with open(self.path, mode, encoding="utf-8", newline="") as f:
+            f.write("".join(line + newline for line in lines))
+
+    def test_rows_match_file(self):
+        """行索引与按行读取一致：\\r\\n、空行、没有换行符的最后一行和行偏移互相对应"""
+        lines = log_lines(0, 20000) + ["", "last line without newline"]
+        self._write(lines[:-1], newline="\r\n")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines[-1])
+        source = open_mapped_file(self.path)
+        self.assertIsInstance(source, MappedTextFile)
+        self.assertTrue(source.build())
+        self.assertEqual(source.row_count, len(lines))
+        for row in (0, 1, 4999, 12345, len(lines) - 2):
+            self.assertEqual(source.rows(row, row + 3), lines[row:row + 3])
+            self.assertEqual(source.row_at_offset(source.line_offset(row)), row)
+        self.assertEqual(source.rows(len(lines) - 1, len(lines) + 10), [lines[-1]])
+        source.close()
+
+    def test_incremental_refresh_and_reset(self):
+        """文件变长时只为新增部分建立索引；被清空重写后从头重建"""
+        lines = log_lines(0, 3000)
+        self._write(lines[:1000])
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("partial ")
+        source = MappedTextFile(self.path)
+        source.build()
+        self.assertEqual(source.row_count, len(lines[:1000]) + 1)
+        self.assertEqual(source.refresh(), UNCHANGED)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("line\n" + "".join(line + "\n" for line in lines[1000:]))
+        self.assertEqual(source.refresh(), GROWN)
+        source.build()
+        expected = lines[:1000] + ["partial line"] + lines[1000:]
+        self.assertEqual(source.row_count, len(expected))
+        self.assertEqual(source.rows(995, 1010), expected[995:1010])
+
+        self._write(["cleared"])
+        self.assertEqual(source.refresh(), RESET)
+        source.build()
+        self.assertEqual(source.rows(0, 10), ["cleared"])
+        source.close()
+
+    def test_long_lines_truncated(self):
+        """超长的行截断显示，后面的行不受影响"""
+        lines = ["a" * (MAX_LINE_BYTES * 3), "after", "b" * 10]
+        self._write(lines)
+        source = MappedTextFile(self.path)
+        source.build()
+        rows = source.rows(0, 3)
+        self.assertEqual(len(rows[0]), MAX_LINE_BYTES)
+        self.assertEqual(rows[1:], lines[1:])
+        source.close()
+
+    def test_search(self):
+        """字节匹配和解码后匹配返回相同的 (行, 列) 结果，列按字符计算"""
+        lines = log_lines(0, 5000)
+        self._write(lines)
+        source = MappedTextFile(self.path)
+        source.build()
+        expected = [(row, line.index("seq=4242"), line.index("seq=4242") + 8) for row, line in enumerate(lines)
+                    if line.endswith("seq=4242")]
+        self.assertEqual(source.search(compile_search("SEQ=4242")), expected)
+        self.assertEqual(source.search(compile_search("SEQ=4242", case_sensitive=True)), [])
+        # 非 ASCII 的模式解码后匹配，列按字符计算
+        results = source.search(compile_search("续行 cont"), limit=3)
+        self.assertEqual(results, [(1, 4, 11), (7, 4, 11), (13, 4, 11)])
+        self.assertEqual(source.rows(7, 8)[0][4:11], "续行 cont")
+        regex = compile_search(r"CSQ: 3\d,99", regex=True)
+        self.assertEqual(len(source.search(regex)), len([line for line in lines if regex.search(line)]))
+        source.close()
+
+    def test_row_for_time(self):
+        """有 .tsidx 时经索引定位，没有时按时间戳二分查找，结果相同"""
+        lines = log_lines(0, 8000)
+        self._write(lines)
+        source = MappedTextFile(self.path)
+        source.build()
+        target = START + 4321 * 0.01 - 0.001
+        row = source.row_for_time(target)
+        self.assertTrue(source.rows(row, row + 1)[0].endswith("seq=4321"))
+        build_index(self.path, stride=4096)
+        self.assertEqual(source.row_for_time(target), row)
+        self.assertEqual(source.row_for_time(START - 10), 0)
+        self.assertEqual(source.row_for_time(START + 1000), source.row_count)
+        source.close()
+
+    def test_capture_rows(self):
+        """抓包文件每条记录显示为一行，可按时刻定位"""
+        path = os.path.join(self.directory, "test.scap")
+        writer = CaptureWriter(path)
+        for i in range(1000):
+            writer.write(DIRECTION_TX if i % 10 == 0 else DIRECTION_RX, b"chunk %d\r\n" % i, monotonic_ns=1000000 * i)
+        writer.close()
+        with CaptureReader(path) as reader:
+            times = [timestamp_ns for timestamp_ns, _, _ in reader.records()]
+        source = open_mapped_file(path)
+        self.assertIsInstance(source, MappedCaptureFile)
+        source.build()
+        self.assertEqual(source.row_count, 1000)
+        row = source.rows(701, 702)[0]
+        self.assertTrue(row.endswith("]RX " + (b"chunk 701\r\n").hex(" ").upper()), row)
+        self.assertIn("]TX ", source.rows(300, 301)[0])
+        self.assertEqual(source.row_for_time(times[613] / 1e9 - 0.0001), 613)
+        self.assertEqual(source.search(compile_search("TX"))[:2], [(0, 25, 27), (10, 25, 27)])
+        source.close()
+
+    def test_incomplete_subclass_rejected(self):
+        """缺少行访问方法的子类在创建时即报错，而不是等到首次绘制或搜索时"""
+        class RowsOnly(MappedFile):
+            def _index_chunk(self):
+                self.indexed = self.size
+
+            def rows(self, first, last):
+                return []
+
+        self._write(log_lines(0, 10))
+        with self.assertRaises(TypeError):
+            RowsOnly(self.path)
+
+
+class TestLargeFileViewer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "received.log")
+        self.lines = log_lines(0, 10000)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in self.lines))
+        self.viewer = LargeFileViewer()
+
+    def tearDown(self):
+        self.viewer.release()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _wait(self):
+        """等待后台任务完成并处理排队的信号"""
+        while self.viewer._task is not None:
+            self.viewer._task.wait()
+            self.app.processEvents()
+
+    def test_open_jump_and_search(self):
+        """打开后在后台建立索引，跳转到行、时刻和搜索结果"""
+        self.viewer.activate(self.path)
+        self._wait()
+        self.assertEqual(self.viewer.model.rowCount(), len(self.lines))
+
+        self.viewer.line_input.setText("1,235")
+        self.viewer.go_to_line()
+        self.assertEqual(self.viewer.view._current_match[0], 1234)
+
+        self.viewer.time_input.setText(time.strftime("%Y-%m-%d %H:%M:%S.000", time.localtime(START + 50)))
+        self.viewer.go_to_time()
+        self._wait()
+        row = self.viewer.view._current_match[0]
+        self.assertTrue(self.viewer.model.row_text(row).endswith("seq=5000"))
+
+        self.viewer.search_input.setText("seq=99")
+        self.viewer.start_search()
+        self._wait()
+        self.assertEqual(len(self.viewer._results), 111)
+        self.viewer.step_result(1)
+        row, start, end = self.viewer.view._current_match
+        self.assertEqual(self.viewer.model.row_text(row)[start:end], "seq=99")
+
+    def test_focus_search_uses_background_search(self):
+        """Ctrl+F 聚焦搜索栏，模型不提供在界面线程中扫描整个文件的 find_all"""
+        self.viewer.show()
+        self.viewer.activateWindow()
+        self.viewer.activate(self.path)
+        self._wait()
+        self.viewer.search_input.setText("seq=1")
+        self.viewer.focus_search()
+        self.app.processEvents()
+        self.assertTrue(self.viewer.search_input.hasFocus())
+        self.assertEqual(self.viewer.search_input.selectedText(), "seq=1")
+        self.assertFalse(hasattr(self.viewer.model, "find_all"))
+
+    def test_release_keeps_index(self):
+        """离开页面时释放映射，文件变长后重新进入只追加新增的行"""
+        self.viewer.activate(self.path)
+        self._wait()
+        self.viewer.release()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("appended\n")
+        os.rename(self.path, self.path + ".moved")
+        os.rename(self.path + ".moved", self.path)
+        self.viewer.activate(self.path)
+        self._wait()
+        self.assertEqual(self.viewer.model.rowCount(), len(self.lines) + 1)
+        self.assertEqual(self.viewer.model.row_text(len(self.lines)), "appended")
+
+
+if __name__ == '__main__':
+    unittest.main()
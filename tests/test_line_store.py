@@ -0,0 +1,268 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from components.ReceiveLogView import ReceiveLogModel
+from components.ReceivePipeline import default_settings
+from utils.segment_file import Segment
+from utils.line_store import (LineStore, RowFormatter, timestamp_prefix,
+                              DIRECTION_RX, DIRECTION_TX, DIRECTION_TX_HEX)
+
+TIMESTAMP = 1704081600.123
+
+
+def settings(**overrides):
+    result = default_settings()
+    result.update(overrides)
+    return result
+
+
+class TestLineStore(unittest.TestCase):
+
+    def test_append_and_trim(self):
+        """记录保存原始字节和元数据，丢弃头部后序号和数据仍对应"""
+        store = LineStore()
+        store.extend((f"line {i}\r\n".encode(), i * 8, TIMESTAMP + i, DIRECTION_RX) for i in range(10))
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.data(3), b"line 3\r\n")
+        self.assertEqual(store.stream_offset(3), 24)
+        self.assertEqual(store.timestamp(3), TIMESTAMP + 3)
+
+        store.trim(4)
+        self.assertEqual((store.first, len(store)), (4, 6))
+        self.assertEqual(store.data(0), b"line 4\r\n")
+        self.assertEqual(store.nbytes, 6 * 8 + 7 * 8 + 6 * (8 + 8 + 1 + 1))
+        store.append(b"tail", 0, TIMESTAMP, DIRECTION_RX)
+        self.assertEqual(store.data(6), b"tail")
+
+    def test_row_count_matches_formatter(self):
+        """不格式化即可得到每条记录的可视行数，与格式化结果一致"""
+        store = LineStore()
+        store.extend([
+            (b"AT\r\n", 0, TIMESTAMP, DIRECTION_RX),
+            (b"a\nb\r\n", 4, TIMESTAMP, DIRECTION_RX),
+            (bytes(range(40)), 9, TIMESTAMP, DIRECTION_RX),
+            (b"AT", 0, TIMESTAMP, DIRECTION_TX),
+            (b"AT\r\n", 0, TIMESTAMP, DIRECTION_TX_HEX),
+        ])
+        for options in ({}, {'show_control_char': True}, {'show_hex': True},
+                        {'show_hex': True, 'hex_layout': 'Dump'}, {'show_timestamp': True}):
+            formatter = RowFormatter(store, settings(**options))
+            for i in range(len(store)):
+                self.assertEqual(len(formatter.rows(i)), store.row_count(i, formatter.mode), (options, i))
+
+
+class TestLineStoreSegments(unittest.TestCase):
+
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _fill(self, store, count):
+        store.extend((f"line {i}\r\n".encode(), i * 8, TIMESTAMP + i, i % 2) for i in range(count))
+
+    def test_spill_keeps_memory_bounded(self):
+        """超出内存预算的记录写入磁盘分段，读取结果与内存中一致"""
+        store = LineStore(self.spill_dir, memory_budget=4096, compression="none", block_records=64)
+        self._fill(store, 3000)
+        store.flush()
+        self.assertEqual(len(store), 3000)
+        self.assertGreater(store.segment_count, 1)
+        self.assertLessEqual(store.stats()['cold_bytes'], 4096)
+        for i in range(3000):
+            self.assertEqual(store.data(i), f"line {i}\r\n".encode())
+            self.assertEqual(store.length(i), len(f"line {i}\r\n"))
+            self.assertEqual(store.stream_offset(i), i * 8)
+            self.assertEqual(store.timestamp(i), TIMESTAMP + i)
+            self.assertEqual(store.direction(i), i % 2)
+
+    def test_trim_and_clear_remove_segments(self):
+        """丢弃头部时删除整段过期的分段，清空后删除分段目录"""
+        store = LineStore(self.spill_dir, memory_budget=4096, compression="none", block_records=64)
+        self._fill(store, 3000)
+        store.flush()
+        segments = store.segment_count
+        store.trim(2000)
+        self.assertLess(store.segment_count, segments)
+        self.assertEqual(store.data(0), b"line 2000\r\n")
+        self.assertEqual(store.data(999), b"line 2999\r\n")
+
+        store.clear()
+        self.assertEqual((len(store), store.segment_count), (0, 0))
+        self.assertEqual(os.listdir(self.spill_dir), [])
+        store.append(b"again", 0, TIMESTAMP, DIRECTION_RX)
+        self.assertEqual(store.data(0), b"again")
+
+    def test_spill_written_in_background(self):
+        """分段在后台线程写入，写入期间追加和读取不等待磁盘，完成后释放内存"""
+        started = threading.Event()
+        release = threading.Event()
+        write = Segment.write.__func__
+
+        def slow_write(cls, path, blocks):
+            started.set()
+            release.wait(5)
+            return write(cls, path, blocks)
+
+        store = LineStore(self.spill_dir, memory_budget=4096, compression="none", block_records=64)
+        with mock.patch.object(Segment, "write", classmethod(slow_write)):
+            self._fill(store, 3000)
+            self.assertTrue(started.wait(5))
+            self.assertEqual(store.segment_count, 0)
+            self.assertEqual(store.data(0), b"line 0\r\n")
+            release.set()
+            store.flush()
+        self.assertGreater(store.segment_count, 0)
+        self.assertLessEqual(store.stats()['cold_bytes'], 4096)
+        self.assertEqual([store.data(i) for i in (0, 1500, 2999)],
+                         [b"line 0\r\n", b"line 1500\r\n", b"line 2999\r\n"])
+
+    def test_spill_error_keeps_blocks_in_memory(self):
+        """分段写入失败（如磁盘已满）时停止写入磁盘，记录保留在内存中"""
+        store = LineStore(self.spill_dir, memory_budget=4096, compression="none", block_records=64)
+        with mock.patch.object(Segment, "write", side_effect=OSError(28, "No space left on device")):
+            self._fill(store, 3000)
+            store.flush()
+        self.assertIsInstance(store.spill_error, OSError)
+        self.assertEqual(store.segment_count, 0)
+        self.assertEqual(store.data(2999), b"line 2999\r\n")
+        store.close()
+
+    def test_unlimited_model_history(self):
+        """不限制记录数时模型可以滚动到最早的数据"""
+        model = ReceiveLogModel(max_lines=0, spill_dir=self.spill_dir, memory_budget=4096)
+        model.store.block_records = 64
+        for start in range(0, 3000, 100):
+            model.append_records([(f"{i}\r\n".encode(), 0, TIMESTAMP, DIRECTION_RX) for i in range(start, start + 100)])
+        model.store.flush()
+        self.assertEqual(model.rowCount(), 3000)
+        self.assertGreater(model.store.segment_count, 1)
+        self.assertEqual(model.rows(0, 3), ["0", "1", "2"])
+        self.assertEqual(model.row_text(2999), "2999")
+
+
+class TestLineStoreCompression(unittest.TestCase):
+
+    def test_cold_blocks_round_trip(self):
+        """较旧的记录按块压缩，按需解压后与原始数据一致，统计压缩率和缓存命中率"""
+        for compression in ("zlib", "lzma", "none"):
+            store = LineStore(compression=compression, block_records=100)
+            lines = [f"+CSQ: {i % 32},99\r\n".encode() for i in range(1000)]
+            store.extend((line, i, TIMESTAMP + i, DIRECTION_RX) for i, line in enumerate(lines))
+            store.flush()
+            stats = store.stats()
+            self.assertGreaterEqual(stats['cold_blocks'], 7)
+            if compression != "none":
+                self.assertGreater(stats['compression_ratio'], 3)
+                self.assertLess(store.nbytes, sum(map(len, lines)))
+            for i, line in enumerate(lines):
+                self.assertEqual(store.data(i), line)
+                self.assertEqual(store.timestamp(i), TIMESTAMP + i)
+            self.assertGreater(store.stats()['cache_hit_rate'], 0.9)
+
+    def test_oversized_record_gets_own_block(self):
+        """超过块大小的单条记录单独成块"""
+        store = LineStore(block_bytes=16)
+        store.extend((bytes([i]) * 40, 0, TIMESTAMP, DIRECTION_RX) for i in range(5))
+        store.flush()
+        self.assertEqual(store.stats()["cold_blocks"], 5)
+        self.assertEqual([store.data(i) for i in range(5)], [bytes([i]) * 40 for i in range(5)])
+
+    def test_trim_while_compressing(self):
+        """压缩尚未完成的块被丢弃后不影响后续数据"""
+        store = LineStore(block_records=10)
+        store.extend((str(i).encode(), 0, TIMESTAMP, DIRECTION_RX) for i in range(100))
+        store.trim(95)
+        store.flush()
+        self.assertEqual([store.data(i) for i in range(len(store))], [str(i).encode() for i in range(95, 100)])
+        self.assertGreaterEqual(store.stats()['cold_bytes'], 0)
+
+
+class TestRowFormatter(unittest.TestCase):
+
+    def setUp(self):
+        self.store = LineStore()
+        self.store.append(b"AB\r\n", 0x10, TIMESTAMP, DIRECTION_RX)
+
+    def test_display_settings(self):
+        """同一份数据按不同显示设置格式化"""
+        store = self.store
+        self.assertEqual(RowFormatter(store, settings()).rows(0), ["AB"])
+        self.assertEqual(RowFormatter(store, settings(show_control_char=True)).rows(0), ["AB\\r\\n"])
+        self.assertEqual(RowFormatter(store, settings(show_hex=True)).rows(0),
+                         ["Received: 41 42 0D 0A", "ASCII   : A  B  \\r \\n"])
+        self.assertEqual(RowFormatter(store, settings(show_hex=True, hex_layout="Dump")).rows(0)[0][:8], "00000010")
+        self.assertEqual(RowFormatter(store, settings(show_timestamp=True)).rows(0),
+                         [f"{timestamp_prefix(TIMESTAMP)}AB"])
+
+    def test_encoding_and_echo(self):
+        """接收数据按会话编码解码，发送回显带发送时间和方向标记"""
+        store = self.store
+        store.append("你好".encode("gbk"), 0, TIMESTAMP, DIRECTION_RX)
+        store.append(b"\x01\xff", 0, TIMESTAMP, DIRECTION_TX_HEX)
+        formatter = RowFormatter(store, settings(), encoding="gbk")
+        self.assertEqual(formatter.rows(1), ["你好"])
+        self.assertTrue(formatter.rows(2)[0].endswith(")-->[HEX] 01 FF"))
+
+    def test_cache_is_bounded(self):
+        """缓存只保留最近格式化的记录"""
+        store = self.store
+        for i in range(20):
+            store.append(str(i).encode(), 0, TIMESTAMP, DIRECTION_RX)
+        formatter = RowFormatter(store, settings(), cache_size=8)
+        for i in range(len(store)):
+            formatter.rows(i)
+        self.assertEqual(len(formatter._cache), 8)
+
+
+class TestReceiveLogModelRecords(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_toggle_rerenders_history(self):
+        """切换显示设置后整段历史按新设置显示"""
+        model = ReceiveLogModel()
+        model.append_records([(f"L{i}\r\n".encode(), i * 4, TIMESTAMP, DIRECTION_RX) for i in range(3)])
+        self.assertEqual(model.rows(0, model.rowCount()), ["L0", "L1", "L2"])
+
+        model.set_display_settings(settings(show_hex=True))
+        self.assertEqual(model.rowCount(), 6)
+        self.assertEqual(model.row_text(2), "Received: 4C 31 0D 0A")
+
+        model.set_display_settings(settings(show_timestamp=True))
+        self.assertEqual(model.rows(0, model.rowCount()), [f"{timestamp_prefix(TIMESTAMP)}L{i}" for i in range(3)])
+
+    def test_mixed_rows_index(self):
+        """每条记录行数不同时按行号定位记录，丢弃头部后仍正确"""
+        model = ReceiveLogModel(max_lines=16)
+        records = []
+        for i in range(18):
+            data = f"{i}a\n{i}b\r\n".encode() if i % 3 == 0 else f"{i}\r\n".encode()
+            records.append((data, 0, TIMESTAMP, DIRECTION_RX))
+        model.append_records(records[:10])
+        self.assertEqual(model.rowCount(), 14)
+        self.assertEqual(model.locate(5), (3, 1))
+        self.assertEqual(model.row_text(4), "3a")
+
+        model.append_records(records[10:])
+        self.assertEqual(len(model.store), 16)
+        expected = []
+        for i in range(2, 18):
+            expected.extend([f"{i}a", f"{i}b"] if i % 3 == 0 else [str(i)])
+        self.assertEqual(model.rows(0, model.rowCount()), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
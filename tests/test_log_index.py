@@ -0,0 +1,122 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.line_store import timestamp_prefix
+from utils.log_writer import LogWriterService
+from utils.log_rotation import RotationPolicy
+from utils.log_index import (TimestampIndex, TimestampMatcher, TimestampIndexWriter, build_index, seek_time,
+                             read_time_range, parse_timestamp, index_path)
+
+START = 1704081600.0  # 2024-01-01 本地时间附近
+
+
+def log_lines(count, step=0.01):
+    """带时间戳前缀的日志行，每隔若干行插入一行没有时间戳的续行"""
+    lines = []
+    for i in range(count):
+        lines.append(f"{timestamp_prefix(START + i * step)}+CSQ: {i % 32},99 seq={i}")
+        if i % 7 == 0:
+            lines.append("    continuation")
+    return lines
+
+
+class TestLogIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "received.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _line_at(self, offset):
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.readline().decode()
+
+    def test_parse_timestamp_formats(self):
+        """解析接收日志、发送回显和配置正则匹配到的各种时间戳写法"""
+        expected = parse_timestamp("2024-01-01_12:00:00.123")
+        self.assertAlmostEqual(parse_timestamp("[2024-01-01_12:00:00.123]AT"), expected)
+        self.assertAlmostEqual(parse_timestamp("(2024-01-01_12:00:00:123)--> AT"), expected)
+        self.assertAlmostEqual(parse_timestamp("24-01-01 12:00:00.123"), expected)
+        self.assertIsNone(parse_timestamp("no time here"))
+        self.assertAlmostEqual(TimestampMatcher(r"\[20(.*?)\]").timestamp(b"[2024-01-01_12:00:00.123]x"), expected)
+
+    def test_index_built_while_writing(self):
+        """写入时增量建立索引，查找结果与顺序扫描一致"""
+        lines = log_lines(20000)
+        with LogWriterService(flush_interval=60, flush_bytes=4096) as writer:
+            writer.set_index(self.path)
+            for start in range(0, len(lines), 100):
+                writer.write_lines(self.path, lines[start:start + 100])
+        index = TimestampIndex.load(self.path)
+        self.assertGreater(len(index), 10)
+        self.assertEqual(list(index.times), sorted(index.times))
+        for timestamp, offset in zip(index.times, index.offsets):
+            self.assertAlmostEqual(TimestampMatcher().timestamp(self._line_at(offset).encode()), timestamp)
+        for i in (0, 1234, 19999):
+            offset = seek_time(self.path, START + i * 0.01 - 0.001, index=index)
+            self.assertTrue(self._line_at(offset).endswith(f"seq={i}\n"), i)
+        self.assertEqual(seek_time(self.path, START + 1000, index=index), os.path.getsize(self.path))
+
+    def test_rebuild_matches_incremental_and_range(self):
+        """重建的索引使用配置的时间戳正则；按时间范围取出的行包含范围内的续行"""
+        lines = log_lines(5000)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        index = build_index(self.path, r"\[20(.*?)\]", stride=4096)
+        self.assertEqual(TimestampIndex.load(self.path).offsets, index.offsets)
+        selected = [line.decode().rstrip("\n") for _, line in
+                    read_time_range(self.path, START + 10.0 - 0.001, START + 10.2 + 0.001, index=index)]
+        expected_first = lines.index(next(line for line in lines if line.endswith("seq=1000")))
+        expected_last = lines.index(next(line for line in lines if line.endswith("seq=1020")))
+        # 最后一行之后的续行也属于范围内
+        if lines[expected_last + 1].startswith(" "):
+            expected_last += 1
+        self.assertEqual(selected, lines[expected_first:expected_last + 1])
+
+    def test_existing_log_and_stale_index(self):
+        """续写已有的日志时沿用索引；日志被截短后旧索引失效"""
+        lines = log_lines(3000)
+        with LogWriterService(flush_interval=60) as writer:
+            writer.set_index(self.path)
+            writer.write_lines(self.path, lines[:1500])
+        first = len(TimestampIndex.load(self.path))
+        with LogWriterService(flush_interval=60) as writer:
+            writer.set_index(self.path)
+            writer.write_lines(self.path, lines[1500:])
+        self.assertGreater(len(TimestampIndex.load(self.path)), first)
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(lines[0] + "\n")
+        self.assertIsNone(TimestampIndex.load(self.path))
+        writer = TimestampIndexWriter(self.path, os.path.getsize(self.path))
+        writer.close()
+        self.assertEqual(len(TimestampIndex.load(self.path)), 0)
+
+    def test_truncate_and_rotation_drop_stale_index(self):
+        """清空日志时删除索引；不压缩的轮转文件带着自己的索引"""
+        with LogWriterService(flush_interval=60) as writer:
+            writer.set_index(self.path)
+            writer.set_rotation(self.path, RotationPolicy(max_bytes=64 * 1024, compression="none"))
+            lines = log_lines(3000)
+            for start in range(0, len(lines), 100):
+                writer.write_lines(self.path, lines[start:start + 100])
+            writer.flush()
+            rotated = [name for name in os.listdir(self.directory) if name.endswith(".log") and name != "received.log"]
+            self.assertTrue(rotated)
+            self.assertIsNotNone(TimestampIndex.load(os.path.join(self.directory, rotated[0])))
+            writer.truncate(self.path)
+            writer.flush()
+            self.assertFalse(os.path.exists(index_path(self.path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
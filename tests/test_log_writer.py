@@ -0,0 +1,242 @@
+import sys
+import os
+import gzip
+import lzma
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import common
+from utils.log_writer import LogWriterService, FSYNC_FLUSH
+from utils.log_rotation import RotationPolicy, apply_retention
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestLogWriterService(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "received.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_batches_lines_from_many_threads(self):
+        """多个线程提交的行都被写入，同一线程内保持顺序，文件只打开一次"""
+        with LogWriterService(flush_interval=10) as writer:
+            def producer(name):
+                for i in range(500):
+                    writer.write_lines(self.path, [f"{name} {i}"])
+
+            threads = [threading.Thread(target=producer, args=(f"t{n}",)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertTrue(writer.flush(5))
+            self.assertEqual(writer.open_files, [self.path])
+            self.assertEqual(writer.lines_written, 2000)
+            self.assertLess(writer.flushes, 100)
+        lines = read(self.path).splitlines()
+        self.assertEqual(len(lines), 2000)
+        for n in range(4):
+            self.assertEqual([line for line in lines if line.startswith(f"t{n} ")], [f"t{n} {i}" for i in range(500)])
+
+    def test_flush_by_size_and_time(self):
+        """数据量达到阈值或超过写入间隔后自动写入，不需要调用 flush"""
+        with LogWriterService(flush_interval=0.05, flush_bytes=1 << 30) as writer:
+            writer.write_lines(self.path, ["timed"])
+            deadline = 100
+            while writer.lines_written < 1 and deadline:
+                threading.Event().wait(0.02)
+                deadline -= 1
+            self.assertEqual(read(self.path), "timed\n")
+        with LogWriterService(flush_interval=60, flush_bytes=64, fsync=FSYNC_FLUSH) as writer:
+            writer.write_lines(self.path, ["x" * 100])
+            deadline = 100
+            while writer.lines_written < 1 and deadline:
+                threading.Event().wait(0.02)
+                deadline -= 1
+            self.assertEqual(writer.lines_written, 1)
+
+    def test_truncate_and_path_change_keep_order(self):
+        """清空前排队的行不会在清空后写入；路径切换后各行写入各自的文件"""
+        other = os.path.join(self.directory, "sub", "other.log")
+        with LogWriterService(flush_interval=60) as writer:
+            writer.write_lines(self.path, ["before"])
+            writer.flush()
+            writer.write_lines(self.path, ["queued"])
+            writer.truncate(self.path)
+            writer.write_lines(self.path, ["after"])
+            writer.write_lines(other, ["moved"])
+            writer.flush()
+            self.assertEqual(read(self.path), "after\n")
+            self.assertEqual(read(other), "moved\n")
+        self.assertEqual(writer.open_files, [])
+
+    def test_unexpected_errors_keep_writer_running(self):
+        """轮转模板和编码等意外错误被计数，写入线程继续写入后续的行"""
+        policy = RotationPolicy(max_bytes=8, compression="none")
+        policy.name_template = "{stem}_{seq}_{Date}{suffix}"  # 绕过构造时的检查
+        with LogWriterService(flush_interval=60) as writer:
+            writer.set_rotation(self.path, policy)
+            writer.write_lines(self.path, ["first line"])
+            writer.write_lines(self.path, ["bad \ud800"])
+            writer.write_lines(self.path, ["second line"])
+            self.assertTrue(writer.flush(5))
+            self.assertTrue(writer._thread.is_alive())
+            self.assertEqual(writer.errors, 2)
+            self.assertIsInstance(writer.last_error, KeyError)
+            self.assertTrue(writer.write_lines(self.path, ["third line"]))
+            self.assertTrue(writer.flush(5))
+        self.assertEqual(read(self.path), "first line\nsecond line\nthird line\n")
+
+    def test_write_lines_gives_up_after_writer_thread_exits(self):
+        """写入线程意外退出后，写满队列的调用方不再永久等待"""
+        release = threading.Event()
+
+        class BrokenWriter(LogWriterService):
+            def _loop(self):
+                release.wait(5)
+                raise RuntimeError("writer thread failed")
+
+        with mock.patch("threading.excepthook", lambda args: None):
+            writer = BrokenWriter(max_buffer=16)
+            self.assertTrue(writer.write_lines(self.path, ["x" * 32]))
+            threading.Timer(0.1, release.set).start()
+            # 队列已满，等待写入线程时线程退出
+            self.assertFalse(writer.write_lines(self.path, ["y"]))
+            writer._thread.join(5)
+        self.assertFalse(writer.write_lines(self.path, ["z"]))
+        self.assertTrue(writer.flush(1))
+        writer.close()
+
+    def test_invalid_fsync_policy(self):
+        """未知的 fsync 策略被拒绝"""
+        with self.assertRaises(ValueError):
+            LogWriterService(fsync="sometimes")
+
+    def test_common_print_write(self):
+        """common.print_write 按行写入，log_write 去除首尾空白"""
+        common.print_write("line 1\r\n\r\nline 3\r\n", self.path)
+        common.log_write("  single  ", self.path)
+        self.assertTrue(common.flush_log())
+        self.assertEqual(read(self.path), "line 1\n\nline 3\nsingle\n")
+        common.truncate_log(self.path)
+        self.assertTrue(common.flush_log())
+        self.assertEqual(read(self.path), "")
+
+
+class TestLogRotation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "received.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _rotated(self):
+        return sorted(name for name in os.listdir(self.directory) if name != "received.log")
+
+    def test_size_rotation_compresses_without_losing_lines(self):
+        """按大小轮转，轮转文件在后台压缩，所有行按顺序保留在轮转文件和当前文件中"""
+        for compression, opener in (("gzip", gzip.open), ("lzma", lzma.open)):
+            shutil.rmtree(self.directory)
+            os.makedirs(self.directory)
+            with LogWriterService(flush_interval=60, flush_bytes=512) as writer:
+                writer.set_rotation(self.path, RotationPolicy(max_bytes=4096, compression=compression))
+                for i in range(1000):
+                    writer.write_lines(self.path, [f"line {i:04d}"])
+                writer.flush()
+                writer.rotation.wait()
+            rotated = self._rotated()
+            self.assertGreaterEqual(len(rotated), 2)
+            self.assertTrue(all(name.startswith("received_") and name.endswith((".gz", ".xz")) for name in rotated))
+            content = b""
+            for name in sorted(rotated, key=lambda name: int(name.split("_")[2].split(".")[0])):
+                with opener(os.path.join(self.directory, name)) as f:
+                    data = f.read()
+                self.assertLessEqual(len(data), 4096)
+                content += data
+            with open(self.path, "rb") as f:
+                content += f.read()
+            self.assertEqual(content.decode().splitlines(), [f"line {i:04d}" for i in range(1000)])
+
+    def test_interval_rotation_and_template(self):
+        """跨过轮转间隔后轮转，文件名按 {date}/{seq} 模板生成"""
+        policy = RotationPolicy(interval=3600, name_template="{stem}-{date}-{seq}{suffix}", compression="none")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("yesterday\n")
+        old = time.time() - 86400
+        os.utime(self.path, (old, old))
+        with LogWriterService(flush_interval=60) as writer:
+            writer.set_rotation(self.path, policy)
+            writer.write_lines(self.path, ["today"])
+            writer.flush()
+        date = time.strftime("%Y%m%d", time.localtime(old))
+        self.assertEqual(self._rotated(), [f"received-{date}-1.log"])
+        self.assertEqual(read(os.path.join(self.directory, f"received-{date}-1.log")), "yesterday\n")
+        self.assertEqual(read(self.path), "today\n")
+        self.assertTrue(policy.should_rotate(1, 0, old, time.time()))
+        self.assertFalse(policy.should_rotate(0, 0, old, time.time()))
+
+    def test_retention(self):
+        """保留最近 N 个文件或总大小不超过上限，从最旧的开始删除"""
+        policy = RotationPolicy(max_bytes=1, compression="none")
+        files = []
+        for i in range(5):
+            path = os.path.join(self.directory, f"received_20240101_{i + 1:03d}.log")
+            with open(path, "w") as f:
+                f.write("x" * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+            files.append(path)
+        self.assertEqual(policy.rotated_files(self.path), files)
+        self.assertEqual(apply_retention(files, 3, 0), files[:2])
+        self.assertEqual(apply_retention(files[2:], 0, 150), files[2:4])
+        self.assertEqual(self._rotated(), ["received_20240101_005.log"])
+
+    def test_retention_keeps_unrelated_files(self):
+        """保留策略只删除本日志的轮转文件，前缀相同的其他日志和用户文件不受影响"""
+        policy = RotationPolicy(max_bytes=1, keep_files=1)
+        self.path = os.path.join(self.directory, "rx.log")
+        rotated = []
+        for i, name in enumerate(("rx_20240101_001.log.gz", "rx_20240101_002.log.xz", "rx_20240102_003.log")):
+            path = os.path.join(self.directory, name)
+            with open(path, "w") as f:
+                f.write("x")
+            os.utime(path, (1000 + i, 1000 + i))
+            rotated.append(path)
+        unrelated = ["rx_port2_20240101_001.log.gz", "rx_backup_old.log", "rx_20240101_001.log.part",
+                     "rx_20240101_001.log.tsidx", "rx.log"]
+        for name in unrelated:
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write("keep")
+        self.assertEqual(policy.rotated_files(self.path), rotated)
+        apply_retention(policy.rotated_files(self.path), policy.keep_files, policy.keep_bytes)
+        self.assertEqual(self._rotated(), sorted(unrelated + ["rx_20240102_003.log"]))
+
+    def test_invalid_policy(self):
+        """未知的压缩方式和没有序号的文件名模板被拒绝"""
+        with self.assertRaises(ValueError):
+            RotationPolicy(compression="zip")
+        with self.assertRaises(ValueError):
+            RotationPolicy(name_template="{stem}{suffix}")
+        with self.assertRaises(ValueError):
+            RotationPolicy(name_template="{stem}_{seq}_{Date}{suffix}")
+        with self.assertRaises(ValueError):
+            RotationPolicy(name_template="{stem}_{seq:q}{suffix}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,17 @@
 import sys
 import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
 import unittest
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from middileware.Logger import Logger, init_logging, log_ui_operation, catch_ui_exceptions
+from middileware.Logger import (Logger, init_logging, log_ui_operation, catch_ui_exceptions,
+                                RateLimitFilter, ExceptionBackoff)
 
 class TestLogger(unittest.TestCase):
     
@@ -83,6 +89,159 @@ class TestLogger(unittest.TestCase):
         with self.assertRaises(ValueError):
             error_function()
 
+
+class TestQueuedLogging(unittest.TestCase):
+
+    def setUp(self):
+        Logger._instance = None
+        self.directory = tempfile.mkdtemp()
+        self.logger = Logger(app_name="QueueTest", log_dir=self.directory, enable_ui_monitoring=False)
+
+    def tearDown(self):
+        self.logger.shutdown()
+        Logger._instance = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _read(self, filename):
+        self.assertTrue(self.logger.flush())
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path):
+            return ""
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_producers_do_not_block_on_handlers(self):
+        """处理器阻塞时记录日志仍立即返回，记录按顺序在日志线程中输出"""
+        release = threading.Event()
+        handled = []
+
+        class SlowHandler(logging.Handler):
+            def emit(self, record):
+                release.wait(5)
+                handled.append((self.format(record), threading.current_thread().name))
+
+        self.logger.listener.add_handler(SlowHandler())
+        # 同一调用位置的200条记录，关闭限流
+        self.logger.queue_handler.removeFilter(self.logger.rate_limiter)
+        component = Logger.get_logger("QueueComponent")
+        start = time.perf_counter()
+        for i in range(200):
+            component.info("message %d", i)
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(handled, [])
+        release.set()
+        self.assertTrue(self.logger.flush())
+        self.assertEqual([message for message, _ in handled], [f"message {i}" for i in range(200)])
+        self.assertEqual({thread for _, thread in handled}, {"LogListener"})
+        self.assertIn("message 199", self._read("QueueTest.log"))
+
+    def test_component_file_and_ui_errors(self):
+        """有独立文件的组件logger只写入自己的文件；UI错误日志只收录UI相关的错误"""
+        component = Logger.get_logger("FileComponent", "file_component.log")
+        self.assertIs(Logger.get_logger("FileComponent", "file_component.log"), component)
+        component.info("component only")
+        component.info("component again")
+        logging.getLogger("Window").error("QWidget deleted")
+        logging.getLogger("Window").error("serial port lost")
+        self.assertEqual(self._read("file_component.log").count("component"), 2)
+        main_log = self._read("QueueTest.log")
+        self.assertNotIn("component only", main_log)
+        self.assertIn("serial port lost", main_log)
+        ui_log = self._read("QueueTest_ui_errors.log")
+        self.assertIn("QWidget deleted", ui_log)
+        self.assertNotIn("serial port lost", ui_log)
+
+    def test_reinitialize_stops_previous_listener(self):
+        """重新初始化时停止上一个日志线程，队列中剩余的记录写完后才关闭文件"""
+        component = Logger.get_logger("FileComponent", "file_component.log")
+        component.info("before restart")
+        listener, queue_handler = self.logger.listener, self.logger.queue_handler
+        Logger._instance = None
+        self.logger = Logger(app_name="QueueTest", log_dir=self.directory, enable_ui_monitoring=False)
+        self.assertIsNone(listener._thread)
+        self.assertNotIn(queue_handler, logging.getLogger().handlers)
+        self.assertIn("before restart", self._read("file_component.log"))
+        # 旧实例的独立文件路由被撤销，记录重新传播到根logger
+        component.info("after restart")
+        self.assertIn("after restart", self._read("QueueTest.log"))
+
+    def test_log_storm_rate_limited(self):
+        """同一调用位置的日志风暴被限流，汇总记录报告丢弃的条数；其他调用位置不受影响"""
+        component = Logger.get_logger("StormComponent")
+        for i in range(1000):
+            component.error(f"read failed {i}")
+        component.info("other call site")
+        main_log = self._read("QueueTest.log")
+        self.assertEqual(main_log.count("read failed"), self.logger.rate_limiter.burst + 1)
+        self.assertIn("other call site", main_log)
+        self.assertIn("suppressed 980 similar messages, last: read failed 999", main_log)
+
+
+class TestRateLimitFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.summaries = []
+        self.limiter = RateLimitFilter(rate=2.0, burst=3, summary_interval=5.0, clock=lambda: self.now)
+        self.limiter.on_summary = self.summaries.append
+
+    def _record(self, message, lineno=10, level=logging.ERROR, exc_info=None):
+        return logging.LogRecord("Storm", level, "storm.py", lineno, message, None, exc_info)
+
+    def test_token_bucket(self):
+        """令牌用完后丢弃，按速率补充，下一条放行的记录附带丢弃条数"""
+        allowed = [self.limiter.filter(self._record(f"m{i}")) for i in range(10)]
+        self.assertEqual(allowed, [True] * 3 + [False] * 7)
+        self.assertTrue(self.limiter.filter(self._record("other", lineno=11)))
+        self.now = 0.5
+        record = self._record("m10")
+        self.assertTrue(self.limiter.filter(record))
+        self.assertEqual(record.getMessage(), "m10 (suppressed 7 similar messages)")
+        self.assertFalse(self.limiter.filter(self._record("m11")))
+        self.assertEqual(self.limiter.suppressed_total, 8)
+
+    def test_summary_after_quiet_period(self):
+        """风暴结束后安静一段时间，由后续任意记录触发补发汇总"""
+        for i in range(5):
+            self.limiter.filter(self._record(f"m{i}"))
+        self.now = 2.0
+        self.limiter.filter(self._record("other", lineno=11))
+        self.assertEqual(self.summaries, [])
+        self.now = 6.0
+        self.limiter.filter(self._record("other", lineno=11))
+        self.assertEqual([(s.lineno, s.getMessage()) for s in self.summaries],
+                         [(10, "suppressed 2 similar messages, last: m4")])
+        self.limiter.drain()
+        self.assertEqual(len(self.summaries), 1)
+
+    def test_key_includes_level_not_message(self):
+        """同一调用位置按级别分别限流，消息文本不同仍共用令牌桶；带异常信息的 CRITICAL 记录总是放行"""
+        for i in range(5):
+            self.limiter.filter(self._record(f"m{i}"))
+        self.assertFalse(self.limiter.filter(self._record("UI error in button")))
+        self.assertTrue(self.limiter.filter(self._record("m1", level=logging.WARNING)))
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            exc_info = sys.exc_info()
+        for _ in range(10):
+            self.assertTrue(self.limiter.filter(self._record("未捕获的异常", level=logging.CRITICAL,
+                                                             exc_info=exc_info)))
+        self.assertEqual(self.limiter.suppressed_total, 3)
+
+
+class TestExceptionBackoff(unittest.TestCase):
+
+    def test_backoff(self):
+        """相同异常的等待时间指数增长并有上限，不同异常或恢复后重新开始"""
+        backoff = ExceptionBackoff(initial=0.01, maximum=0.05)
+        delays = [backoff.record(OSError("unplugged")) for _ in range(6)]
+        self.assertEqual(delays, [0.0, 0.01, 0.02, 0.04, 0.05, 0.05])
+        self.assertEqual(backoff.record(ValueError("unplugged")), 0.0)
+        backoff.reset()
+        self.assertEqual(backoff.record(ValueError("unplugged")), 0.0)
+
 def run_basic_tests():
     """运行基础测试"""
     print("开始Logger测试...")
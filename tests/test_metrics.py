@@ -0,0 +1,117 @@
+import sys
+import os
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from components.PerformancePanel import PerformancePanel, format_number, line_utilization
+from components.ReceivePipeline import ReceivePipeline
+from components.RenderScheduler import RenderScheduler
+from utils import metrics
+from utils.framing import FRAMING_IDLE_TIMEOUT
+from utils.metrics import MetricsRegistry, SIZE_BUCKETS
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_registry_and_histogram(self):
+        """同名指标只创建一次；直方图按固定分桶计数并估算分位数"""
+        registry = MetricsRegistry()
+        counter = registry.counter("reads_total")
+        self.assertIs(registry.counter("reads_total"), counter)
+        with self.assertRaises(ValueError):
+            registry.gauge("reads_total")
+        counter.inc()
+        counter.inc(4)
+
+        histogram = registry.histogram("read_size", SIZE_BUCKETS)
+        for size in [1] * 50 + [100] * 45 + [5000] * 4 + [100000]:
+            histogram.observe(size)
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.95), 128)
+        self.assertEqual(histogram.quantile(0.999), 100000)
+        self.assertEqual((histogram.count, histogram.max), (100, 100000))
+
+        backlog = [7]
+        registry.gauge("backlog", function=lambda: backlog[0])
+        registry.gauge("broken", function=lambda: 1 / 0)
+        snapshot = registry.snapshot()
+        self.assertEqual((snapshot["reads_total"], snapshot["backlog"], snapshot["broken"]), (5, 7, None))
+        registry.reset()
+        self.assertEqual(registry.snapshot()["reads_total"], 0)
+        self.assertEqual(registry.snapshot()["backlog"], 7)
+
+    def test_rates(self):
+        """速率只对计数器和直方图计算，计数被清零时不为负"""
+        counter = metrics.counter("test_rate_total")
+        metrics.gauge("test_rate_gauge").set(100)
+        before = metrics.snapshot()
+        counter.inc(500)
+        rates = metrics.rates(before, metrics.snapshot(), 2.0)
+        self.assertEqual(rates["test_rate_total"], 250)
+        self.assertNotIn("test_rate_gauge", rates)
+        counter.reset()
+        self.assertEqual(metrics.rates(before, metrics.snapshot(), 1.0)["test_rate_total"], 0)
+
+    def test_hot_paths_update_metrics(self):
+        """处理流水线和显示刷新更新帧数、批次耗时和渲染行数"""
+        app = QApplication.instance() or QApplication([])
+        before = metrics.snapshot()
+        pipeline = ReceivePipeline()
+        pipeline.process(b"OK\r\nERROR\r\n", [11], [time.monotonic_ns()])
+        scheduler = RenderScheduler(lambda lines: None)
+        scheduler.submit(["a", "b", "c"])
+        scheduler.flush()
+        after = metrics.snapshot()
+        self.assertEqual(after["rx_frames_total"] - before["rx_frames_total"], 2)
+        self.assertEqual(after["pipeline_batches_total"] - before["pipeline_batches_total"], 1)
+        self.assertEqual(after["pipeline_batch_ms"]["count"] - before["pipeline_batch_ms"]["count"], 1)
+        self.assertEqual(after["lines_rendered_total"] - before["lines_rendered_total"], 3)
+        self.assertEqual(after["render_frame_ms"]["count"] - before["render_frame_ms"]["count"], 1)
+
+    def test_pipeline_batch_time_with_time_based_framer(self):
+        """按读取块喂入的分帧方式下，批次耗时记录的是处理时间而不是时钟读数"""
+        pipeline = ReceivePipeline(settings={'framing': FRAMING_IDLE_TIMEOUT})
+        before = metrics.snapshot()["pipeline_batch_ms"]
+        now = time.monotonic_ns()
+        pipeline.process(b"abcdef", [3, 6], [now, now + 100_000_000])
+        after = metrics.snapshot()["pipeline_batch_ms"]
+        self.assertEqual(after["count"] - before["count"], 1)
+        self.assertLess(after["sum"] - before["sum"], 1000)
+
+
+class TestPerformancePanel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_refresh(self):
+        """面板按两次刷新之间的增量显示速率和分位数，摘要中显示线路利用率"""
+        registry = MetricsRegistry()
+        rx_bytes = registry.counter("rx_bytes_total", "Bytes read")
+        latency = registry.histogram("render_frame_ms")
+        registry.gauge("line_capacity_bytes_per_second").set(11520)
+        panel = PerformancePanel(registry)
+        panel.refresh(now=10.0)
+        rx_bytes.inc(5760)
+        for _ in range(19):
+            latency.observe(0.3)
+        latency.observe(40)
+        panel.refresh(now=11.0)
+
+        rows = {panel.table.item(row, 0).text(): [panel.table.item(row, column).text() for column in range(1, 6)]
+                for row in range(panel.table.rowCount())}
+        self.assertEqual(rows["rx_bytes_total"], ["5.76K", "5.76K", "-", "-", "-"])
+        self.assertEqual(rows["render_frame_ms"], ["20", "20", "0.5", "0.5", "40"])
+        self.assertEqual(rows["line_capacity_bytes_per_second"][0], "11.52K")
+        self.assertIn("line 50%", panel.summary_label.text())
+        self.assertEqual(line_utilization({}, {}), None)
+        self.assertEqual(format_number(1234567), "1.23M")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import urllib.request
+import urllib.error
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.ReceivePipeline import ReceivePipeline
+from utils import common, metrics
+from utils.framing import FRAMING_COBS
+from utils.metrics import MetricsRegistry
+from utils.metrics_export import prometheus_text, json_snapshot, MetricsServer, SnapshotWriter
+
+
+def sample_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter("rx_bytes_total", "Bytes read").inc(1024)
+    registry.gauge("ring_backlog_bytes", function=lambda: 12)
+    registry.gauge("line_capacity")
+    histogram = registry.histogram("read_size_bytes", (1, 16, 256))
+    for size in (1, 8, 8, 300):
+        histogram.observe(size)
+    return registry
+
+
+class TestMetricsExport(unittest.TestCase):
+
+    def test_prometheus_text(self):
+        """计数、当前值和直方图按 Prometheus 文本格式输出，直方图桶为累积计数"""
+        text = prometheus_text(sample_registry())
+        lines = text.splitlines()
+        self.assertIn("# HELP scom_rx_bytes_total Bytes read", lines)
+        self.assertIn("# TYPE scom_rx_bytes_total counter", lines)
+        self.assertIn("scom_rx_bytes_total 1024", lines)
+        self.assertIn("scom_ring_backlog_bytes 12", lines)
+        # 没有值的当前值指标只输出类型
+        self.assertIn("# TYPE scom_line_capacity gauge", lines)
+        self.assertFalse([line for line in lines if line.startswith("scom_line_capacity ")])
+        self.assertEqual([line for line in lines if line.startswith("scom_read_size_bytes")], [
+            'scom_read_size_bytes_bucket{le="1.0"} 1',
+            'scom_read_size_bytes_bucket{le="16.0"} 3',
+            'scom_read_size_bytes_bucket{le="256.0"} 3',
+            'scom_read_size_bytes_bucket{le="+Inf"} 4',
+            "scom_read_size_bytes_sum 317",
+            "scom_read_size_bytes_count 4",
+        ])
+        self.assertTrue(text.endswith("\n"))
+
+    def test_http_endpoint(self):
+        """本机 HTTP 端点提供文本格式和 JSON 快照，其他路径返回 404"""
+        server = MetricsServer(0, registry=sample_registry())
+        server.start()
+        try:
+            base = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+                self.assertIn("scom_rx_bytes_total 1024", response.read().decode("utf-8"))
+            with urllib.request.urlopen(base + "/metrics.json", timeout=5) as response:
+                snapshot = json.loads(response.read())
+            self.assertEqual(snapshot["metrics"]["rx_bytes_total"], 1024)
+            self.assertEqual(snapshot["metrics"]["read_size_bytes"]["buckets"], [1, 16, 256])
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(base + "/other", timeout=5)
+        finally:
+            server.stop()
+        self.assertFalse(server.running)
+
+    def test_snapshot_writer(self):
+        """快照按行追加到文件，停止时写入最后一份"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "metrics.jsonl")
+            writer = SnapshotWriter(path, 0.05, registry=sample_registry())
+            writer.start()
+            time.sleep(0.3)
+            writer.stop()
+            self.assertTrue(common.flush_log())
+            with open(path, encoding="utf-8") as f:
+                snapshots = [json.loads(line) for line in f]
+            self.assertEqual(len(snapshots), writer.snapshots)
+            self.assertGreaterEqual(len(snapshots), 2)
+            self.assertEqual(snapshots[-1]["metrics"]["ring_backlog_bytes"], 12)
+            self.assertLessEqual(snapshots[0]["time"], snapshots[-1]["time"])
+            with self.assertRaises(ValueError):
+                SnapshotWriter(path, 0)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_receive_error_counters(self):
+        """无法解码的帧和发送的字节计入全局指标"""
+        before = metrics.snapshot()
+        pipeline = ReceivePipeline(settings={'framing': FRAMING_COBS})
+        # 第二帧的长度字节超出帧长，解码失败
+        pipeline.process(b"\x03ab\x00\x09ab\x00", [8], [time.monotonic_ns()])
+
+        class Port:
+            def write(self, data):
+                return len(data)
+
+        common.port_write("AT", Port(), "0D0A")
+        after = json_snapshot()["metrics"]
+        self.assertEqual(after["rx_decode_errors_total"] - before["rx_decode_errors_total"], 1)
+        self.assertEqual(after["rx_frames_total"] - before["rx_frames_total"], 2)
+        self.assertEqual(after["tx_bytes_total"] - before["tx_bytes_total"], 4)
+        self.assertEqual(after["tx_commands_total"] - before["tx_commands_total"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
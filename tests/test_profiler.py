@@ -0,0 +1,83 @@
+import sys
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import profiler
+from utils.profiler import ProfileSession
+
+
+def busy_worker_function(n):
+    return sum(i * i for i in range(n))
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        profiler.stop_profiling()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_profiles_gui_and_worker_threads(self):
+        """工作线程通过 sync() 加入会话，停止后写入合并的 .pstats 和包含各线程的文本摘要"""
+        started = threading.Event()
+        stop = threading.Event()
+
+        def worker():
+            while not stop.is_set():
+                profiler.sync("Worker")
+                busy_worker_function(2000)
+                started.set()
+            profiler.sync("Worker")
+
+        session = profiler.start_profiling(self.directory, trace_memory=True, top=15)
+        self.assertIs(profiler.active_session(), session)
+        with self.assertRaises(RuntimeError):
+            ProfileSession(self.directory).start()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        retained = [bytearray(1024) for _ in range(200)]
+        memory_path = session.memory_snapshot()
+        result = profiler.stop_profiling()
+        stop.set()
+        thread.join(5)
+
+        self.assertIsNone(profiler.active_session())
+        self.assertIsNone(profiler.stop_profiling())
+        self.assertIn("Worker", result.threads)
+        self.assertEqual(result.threads[0], threading.current_thread().name)
+        functions = {function for _, _, function in pstats.Stats(result.stats_path).stats}
+        self.assertIn("busy_worker_function", functions)
+        with open(result.summary_path, encoding="utf-8") as f:
+            summary = f.read()
+        self.assertIn("Top 15 by cumulative time, all threads", summary)
+        self.assertIn("Worker: top 10 by own time", summary)
+        self.assertIn("Memory (tracemalloc)", summary)
+        with open(memory_path, encoding="utf-8") as f:
+            self.assertIn("test_profiler.py", f.read())
+        self.assertEqual(len(retained), 200)
+
+    def test_sync_without_session(self):
+        """没有会话时 sync() 不开启分析；不跟踪内存的会话不能拍摄内存快照"""
+        profiler.sync("Idle")
+        self.assertIsNone(profiler._local.profile)
+        session = profiler.start_profiling(self.directory, trace_memory=False)
+        with self.assertRaises(RuntimeError):
+            session.memory_snapshot()
+        result = session.stop()
+        self.assertTrue(os.path.exists(result.summary_path))
+        with self.assertRaises(RuntimeError):
+            session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
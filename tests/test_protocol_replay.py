@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+from PySide6.QtCore import Qt
+from utils import common
+from utils.capture import CaptureWriter, DIRECTION_RX, DIRECTION_TX
+from utils.protocol_replay import replay_url
+from components.DataReceiver import DataReceiver
+
+
+class TestProtocolReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "session.scap")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, records):
+        """records: (相对时刻秒, 方向, 数据)"""
+        base = time.monotonic_ns()
+        with CaptureWriter(self.path) as capture:
+            for seconds, direction, data in records:
+                capture.write(direction, data, monotonic_ns=base + int(seconds * 1e9))
+
+    def _read_all(self, port, expected_size, timeout=5.0):
+        data = bytearray()
+        deadline = time.monotonic() + timeout
+        while len(data) < expected_size and time.monotonic() < deadline:
+            data += port.read(max(port.in_waiting, 1))
+        return bytes(data)
+
+    def test_url_options(self):
+        """replay:// URL 解析文件路径、倍速和循环选项，非法选项打开失败"""
+        self._write([(0, DIRECTION_RX, b"x")])
+        port = serial.serial_for_url(replay_url(self.path, 2.5, loop=True))
+        self.assertEqual((port.path, port.speed, port.loop, port.rtscts), (self.path, 2.5, True, False))
+        port.close()
+        port = serial.serial_for_url(replay_url(self.path, None))
+        self.assertIsNone(port.speed)
+        self.assertTrue(port.rtscts)
+        port.close()
+        for url in (replay_url(self.path) + "&bogus=1", "replay://" + self.path + "?speed=-1",
+                    "replay://" + os.path.join(self.directory, "missing.scap")):
+            with self.assertRaises(serial.SerialException):
+                serial.serial_for_url(url)
+
+    def test_original_timing_and_speed(self):
+        """按原始时序回放时数据按记录时刻到达，倍速按比例缩短，发送记录不回放"""
+        self._write([(0, DIRECTION_RX, b"first\r\n"), (0.1, DIRECTION_TX, b"AT\r\n"), (0.4, DIRECTION_RX, b"second\r\n")])
+        for speed, duration in ((1.0, 0.4), (4.0, 0.1)):
+            port = serial.serial_for_url(replay_url(self.path, speed), timeout=0.05)
+            start = time.monotonic()
+            self.assertEqual(self._read_all(port, 15), b"first\r\nsecond\r\n")
+            elapsed = time.monotonic() - start
+            self.assertGreaterEqual(elapsed, duration * 0.9, speed)
+            self.assertLess(elapsed, duration + 0.3, speed)
+            self.assertTrue(port.finished)
+            self.assertEqual(port.read(10), b"")
+            port.close()
+
+    def test_max_speed_and_loop(self):
+        """尽可能快时全部数据立即可读，循环回放结束后从头开始"""
+        self._write([(i * 10, DIRECTION_RX, f"{i}\r\n".encode()) for i in range(5)])
+        port = serial.serial_for_url(replay_url(self.path, None, loop=True), timeout=0.05)
+        start = time.monotonic()
+        data = port.read(30)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(data, b"0\r\n1\r\n2\r\n3\r\n4\r\n" * 2)
+        self.assertFalse(port.finished)
+        port.close()
+
+    def test_port_on_opens_replay_through_data_receiver(self):
+        """common.port_on 可以打开回放 URL，尽可能快回放时缓冲区小于抓包也不丢数据"""
+        chunks = [bytes([65 + i % 26]) * 1000 + b"\r\n" for i in range(200)]
+        self._write([(i * 0.01, DIRECTION_RX, chunk) for i, chunk in enumerate(chunks)])
+        port = common.port_on(replay_url(self.path, None), 3000000, flowcontrol="None")
+        self.assertTrue(port.rtscts)
+        receiver = DataReceiver(port, ring_capacity=16 * 1024)
+        received = []
+        # 模拟较慢的消费者
+        receiver.dataAvailable.connect(lambda offset: (time.sleep(0.001), received.append(receiver.ring.read(offset))),
+                                       Qt.DirectConnection)
+        payload = b"".join(chunks)
+        receiver.start()
+        try:
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline and sum(map(len, received)) < len(payload):
+                time.sleep(0.01)
+        finally:
+            receiver.stop_thread()
+            receiver.wait(2000)
+            port.close()
+        self.assertEqual(b"".join(received), payload)
+        self.assertEqual(receiver.overflow_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
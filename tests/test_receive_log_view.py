@@ -0,0 +1,123 @@
+import sys
+import os
+import re
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+from components.ReceiveLogView import ReceiveLogView, ReceiveLogModel
+
+
+class TestReceiveLogModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_append_splits_visual_rows(self):
+        """行尾的 \\r\\n 去掉，行内换行拆成多个可视行，空行保留"""
+        model = ReceiveLogModel()
+        added = model.append_lines(["AT+CSQ\r\n", "Received: 41 42\nASCII   : A  B", "\n", "partial"])
+        self.assertEqual(added, 5)
+        self.assertEqual(model.rows(0, model.rowCount()), ["AT+CSQ", "Received: 41 42", "ASCII   : A  B", "", "partial"])
+        self.assertEqual(model.text(), "AT+CSQ\nReceived: 41 42\nASCII   : A  B\n\npartial")
+
+    def test_trim_in_batches(self):
+        """超过上限一定比例后才从头部成批丢弃，修改上限时立即丢弃"""
+        model = ReceiveLogModel(max_lines=80)
+        model.append_lines(str(i) for i in range(85))
+        self.assertEqual(model.rowCount(), 85)
+        model.append_lines(str(i) for i in range(85, 90))
+        self.assertEqual(model.rows(0, model.rowCount()), [str(i) for i in range(10, 90)])
+        model.set_max_lines(50)
+        self.assertEqual(model.rows(0, model.rowCount()), [str(i) for i in range(40, 90)])
+
+    def test_find_all(self):
+        """返回 (行号, 起始列, 结束列)，忽略空匹配"""
+        model = ReceiveLogModel()
+        model.append_lines(["OK", "ERROR", "ok ok"])
+        self.assertEqual(model.find_all(re.compile("ok", re.IGNORECASE)), [(0, 0, 2), (2, 0, 2), (2, 3, 5)])
+        self.assertEqual(model.find_all(re.compile("x*")), [])
+
+
+class TestReceiveLogView(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.view = ReceiveLogView(ReceiveLogModel(max_lines=1000))
+        self.view.resize(300, 200)
+        self.view.show()
+        self.app.processEvents()
+
+    def tearDown(self):
+        self.view.close()
+        self.view.deleteLater()
+        self.app.processEvents()
+
+    def test_scrollbar_covers_history_and_follows_tail(self):
+        """滚动条以行为单位覆盖全部历史，停在底部时跟随最新数据"""
+        view = self.view
+        bar = view.verticalScrollBar()
+        view.append_lines(f"line {i}" for i in range(500))
+        self.assertTrue(view.follow_tail)
+        self.assertEqual(bar.maximum(), 500 - bar.pageStep())
+        self.assertEqual(bar.value(), bar.maximum())
+
+        # 向上滚动后不再跟随，追加数据时位置保持不变
+        bar.setValue(100)
+        self.assertFalse(view.follow_tail)
+        view.append_lines(f"line {i}" for i in range(500, 600))
+        self.assertEqual(bar.value(), 100)
+
+        # 回到底部后恢复跟随
+        view.scroll_to_bottom()
+        view.append_lines(["tail"])
+        self.assertTrue(view.follow_tail)
+        self.assertEqual(bar.value(), bar.maximum())
+        view.viewport().repaint()
+
+    def test_head_trim_keeps_viewport_content(self):
+        """头部丢弃历史时，未跟随的视口仍显示同一行"""
+        view = self.view
+        bar = view.verticalScrollBar()
+        view.append_lines(f"line {i}" for i in range(1000))
+        bar.setValue(600)
+        view.append_lines(f"line {i}" for i in range(1000, 1200))
+        top = view.model().row_text(bar.value())
+        self.assertEqual(top, "line 600")
+        self.assertEqual(view.model().rowCount(), 1000)
+
+    def test_search_match_selects_and_scrolls(self):
+        """定位搜索结果时选中匹配文本并滚动到该行"""
+        view = self.view
+        view.append_lines(f"line {i}" for i in range(300))
+        view.append_lines(f"line {i}" for i in range(300, 600))
+        results = view.find_all(re.compile(r"line 42\b"))
+        self.assertEqual(results, [(42, 0, 7)])
+        view.set_current_match(*results[0])
+        bar = view.verticalScrollBar()
+        self.assertTrue(bar.value() <= 42 < bar.value() + bar.pageStep())
+        self.assertEqual(view.selected_text(), "line 42")
+        view.viewport().repaint()
+
+    def test_text_edit_compatible_methods(self):
+        """append/toPlainText/clear 与原 QTextEdit 接收区的用法兼容"""
+        view = self.view
+        view.append("(12:00:00)--> AT")
+        view.append_lines(["OK\r\n"])
+        self.assertEqual(view.toPlainText(), "(12:00:00)--> AT\nOK")
+        view.select_all()
+        self.assertEqual(view.selected_text(), "(12:00:00)--> AT\nOK")
+        view.clear()
+        self.assertEqual(view.toPlainText(), "")
+        self.assertFalse(view.has_selection())
+        self.assertTrue(view.follow_tail)
+
+
+if __name__ == '__main__':
+    unittest.main()
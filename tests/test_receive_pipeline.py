@@ -0,0 +1,157 @@
+import sys
+import os
+import time
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
+from components.ReceivePipeline import ReceivePipeline
+from utils.byte_ring import ByteRing
+from utils.framing import FRAMING_FIXED_LENGTH
+from utils.line_store import LineStore, RowFormatter, DIRECTION_TX
+from utils import common
+
+
+class _Notifier(QObject):
+    """模拟 DataReceiver 的偏移通知信号"""
+    dataAvailable = Signal(object)
+
+
+class TestReceivePipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def _process(self, data, **settings):
+        pipeline = ReceivePipeline(settings=settings)
+        lines = pipeline.process(data, [len(data)], [time.monotonic_ns()])
+        return pipeline, lines
+
+    def test_interpret_mode_splits_on_ender(self):
+        """按结束符分段，不完整的最后一段保留在累积缓冲区"""
+        pipeline, lines = self._process(b"AT+CSQ\r\n+CSQ: 20,99\r\n\r\nOK\r\npartial")
+        self.assertEqual(lines, ["AT+CSQ\n", "+CSQ: 20,99\n", "\n", "OK\n"])
+        self.assertEqual(pipeline.framer.pending, len(b"partial"))
+
+        # 超时强制输出未完成的分段
+        flushed = []
+        pipeline.linesReady.connect(flushed.append)
+        pipeline.flush()
+        self.assertEqual(flushed, [["partial"]])
+        self.assertEqual(pipeline.framer.pending, 0)
+
+    def test_escape_mode(self):
+        """显示控制字符模式输出转义后的文本"""
+        _, lines = self._process(b"OK\r\n", show_control_char=True)
+        self.assertEqual(lines, ["OK\\r\\n"])
+
+    def test_hex_mode(self):
+        """十六进制模式输出对齐的十六进制行和字符行"""
+        _, lines = self._process(b"A\x00\r\n", show_hex=True)
+        self.assertEqual(lines, ["Received: 41 00 0D 0A\nASCII   : A  \\0 \\r \\n"])
+
+    def test_hex_dump_layout(self):
+        """十六进制经典转储布局，偏移为数据流偏移"""
+        _, lines = self._process(b"A\r\nB\r\n", show_hex=True, hex_layout="Dump")
+        self.assertEqual(lines[1], "00000003  42 0D 0A" + " " * 40 + "  |B..|")
+
+    def test_timestamp_prefix(self):
+        """时间戳模式每行添加读取时刻"""
+        _, lines = self._process(b"a\r\nb\r\n", show_timestamp=True)
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertRegex(line, r"^\[\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}\.\d{3}\]\w\n$")
+
+    def test_empty_ender_outputs_whole_batch(self):
+        """结束符为空时每批数据直接输出"""
+        _, lines = self._process(b"no ender", ender=b"")
+        self.assertEqual(lines, ["no ender"])
+
+    def test_split_line_across_batches(self):
+        """跨批次的行在收到结束符后完整输出"""
+        pipeline = ReceivePipeline()
+        self.assertEqual(pipeline.process(b"AT+C", [4], [time.monotonic_ns()]), [])
+        self.assertEqual(pipeline.process(b"SQ\r\nOK", [4], [time.monotonic_ns()]), ["AT+CSQ\n"])
+
+    def test_multibyte_character_across_flush(self):
+        """超时输出切开的多字节字符，剩余字节在下一行开头完整输出"""
+        pipeline = ReceivePipeline(settings={'encoding': 'utf-8'})
+        data = "温度\r\n".encode("utf-8")
+        self.assertEqual(pipeline.process(data[:4], [4], [time.monotonic_ns()]), [])
+        flushed = []
+        pipeline.linesReady.connect(flushed.extend)
+        pipeline.flush()
+        self.assertEqual(flushed, ["温"])
+        self.assertEqual(pipeline.process(data[4:], [len(data) - 4], [time.monotonic_ns()]), ["度\n"])
+
+    def test_display_decodes_characters_split_across_frames(self):
+        """定长分帧切开的多字节字符在显示区与日志一样完整显示，中间插入的发送回显不影响"""
+        pipeline = ReceivePipeline(settings={'encoding': 'utf-8', 'framing': FRAMING_FIXED_LENGTH,
+                                             'frame_length': 5})
+        batches = []
+        pipeline.framesReady.connect(lambda records, encoding: batches.append((records, encoding)))
+        data = "你好世界!!!".encode("utf-8")
+        lines = pipeline.process(data[:10], [10], [time.monotonic_ns()])
+        lines += pipeline.process(data[10:], [5], [time.monotonic_ns()])
+        self.assertEqual(lines, ["你", "好世", "界!!!"])
+        self.assertEqual([record[4] for records, _ in batches for record in records], [0, 2, 1])
+
+        # 每条记录单独成块，跨热区和压缩后的冷区读取前缀字节数
+        store = LineStore(block_records=1, compression="zlib")
+        store.extend(batches[0][0])
+        store.append(b"AT", 0, 0.0, DIRECTION_TX)
+        store.extend(batches[1][0])
+        store.flush()
+        formatter = RowFormatter(store, settings=pipeline._settings, encoding=batches[1][1])
+        self.assertEqual([formatter.rows(i) for i in (0, 1, 3)], [["你"], ["好世"], ["界!!!"]])
+        # 前面的帧已丢弃时退回逐帧解码
+        store.trim(1)
+        self.assertEqual(RowFormatter(store, pipeline._settings, "utf-8").rows(0), ["\ufffd世"])
+
+    def test_slip_framing(self):
+        """SLIP分帧输出解码后的帧"""
+        _, lines = self._process(b"\xc0ab\xdb\xdccd\xc0", framing="SLIP", show_hex=True)
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith("Received: 61 62 C0 63 64"))
+
+    def test_log_file_written(self):
+        """日志文件在流水线中写入"""
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "recv.log")
+            self._process(b"line1\r\nline2\r\n", log_file=log_file)
+            # 日志由写入线程异步写入
+            self.assertTrue(common.flush_log())
+            with open(log_file, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "line1\nline2\n")
+
+    def test_runs_in_worker_thread(self):
+        """流水线在独立线程中从环形缓冲区取数据，显示行发回调用线程"""
+        ring = ByteRing(64)
+        pipeline = ReceivePipeline(ring)
+        thread = QThread()
+        pipeline.moveToThread(thread)
+        notifier = _Notifier()
+        notifier.dataAvailable.connect(pipeline.process_available)
+        received = []
+        pipeline.linesReady.connect(received.extend)
+        thread.start()
+        try:
+            ring.write(b"hello\r\nworld\r\n")
+            ring.mark(time.monotonic_ns())
+            notifier.dataAvailable.emit(ring.write_offset)
+            deadline = time.time() + 2
+            while time.time() < deadline and len(received) < 2:
+                self.app.processEvents()
+                time.sleep(0.01)
+        finally:
+            thread.quit()
+            thread.wait(2000)
+        self.assertEqual(received, ["hello\n", "world\n"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
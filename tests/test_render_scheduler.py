@@ -0,0 +1,81 @@
+import sys
+import os
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+from components.RenderScheduler import RenderScheduler
+
+
+class TestRenderScheduler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def _run_events(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def test_batches_coalesced_into_one_frame(self):
+        """同一帧内提交的多批显示行合并为一次渲染"""
+        frames = []
+        scheduler = RenderScheduler(frames.append, max_fps=20)
+        for i in range(100):
+            scheduler.submit([f"line {i}"])
+        self.assertEqual(frames, [])
+        self._run_events(0.2)
+        self.assertEqual(frames, [[f"line {i}" for i in range(100)]])
+
+        stats = scheduler.stats()
+        self.assertEqual(stats['frames_rendered'], 1)
+        self.assertEqual(stats['lines_rendered'], 100)
+        self.assertEqual(stats['max_lines_per_frame'], 100)
+        self.assertEqual(stats['batches_coalesced'], 99)
+        self.assertEqual(stats['pending_lines'], 0)
+
+    def test_frame_rate_is_capped(self):
+        """持续提交时渲染次数不超过最大帧率"""
+        frames = []
+        scheduler = RenderScheduler(frames.append, max_fps=20)
+        submitted = 0
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            scheduler.submit(["x"])
+            submitted += 1
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.assertLessEqual(len(frames), 12)
+        self.assertGreaterEqual(len(frames), 5)
+        # 所有提交的行都被渲染或仍在等待，不会丢失
+        self.assertEqual(sum(map(len, frames)) + scheduler.pending_lines, submitted)
+
+    def test_busy_gui_counts_skipped_frames(self):
+        """GUI线程繁忙超过一帧时记录跳过的帧数"""
+        scheduler = RenderScheduler(lambda lines: time.sleep(0.12), max_fps=20)
+        scheduler.submit(["a"])
+        self._run_events(0.1)
+        scheduler.submit(["b"])
+        self._run_events(0.1)
+        self.assertGreaterEqual(scheduler.frames_skipped, 1)
+
+    def test_flush_and_clear(self):
+        """flush 立即渲染，clear 丢弃待显示的行"""
+        frames = []
+        scheduler = RenderScheduler(frames.append)
+        scheduler.submit(["a", "b"])
+        scheduler.flush()
+        self.assertEqual(frames, [["a", "b"]])
+        scheduler.submit(["c"])
+        scheduler.clear()
+        self._run_events(0.1)
+        self.assertEqual(frames, [["a", "b"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import sys
+import os
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.session_decoder import SessionDecoder
+
+
+class TestSessionDecoder(unittest.TestCase):
+
+    def test_partial_character_carried_over(self):
+        """被读取边界切开的多字节字符在下一块中完整输出"""
+        decoder = SessionDecoder("utf-8")
+        data = "温度:25℃\r\n".encode("utf-8")
+        text = "".join(decoder.decode(data[i:i + 1]) for i in range(len(data)))
+        self.assertEqual(text, "温度:25℃\r\n")
+
+    def test_auto_detect_locks_gbk(self):
+        """自动检测在采样字节数内淘汰非法候选并锁定编码"""
+        decoder = SessionDecoder(detect_bytes=8)
+        data = "中文串口数据".encode("gbk")
+        self.assertTrue(decoder.detecting)
+        text = decoder.decode(data[:5]) + decoder.decode(data[5:])
+        self.assertEqual(text, "中文串口数据")
+        self.assertEqual(decoder.encoding, "gbk")
+        self.assertFalse(decoder.detecting)
+
+    def test_auto_detect_prefers_utf8(self):
+        """UTF-8数据锁定为utf-8，锁定后非法字节被替换而不是回退其他编码"""
+        decoder = SessionDecoder(detect_bytes=4)
+        self.assertEqual(decoder.decode("你好".encode("utf-8")), "你好")
+        self.assertEqual(decoder.encoding, "utf-8")
+        self.assertEqual(decoder.decode(b"\xff"), "�")
+
+    def test_manual_encoding(self):
+        """手动指定编码时不做检测"""
+        decoder = SessionDecoder("big5")
+        self.assertEqual(decoder.encoding, "big5")
+        self.assertEqual(decoder.decode("繁體".encode("big5")), "繁體")
+        with self.assertRaises(LookupError):
+            SessionDecoder("no-such-codec")
+
+    def test_reset_keeps_locked_encoding(self):
+        """reset只丢弃未完成的字符，保留已锁定的编码"""
+        decoder = SessionDecoder("gbk")
+        decoder.decode("中".encode("gbk")[:1])
+        decoder.reset()
+        self.assertEqual(decoder.decode(b"OK"), "OK")
+        self.assertEqual(decoder.encoding, "gbk")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+from components.ReceivePipeline import ReceivePipeline
+from utils import common
+from utils.line_store import DIRECTION_TX
+from utils.session_log import SessionLog, iter_records, DATA_HEX, EVENT_OPEN, EVENT_CLOSE
+
+
+class TestSessionLog(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "session.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _lines(self):
+        self.assertTrue(common.flush_log())
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_rx_and_tx_records(self):
+        """接收帧带数据流偏移和会话编码解码的文本，发送记录带实际发送的字节，时刻单调"""
+        session_log = SessionLog(self.path, "COM3")
+        session_log.event(EVENT_OPEN, baudrate=115200)
+        tx = common.encode_command("AT+CSQ", "0D0A")
+        session_log.write(DIRECTION_TX, tx, text="AT+CSQ")
+        pipeline = ReceivePipeline(settings={'session_log': session_log, 'encoding': 'utf-8'})
+        start_ns = time.monotonic_ns()
+        pipeline.process("+CSQ: 20,99\r\n温度\r\nOK".encode("utf-8"), [10, 24], [start_ns, start_ns + 1000000])
+        session_log.event(EVENT_CLOSE, records=session_log.records)
+
+        lines = self._lines()
+        self.assertEqual([line.get("event") for line in lines], [EVENT_OPEN, None, None, None, EVENT_CLOSE])
+        self.assertEqual(lines[0]["baudrate"], 115200)
+        self.assertEqual(lines[-1]["records"], 3)
+        self.assertEqual((lines[1]["dir"], lines[1]["text"], lines[1]["port"]), ("tx", "AT+CSQ", "COM3"))
+        self.assertNotIn("offset", lines[1])
+        self.assertEqual([(line["dir"], line["offset"], line["text"]) for line in lines[2:4]],
+                         [("rx", 0, "+CSQ: 20,99\r\n"), ("rx", 13, "温度\r\n")])
+        self.assertLessEqual(lines[2]["mono_ns"], lines[3]["mono_ns"])
+        self.assertAlmostEqual(lines[2]["time"], common.monotonic_ns_to_epoch(lines[2]["mono_ns"]), places=5)
+
+        records = list(iter_records(self.path))
+        self.assertEqual([record["data"] for record in records], [tx, b"+CSQ: 20,99\r\n", "温度\r\n".encode("utf-8")])
+        self.assertEqual(len(list(iter_records(self.path, events=True))), 5)
+
+    def test_hex_data_and_invalid_encoding(self):
+        """原始字节可编码为十六进制；未知的编码方式被拒绝"""
+        session_log = SessionLog(self.path, "loop://", data_encoding=DATA_HEX)
+        session_log.write(DIRECTION_TX, b"\x01\xff")
+        self.assertEqual(self._lines()[0]["hex"], "01ff")
+        self.assertEqual(next(iter_records(self.path))["data"], b"\x01\xff")
+        with self.assertRaises(ValueError):
+            SessionLog(self.path, data_encoding="zip")
+
+    def test_pipeline_decodes_each_frame_once(self):
+        """开启会话日志时文本日志的内容不变"""
+        log_file = os.path.join(self.directory, "received.log")
+        data = "第一行\r\n第二行\r\n".encode("utf-8")
+        for session_log in (None, SessionLog(self.path)):
+            common.truncate_log(log_file)
+            pipeline = ReceivePipeline(settings={'session_log': session_log, 'log_file': log_file})
+            lines = pipeline.process(data, [len(data)], [time.monotonic_ns()])
+            self.assertEqual(lines, ["第一行\n", "第二行\n"])
+        self.assertEqual([line["text"] for line in self._lines()], ["第一行\r\n", "第二行\r\n"])
+
+
+if __name__ == '__main__':
+    unittest.main()
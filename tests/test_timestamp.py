@@ -0,0 +1,42 @@
+import sys
+import os
+import time
+import datetime
+import unittest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import common
+
+
+class TestCalculateTimestamp(unittest.TestCase):
+
+    def test_legacy_offset_from_start_time(self):
+        """未提供读取时刻时按起始时间加字节偏移推算"""
+        start = datetime.datetime(2024, 1, 1, 12, 0, 0)
+        ts = common.calculate_timestamp(start, 100, 0.001)
+        self.assertEqual(ts, start + datetime.timedelta(seconds=0.1))
+
+    def test_uses_chunk_read_time(self):
+        """时间戳由字节所在读取块的读取时刻向前推算"""
+        now = time.monotonic_ns()
+        ends = [10, 20]
+        times = [now, now + 50_000_000]
+        # 块末字节即为读取时刻
+        self.assertEqual(common.calculate_timestamp(None, 19, 0.001, ends, times),
+                         common.monotonic_ns_to_datetime(times[1]))
+        # 块内靠前的字节按传输时间往前推，但不早于上一块的读取时刻
+        ts = common.calculate_timestamp(None, 15, 0.001, ends, times)
+        self.assertEqual(ts, common.monotonic_ns_to_datetime(times[1] - 4_000_000))
+        ts = common.calculate_timestamp(None, 10, 1.0, ends, times)
+        self.assertEqual(ts, common.monotonic_ns_to_datetime(times[0]))
+
+    def test_monotonic_maps_to_wall_clock(self):
+        """单调时钟换算后的时间应接近当前本地时间"""
+        ts = common.monotonic_ns_to_datetime(time.monotonic_ns())
+        self.assertLess(abs((datetime.datetime.now() - ts).total_seconds()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
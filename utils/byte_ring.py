@@ -0,0 +1,184 @@
+"""
+定长字节环形缓冲区
+
+DataReceiver（生产者）通过 readinto 把串口数据直接读进预分配的 bytearray，
+消费者只收到“数据已写到偏移 N”的通知，再按需取出。单生产者/单消费者，
+两端各自只推进自己的偏移量，不需要加锁。
+
+生产者每次读取后可以调用 mark() 记录该块的读取时刻（单调时钟纳秒），
+消费者通过 read_marked() 取出数据的同时得到块结束偏移和时间戳两个并行数组。
+"""
+
+from array import array
+from collections import deque
+
+DEFAULT_RING_CAPACITY = 4 * 1024 * 1024  # 4MB
+MAX_PENDING_MARKS = 65536  # 未被消费的读取时刻上限，超出后最旧的记录被合并掉
+
+
+class ByteRing:
+    """
+    单生产者/单消费者的定长字节环形缓冲区
+
+    偏移量均为自创建以来的累计字节数（绝对偏移），不会回绕：
+    - write_offset: 生产者已写入的总字节数
+    - read_offset: 消费者已取走的总字节数
+    - overflow_bytes: 缓冲区写满时被丢弃的字节数（精确计数）
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY):
+        if capacity <= 0:
+            raise ValueError(f"Invalid ring capacity: {capacity}")
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._scratch = memoryview(bytearray(4096))  # 溢出时用于丢弃数据
+        self.write_offset = 0
+        self.read_offset = 0
+        self.overflow_bytes = 0
+        self._marks = deque(maxlen=MAX_PENDING_MARKS)  # (块结束绝对偏移, 读取时刻ns)
+        self._last_mark_offset = 0
+
+    def readable(self) -> int:
+        """可供消费者读取的字节数"""
+        return self.write_offset - self.read_offset
+
+    def writable(self) -> int:
+        """可供生产者写入的字节数"""
+        return self.capacity - (self.write_offset - self.read_offset)
+
+    # 生产者接口
+    def fill_from(self, source, size: int) -> int:
+        """
+        通过 source.readinto 把最多 size 字节直接读入缓冲区
+
+        参数：
+        source: 支持 readinto 的对象（如 serial.Serial）
+        size (int): 本次最多读取的字节数
+
+        返回：
+        int: 从 source 读出的字节数（包括因缓冲区已满而丢弃的部分）
+        """
+        total = 0
+        while total < size:
+            free = self.writable()
+            if free <= 0:
+                # 消费者跟不上：仍需把数据从串口取走，避免驱动缓冲区溢出，但只计数不保存
+                n = source.readinto(self._scratch[:min(size - total, len(self._scratch))])
+                if not n:
+                    break
+                self.overflow_bytes += n
+                total += n
+                continue
+
+            pos = self.write_offset % self.capacity
+            want = min(size - total, free, self.capacity - pos)
+            n = source.readinto(self._view[pos:pos + want])
+            if not n:
+                break
+            self.write_offset += n
+            total += n
+            if n < want:
+                break  # 读超时，没有更多数据
+        return total
+
+    def mark(self, timestamp_ns: int):
+        """记录自上次 mark 以来写入的数据块的读取时刻"""
+        if self.write_offset > self._last_mark_offset:
+            self._last_mark_offset = self.write_offset
+            self._marks.append((self.write_offset, timestamp_ns))
+
+    def slices(self, start_offset: int, end_offset: int) -> list:
+        """
+        生产者查看自己刚写入的 [start_offset, end_offset) 数据（如写入原始抓包），不复制、不改变偏移
+
+        返回：
+        list[memoryview]: 一段，或在缓冲区末尾回绕时为两段
+        """
+        size = end_offset - start_offset
+        if size <= 0:
+            return []
+        pos = start_offset % self.capacity
+        first = min(size, self.capacity - pos)
+        if first == size:
+            return [self._view[pos:pos + size]]
+        return [self._view[pos:], self._view[:size - first]]
+
+    def write(self, data) -> int:
+        """
+        写入一段现有数据（用于回放等非串口数据源）
+
+        返回：
+        int: 实际写入的字节数，其余部分计入 overflow_bytes
+        """
+        data = memoryview(data)
+        size = len(data)
+        written = 0
+        while written < size:
+            free = self.writable()
+            if free <= 0:
+                break
+            pos = self.write_offset % self.capacity
+            n = min(size - written, free, self.capacity - pos)
+            self._view[pos:pos + n] = data[written:written + n]
+            self.write_offset += n
+            written += n
+        self.overflow_bytes += size - written
+        return written
+
+    # 消费者接口
+    def read(self, end_offset: int = None) -> bytes:
+        """
+        取出 [read_offset, end_offset) 之间的数据，end_offset 为空时取出全部可读数据
+
+        返回：
+        bytes: 取出的数据
+        """
+        end = self.write_offset if end_offset is None else min(end_offset, self.write_offset)
+        start = self.read_offset
+        size = end - start
+        if size <= 0:
+            return b""
+
+        pos = start % self.capacity
+        first = min(size, self.capacity - pos)
+        if first == size:
+            data = bytes(self._view[pos:pos + size])
+        else:
+            data = b"".join((self._view[pos:], self._view[:size - first]))
+        self.read_offset = end
+        return data
+
+    def read_marked(self, end_offset: int = None):
+        """
+        取出已记录读取时刻的数据，并返回每个读取块的结束位置和时间戳
+
+        参数：
+        end_offset (int): 最多取到的绝对偏移，为空时取到最新的 mark
+
+        返回：
+        tuple[bytes, array, array]: (数据, 块结束偏移(相对数据起点), 块读取时刻ns)
+        """
+        start = self.read_offset
+        chunk_ends = array('Q')
+        chunk_times = array('Q')
+        marks = self._marks
+        # 跳过已被 clear() 越过的记录
+        while marks and marks[0][0] <= start:
+            marks.popleft()
+        if not marks:
+            return b"", chunk_ends, chunk_times
+
+        limit = marks[-1][0] if end_offset is None else min(end_offset, marks[-1][0])
+        end = start
+        while marks and marks[0][0] <= limit:
+            end, timestamp_ns = marks.popleft()
+            chunk_ends.append(end - start)
+            chunk_times.append(timestamp_ns)
+        if end == start:
+            return b"", chunk_ends, chunk_times
+        return self.read(end), chunk_ends, chunk_times
+
+    def clear(self):
+        """丢弃所有未读数据"""
+        self.read_offset = self.write_offset
@@ -0,0 +1,304 @@
+"""
+原始数据抓包文件（.scap）
+
+接收日志只保存格式化后的显示文本，原始字节、读取块边界和读取时刻都会丢失。抓包文件按读取块保存
+原始数据，可以离线分析或回放（见 utils.protocol_replay）。
+
+文件布局（小端）：
+    文件头      magic "SCAP"(4s) 版本(H) 标志(H) 创建时刻 Unix ns(q)
+    记录        数据长度(I) 时刻 Unix ns(q) 方向(B) 数据，依次追加
+    索引        每隔约 64KB 一项：记录时刻(q) 记录在文件中的偏移(Q)
+    尾部        索引偏移(Q) 索引项数(Q) 记录数(Q) magic "SCAPIDX1"(8s)
+
+索引和尾部在关闭时写入；异常退出的文件没有尾部，CaptureReader 会顺序扫描记录重建索引，
+末尾不完整的记录被忽略。
+
+CaptureWriter 在读取线程中调用：write() 只把记录复制进内存缓冲区，由后台线程按大块写入磁盘，
+磁盘变慢时读取循环也不会被阻塞（缓冲区超过上限时丢弃记录并计数）。
+CaptureReader 通过 mmap 读取，记录数据以 memoryview 切片返回，不复制。
+"""
+
+import mmap
+import time
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from utils.line_store import DIRECTION_RX, DIRECTION_TX
+
+MAGIC = b"SCAP"
+INDEX_MAGIC = b"SCAPIDX1"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHq")
+RECORD_HEADER = struct.Struct("<IqB")
+INDEX_ENTRY = struct.Struct("<qQ")
+TRAILER = struct.Struct("<QQQ8s")
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_MAX_BUFFER = 64 * 1024 * 1024
+DEFAULT_INDEX_STRIDE = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class CaptureWriter:
+    """
+    抓包文件写入器，可在多个线程中调用 write()
+
+    属性：
+    path (str): 文件路径
+    records (int): 已接受的记录数
+    payload_bytes (int): 已接受的数据字节数
+    dropped_records (int): 缓冲区超过上限时丢弃的记录数
+    dropped_bytes (int): 丢弃的数据字节数
+    error (OSError | None): 后台写入失败的错误，失败后不再写入
+    """
+
+    def __init__(self, path: str, block_size: int = DEFAULT_BLOCK_SIZE, max_buffer: int = DEFAULT_MAX_BUFFER,
+                 index_stride: int = DEFAULT_INDEX_STRIDE, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        参数：
+        path (str): 文件路径，已存在时被覆盖
+        block_size (int): 缓冲区达到该大小时立即写入磁盘
+        max_buffer (int): 缓冲区上限，超过后丢弃新记录
+        index_stride (int): 索引项之间的最小文件距离（字节）
+        flush_interval (float): 缓冲区未满时最长的写入间隔（秒）
+        """
+        self.path = path
+        self.block_size = block_size
+        self.max_buffer = max_buffer
+        self.index_stride = index_stride
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.payload_bytes = 0
+        self.dropped_records = 0
+        self.dropped_bytes = 0
+        self.error = None
+
+        # 单调时钟换算为 Unix 时间的锚点
+        self._wall_anchor_ns = time.time_ns()
+        self._monotonic_anchor_ns = time.monotonic_ns()
+        # 带缓冲的写入器保证整块写完（原始 FileIO 可能只写入一部分而不报错），每块写入后 flush
+        self._file = open(path, "wb")
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, self._wall_anchor_ns))
+        self._offset = FILE_HEADER.size  # 下一条记录的文件偏移
+        self._next_index = self._offset
+        self._index_times = array('q')
+        self._index_offsets = array('Q')
+        self._buffer = bytearray()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="CaptureWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, direction: int, *parts, monotonic_ns: int = None) -> bool:
+        """
+        追加一条记录
+
+        参数：
+        direction (int): DIRECTION_RX / DIRECTION_TX
+        parts (bytes-like): 记录数据，可以分成多段（如环形缓冲区回绕处的两段）
+        monotonic_ns (int): 读取时刻（time.monotonic_ns()），为空时取当前时刻
+
+        返回：
+        bool: 是否被接受，写入器已关闭或缓冲区已满时为 False
+        """
+        size = sum(len(part) for part in parts)
+        if monotonic_ns is None:
+            monotonic_ns = time.monotonic_ns()
+        timestamp_ns = self._wall_anchor_ns + (monotonic_ns - self._monotonic_anchor_ns)
+        with self._cond:
+            if self._closed or self.error is not None:
+                return False
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped_records += 1
+                self.dropped_bytes += size
+                return False
+            if self._offset >= self._next_index:
+                self._index_times.append(timestamp_ns)
+                self._index_offsets.append(self._offset)
+                self._next_index = self._offset + self.index_stride
+            self._buffer += RECORD_HEADER.pack(size, timestamp_ns, direction)
+            for part in parts:
+                self._buffer += part
+            self._offset += RECORD_HEADER.size + size
+            self.records += 1
+            self.payload_bytes += size
+            if len(self._buffer) >= self.block_size:
+                self._cond.notify()
+        return True
+
+    def close(self):
+        """写入剩余数据、索引和尾部后关闭文件"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._buffer) >= self.block_size,
+                                    timeout=self.flush_interval)
+                block, self._buffer = self._buffer, bytearray()
+                closed = self._closed
+            if block and self.error is None:
+                try:
+                    self._file.write(block)
+                    self._file.flush()
+                except OSError as e:
+                    self.error = e
+            if closed:
+                break
+        try:
+            if self.error is None:
+                self._file.write(self._index_times_and_offsets())
+                self._file.write(TRAILER.pack(self._offset, len(self._index_times), self.records, INDEX_MAGIC))
+        except OSError as e:
+            self.error = e
+        finally:
+            self._file.close()
+
+    def _index_times_and_offsets(self) -> bytes:
+        return b"".join(INDEX_ENTRY.pack(timestamp_ns, offset)
+                        for timestamp_ns, offset in zip(self._index_times, self._index_offsets))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """
+    通过 mmap 读取抓包文件
+
+    records() 返回的数据是 mmap 的 memoryview 切片，关闭前需要先释放（或复制为 bytes）。
+
+    属性：
+    path (str): 文件路径
+    created_ns (int): 文件创建时刻（Unix ns）
+    complete (bool): 是否正常关闭（带索引尾部）
+    record_count (int): 记录数
+    index_times (array): 索引项的记录时刻
+    index_offsets (array): 索引项的文件偏移
+    """
+
+    def __init__(self, path: str, index_stride: int = DEFAULT_INDEX_STRIDE):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._mmap) < FILE_HEADER.size:
+            self.close()
+            raise ValueError(f"Not a capture file: {path}")
+        magic, version, _, self.created_ns = FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a capture file: {path}")
+
+        self.index_times = array('q')
+        self.index_offsets = array('Q')
+        self.complete = self._read_trailer()
+        if not self.complete:
+            self._scan(index_stride)
+
+    def _read_trailer(self) -> bool:
+        size = len(self._mmap)
+        if size < FILE_HEADER.size + TRAILER.size:
+            return False
+        index_offset, entries, records, magic = TRAILER.unpack_from(self._mmap, size - TRAILER.size)
+        if magic != INDEX_MAGIC or index_offset + entries * INDEX_ENTRY.size != size - TRAILER.size:
+            return False
+        for timestamp_ns, offset in INDEX_ENTRY.iter_unpack(self._view[index_offset:size - TRAILER.size]):
+            self.index_times.append(timestamp_ns)
+            self.index_offsets.append(offset)
+        self.record_count = records
+        self._data_end = index_offset
+        return True
+
+    def _scan(self, index_stride: int):
+        """没有尾部时顺序扫描完整的记录，重建索引"""
+        self._data_end = len(self._mmap)
+        count = 0
+        next_index = FILE_HEADER.size
+        end = FILE_HEADER.size
+        for offset, timestamp_ns, _, _ in self._iter_from(FILE_HEADER.size, headers_only=True):
+            if offset >= next_index:
+                self.index_times.append(timestamp_ns)
+                self.index_offsets.append(offset)
+                next_index = offset + index_stride
+            count += 1
+            end = offset + RECORD_HEADER.size + RECORD_HEADER.unpack_from(self._mmap, offset)[0]
+        self.record_count = count
+        self._data_end = end
+
+    def _iter_from(self, offset: int, headers_only: bool = False):
+        """从 offset 开始依次返回 (偏移, 时刻, 方向, 数据)，遇到不完整的记录时停止"""
+        mm = self._mmap
+        view = self._view
+        end = self._data_end
+        header_size = RECORD_HEADER.size
+        while offset + header_size <= end:
+            size, timestamp_ns, direction = RECORD_HEADER.unpack_from(mm, offset)
+            start = offset + header_size
+            if start + size > end:
+                break
+            yield offset, timestamp_ns, direction, None if headers_only else view[start:start + size]
+            offset = start + size
+
+    def offset_for_time(self, timestamp_ns: int) -> int:
+        """时刻不晚于 timestamp_ns 的最后一个索引项的文件偏移，用于从某个时刻开始读取"""
+        index = bisect_right(self.index_times, timestamp_ns) - 1
+        return self.index_offsets[index] if index >= 0 else FILE_HEADER.size
+
+    def records(self, start_ns: int = None):
+        """
+        依次返回记录
+
+        参数：
+        start_ns (int): 只返回时刻不早于该值的记录，为空时从头开始
+
+        返回：
+        Iterator[tuple[int, int, memoryview]]: (时刻 Unix ns, 方向, 数据)
+        """
+        offset = FILE_HEADER.size if start_ns is None else self.offset_for_time(start_ns)
+        for _, timestamp_ns, direction, payload in self._iter_from(offset):
+            if start_ns is not None and timestamp_ns < start_ns:
+                continue
+            yield timestamp_ns, direction, payload
+
+    @property
+    def start_ns(self) -> int:
+        """第一条记录的时刻，没有记录时为文件创建时刻"""
+        return self.index_times[0] if self.index_times else self.created_ns
+
+    @property
+    def end_ns(self) -> int:
+        """最后一条记录的时刻"""
+        timestamp_ns = self.start_ns
+        offset = self.index_offsets[-1] if self.index_offsets else FILE_HEADER.size
+        for _, timestamp_ns, _, _ in self._iter_from(offset, headers_only=True):
+            pass
+        return timestamp_ns
+
+    def close(self):
+        """关闭映射；仍有未释放的记录数据切片时由垃圾回收关闭"""
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
@@ -4,13 +4,80 @@ import sys
 import time
 import json
 import serial
+import atexit
 import threading
 import configparser
 import datetime
+from bisect import bisect_right
 from pathlib import Path
 from typing import Literal, Tuple
+from utils import hex_formatter, metrics
+from utils.log_writer import LogWriterService
 
 write_lock = threading.Lock()
+TX_BYTES = metrics.counter("tx_bytes_total", "Bytes written to the serial port")
+TX_COMMANDS = metrics.counter("tx_commands_total", "Commands written to the serial port")
+# 文本日志统一由写入服务在专用线程中批量写入，首次写日志时启动
+_log_writer = None
+
+# 注册 utils 下的 pyserial URL 处理器（replay:// 抓包回放，见 utils.protocol_replay）
+if "utils" not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append("utils")
+
+# 单调时钟与系统时钟的对应关系，用于把读取线程记录的 time.monotonic_ns() 换算成显示时间
+_WALL_ANCHOR_NS = time.time_ns()
+_MONOTONIC_ANCHOR_NS = time.monotonic_ns()
+
+
+# 控制字符处理的预编译查表（str.translate）
+# 查表使用256项的列表：码位超出列表范围的字符按未映射处理（保持原样），列表下标查找
+# 比字典查不到时抛出 KeyError 快得多。值为 int 表示原样保留，None 表示删除。
+# 常见控制字符映射
+_CONTROL_CHAR_ESCAPES = {
+    '\r': '\\r',
+    '\n': '\\n',
+    '\t': '\\t',
+    '\v': '\\v',
+    '\f': '\\f',
+    '\b': '\\b',
+    '\a': '\\a',
+    '\\': '\\\\',  # 防止反斜杠本身被误解
+}
+
+
+def _build_escape_table(escape_extended: bool) -> list:
+    table = []
+    for code in range(256):
+        char = chr(code)
+        if char in _CONTROL_CHAR_ESCAPES:
+            table.append(_CONTROL_CHAR_ESCAPES[char])
+        elif code < 32 or (escape_extended and (code > 126 or not char.isprintable())):
+            table.append(f'\\x{code:02x}')
+        else:
+            table.append(code)
+    return table
+
+
+class _ExtendedEscapeTable(dict):
+    """扩展转义查表：码位0xFF以上的字符按需生成\\u转义并缓存"""
+
+    def __missing__(self, code):
+        value = f'\\u{code:04x}'
+        self[code] = value
+        return value
+
+
+_ESCAPE_TABLE = _build_escape_table(False)
+_ESCAPE_EXTENDED_TABLE = _ExtendedEscapeTable(enumerate(_build_escape_table(True)))
+# 删除0xFF以内的控制字符和扩展ASCII字符
+_REMOVE_CONTROL_TABLE = [None if code < 32 or code >= 127 else code for code in range(256)]
+_REMOVE_CONTROL_TABLE_KEEP_CRLF = [code if code in (0x0D, 0x0A) else value for code, value in enumerate(_REMOVE_CONTROL_TABLE)]
+# 不需要光标位置时的解析：\r 不产生输出，\a 显示为[BEL]，空字符替换为空格
+_INTERPRET_TABLE = [code for code in range(256)]
+_INTERPRET_TABLE[0x0D] = None
+_INTERPRET_TABLE[0x07] = '[BEL]'
+_INTERPRET_TABLE[0x00] = ' '
+_INTERPRET_TOKENS = re.compile(r'([\r\n\t\b\a])')
 
 
 class SerialPortNotInitializedError(Exception):
@@ -145,19 +212,74 @@ def get_absolute_path(file_name):
     else:
         raise FileNotFoundError(f"File not found at path: {abs_path}")
     
-def calculate_timestamp(start_time, byte_offset, time_per_byte):
+def monotonic_ns_to_epoch(timestamp_ns: int) -> float:
+    """
+    将 time.monotonic_ns() 记录的时刻换算为 Unix 时间戳
+
+    参数：
+    timestamp_ns (int): 单调时钟纳秒
+
+    返回：
+    float: 对应的 Unix 时间戳（秒）
+    """
+    return (_WALL_ANCHOR_NS + (timestamp_ns - _MONOTONIC_ANCHOR_NS)) / 1e9
+
+
+def monotonic_ns_to_datetime(timestamp_ns: int) -> datetime.datetime:
+    """
+    将 time.monotonic_ns() 记录的时刻换算为本地时间
+
+    参数：
+    timestamp_ns (int): 单调时钟纳秒
+
+    返回：
+    datetime: 对应的本地时间
+    """
+    return datetime.datetime.fromtimestamp(monotonic_ns_to_epoch(timestamp_ns))
+
+
+def frame_timestamp_ns(byte_offset, time_per_byte, chunk_ends, chunk_times_ns) -> int:
+    """
+    按字节所在读取块的实际读取时刻推算该字节的到达时刻：块内越靠前的字节到达越早，
+    但不早于上一块的读取时刻
+
+    参数：
+    byte_offset (int): 字节偏移量
+    time_per_byte (float): 每字节传输时间（秒）
+    chunk_ends (Sequence[int]): 各读取块的结束偏移（相对同一数据起点，递增，非空）
+    chunk_times_ns (Sequence[int]): 各读取块的读取时刻（time.monotonic_ns）
+
+    返回：
+    int: 到达时刻（time.monotonic_ns）
+    """
+    index = min(bisect_right(chunk_ends, byte_offset), len(chunk_ends) - 1)
+    bytes_after = max(0, chunk_ends[index] - 1 - byte_offset)
+    timestamp_ns = chunk_times_ns[index] - int(bytes_after * time_per_byte * 1e9)
+    if index > 0:
+        timestamp_ns = max(timestamp_ns, chunk_times_ns[index - 1])
+    return timestamp_ns
+
+
+def calculate_timestamp(start_time, byte_offset, time_per_byte, chunk_ends=None, chunk_times_ns=None):
     """
     计算时间戳
 
+    若提供了读取线程记录的块结束偏移和读取时刻（并行数组），则按 frame_timestamp_ns 推算；
+    否则按起始时间加字节偏移推算。
+
     Args:
-        start_time (datetime): 起始时间
+        start_time (datetime): 起始时间（仅在未提供读取时刻时使用）
         byte_offset (int): 字节偏移量
         time_per_byte (float): 每字节传输时间（秒）
+        chunk_ends (Sequence[int]): 各读取块的结束偏移（相对同一数据起点，递增）
+        chunk_times_ns (Sequence[int]): 各读取块的读取时刻（time.monotonic_ns）
 
     Returns:
         datetime: 计算后的时间戳
     """
-    return start_time + datetime.timedelta(seconds=(byte_offset * time_per_byte))
+    if not chunk_ends:
+        return start_time + datetime.timedelta(seconds=(byte_offset * time_per_byte))
+    return monotonic_ns_to_datetime(frame_timestamp_ns(byte_offset, time_per_byte, chunk_ends, chunk_times_ns))
 
     
 def remove_control_characters(s: str, ignore_crlf: bool = True) -> str:
@@ -171,10 +293,7 @@ def remove_control_characters(s: str, ignore_crlf: bool = True) -> str:
     返回：
     str: 移除后的字符串
     """
-    return ''.join(
-        c for c in s 
-        if not (ord(c) <= 0xFF and (ord(c) < 32 or ord(c) >= 127) and not (ignore_crlf and c in '\r\n'))
-    )
+    return s.translate(_REMOVE_CONTROL_TABLE_KEEP_CRLF if ignore_crlf else _REMOVE_CONTROL_TABLE)
 
 def force_decode(
     bytes_data: bytes,
@@ -203,22 +322,36 @@ def force_decode(
     for encoding in encoding_list:
         try:
             decoded_str = bytes_data.decode(encoding)
-            
-            if handle_control_char == 'escape':
-                decoded_str = escape_control_characters(decoded_str)
-            elif handle_control_char == 'remove':
-                decoded_str = remove_control_characters(decoded_str)
-            elif handle_control_char == 'interpret':
-                decoded_str = interpret_control_characters(decoded_str)
-            # 'ignore' 情况不做处理
-            
-            return decoded_str
+            return handle_control_characters(decoded_str, handle_control_char)
         except UnicodeDecodeError:
             continue
     
     # 所有编码尝试失败后回退到latin1并替换不可解码字符
     return bytes_data.decode('latin1', errors='replace')
 
+def handle_control_characters(
+    s: str,
+    handle_control_char: Literal['escape', 'remove', 'ignore', 'interpret'] = 'escape'
+) -> str:
+    """
+    按指定方式处理已解码文本中的控制字符（force_decode 与会话解码器共用）
+
+    参数：
+    s (str): 已解码的文本
+    handle_control_char: 控制字符处理方式，同 force_decode
+
+    返回：
+    str: 处理后的字符串
+    """
+    if handle_control_char == 'escape':
+        return escape_control_characters(s)
+    if handle_control_char == 'remove':
+        return remove_control_characters(s)
+    if handle_control_char == 'interpret':
+        return interpret_control_characters(s)
+    # 'ignore' 情况不做处理
+    return s
+
 def interpret_control_characters(s: str) -> str:
     """
     像终端一样解析控制字符
@@ -228,34 +361,51 @@ def interpret_control_characters(s: str) -> str:
     - \b 退格
     - \a 响铃（转换为[BEL]）
     - \x00 删除（或替换为空格）
+
+    光标位置只影响 \t 和 \b，不含这两者的文本（即使含 \r）直接查表替换；否则按控制字符切分为
+    普通字符段，以段为单位模拟光标。退格删除一个输出单元：制表符展开的空格和[BEL]整体删除，
+    普通字符段只删一个字符。
     """
+    if '\t' not in s and '\b' not in s:
+        return s.translate(_INTERPRET_TABLE)
+
     result = []
+    atomic = []  # 对应片段是否需被退格整体删除（制表符展开的空格、[BEL]）
     cursor = 0  # 模拟光标位置，用于处理\r和\b
-    
-    for char in s:
-        if char == '\r':  # 回车
+
+    for token in _INTERPRET_TOKENS.split(s):
+        if not token:
+            continue
+        if token == '\r':  # 回车
             cursor = 0
-        elif char == '\n':  # 换行
+        elif token == '\n':  # 换行
             result.append('\n')
+            atomic.append(False)
             cursor = 0
-        elif char == '\t':  # 制表符
+        elif token == '\t':  # 制表符
             spaces = 8 - (cursor % 8)
             result.append(' ' * spaces)
+            atomic.append(True)
             cursor += spaces
-        elif char == '\b':  # 退格
+        elif token == '\b':  # 退格
             if cursor > 0:
                 cursor -= 1
-                result.pop()
-        elif char == '\a':  # 响铃
+                if not result:
+                    continue  # 制表符、[BEL] 已整体删除，光标仍在行首之后
+                if atomic[-1] or len(result[-1]) == 1:
+                    result.pop()
+                    atomic.pop()
+                else:
+                    result[-1] = result[-1][:-1]
+        elif token == '\a':  # 响铃
             result.append('[BEL]')
+            atomic.append(True)
             cursor += 5
-        elif char == '\x00':  # 空字符
-            result.append(' ')  # 替换为空格
-            cursor += 1
-        else:
-            result.append(char)
-            cursor += 1
-    
+        else:  # 普通字符段，空字符替换为空格
+            result.append(token.translate(_INTERPRET_TABLE))
+            atomic.append(False)
+            cursor += len(token)
+
     return ''.join(result)
 
 def create_default_config() -> None:
@@ -412,27 +562,130 @@ def write_config(config: configparser.ConfigParser, config_path: str = None) ->
         raise e
 
 
+def get_log_writer() -> LogWriterService:
+    """
+    获取全局的日志写入服务，首次调用时启动写入线程，程序退出时写入剩余数据
+
+    返回：
+    LogWriterService: 日志写入服务
+    """
+    global _log_writer
+    with write_lock:
+        if _log_writer is None or _log_writer.closed:
+            _log_writer = LogWriterService()
+            atexit.register(_log_writer.close)
+        return _log_writer
+
+
+def _log_writer_stat(name: str):
+    """读取日志写入服务的统计项，写入服务尚未启动时为 0（不为了读取指标而启动写入线程）"""
+    writer = _log_writer
+    return writer.stats()[name] if writer is not None else 0
+
+
+metrics.gauge("log_writer_queued_bytes", "Text queued for the log writer thread",
+              lambda: _log_writer_stat("queued_bytes"))
+metrics.gauge("log_writer_errors", "Failed log writes (lines dropped)", lambda: _log_writer_stat("errors"))
+
+
+def configure_log_writer(flush_interval: float = None, fsync: str = None) -> None:
+    """
+    修改日志写入服务的写入间隔和 fsync 策略
+
+    参数：
+    flush_interval (float): 最长写入间隔（秒），为空时不修改
+    fsync (str): fsync 策略（never / flush / close），为空时不修改
+    """
+    writer = get_log_writer()
+    if flush_interval is not None:
+        writer.flush_interval = max(float(flush_interval), 0.001)
+    if fsync is not None:
+        writer.set_fsync(fsync)
+
+
+def set_log_rotation(log_file: str, policy=None) -> None:
+    """
+    设置日志文件的轮转策略（见 utils.log_rotation）
+
+    参数：
+    log_file (str): 日志文件路径
+    policy (RotationPolicy | None): 轮转策略，为空时取消轮转
+    """
+    get_log_writer().set_rotation(log_file, policy)
+
+
+def set_log_index(log_file: str, enabled: bool = True) -> None:
+    """
+    开启或关闭日志文件的时间戳索引（.tsidx，见 utils.log_index）
+
+    参数：
+    log_file (str): 日志文件路径
+    enabled (bool): 是否在写入时追加索引
+    """
+    get_log_writer().set_index(log_file, enabled)
+
+
 def log_write(res: str, log_file: str = None) -> bool:
     """
-    将结果写入日志文件（线程安全）
+    将结果写入日志文件（线程安全，不阻塞调用线程）
+
+    行被放入日志写入服务的队列，由写入线程批量写入；需要立即读取文件时先调用 flush_log。
 
     参数：
     res (str): 要写入的结果
     log_file (str): 日志文件路径，默认为 None
 
     返回：
-    bool: 写入成功返回 True，否则返回 False
+    bool: 已放入写入队列返回 True，否则返回 False
     """
     if log_file is None:
         log_file = get_resource_path("tmps/temp.log")
-    try:
-        with write_lock:  # 加锁，确保线程安全
-            with open(os.path.join(log_file), "a", encoding="utf-8") as log_file_object:
-                log_file_object.write("{}\n".format(res.strip()))
-        return True
-    except IOError as e:
-        custom_print(f"Error writing to log file: {e}")
-        raise e
+    return get_log_writer().write_lines(log_file, [res.strip()])
+
+
+def log_write_lines(lines, log_file: str = None) -> bool:
+    """
+    把多行一次性放入日志写入队列（每行去除首尾空白）
+
+    参数：
+    lines (Iterable[str]): 要写入的行
+    log_file (str): 日志文件路径，默认为 None
+
+    返回：
+    bool: 已放入写入队列返回 True，否则返回 False
+    """
+    if log_file is None:
+        log_file = get_resource_path("tmps/temp.log")
+    return get_log_writer().write_lines(log_file, (line.strip() for line in lines))
+
+
+def flush_log(timeout: float = 2.0) -> bool:
+    """
+    等待已提交的日志全部写入文件（读取日志文件之前调用）
+
+    返回：
+    bool: 在超时前完成时为 True
+    """
+    return get_log_writer().flush(timeout)
+
+
+def truncate_log(log_file: str = None) -> bool:
+    """
+    清空日志文件，由写入线程按提交顺序执行，此前尚未写入的行不会再写入该文件
+
+    参数：
+    log_file (str): 日志文件路径，默认为 None
+
+    返回：
+    bool: 已放入写入队列返回 True，否则返回 False
+    """
+    if log_file is None:
+        log_file = get_resource_path("tmps/temp.log")
+    return get_log_writer().truncate(log_file)
+
+
+# 串口读超时（秒）：线路空闲时接收线程阻塞读的最长时间，决定响应暂停/停止的速度
+SERIAL_READ_TIMEOUT = 0.1
 
 
 def port_on(
@@ -449,7 +702,7 @@ def port_on(
     打开指定参数的串口
 
     参数：
-    port (str): 串口名称
+    port (str): 串口名称，也可以是 pyserial URL（如 replay://capture.scap?speed=max）
     baudrate (int): 波特率
     stopbits: 停止位（默认 serial.STOPBITS_ONE）
     parity: 校验位（默认 serial.PARITY_NONE）
@@ -462,8 +715,7 @@ def port_on(
     serial.Serial or None: 成功打开的串口对象或 None（如果打开失败）
     """
     try:
-        ser = serial.Serial()
-        ser.port = port
+        ser = serial.serial_for_url(port, do_not_open=True)
         ser.baudrate = baudrate
         ser.stopbits = stopbits
         ser.parity = parity
@@ -485,6 +737,8 @@ def port_on(
             ser.xonxoff = False
             ser.dsrdtr = False
         ser.write_byte_size = 1024
+        # 读超时只在打开时设置一次，接收线程不再修改（修改超时会重新配置串口）
+        ser.timeout = SERIAL_READ_TIMEOUT
         ser.rts = rts
         ser.dtr = dtr
         ser.open()
@@ -522,34 +776,7 @@ def escape_control_characters(text: str, escape_extended: bool = False) -> str:
     返回：
     str: 控制字符被转义后的文本，如\r变为\\r，\n变为\\n
     """
-    # 常见控制字符映射
-    control_chars = {
-        '\r': '\\r',
-        '\n': '\\n',
-        '\t': '\\t',
-        '\v': '\\v',
-        '\f': '\\f',
-        '\b': '\\b',
-        '\a': '\\a',
-        '\\': '\\\\',  # 防止反斜杠本身被误解
-    }
-    
-    result = ""
-    for char in text:
-        if char in control_chars:
-            result += control_chars[char]
-        elif ord(char) < 32:  # ASCII控制字符
-            result += f'\\x{ord(char):02x}'
-        elif escape_extended and (ord(char) > 126 or not char.isprintable()):
-            # 扩展ASCII或Unicode控制字符
-            if ord(char) <= 0xFF:
-                result += f'\\x{ord(char):02x}'
-            else:
-                result += f'\\u{ord(char):04x}'
-        else:
-            result += char
-    
-    return result
+    return text.translate(_ESCAPE_EXTENDED_TABLE if escape_extended else _ESCAPE_TABLE)
 
 def hex_str_to_bytes(hex_str: str) -> bytes:
     """
@@ -584,43 +811,54 @@ def hex_str_to_bytes(hex_str: str) -> bytes:
     except ValueError as e:
         raise ValueError(f"Invalid hex string '{hex_str}': {e}")
 
-def port_write(command: str, port_serial: serial.Serial, ender: str = None) -> None:
+def encode_command(command: str, ender=None) -> bytes:
+    """
+    命令实际发送的字节：UTF-8 编码的命令加结束符
+
+    参数：
+    command (str): 命令
+    ender (str | bytes | bool | None): 结束符，十六进制字符串（如 "0D0A"）、字节，
+        True 表示默认结束符 0D0A，False / 空字符串 / None 表示不加结束符；无效的十六进制结束符被忽略
+
+    返回：
+    bytes: 要写入串口的数据
+    """
+    data = command.encode("UTF-8")
+    # 兼容不同类型的 ender 参数：bool / bytes / bytearray / str / None
+    if isinstance(ender, bool):
+        ender = "0D0A" if ender else ""
+    elif isinstance(ender, (bytes, bytearray)):
+        return data + bytes(ender)
+    if ender:
+        try:
+            data += hex_str_to_bytes(ender)
+        except ValueError as e:
+            # 如果结束符无效，记录错误并仅发送命令
+            custom_print(f"Invalid hex string '{ender}': {e}")
+    return data
+
+
+def port_write(command: str, port_serial: serial.Serial, ender: str = None) -> bytes:
     """
     向串口写入命令
 
     参数：
     command (str): 要写入的命令
     port_serial (serial.Serial): 打开的串口对象
-    ender (str): 结束符，十六进制字符串，如 "0D0A", "0d0a"，空字符串或 None
+    ender (str): 结束符，十六进制字符串，如 "0D0A", "0d0a"，空字符串或 None，见 encode_command
+
+    返回：
+    bytes: 实际写入的数据
     """
     if port_serial is None:
         raise SerialPortNotInitializedError("Serial port is not initialized.")
 
     try:
-        # 兼容不同类型的 ender 参数：bool / bytes / bytearray / str / None
-        # 布尔值：True 表示使用默认结束符 0D0A，False 表示不使用结束符
-        if isinstance(ender, bool):
-            ender_str = "0D0A" if ender else ""
-        elif isinstance(ender, (bytes, bytearray)):
-            # 直接写入字节类型的 ender
-            port_serial.write(command.encode("UTF-8") + bytes(ender))
-            return
-        else:
-            # 对于 str 或 None，保持原有语义
-            ender_str = ender if ender is not None else ""
-
-        # 如果提供了结束符且不是空字符串，尝试将其解析为十六进制字节
-        if ender_str:
-            try:
-                end_bytes = hex_str_to_bytes(ender_str)
-                port_serial.write(command.encode("UTF-8") + end_bytes)
-            except ValueError as e:
-                # 如果结束符无效，记录错误并仅发送命令
-                custom_print(f"Invalid hex string '{ender_str}': {e}")
-                port_serial.write(command.encode("UTF-8"))
-        else:
-            # 如果未提供结束符或为空字符串，仅发送命令
-            port_serial.write(command.encode("UTF-8"))
+        data = encode_command(command, ender)
+        port_serial.write(data)
+        TX_BYTES.inc(len(data))
+        TX_COMMANDS.inc()
+        return data
     except Exception as e:
         custom_print(f"Error writing to serial port: {e}")
         raise e
@@ -700,10 +938,7 @@ def port_read_hex(port_serial: serial.Serial, size: int = 256, max_data_size: in
             if len(data) >= max_data_size:
                 break
 
-        if data:
-            return " ".join(f"{byte:02X}" for byte in data)
-        else:
-            return ""
+        return hex_formatter.hex_string(data)
     except Exception as e:
         custom_print(f"Error reading from serial port as hex: {e}")
         raise e
@@ -785,8 +1020,7 @@ def port_readline_hex(port_serial: serial.Serial) -> str:
         try:
             line = port_serial.readline()
             if line:
-                hex_line = " ".join(f"{byte:02X}" for byte in line)
-                return hex_line
+                return hex_formatter.hex_string(line)
             else:
                 return ""
         except Exception as e:
@@ -801,10 +1035,11 @@ def print_write(text: str, log_file=None, isPrint=False) -> None:
     text (str): 要打印和写入日志的文本
     isPrint (bool): 是否打印文本（默认 False）
     """
-    for line in text.strip().split("\n"):
-        # 保留空行，不过滤
-        log_write(f"{line}", log_file=log_file)
-        if isPrint:
+    lines = text.strip().split("\n")
+    # 保留空行，不过滤；整段一次放入写入队列
+    log_write_lines(lines, log_file=log_file)
+    if isPrint:
+        for line in lines:
             custom_print(f"{line}")
 
 
@@ -0,0 +1,389 @@
+"""
+流式分帧器
+
+接收数据按到达顺序喂给分帧器，分帧器只扫描新到达的字节，返回已经完整的帧。
+每个帧以 (起始偏移, 帧数据) 的元组表示，起始偏移为该帧第一个原始字节在整个数据流中的
+累计偏移，便于与读取时刻记录对应。
+
+支持的分帧方式：
+- Ender: 按结束符分帧（帧数据包含结束符，与原有显示一致）
+- FixedLength: 固定长度分帧
+- LengthPrefixed: 大端长度前缀分帧（帧数据包含长度头）
+- IdleTimeout: 按字符间空闲时间分帧
+- SLIP: RFC 1055 SLIP 分帧（帧数据为解码后的内容）
+- COBS: 以 0x00 分隔的 COBS 分帧（帧数据为解码后的内容）
+
+所有分帧器都受 max_frame_size 限制：缓冲的未完成数据超过上限时按上限强制切出，
+避免缺少结束符时内存无限增长。SLIP/COBS 的帧数据是解码后的内容，原样切出的半帧会被当作有效帧，
+因此超长帧直到下一个分隔符的数据都被丢弃，只计数。
+"""
+
+DEFAULT_MAX_FRAME_SIZE = 64 * 1024
+
+FRAMING_ENDER = "ender"
+FRAMING_FIXED_LENGTH = "fixedlength"
+FRAMING_LENGTH_PREFIXED = "lengthprefixed"
+FRAMING_IDLE_TIMEOUT = "idletimeout"
+FRAMING_SLIP = "slip"
+FRAMING_COBS = "cobs"
+
+
+class Framer:
+    """
+    分帧器基类
+
+    子类实现 _extract()：从 self._buffer 的 self._scan_pos 处开始扫描新数据，
+    切出完整帧并通过 _take() 从缓冲区移除。
+    """
+    # 为 True 时由调用方按读取块逐块喂入并提供读取时刻
+    time_based = False
+    # 未完成数据的强制输出超时（毫秒），None 表示不按超时输出
+    flush_timeout_ms = None
+    # 为 True 时超长帧不强制切出，而是丢弃到下一个分隔符为止（子类用 _end_frame() 处理分隔符）
+    discard_oversize = False
+
+    def __init__(self, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        if max_frame_size <= 0:
+            raise ValueError(f"Invalid max frame size: {max_frame_size}")
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._base_offset = 0  # _buffer[0] 在数据流中的偏移
+        self._scan_pos = 0     # _buffer 中尚未扫描过的起点
+        self.oversize_frames = 0  # 超过 max_frame_size 的帧数（被强制切出或丢弃）
+        self.discarded_bytes = 0  # discard_oversize 时丢弃的字节数
+        self._discarding = False  # 正在丢弃超长帧的剩余部分
+
+    @property
+    def pending(self) -> int:
+        """缓冲中尚未成帧的字节数"""
+        return len(self._buffer)
+
+    @property
+    def pending_offset(self) -> int:
+        """第一个尚未成帧的字节在数据流中的偏移"""
+        return self._base_offset
+
+    def feed(self, data, timestamp_ns: int = None) -> list:
+        """
+        喂入新到达的数据
+
+        参数：
+        data (bytes): 新数据
+        timestamp_ns (int): 该数据的读取时刻（仅 time_based 分帧器使用）
+
+        返回：
+        list[tuple[int, bytes]]: 完整帧列表 (起始偏移, 帧数据)
+        """
+        if not data:
+            return []
+        self._buffer += data
+        frames = []
+        self._extract(frames)
+        # 缺少分隔符时按上限强制切出（或丢弃），保证内存有界；_take() 会相应调整扫描位置，已扫描的数据不再重复扫描
+        while len(self._buffer) > self.max_frame_size:
+            if self.discard_oversize:
+                self._discard_pending()
+            else:
+                self.oversize_frames += 1
+                frames.append(self._take(self.max_frame_size))
+            self._extract(frames)
+        return frames
+
+    def flush(self) -> list:
+        """超时后把未完成的数据作为一帧输出"""
+        if self._discarding:
+            # 超长帧到此结束，剩余部分丢弃
+            self._discard_pending()
+            self._discarding = False
+            return []
+        if not self._buffer:
+            return []
+        return [self._take(len(self._buffer))]
+
+    def reset(self):
+        """丢弃未完成的数据，数据流偏移继续累计"""
+        self._base_offset += len(self._buffer)
+        self._buffer = bytearray()
+        self._scan_pos = 0
+        self._discarding = False
+
+    def _take(self, size: int, skip: int = 0):
+        """从缓冲区头部取出 size 字节作为帧，再额外丢弃 skip 字节"""
+        frame = (self._base_offset, bytes(self._buffer[:size]))
+        del self._buffer[:size + skip]  # bytearray 头部删除为摊销 O(1)
+        self._base_offset += size + skip
+        self._scan_pos = max(0, self._scan_pos - size - skip)
+        return frame
+
+    def _discard_pending(self):
+        """丢弃缓冲的全部数据（超长帧的一部分），一个超长帧只计数一次"""
+        if not self._discarding:
+            self._discarding = True
+            self.oversize_frames += 1
+        self.discarded_bytes += len(self._buffer)
+        self._take(0, skip=len(self._buffer))
+
+    def _end_frame(self, index: int):
+        """
+        分隔符位于 index，取出其前的数据并丢弃分隔符
+
+        返回：
+        tuple[int, bytes] | None: (起始偏移, 原始帧数据)，是超长帧的剩余部分时丢弃并返回 None
+        """
+        if self._discarding:
+            self._discarding = False
+            self.discarded_bytes += index
+            self._take(0, skip=index + 1)
+            return None
+        return self._take(index, skip=1)
+
+    def _extract(self, frames: list):
+        raise NotImplementedError
+
+
+class PassthroughFramer(Framer):
+    """不分帧，每次喂入的数据直接作为一帧（结束符为空时使用）"""
+
+    def _extract(self, frames):
+        frames.append(self._take(len(self._buffer)))
+
+
+class EnderFramer(Framer):
+    """按结束符分帧，帧数据包含结束符"""
+
+    def __init__(self, ender: bytes, flush_timeout_ms=30, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        super().__init__(max_frame_size)
+        if not ender:
+            raise ValueError("Ender framing requires a non-empty ender")
+        self.ender = bytes(ender)
+        self.flush_timeout_ms = flush_timeout_ms
+
+    def _extract(self, frames):
+        buffer = self._buffer
+        ender = self.ender
+        # 结束符可能跨越上次扫描的末尾，回退 len(ender)-1 字节
+        start = max(0, self._scan_pos - len(ender) + 1)
+        while True:
+            index = buffer.find(ender, start)
+            if index < 0:
+                break
+            frames.append(self._take(index + len(ender)))
+            start = 0
+        self._scan_pos = len(buffer)
+
+
+class FixedLengthFramer(Framer):
+    """固定长度分帧"""
+
+    def __init__(self, frame_length: int, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        if frame_length <= 0:
+            raise ValueError(f"Invalid frame length: {frame_length}")
+        super().__init__(max(max_frame_size, frame_length))
+        self.frame_length = frame_length
+
+    def _extract(self, frames):
+        while len(self._buffer) >= self.frame_length:
+            frames.append(self._take(self.frame_length))
+
+
+class LengthPrefixedFramer(Framer):
+    """
+    长度前缀分帧：帧以 prefix_size 字节的大端无符号长度开头，长度值为其后负载的字节数，
+    帧数据包含长度头。长度超过 max_frame_size 时视为失步，丢弃一个字节后重新同步。
+    """
+
+    def __init__(self, prefix_size: int = 2, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        if prefix_size not in (1, 2, 4):
+            raise ValueError(f"Invalid length prefix size: {prefix_size}")
+        super().__init__(max_frame_size)
+        self.prefix_size = prefix_size
+        self.resync_bytes = 0  # 因长度非法而丢弃的字节数
+
+    def _extract(self, frames):
+        buffer = self._buffer
+        prefix_size = self.prefix_size
+        while len(buffer) >= prefix_size:
+            frame_size = prefix_size + int.from_bytes(buffer[:prefix_size], "big")
+            if frame_size > self.max_frame_size:
+                self.resync_bytes += 1
+                self._take(0, skip=1)
+                continue
+            if len(buffer) < frame_size:
+                break
+            frames.append(self._take(frame_size))
+
+
+class IdleTimeoutFramer(Framer):
+    """
+    按字符间空闲时间分帧：相邻两次读取之间线路空闲超过 idle_timeout_ms 即结束当前帧。
+    同一批读取之内的间隔由读取时刻推算，批与批之间由调用方在超时后调用 flush()。
+    """
+    time_based = True
+
+    def __init__(self, idle_timeout_ms=30, byte_time: float = 0.0, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        super().__init__(max_frame_size)
+        self.flush_timeout_ms = idle_timeout_ms
+        self.byte_time = byte_time
+        self._last_timestamp_ns = None
+
+    def feed(self, data, timestamp_ns: int = None) -> list:
+        frames = []
+        if data and timestamp_ns is not None:
+            if self._buffer and self._last_timestamp_ns is not None:
+                # 本块首字节的到达时刻 = 读取时刻 - 本块传输时间
+                first_byte_ns = timestamp_ns - int(len(data) * self.byte_time * 1e9)
+                if first_byte_ns - self._last_timestamp_ns > self.flush_timeout_ms * 1e6:
+                    frames.extend(self.flush())
+            self._last_timestamp_ns = timestamp_ns
+        frames.extend(super().feed(data, timestamp_ns))
+        return frames
+
+    def _extract(self, frames):
+        pass
+
+
+class SlipFramer(Framer):
+    """SLIP 分帧（RFC 1055），以 0xC0 结束帧，帧数据为反转义后的内容，空帧和超长帧被丢弃"""
+    END = b"\xc0"
+    discard_oversize = True
+
+    def _extract(self, frames):
+        buffer = self._buffer
+        start = self._scan_pos
+        while True:
+            index = buffer.find(self.END, start)
+            if index < 0:
+                break
+            frame = self._end_frame(index)
+            if frame is not None and frame[1]:
+                offset, raw = frame
+                frames.append((offset, raw.replace(b"\xdb\xdc", b"\xc0").replace(b"\xdb\xdd", b"\xdb")))
+            start = 0
+        self._scan_pos = len(buffer)
+
+
+class CobsFramer(Framer):
+    """COBS 分帧，以 0x00 分隔，帧数据为解码后的内容；无法解码的帧按原样输出并计数，超长帧被丢弃"""
+    discard_oversize = True
+
+    def __init__(self, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        super().__init__(max_frame_size)
+        self.decode_errors = 0
+
+    def _extract(self, frames):
+        buffer = self._buffer
+        start = self._scan_pos
+        while True:
+            index = buffer.find(b"\x00", start)
+            if index < 0:
+                break
+            frame = self._end_frame(index)
+            if frame is not None and frame[1]:
+                offset, raw = frame
+                try:
+                    frames.append((offset, cobs_decode(raw)))
+                except ValueError:
+                    self.decode_errors += 1
+                    frames.append((offset, raw))
+            start = 0
+        self._scan_pos = len(buffer)
+
+
+def cobs_decode(data: bytes) -> bytes:
+    """
+    解码一个 COBS 帧（不含 0x00 分隔符）
+
+    参数：
+    data (bytes): 编码后的帧
+
+    返回：
+    bytes: 解码后的数据
+
+    异常：
+    ValueError: 帧格式错误
+    """
+    output = bytearray()
+    index = 0
+    size = len(data)
+    while index < size:
+        code = data[index]
+        if code == 0:
+            raise ValueError("Unexpected zero byte in COBS frame")
+        end = index + code
+        if end > size:
+            raise ValueError("Truncated COBS frame")
+        output += data[index + 1:end]
+        index = end
+        if code != 0xFF and index < size:
+            output.append(0)
+    return bytes(output)
+
+
+def cobs_encode(data: bytes) -> bytes:
+    """
+    COBS 编码（不含 0x00 分隔符），用于测试和发送
+
+    参数：
+    data (bytes): 原始数据
+
+    返回：
+    bytes: 编码后的帧
+    """
+    output = bytearray()
+    block = bytearray()
+    for byte in data:
+        if byte == 0:
+            output.append(len(block) + 1)
+            output += block
+            block = bytearray()
+        else:
+            block.append(byte)
+            if len(block) == 0xFE:
+                output.append(0xFF)
+                output += block
+                block = bytearray()
+    output.append(len(block) + 1)
+    output += block
+    return bytes(output)
+
+
+def create_framer(
+    framing: str = FRAMING_ENDER,
+    ender: bytes = b"\r\n",
+    frame_length: int = 16,
+    length_prefix_size: int = 2,
+    idle_timeout_ms: int = 30,
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    byte_time: float = 0.0,
+) -> Framer:
+    """
+    按名称创建分帧器
+
+    参数：
+    framing (str): 分帧方式（Ender/FixedLength/LengthPrefixed/IdleTimeout/SLIP/COBS，不区分大小写）
+    ender (bytes): 结束符，Ender 方式下为空时不分帧
+    frame_length (int): FixedLength 方式的帧长
+    length_prefix_size (int): LengthPrefixed 方式的长度头字节数（1/2/4）
+    idle_timeout_ms (int): Ender 方式的未完成行输出超时，以及 IdleTimeout 方式的空闲时间
+    max_frame_size (int): 单帧最大字节数
+    byte_time (float): 每字节传输时间（秒），IdleTimeout 方式用于推算字节到达时刻
+
+    返回：
+    Framer: 分帧器
+    """
+    name = str(framing or FRAMING_ENDER).replace("_", "").replace("-", "").lower()
+    if name == FRAMING_ENDER:
+        if not ender:
+            return PassthroughFramer(max_frame_size)
+        return EnderFramer(ender, idle_timeout_ms, max_frame_size)
+    if name == FRAMING_FIXED_LENGTH:
+        return FixedLengthFramer(frame_length, max_frame_size)
+    if name == FRAMING_LENGTH_PREFIXED:
+        return LengthPrefixedFramer(length_prefix_size, max_frame_size)
+    if name == FRAMING_IDLE_TIMEOUT:
+        return IdleTimeoutFramer(idle_timeout_ms, byte_time, max_frame_size)
+    if name == FRAMING_SLIP:
+        return SlipFramer(max_frame_size)
+    if name == FRAMING_COBS:
+        return CobsFramer(max_frame_size)
+    raise ValueError(f"Unknown framing: {framing}")
@@ -0,0 +1,98 @@
+"""
+十六进制格式化
+
+所有函数直接接收 bytes，基于预先生成的 256 项查表和 bytes.hex(' ') 批量拼接，
+不再逐字节拼接字符串。提供三种输出：
+- hex_string: 空格分隔的大写十六进制，如 "41 54 0D 0A"
+- hex_columns: 接收区 HEX 模式的十六进制行 + 字符行（控制字符转义显示）
+- hexdump: 经典的 偏移/每行16字节/ASCII 布局
+"""
+
+HEX_LINE_PREFIX = "Received: "
+CHAR_LINE_PREFIX = "ASCII   : "
+
+# 控制字符的转义写法
+_ESCAPES = {
+    0x0D: "\\r",
+    0x0A: "\\n",
+    0x09: "\\t",
+    0x08: "\\b",
+    0x07: "\\a",
+    0x0C: "\\f",
+    0x0B: "\\v",
+    0x00: "\\0",
+}
+
+
+def _char_cell(byte: int) -> str:
+    if 32 <= byte <= 126:  # 可打印ASCII字符，每个字符后加两个空格对齐
+        return f"{chr(byte)}  "
+    if byte in _ESCAPES:
+        return f"{_ESCAPES[byte]} "
+    return f"\\x{byte:02x} "  # 不可打印字符
+
+
+# 字符行每个字节对应的单元格
+CHAR_CELLS = tuple(_char_cell(byte) for byte in range(256))
+# hexdump 的 ASCII 列：可打印字符保持原样，其余显示为 '.'
+_DUMP_ASCII_TABLE = bytes(byte if 32 <= byte <= 126 else ord(".") for byte in range(256))
+
+
+def hex_string(data, sep: str = " ") -> str:
+    """
+    转换为分隔的大写十六进制字符串
+
+    参数：
+    data (bytes): 字节数据
+    sep (str): 字节之间的分隔符（单个字符，默认空格）
+
+    返回：
+    str: 如 "41 54 0D 0A"，data 为空时返回空字符串
+    """
+    return data.hex(sep).upper() if sep else data.hex().upper()
+
+
+def hex_columns(data):
+    """
+    将字节数据转换为两部分：
+    第一部分：十六进制值
+    第二部分：对应的字符（包括控制字符的转义形式）
+
+    参数：
+    data (bytes): 字节数据
+
+    返回：
+    tuple[str, str]: 包含两部分的元组，第一部分是十六进制值，第二部分是对应字符，两行填充为等长
+    """
+    hex_line = (HEX_LINE_PREFIX + hex_string(data)).strip()
+    char_line = (CHAR_LINE_PREFIX + "".join(map(CHAR_CELLS.__getitem__, data))).strip()
+    max_length = max(len(hex_line), len(char_line))
+    return hex_line.ljust(max_length), char_line.ljust(max_length)
+
+
+def hexdump(data, start_offset: int = 0, width: int = 16) -> list:
+    """
+    经典十六进制转储布局，每行：偏移  十六进制（每8字节多一个空格）  |ASCII|
+
+    参数：
+    data (bytes): 字节数据
+    start_offset (int): 第一字节显示的偏移
+    width (int): 每行字节数（默认 16）
+
+    返回：
+    list[str]: 转储行，如 "00000000  41 54 0D 0A                                       |AT..|"
+    """
+    data = bytes(data)
+    half = width // 2
+    # 十六进制列的固定宽度：每字节3字符，半行之间多一个空格
+    hex_width = width * 3 - 1 + (1 if 0 < half < width else 0)
+    ascii_column = data.translate(_DUMP_ASCII_TABLE).decode("ascii")
+    rows = []
+    for start in range(0, len(data), width):
+        row = data[start:start + width]
+        if 0 < half < width and len(row) > half:
+            hex_part = f"{row[:half].hex(' ')}  {row[half:].hex(' ')}"
+        else:
+            hex_part = row.hex(" ")
+        rows.append(f"{start_offset + start:08X}  {hex_part.upper().ljust(hex_width)}  |{ascii_column[start:start + width]}|")
+    return rows
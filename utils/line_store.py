@@ -0,0 +1,611 @@
+"""
+紧凑的接收历史存储与按需格式化
+
+LineStore 不再保存格式化好的字符串，而是把每条记录（接收到的一帧、一次发送回显）的原始字节
+依次写入同一个 bytearray，并用并行数组保存：
+- 记录起始偏移 array('Q')
+- 数据流偏移 array('Q')（十六进制转储的地址列）
+- 时间戳 array('d')（Unix 秒）
+- 方向 array('B')（接收 / 发送回显 / 十六进制发送回显 / 预格式化文本）
+- 前缀字节数 array('B')（接收帧第一个字符从上一帧末尾开始的字节数，见 RowFormatter）
+
+每条记录的固定开销约 26 字节，远小于一个格式化后的 str 对象。显示字符串由 RowFormatter 在行
+可见时按当前显示设置生成，并缓存在一个小的 LRU 中；切换 HEX、控制字符或时间戳显示只需要换一个
+RowFormatter，整段历史立即按新设置显示。
+
+较旧的记录按块压缩保存在内存中（冷区），超过内存预算后写入磁盘分段文件并通过 mmap 读取
+（见 utils.segment_file），可以保留整夜的设备日志而内存占用不变。
+
+格式化逻辑（display_mode / timestamp_prefix / format_frame）同时供接收处理流水线写日志使用，
+保证日志与显示一致。
+"""
+
+import os
+import codecs
+import shutil
+import weakref
+import datetime
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from utils import common
+from utils.segment_file import CODECS, CODEC_NAMES, RecordBlock, Segment, encode_records
+from utils.hex_formatter import hex_columns, hex_string, hexdump
+
+# 记录方向
+DIRECTION_RX = 0       # 接收到的帧
+DIRECTION_TX = 1       # 文本发送回显
+DIRECTION_TX_HEX = 2   # 十六进制发送回显
+DIRECTION_TEXT = 3     # 预格式化文本，原样显示
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+DEFAULT_COMPRESSION = "zlib"
+# 冷区记录块的大小上限和解压缓存的块数
+BLOCK_RECORDS = 4096
+BLOCK_BYTES = 256 * 1024
+BLOCK_CACHE_SIZE = 8
+# 每条记录在并行数组中占用的字节数：起始偏移 8 + 数据流偏移 8 + 时间戳 8 + 方向 1 + 前缀字节数 1
+RECORD_OVERHEAD = 26
+# 向前查找上一条接收帧时最多跳过的记录数（中间可能夹着发送回显）
+CARRY_LOOKBACK = 16
+
+
+def display_mode(settings: dict):
+    """
+    由显示设置得到接收数据的格式化方式
+
+    返回：
+    tuple[str | None, bool]: (控制字符处理方式，十六进制显示时为 None；是否为十六进制经典转储布局)
+    """
+    if settings['show_hex']:
+        return None, str(settings['hex_layout']).lower() == "dump"
+    if settings['show_control_char']:
+        return 'escape', False
+    return 'interpret', False
+
+
+def timestamp_prefix(timestamp: float) -> str:
+    """时间戳前缀，如 [2024-01-01_12:00:00.123]"""
+    return f"[{datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d_%H:%M:%S.%f')[:-3]}]"
+
+
+def format_frame(frame, offset: int, prefix: str, control_char_mode, hex_dump: bool, text: str = None) -> str:
+    """
+    把一帧格式化为显示文本（可能包含多行）
+
+    参数：
+    frame (bytes): 帧数据
+    offset (int): 帧在数据流中的偏移（十六进制转储的地址）
+    prefix (str): 每行的前缀（时间戳），文本模式只加在第一行
+    control_char_mode (str | None): 控制字符处理方式，None 表示十六进制显示
+    hex_dump (bool): 十六进制显示时是否使用经典转储布局
+    text (str): 文本模式下已解码的帧文本
+
+    返回：
+    str: 显示文本
+    """
+    if control_char_mode is None:
+        if hex_dump:
+            return "\n".join(f"{prefix}{row}" for row in hexdump(frame, offset))
+        hex_line, char_line = hex_columns(frame)
+        return f"{prefix}{hex_line}\n{prefix}{char_line}"
+    return f"{prefix}{common.handle_control_characters(text, control_char_mode)}"
+
+
+def _remove_segments(segments: list, directory: str):
+    """关闭并删除全部分段文件和分段目录（LineStore 的 finalizer，不能引用 LineStore 本身）"""
+    for segment in segments:
+        segment.close()
+    segments.clear()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def _text_rows(data) -> int:
+    """文本的可视行数：去掉行尾换行后按 \\n 拆分"""
+    return data.rstrip(b"\r\n").count(b"\n") + 1
+
+
+class ColdBlock:
+    """
+    冷区中的一个记录块
+
+    属性：
+    start (int): 第一条记录的绝对序号
+    count (int): 记录数
+    raw_size (int): 未压缩大小
+    size (int): 压缩后大小，压缩完成前为 0
+    payload (bytes | None): 内存中的压缩数据，压缩完成前或写入磁盘后为 None
+    pending (RecordBlock | None): 压缩完成前直接读取的未压缩块
+    segment (Segment | None): 写入磁盘后所在的分段
+    slot (int): 在分段中的序号
+    """
+    __slots__ = ("start", "count", "raw_size", "size", "payload", "pending", "segment", "slot")
+
+    def __init__(self, start: int, count: int, raw: bytes):
+        self.start = start
+        self.count = count
+        self.raw_size = len(raw)
+        self.size = 0
+        self.payload = None
+        self.pending = RecordBlock(raw)
+        self.segment = None
+        self.slot = 0
+
+    @property
+    def end(self) -> int:
+        return self.start + self.count
+
+    @property
+    def nbytes(self) -> int:
+        """占用的内存字节数"""
+        if self.payload is not None:
+            return len(self.payload)
+        return self.raw_size if self.pending is not None else 0
+
+
+class LineStore:
+    """
+    接收历史的原始数据存储
+
+    记录按追加顺序编号，first 为当前第一条记录的绝对序号，丢弃头部记录后递增。
+
+    数据分三层：
+    - 热区：最新的记录，保存在并行数组中，追加和读取都不需要解码
+    - 冷区：热区超过 block_records 条或 block_bytes 字节的两倍后，最旧的记录封装成记录块，由后台
+      线程压缩（zlib / lzma），读取时按需解压，最近解压的块保存在一个小的 LRU 缓存中
+    - 磁盘：指定 spill_dir 且热区与冷区超过 memory_budget 字节后，最旧的一半压缩块由后台线程原样写入
+      spill_dir 下的分段文件（见 utils.segment_file），写入完成后这些块改为通过 mmap 读取，内存占用
+      保持在预算以内，历史长度只受磁盘空间限制。写入期间块仍从内存读取，调用线程不等待磁盘。
+      分段目录在 clear()/close() 或进程退出时删除。
+    """
+
+    def __init__(self, spill_dir: str = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 compression: str = DEFAULT_COMPRESSION, block_records: int = BLOCK_RECORDS,
+                 block_bytes: int = BLOCK_BYTES):
+        """
+        参数：
+        spill_dir (str): 分段文件的父目录，为空时所有记录都保存在内存中
+        memory_budget (int): 内存中历史数据的预算（字节）
+        compression (str): 冷区的压缩方式，"zlib" / "lzma" / "none"
+        block_records (int): 每个记录块最多包含的记录数
+        block_bytes (int): 每个记录块最多包含的数据字节数
+        """
+        if compression not in CODECS:
+            raise ValueError(f"Unknown scrollback compression: {compression}")
+        self.spill_dir = spill_dir
+        self.memory_budget = max(1, int(memory_budget))
+        self.compression = compression
+        self.block_records = max(1, int(block_records))
+        self.block_bytes = max(1, int(block_bytes))
+        self.cache_size = BLOCK_CACHE_SIZE
+        self._executor = None
+        self.first = 0
+        self._reset_cold()
+        self._reset_hot()
+
+    def _reset_hot(self):
+        self._data = bytearray()
+        self._base = 0  # _data[0] 对应的绝对字节偏移
+        self._offsets = array('Q', [0])  # 各记录起始的绝对字节偏移，末尾多一项为结束偏移
+        self._stream_offsets = array('Q')
+        self._times = array('d')
+        self._directions = array('B')
+        self._carries = array('B')
+        self._hot_start = self.first  # 热区第一条记录的绝对序号
+
+    def _reset_cold(self):
+        self._blocks = []  # 按绝对序号排列的冷区记录块（包括已写入磁盘的）
+        self._block_starts = []
+        self._cold_bytes = 0  # 冷区占用的内存字节数
+        self._compressing = deque()  # 等待压缩结果的 (块, Future)
+        self._spilling = deque()  # 等待分段写入完成的 (块列表, Future)
+        self._spilling_bytes = 0  # 正在写入磁盘、尚未释放的压缩数据字节数
+        self._spill_end = 0  # 已写入或正在写入磁盘的块之后的绝对序号
+        self.spill_error = None  # 分段写入失败（如磁盘已满）的错误，之后的块保留在内存中
+        self._cache = OrderedDict()  # 块起始序号 -> 解压后的 RecordBlock
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._segments = []
+        self._segment_dir = None
+        self._finalizer = None
+        self._segment_seq = 0
+
+    def __len__(self):
+        return self._hot_start + len(self._times) - self.first
+
+    def append(self, data, stream_offset: int, timestamp: float, direction: int = DIRECTION_RX, carry: int = 0):
+        """
+        追加一条记录
+
+        参数：
+        data (bytes): 原始字节
+        stream_offset (int): 在接收数据流中的偏移（非接收记录为 0）
+        timestamp (float): Unix 时间戳（秒）
+        direction (int): 记录方向，DIRECTION_*
+        carry (int): 接收帧的第一个字符在上一帧末尾已开始的字节数（解码器跨帧保留的字节数）
+        """
+        self._data += data
+        self._offsets.append(self._base + len(self._data))
+        self._stream_offsets.append(stream_offset)
+        self._times.append(timestamp)
+        self._directions.append(direction)
+        self._carries.append(min(carry, 255))
+        if len(self._times) >= 2 * self.block_records or len(self._data) >= 2 * self.block_bytes:
+            self._seal()
+
+    def extend(self, records):
+        """追加多条 (data, stream_offset, timestamp, direction[, carry]) 记录"""
+        for record in records:
+            self.append(*record)
+
+    def _locate(self, index: int):
+        """
+        相对序号 index 所在的位置
+
+        返回：
+        tuple[RecordBlock | None, int]: (记录块，热区为 None；在块或热区中的序号)
+        """
+        absolute = self.first + index
+        if absolute >= self._hot_start:
+            return None, absolute - self._hot_start
+        block = self._blocks[bisect_right(self._block_starts, absolute) - 1]
+        return self._records(block), absolute - block.start
+
+    def _records(self, block: ColdBlock) -> RecordBlock:
+        """解压后的记录块，经过 LRU 缓存"""
+        if block.pending is not None:
+            return block.pending
+        records = self._cache.get(block.start)
+        if records is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(block.start)
+            return records
+        self.cache_misses += 1
+        if block.payload is not None:
+            codec, payload = self.compression, block.payload
+        else:
+            codec, payload = CODEC_NAMES[block.segment.blocks[block.slot][2]], block.segment.payload(block.slot)
+        records = RecordBlock(CODECS[codec][2](payload))
+        self._cache[block.start] = records
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return records
+
+    def data(self, index: int) -> bytes:
+        """第 index 条记录（相对 first）的原始字节"""
+        records, index = self._locate(index)
+        if records is not None:
+            return records.data(index)
+        base = self._base
+        return bytes(self._data[self._offsets[index] - base:self._offsets[index + 1] - base])
+
+    def length(self, index: int) -> int:
+        records, index = self._locate(index)
+        offsets = self._offsets if records is None else records.offsets
+        return offsets[index + 1] - offsets[index]
+
+    def stream_offset(self, index: int) -> int:
+        records, index = self._locate(index)
+        return (self._stream_offsets if records is None else records.stream_offsets)[index]
+
+    def timestamp(self, index: int) -> float:
+        records, index = self._locate(index)
+        return (self._times if records is None else records.times)[index]
+
+    def direction(self, index: int) -> int:
+        records, index = self._locate(index)
+        return (self._directions if records is None else records.directions)[index]
+
+    def carry(self, index: int) -> int:
+        records, index = self._locate(index)
+        return (self._carries if records is None else records.carries)[index]
+
+    def trim(self, count: int):
+        """丢弃头部的 count 条记录"""
+        count = min(count, len(self))
+        if count <= 0:
+            return
+        self.first += count
+        # 整个落在丢弃范围内的记录块和分段直接删除
+        while self._blocks and self._blocks[0].end <= self.first:
+            block = self._blocks.pop(0)
+            self._block_starts.pop(0)
+            self._cache.pop(block.start, None)
+            self._cold_bytes -= block.nbytes
+            block.payload = block.pending = None
+        while self._segments and self._segments[0].end <= self.first:
+            self._segments.pop(0).remove()
+        hot_count = self.first - self._hot_start
+        if hot_count > 0:
+            self._trim_hot(hot_count)
+
+    def _trim_hot(self, count: int):
+        end = self._offsets[count]
+        # bytearray 头部删除只移动起始指针，不复制剩余数据
+        del self._data[:end - self._base]
+        self._base = end
+        del self._offsets[:count]
+        del self._stream_offsets[:count]
+        del self._times[:count]
+        del self._directions[:count]
+        del self._carries[:count]
+        self._hot_start += count
+
+    def _seal(self):
+        """把热区中最旧的记录封装成记录块移入冷区，交给后台线程压缩"""
+        self._collect()
+        while len(self._times) > self.block_records or len(self._data) > self.block_bytes:
+            base = self._base
+            # 不超过 block_records 条，数据不超过 block_bytes 字节（单条超长记录单独成块）
+            count = bisect_right(self._offsets, base + self.block_bytes, 0,
+                                 min(self.block_records + 1, len(self._offsets))) - 1
+            count = max(count, 1)
+            end = self._offsets[count]
+            raw = encode_records(self._data[:end - base], array('Q', (offset - base for offset in self._offsets[:count + 1])),
+                                 self._stream_offsets[:count], self._times[:count], self._directions[:count],
+                                 self._carries[:count])
+            block = ColdBlock(self._hot_start, count, raw)
+            self._blocks.append(block)
+            self._block_starts.append(block.start)
+            self._cold_bytes += block.raw_size
+            self._trim_hot(count)
+
+            if self.compression == "none":
+                self._compressed(block, raw)
+            else:
+                self._compressing.append((block, self._worker().submit(CODECS[self.compression][1], raw)))
+        self._spill()
+
+    def _worker(self) -> ThreadPoolExecutor:
+        """压缩和分段写入共用的后台线程，按提交顺序执行"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ScrollbackWorker")
+        return self._executor
+
+    def _compressed(self, block: ColdBlock, payload: bytes):
+        if block.pending is None:
+            return  # 压缩期间已被丢弃
+        self._cold_bytes += len(payload) - block.raw_size
+        block.size = len(payload)
+        block.payload = payload
+        block.pending = None
+
+    def _collect(self, wait: bool = False):
+        """按顺序取回已完成的压缩和分段写入结果（只在调用线程中修改记录块）"""
+        while self._compressing:
+            block, future = self._compressing[0]
+            if not wait and not future.done():
+                break
+            self._compressing.popleft()
+            self._compressed(block, future.result())
+        while self._spilling:
+            blocks, future = self._spilling[0]
+            if not wait and not future.done():
+                break
+            self._spilling.popleft()
+            self._spilled(blocks, future)
+
+    def flush(self):
+        """等待后台压缩和分段写入全部完成"""
+        self._collect(wait=True)
+        self._spill()
+        self._collect(wait=True)
+
+    def _spill(self):
+        """内存超出预算时，把最旧的约一半已压缩的块交给后台线程写入一个新的分段文件"""
+        if self.spill_dir is None or self.spill_error is not None:
+            return
+        resident = self.nbytes - self._spilling_bytes
+        if resident <= self.memory_budget:
+            return
+        target = resident - self.memory_budget // 2
+        blocks = []
+        freed = 0
+        # 已写入或正在写入磁盘的块之后第一个仍在内存中的块
+        index = bisect_left(self._block_starts, self._spill_end)
+        while index < len(self._blocks) and freed < target:
+            block = self._blocks[index]
+            if block.payload is None:
+                break  # 仍在压缩
+            blocks.append(block)
+            freed += block.size
+            index += 1
+        if not blocks:
+            return
+
+        if self._segment_dir is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._segment_dir = tempfile.mkdtemp(prefix="scrollback-", dir=self.spill_dir)
+            self._finalizer = weakref.finalize(self, _remove_segments, self._segments, self._segment_dir)
+        path = os.path.join(self._segment_dir, f"{self._segment_seq:08d}.seg")
+        self._segment_seq += 1
+        self._spill_end = blocks[-1].end
+        self._spilling_bytes += freed
+        entries = [(block.start, block.count, self.compression, block.payload) for block in blocks]
+        self._spilling.append((blocks, self._worker().submit(Segment.write, path, entries)))
+
+    def _spilled(self, blocks: list, future):
+        """分段写入完成：这些块改为从分段读取，释放内存中的压缩数据"""
+        self._spilling_bytes -= sum(block.size for block in blocks)
+        try:
+            segment = future.result()
+        except OSError as e:
+            self.spill_error = e
+            return
+        self._segments.append(segment)
+        for slot, block in enumerate(blocks):
+            if block.payload is None:
+                continue  # 写入期间已被丢弃
+            self._cold_bytes -= block.size
+            block.payload = None
+            block.segment = segment
+            block.slot = slot
+        # 写入期间整段都已被丢弃
+        while self._segments and self._segments[0].end <= self.first:
+            self._segments.pop(0).remove()
+
+    def clear(self):
+        """清空全部记录并删除分段文件"""
+        self.close()
+        self.first = 0
+        self._reset_cold()
+        self._reset_hot()
+
+    def close(self):
+        """停止后台压缩，删除分段文件和分段目录，冷区中的记录随之丢弃（用于退出前清理）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        # 等待正在写入的分段完成后再删除分段目录
+        for _, future in self._spilling:
+            if not future.cancelled():
+                try:
+                    future.result().close()
+                except OSError:
+                    pass
+        if self._finalizer is not None:
+            self._finalizer()
+        self.first = max(self.first, self._hot_start)
+        self._reset_cold()
+
+    @property
+    def nbytes(self) -> int:
+        """热区和冷区占用的内存字节数"""
+        return len(self._data) + len(self._times) * RECORD_OVERHEAD + 8 + self._cold_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        """磁盘分段的总字节数"""
+        return sum(segment.nbytes for segment in self._segments)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def stats(self) -> dict:
+        """返回各层大小、压缩率和解压缓存命中率的快照"""
+        self._collect()
+        compressed = [block for block in self._blocks if block.size]
+        raw_bytes = sum(block.raw_size for block in compressed)
+        compressed_bytes = sum(block.size for block in compressed)
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'records': len(self),
+            'hot_records': len(self._times),
+            'hot_bytes': self.nbytes - self._cold_bytes,
+            'cold_blocks': len(self._blocks),
+            'cold_bytes': self._cold_bytes,
+            'compression': self.compression,
+            'compression_ratio': raw_bytes / compressed_bytes if compressed_bytes else 0.0,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'segments': len(self._segments),
+            'disk_bytes': self.disk_bytes,
+        }
+
+    def row_count(self, index: int, mode) -> int:
+        """
+        第 index 条记录在显示方式 mode（display_mode 的返回值）下的可视行数，无需格式化
+
+        接收记录在文本模式下，只有 interpret 会把帧内的 \\n 显示为换行；十六进制显示为两行或
+        每16字节一行；回显和预格式化文本按 \\n 拆分。
+        """
+        direction = self.direction(index)
+        if direction == DIRECTION_RX:
+            control_char_mode, hex_dump = mode
+            if control_char_mode is None:
+                return max(1, (self.length(index) + 15) // 16) if hex_dump else 2
+            if control_char_mode == 'interpret':
+                return _text_rows(self.data(index))
+            return 1
+        if direction == DIRECTION_TX_HEX:
+            return 1
+        return _text_rows(self.data(index))
+
+
+class RowFormatter:
+    """
+    按一份显示设置快照把记录格式化为可视行，带 LRU 缓存
+
+    缓存以记录的绝对序号为键，丢弃头部记录不影响已缓存的行。
+
+    接收帧按流水线增量解码的结果显示：帧的第一个字符从上一帧末尾开始时（记录的 carry），把上一帧末尾的
+    这几个字节补在前面；帧末尾未完成的多字节字符留给下一帧显示。因此跨帧的中文等字符不会显示成替换字符，
+    显示与日志一致。
+    """
+
+    def __init__(self, store: LineStore, settings: dict, encoding: str = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.store = store
+        self.mode = display_mode(settings)
+        self.show_timestamp = settings['show_timestamp']
+        self.encoding = encoding or "utf-8"
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def rows(self, index: int) -> list:
+        """第 index 条记录（相对 store.first）的可视行"""
+        key = self.store.first + index
+        rows = self._cache.get(key)
+        if rows is not None:
+            self._cache.move_to_end(key)
+            return rows
+        rows = self.format(index)
+        self._cache[key] = rows
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rows
+
+    def format(self, index: int) -> list:
+        """格式化第 index 条记录，不经过缓存"""
+        store = self.store
+        data = store.data(index)
+        direction = store.direction(index)
+        if direction == DIRECTION_RX:
+            control_char_mode, hex_dump = self.mode
+            prefix = timestamp_prefix(store.timestamp(index)) if self.show_timestamp else ""
+            text = None if control_char_mode is None else self.decode(index, data)
+            display = format_frame(data, store.stream_offset(index), prefix, control_char_mode, hex_dump, text)
+        elif direction == DIRECTION_TEXT:
+            display = data.decode("utf-8", "replace")
+        else:
+            sent_time = datetime.datetime.fromtimestamp(store.timestamp(index)).strftime("%Y-%m-%d_%H:%M:%S:%f")[:-3]
+            if direction == DIRECTION_TX_HEX:
+                display = f"({sent_time})-->[HEX] {hex_string(data)}"
+            else:
+                display = f"({sent_time})--> {data.decode('utf-8', 'replace')}"
+
+        rows = display.rstrip("\r\n").split("\n")
+        # 行数必须与 LineStore.row_count 一致（如多字节编码中出现 0x0A 的极端情况）
+        expected = store.row_count(index, self.mode)
+        if len(rows) > expected:
+            rows[expected - 1:] = ["\\n".join(rows[expected - 1:])]
+        elif len(rows) < expected:
+            rows.extend([""] * (expected - len(rows)))
+        return rows
+
+    def decode(self, index: int, data: bytes) -> str:
+        """按接收流水线的增量解码方式解码第 index 条接收帧"""
+        carry = self.store.carry(index)
+        decoder = codecs.getincrementaldecoder(self.encoding)("replace")
+        return decoder.decode(self._carried_bytes(index, carry) + data if carry else data)
+
+    def _carried_bytes(self, index: int, count: int) -> bytes:
+        """第 index 条接收帧的第一个字符在前面的接收帧末尾已开始的 count 个字节，前面的帧已丢弃时为空"""
+        store = self.store
+        offset = store.stream_offset(index)
+        pieces = []
+        previous = index - 1
+        while count > 0 and previous >= max(0, index - CARRY_LOOKBACK):
+            if store.direction(previous) == DIRECTION_RX:
+                if store.stream_offset(previous) + store.length(previous) != offset:
+                    return b""  # 数据流不连续（如缓冲区溢出丢弃了数据）
+                piece = store.data(previous)[-count:]
+                pieces.append(piece)
+                count -= len(piece)
+                offset = store.stream_offset(previous)
+            previous -= 1
+        return b"".join(reversed(pieces)) if count <= 0 else b""
@@ -0,0 +1,307 @@
+"""
+日志文件的时间戳索引（.tsidx）
+
+接收日志每行以 [YYYY-MM-DD_HH:MM:SS.mmm] 开头，要找到某个时刻的数据原来只能从头扫描整个文件。
+时间戳索引是与日志同名、追加 .tsidx 后缀的旁路文件，每隔约 64KB 采样一行，记录 (时间戳, 行首字节偏移)。
+查找时先在索引中二分查找不晚于目标时刻的最后一个采样点，再从该偏移向后扫描至多一个采样间隔。
+
+索引由日志写入线程在写入时增量追加（TimestampIndexWriter）；旧日志可以用 build_index()
+（scripts/log_tsidx.py）按 MoreSettings.TimestampRegex 重建。索引只是加速手段：没有索引或索引不完整时，
+查找退化为从文件开头（或最后一个采样点）顺序扫描，结果相同。
+
+文件布局（小端）：
+    头部    magic "SCOMTSI1"(8s) 采样间隔(Q)
+    采样点  时间戳 Unix 秒(d) 行首字节偏移(Q)，依次追加
+"""
+
+import os
+import re
+import struct
+import datetime
+from array import array
+from bisect import bisect_right
+
+INDEX_SUFFIX = ".tsidx"
+MAGIC = b"SCOMTSI1"
+HEADER = struct.Struct("<8sQ")
+ENTRY = struct.Struct("<dQ")
+DEFAULT_STRIDE = 64 * 1024
+# 接收区写入日志的时间戳前缀（见 utils.line_store.timestamp_prefix），只在行首匹配
+DEFAULT_TIMESTAMP_REGEX = r"^\[\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}\.\d{3}\]"
+# 写入时在一个数据块中最多尝试的行数，超过后留到下一个数据块
+MAX_PROBE_LINES = 64
+READ_CHUNK = 1024 * 1024
+
+_FIELDS = re.compile(r"(\d{2,4})-(\d{1,2})-(\d{1,2})[_ T](\d{1,2}):(\d{2}):(\d{2})(?:[.:,](\d{1,6}))?")
+
+
+def index_path(log_path: str) -> str:
+    """日志文件对应的索引文件路径"""
+    return log_path + INDEX_SUFFIX
+
+
+def remove_index(log_path: str):
+    """删除日志文件的索引（日志被清空、压缩或删除后索引失效）"""
+    try:
+        os.remove(index_path(log_path))
+    except OSError:
+        pass
+
+
+def parse_timestamp(text: str):
+    """
+    从时间戳文本中解析时刻，兼容 2024-01-01_12:00:00.123、24-01-01 12:00:00:123 等写法
+
+    返回：
+    float | None: Unix 时间戳（本地时间），无法解析时为 None
+    """
+    match = _FIELDS.search(text)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction = match.groups()
+    year = int(year)
+    if year < 100:
+        year += 2000
+    try:
+        moment = datetime.datetime(year, int(month), int(day), int(hour), int(minute), int(second),
+                                   int((fraction or "0").ljust(6, "0")))
+    except ValueError:
+        return None
+    return moment.timestamp()
+
+
+class TimestampMatcher:
+    """
+    从一行日志中取出时间戳
+
+    参数：
+    regex (str): 匹配时间戳的正则表达式（如 MoreSettings.TimestampRegex），匹配到的文本按 parse_timestamp 解析
+    encoding (str): 日志编码
+    """
+
+    def __init__(self, regex: str = DEFAULT_TIMESTAMP_REGEX, encoding: str = "utf-8"):
+        self.regex = regex
+        self.encoding = encoding
+        self._pattern = re.compile(regex)
+
+    def timestamp(self, line: bytes):
+        """行的时间戳，没有时间戳的行（续行、关闭了时间戳显示）为 None"""
+        match = self._pattern.search(line.decode(self.encoding, "replace"))
+        return parse_timestamp(match.group(0)) if match else None
+
+
+class TimestampIndex:
+    """
+    已加载的时间戳索引
+
+    属性：
+    times (array): 采样点的时间戳
+    offsets (array): 采样点的行首字节偏移
+    stride (int): 采样间隔
+    """
+
+    def __init__(self, times=None, offsets=None, stride: int = DEFAULT_STRIDE):
+        self.times = times if times is not None else array('d')
+        self.offsets = offsets if offsets is not None else array('Q')
+        self.stride = stride
+
+    @classmethod
+    def load(cls, log_path: str):
+        """
+        读取日志文件的索引
+
+        返回：
+        TimestampIndex | None: 索引文件不存在、格式不符或与日志不一致（日志比索引短）时为 None
+        """
+        try:
+            with open(index_path(log_path), "rb") as f:
+                data = f.read()
+            log_size = os.path.getsize(log_path)
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, stride = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            return None
+        index = cls(stride=stride)
+        # 末尾不完整的采样点（写入中途退出）被忽略
+        end = HEADER.size + (len(data) - HEADER.size) // ENTRY.size * ENTRY.size
+        for timestamp, offset in ENTRY.iter_unpack(data[HEADER.size:end]):
+            index.times.append(timestamp)
+            index.offsets.append(offset)
+        if index.offsets and index.offsets[-1] > log_size:
+            return None
+        return index
+
+    def __len__(self):
+        return len(self.times)
+
+    def offset_before(self, timestamp: float) -> int:
+        """时间戳不晚于 timestamp 的最后一个采样点的偏移，没有时为 0（文件开头）"""
+        position = bisect_right(self.times, timestamp) - 1
+        return self.offsets[position] if position >= 0 else 0
+
+
+class TimestampIndexWriter:
+    """
+    在日志写入时增量追加索引（日志写入线程中使用）
+
+    日志文件已存在但没有可用的索引时，只为之后写入的数据建立索引，之前的部分查找时顺序扫描。
+    """
+
+    def __init__(self, log_path: str, log_size: int, stride: int = DEFAULT_STRIDE):
+        """
+        参数：
+        log_path (str): 日志文件路径
+        log_size (int): 日志文件当前大小
+        stride (int): 采样间隔（字节）
+        """
+        self.log_path = log_path
+        self.stride = stride
+        # 在数据块中的行首用 match(data, pos) 匹配，去掉只匹配字符串开头的 ^
+        self._pattern = re.compile(DEFAULT_TIMESTAMP_REGEX.lstrip("^").encode())
+        existing = TimestampIndex.load(log_path) if log_size else None
+        if existing is not None and existing.stride == stride:
+            self._file = open(index_path(log_path), "ab")
+            # 截掉末尾不完整的采样点
+            self._file.truncate(HEADER.size + len(existing) * ENTRY.size)
+            self.entries = len(existing)
+            self.next_offset = existing.offsets[-1] + stride if self.entries else log_size
+        else:
+            self._file = open(index_path(log_path), "wb")
+            self._file.write(HEADER.pack(MAGIC, stride))
+            self.entries = 0
+            self.next_offset = log_size
+
+    def observe(self, offset: int, data: bytes):
+        """
+        即将在 offset 处写入 data（若干完整的行），到达采样点时记录第一行有时间戳的行
+
+        参数：
+        offset (int): data 写入位置的文件偏移
+        data (bytes): 写入的数据
+        """
+        end = offset + len(data)
+        while self.next_offset < end:
+            start = self.next_offset - offset
+            if start > 0:
+                # 采样点落在数据块中间时取其后的第一个行首
+                start = data.find(b"\n", start - 1) + 1
+                if start <= 0 or start >= len(data):
+                    return
+            else:
+                start = 0
+            for _ in range(MAX_PROBE_LINES):
+                match = self._pattern.match(data, start)
+                if match is not None:
+                    timestamp = parse_timestamp(match.group(0).decode("ascii"))
+                    if timestamp is not None:
+                        self._file.write(ENTRY.pack(timestamp, offset + start))
+                        self.entries += 1
+                        self.next_offset = offset + start + self.stride
+                        break
+                start = data.find(b"\n", start) + 1
+                if start <= 0 or start >= len(data):
+                    self.next_offset = end
+                    return
+            else:
+                self.next_offset = offset + start
+                return
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def build_index(log_path: str, regex: str = DEFAULT_TIMESTAMP_REGEX, stride: int = DEFAULT_STRIDE,
+                encoding: str = "utf-8") -> TimestampIndex:
+    """
+    扫描整个日志文件重建索引并写入旁路文件
+
+    参数：
+    log_path (str): 日志文件路径
+    regex (str): 匹配时间戳的正则表达式
+    stride (int): 采样间隔（字节）
+    encoding (str): 日志编码
+
+    返回：
+    TimestampIndex: 新的索引
+    """
+    matcher = TimestampMatcher(regex, encoding)
+    index = TimestampIndex(stride=stride)
+    next_offset = 0
+    for offset, line in iter_lines(log_path):
+        if offset >= next_offset:
+            timestamp = matcher.timestamp(line)
+            if timestamp is not None:
+                index.times.append(timestamp)
+                index.offsets.append(offset)
+                next_offset = offset + stride
+    partial = index_path(log_path) + ".part"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, stride))
+        f.write(b"".join(ENTRY.pack(timestamp, offset) for timestamp, offset in zip(index.times, index.offsets)))
+    os.replace(partial, index_path(log_path))
+    return index
+
+
+def iter_lines(log_path: str, start: int = 0):
+    """
+    从 start 开始依次返回 (行首偏移, 行数据含换行符)
+
+    参数：
+    log_path (str): 日志文件路径
+    start (int): 起始偏移，应为行首
+    """
+    with open(log_path, "rb", buffering=READ_CHUNK) as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            yield offset, line
+            offset += len(line)
+
+
+def seek_time(log_path: str, timestamp: float, matcher: TimestampMatcher = None, index: TimestampIndex = None) -> int:
+    """
+    第一行时间戳不早于 timestamp 的行首偏移
+
+    参数：
+    log_path (str): 日志文件路径
+    timestamp (float): 目标时刻（Unix 时间）
+    matcher (TimestampMatcher): 时间戳匹配方式，为空时使用默认格式
+    index (TimestampIndex): 已加载的索引，为空时读取旁路文件
+
+    返回：
+    int: 行首偏移，所有行都早于目标时刻时为文件大小
+    """
+    matcher = matcher or TimestampMatcher()
+    if index is None:
+        index = TimestampIndex.load(log_path)
+    start = index.offset_before(timestamp) if index is not None else 0
+    offset = start
+    for offset, line in iter_lines(log_path, start):
+        line_time = matcher.timestamp(line)
+        if line_time is not None and line_time >= timestamp:
+            return offset
+    return os.path.getsize(log_path)
+
+
+def read_time_range(log_path: str, start: float = None, end: float = None, matcher: TimestampMatcher = None,
+                    index: TimestampIndex = None):
+    """
+    依次返回时间范围 [start, end] 内的行，范围内没有时间戳的续行一并返回
+
+    返回：
+    Iterator[tuple[int, bytes]]: (行首偏移, 行数据含换行符)
+    """
+    matcher = matcher or TimestampMatcher()
+    offset = 0 if start is None else seek_time(log_path, start, matcher, index)
+    for offset, line in iter_lines(log_path, offset):
+        if end is not None:
+            line_time = matcher.timestamp(line)
+            if line_time is not None and line_time > end:
+                return
+        yield offset, line
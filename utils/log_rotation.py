@@ -0,0 +1,259 @@
+"""
+接收数据日志的轮转、压缩和保留
+
+长时间无人值守的测试中接收日志会增长到数 GB。LogWriterService 在写入线程中按 RotationPolicy 检查：
+当前文件超过大小上限，或跨过了按本地时间对齐的时间间隔（如每小时、每天零点）时，关闭当前文件并把它
+改名为按模板生成的文件名，之后的行写入新建的同名文件。改名只在两次写入之间进行，因此不会丢行，
+接收路径只把行放入队列，不受影响。
+
+改名后的文件由后台压缩线程以流式方式压缩为 .gz / .xz（不把整个文件读入内存），完成后删除原文件，
+再按保留策略删除最旧的轮转文件。
+
+文件名模板字段：
+    {stem}    日志文件名（不含扩展名）
+    {suffix}  日志文件扩展名（含点）
+    {date}    文件开始写入的日期 YYYYMMDD
+    {time}    文件开始写入的时刻 HHMMSS
+    {seq}     序号，从 1 开始取第一个未被占用的值，可写成 {seq:03d}
+"""
+
+import os
+import re
+import gzip
+import lzma
+import shutil
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from utils.log_index import remove_index
+
+DEFAULT_NAME_TEMPLATE = "{stem}_{date}_{seq:03d}{suffix}"
+
+# 压缩方式：名称 -> (扩展名, 打开压缩文件的函数)
+COMPRESSIONS = {
+    "none": ("", None),
+    "gzip": (".gz", lambda path: gzip.open(path, "wb", compresslevel=6)),
+    "lzma": (".xz", lambda path: lzma.open(path, "wb", preset=1)),
+}
+COPY_CHUNK = 1024 * 1024
+
+_FIELD = re.compile(r"\{(\w+)(:[^}]*)?\}")
+# 轮转文件名中各时间和序号字段匹配的内容
+_FIELD_PATTERNS = {"date": r"\d{8}", "time": r"\d{6}", "seq": r"\d+"}
+_COMPRESSED_SUFFIX = "(?:" + "|".join(re.escape(extension) for extension, _ in COMPRESSIONS.values()
+                                      if extension) + ")?"
+
+
+class RotationPolicy:
+    """
+    一个日志文件的轮转策略
+
+    属性：
+    max_bytes (int): 文件大小上限，0 表示不按大小轮转
+    interval (int): 轮转间隔（秒），按本地时间对齐，0 表示不按时间轮转
+    name_template (str): 轮转文件名模板
+    compression (str): 压缩方式，COMPRESSIONS 之一
+    keep_files (int): 最多保留的轮转文件数，0 表示不限制
+    keep_bytes (int): 轮转文件的总大小上限，0 表示不限制
+    """
+
+    def __init__(self, max_bytes: int = 0, interval: int = 0, name_template: str = DEFAULT_NAME_TEMPLATE,
+                 compression: str = "gzip", keep_files: int = 0, keep_bytes: int = 0):
+        compression = str(compression).lower()
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown log compression: {compression!r}, expected one of {tuple(COMPRESSIONS)}")
+        if "{seq" not in name_template and "{time" not in name_template:
+            raise ValueError(f"Rotated log name template needs {{seq}} or {{time}}: {name_template!r}")
+        try:
+            name_template.format(stem="received", suffix=".log", date="20240101", time="000000", seq=1)
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid rotated log name template {name_template!r}: {e!r}") from None
+        self.max_bytes = max(int(max_bytes), 0)
+        self.interval = max(int(interval), 0)
+        self.name_template = name_template
+        self.compression = compression
+        self.keep_files = max(int(keep_files), 0)
+        self.keep_bytes = max(int(keep_bytes), 0)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_bytes or self.interval)
+
+    def period(self, timestamp: float) -> int:
+        """时间戳所在的轮转周期编号（按本地时间对齐），不按时间轮转时为 0"""
+        if not self.interval:
+            return 0
+        offset = datetime.datetime.fromtimestamp(timestamp).astimezone().utcoffset()
+        return int(timestamp + offset.total_seconds()) // self.interval
+
+    def should_rotate(self, size: int, incoming: int, started: float, now: float) -> bool:
+        """
+        写入 incoming 字节之前是否需要轮转
+
+        参数：
+        size (int): 当前文件大小
+        incoming (int): 即将写入的字节数
+        started (float): 当前文件开始写入的时刻
+        now (float): 当前时刻
+        """
+        if size <= 0:
+            return False
+        if self.max_bytes and size + incoming > self.max_bytes:
+            return True
+        return bool(self.interval) and self.period(started) != self.period(now)
+
+    def rotated_path(self, path: str, started: float) -> str:
+        """为即将轮转的文件生成一个未被占用的文件名（压缩后的文件名也不冲突）"""
+        directory, name = os.path.split(path)
+        stem, suffix = os.path.splitext(name)
+        start = datetime.datetime.fromtimestamp(started)
+        extension = COMPRESSIONS[self.compression][0]
+        seq = 1
+        while True:
+            candidate = os.path.join(directory, self.name_template.format(
+                stem=stem, suffix=suffix, date=start.strftime("%Y%m%d"), time=start.strftime("%H%M%S"), seq=seq))
+            if not os.path.exists(candidate) and not os.path.exists(candidate + extension):
+                return candidate
+            seq += 1
+
+    def name_pattern(self, path: str):
+        """
+        匹配该日志轮转文件名（含压缩扩展名）的正则表达式
+
+        模板中的文字按原样匹配，{stem}/{suffix} 匹配该日志的文件名，{date}/{time}/{seq} 只匹配数字，
+        因此前缀相同的其他日志（如 rx_port2.log 的轮转文件）和用户自己的文件不会被当作轮转文件。
+        """
+        stem, suffix = os.path.splitext(os.path.basename(path))
+        values = {"stem": re.escape(stem), "suffix": re.escape(suffix)}
+        parts = []
+        position = 0
+        for match in _FIELD.finditer(self.name_template):
+            parts.append(re.escape(self.name_template[position:match.start()]))
+            name = match.group(1)
+            parts.append(values[name] if name in values else _FIELD_PATTERNS[name])
+            position = match.end()
+        parts.append(re.escape(self.name_template[position:]))
+        return re.compile("".join(parts) + _COMPRESSED_SUFFIX)
+
+    def rotated_files(self, path: str) -> list:
+        """该日志已有的轮转文件（含压缩后的），按修改时间从旧到新排序"""
+        directory, name = os.path.split(path)
+        pattern = self.name_pattern(path)
+        try:
+            names = os.listdir(directory or ".")
+        except OSError:
+            return []
+        files = [os.path.join(directory, entry) for entry in names if entry != name and pattern.fullmatch(entry)]
+        return sorted(files, key=_mtime)
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def compress_file(path: str, compression: str) -> str:
+    """
+    流式压缩文件，完成后删除原文件
+
+    返回：
+    str: 压缩后的文件路径（不压缩时为原路径）
+    """
+    extension, opener = COMPRESSIONS[compression]
+    if opener is None:
+        return path
+    target = path + extension
+    partial = target + ".part"
+    with open(path, "rb") as source, opener(partial) as destination:
+        shutil.copyfileobj(source, destination, COPY_CHUNK)
+    os.replace(partial, target)
+    os.remove(path)
+    return target
+
+
+def apply_retention(files: list, keep_files: int, keep_bytes: int) -> list:
+    """
+    按保留策略删除最旧的轮转文件
+
+    参数：
+    files (list[str]): 按从旧到新排序的轮转文件
+    keep_files (int): 最多保留的文件数，0 表示不限制
+    keep_bytes (int): 总大小上限，0 表示不限制
+
+    返回：
+    list[str]: 被删除的文件
+    """
+    sizes = []
+    for path in files:
+        try:
+            sizes.append(os.path.getsize(path))
+        except OSError:
+            sizes.append(0)
+    total = sum(sizes)
+    removed = []
+    for index, path in enumerate(files):
+        remaining = len(files) - index
+        if not ((keep_files and remaining > keep_files) or (keep_bytes and total > keep_bytes)):
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        remove_index(path)
+        total -= sizes[index]
+        removed.append(path)
+    return removed
+
+
+class RotationWorker:
+    """
+    后台压缩和清理轮转文件（单线程，按提交顺序执行）
+
+    属性：
+    rotated (int): 已提交的轮转文件数
+    compressed (int): 已压缩完成的文件数
+    removed (int): 按保留策略删除的文件数
+    errors (int): 压缩或删除失败的次数
+    last_error (Exception | None): 最近一次失败的错误
+    """
+
+    def __init__(self):
+        self.rotated = 0
+        self.compressed = 0
+        self.removed = 0
+        self.errors = 0
+        self.last_error = None
+        self._executor = None
+        self._futures = []
+
+    def submit(self, log_path: str, rotated_path: str, policy: RotationPolicy):
+        """压缩一个刚轮转的文件，然后对该日志执行保留策略"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LogCompress")
+        self.rotated += 1
+        self._futures = [future for future in self._futures if not future.done()]
+        self._futures.append(self._executor.submit(self._process, log_path, rotated_path, policy))
+
+    def _process(self, log_path, rotated_path, policy):
+        try:
+            if policy.compression != "none":
+                compress_file(rotated_path, policy.compression)
+                self.compressed += 1
+            if policy.keep_files or policy.keep_bytes:
+                self.removed += len(apply_retention(policy.rotated_files(log_path), policy.keep_files,
+                                                    policy.keep_bytes))
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            self.errors += 1
+            self.last_error = e
+
+    def wait(self, timeout: float = None):
+        """等待已提交的压缩全部完成"""
+        for future in list(self._futures):
+            future.exception(timeout)
+
+    def close(self):
+        """等待压缩完成后停止后台线程"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,446 @@
+"""
+异步批量日志写入服务
+
+common.log_write / print_write 原来每写一行都要加全局锁、打开文件、写入并关闭，而且在调用线程（GUI线程或
+接收处理流水线线程）中完成。LogWriterService 把这些文件操作全部移到一个专用的写入线程：调用方只把行放入
+队列，写入线程为每个文件保持一个带大缓冲区的句柄，按时间或数据量合并写入，并按 fsync 策略落盘。
+
+队列中的操作严格按提交顺序执行，因此：
+- 日志路径变化后，旧路径的行写入旧文件，新路径的行写入新文件，旧句柄空闲一段时间后关闭；
+- truncate()（清空日志）之前提交的行不会在清空之后再被写入文件。
+
+通过 set_rotation() 为某个日志文件设置轮转策略后，写入线程在写入前检查大小和时间间隔，需要时把当前
+文件改名后交给后台线程压缩和清理（见 utils.log_rotation）。
+通过 set_index() 为某个日志文件开启时间戳索引后，写入线程在写入时增量追加 .tsidx 索引（见 utils.log_index）。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.log_rotation import RotationWorker
+from utils.log_index import TimestampIndexWriter, index_path, remove_index
+from utils import profiler
+
+FSYNC_NEVER = "never"  # 只 flush 到操作系统，由系统决定何时落盘
+FSYNC_FLUSH = "flush"  # 每次合并写入后 fsync
+FSYNC_CLOSE = "close"  # 关闭句柄（路径切换、清空、退出）时 fsync
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE)
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_FLUSH_BYTES = 256 * 1024
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_MAX_BUFFER = 64 * 1024 * 1024
+DEFAULT_IDLE_CLOSE = 5.0
+MAX_OPEN_FILES = 8
+
+_TRUNCATE = object()
+
+
+class _LogFile:
+    """写入线程中打开的一个日志文件"""
+    __slots__ = ("file", "size", "started", "last_used", "index")
+
+    def __init__(self, file, size: int, started: float, index=None):
+        self.file = file
+        self.size = size  # 文件当前大小（字节），用于按大小轮转
+        self.started = started  # 文件开始写入的时刻（Unix 时间），用于按时间轮转
+        self.last_used = time.monotonic()
+        self.index = index  # TimestampIndexWriter，未开启索引时为 None
+
+
+class LogWriterService:
+    """
+    在专用线程中批量写入文本日志，可在任意线程调用
+
+    属性：
+    flush_interval (float): 队列中有数据时最长的写入间隔（秒）
+    flush_bytes (int): 队列中的数据达到该大小时立即写入
+    fsync (str): fsync 策略，FSYNC_POLICIES 之一
+    lines_written (int): 已写入文件的行数
+    bytes_written (int): 已写入文件的字节数
+    flushes (int): 合并写入的次数
+    errors (int): 写入失败的次数，失败的行被丢弃
+    last_error (Exception | None): 最近一次写入失败的错误
+    rotation (RotationWorker): 轮转文件的后台压缩和清理
+    """
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL, flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 fsync: str = FSYNC_NEVER, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 max_buffer: int = DEFAULT_MAX_BUFFER, idle_close: float = DEFAULT_IDLE_CLOSE,
+                 encoding: str = "utf-8"):
+        """
+        参数：
+        flush_interval (float): 队列中有数据时最长的写入间隔（秒）
+        flush_bytes (int): 队列中的数据达到该大小时立即写入
+        fsync (str): fsync 策略
+        buffer_size (int): 每个文件句柄的写缓冲区大小
+        max_buffer (int): 队列上限，超过后调用方等待写入线程，而不是丢弃日志
+        idle_close (float): 文件句柄空闲超过该时间（秒）后关闭
+        encoding (str): 文件编码
+        """
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.fsync = FSYNC_NEVER
+        self.set_fsync(fsync)
+        self.buffer_size = buffer_size
+        self.max_buffer = max_buffer
+        self.idle_close = idle_close
+        self.encoding = encoding
+        self.lines_written = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._queue = []  # (路径, 文本或 _TRUNCATE, 行数)
+        self._queued_chars = 0
+        self._first_queued = 0.0  # 队列中最早的操作的提交时刻
+        self._queued_seq = 0  # 已提交的操作数
+        self._done_seq = 0  # 已执行的操作数
+        self._flush_requested = False
+        self._closed = False
+        self._exited = False  # 写入线程已退出（正常关闭或意外错误）
+        self._handles = OrderedDict()  # 路径 -> _LogFile，按最近使用排序
+        self._policies = {}  # 路径 -> RotationPolicy
+        self._indexed = set()  # 开启时间戳索引的路径
+        self.rotation = RotationWorker()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    def set_fsync(self, fsync: str):
+        """修改 fsync 策略"""
+        fsync = str(fsync).lower()
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync!r}, expected one of {FSYNC_POLICIES}")
+        self.fsync = fsync
+
+    def set_rotation(self, path: str, policy=None):
+        """
+        设置日志文件的轮转策略
+
+        参数：
+        path (str): 日志文件路径
+        policy (RotationPolicy | None): 轮转策略，为空或未启用时取消轮转
+        """
+        with self._cond:
+            if policy is not None and policy.enabled:
+                self._policies[path] = policy
+            else:
+                self._policies.pop(path, None)
+
+    def set_index(self, path: str, enabled: bool = True):
+        """
+        开启或关闭日志文件的时间戳索引（在下次打开该文件时生效）
+
+        参数：
+        path (str): 日志文件路径
+        enabled (bool): 是否在写入时追加 .tsidx 索引
+        """
+        with self._cond:
+            if enabled:
+                self._indexed.add(path)
+            else:
+                self._indexed.discard(path)
+
+    def write_lines(self, path: str, lines) -> bool:
+        """
+        追加若干行（每行末尾补换行符）
+
+        参数：
+        path (str): 日志文件路径
+        lines (Iterable[str]): 不含换行符的行
+
+        返回：
+        bool: 是否已放入队列，服务关闭或写入线程已退出后为 False
+        """
+        lines = list(lines)
+        if not lines:
+            return True
+        text = "\n".join(lines) + "\n"
+        with self._cond:
+            if self._closed or self._exited:
+                return False
+            # 写入线程跟不上时让调用方等待，日志不丢失；写入线程退出后不再等待
+            self._cond.wait_for(lambda: self._closed or self._exited or self._queued_chars < self.max_buffer)
+            if self._closed or self._exited:
+                return False
+            if not self._queue:
+                self._first_queued = time.monotonic()
+                self._cond.notify_all()  # 写入线程按写入间隔重新计时
+            self._queue.append((path, text, len(lines)))
+            self._queued_chars += len(text)
+            self._queued_seq += 1
+            if self._queued_chars >= self.flush_bytes:
+                self._cond.notify_all()
+        return True
+
+    def truncate(self, path: str) -> bool:
+        """清空日志文件；此前提交、尚未写入该文件的行被丢弃"""
+        with self._cond:
+            if self._closed:
+                return False
+            self._queue.append((path, _TRUNCATE, 0))
+            self._queued_seq += 1
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        立即写入此前提交的全部操作并等待完成
+
+        返回：
+        bool: 在超时前完成时为 True
+        """
+        with self._cond:
+            target = self._queued_seq
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._done_seq >= target or self._exited, timeout)
+
+    def close(self):
+        """写入剩余数据，关闭所有文件并停止写入线程"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.rotation.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def open_files(self) -> list:
+        """当前打开的日志文件路径"""
+        return list(self._handles)
+
+    def stats(self) -> dict:
+        """返回统计计数的快照"""
+        with self._cond:
+            queued_chars = self._queued_chars
+        return {
+            'lines_written': self.lines_written,
+            'bytes_written': self.bytes_written,
+            'flushes': self.flushes,
+            'queued_bytes': queued_chars,
+            'open_files': len(self._handles),
+            'errors': self.errors,
+            'rotated_files': self.rotation.rotated,
+            'compressed_files': self.rotation.compressed,
+            'removed_files': self.rotation.removed,
+        }
+
+    # ---- 写入线程 ----
+
+    def _wait_for_work(self):
+        """等待到需要写入（数据量、写入间隔、flush、关闭）或需要检查空闲句柄为止，调用时已持有锁"""
+        while not (self._closed or self._flush_requested or self._queued_chars >= self.flush_bytes):
+            if self._queue:
+                remaining = self._first_queued + self.flush_interval - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+            elif self._handles:
+                if not self._cond.wait(self.idle_close) and not self._queue:
+                    return
+            else:
+                self._cond.wait()
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            # 写入线程意外退出时唤醒等待队列空间或 flush 的调用方，见 write_lines()
+            with self._cond:
+                self._exited = True
+                self._cond.notify_all()
+
+    def _loop(self):
+        while True:
+            profiler.sync("LogWriter")
+            with self._cond:
+                self._wait_for_work()
+                batch, self._queue = self._queue, []
+                self._queued_chars = 0
+                self._flush_requested = False
+                closed = self._closed
+                # 队列已清空，等待空间的调用方可以继续
+                self._cond.notify_all()
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+                self._close_idle(closed)
+            except Exception as e:
+                self._error(e)
+            with self._cond:
+                self._done_seq += len(batch)
+                self._cond.notify_all()
+            if closed:
+                break
+
+    def _write_batch(self, batch):
+        touched = set()
+        lines_written = bytes_written = 0
+        with self._cond:
+            policies = dict(self._policies)
+            indexed = set(self._indexed)
+        for path, text, line_count in batch:
+            try:
+                written = self._write_item(path, text, policies.get(path), path in indexed)
+            except Exception as e:
+                # 轮转模板、编码等意外错误只丢弃这一项，写入线程继续运行
+                self._error(e)
+                self._close_handle(path)
+                continue
+            if text is _TRUNCATE:
+                touched.discard(path)
+            elif written:
+                touched.add(path)
+                lines_written += line_count
+                bytes_written += written
+
+        now = time.monotonic()
+        for path in touched:
+            log_file = self._handles.get(path)
+            if log_file is None:
+                continue
+            try:
+                log_file.file.flush()
+                if log_file.index is not None:
+                    log_file.index.flush()
+                if self.fsync == FSYNC_FLUSH:
+                    os.fsync(log_file.file.fileno())
+            except Exception as e:
+                self._error(e)
+                self._close_handle(path)
+                continue
+            log_file.last_used = now
+        self.lines_written += lines_written
+        self.bytes_written += bytes_written
+        self.flushes += 1
+
+    def _write_item(self, path: str, text, policy, indexed: bool) -> int:
+        """
+        执行队列中的一项操作（写入或清空）
+
+        返回：
+        int: 写入的字节数，写入失败或清空时为 0
+        """
+        if text is _TRUNCATE:
+            self._close_handle(path)
+            try:
+                open(path, "w", encoding=self.encoding).close()
+            except OSError as e:
+                self._error(e)
+            remove_index(path)
+            return 0
+        data = text.encode(self.encoding)
+        log_file = self._handle(path, indexed)
+        if log_file is not None and policy is not None and \
+                policy.should_rotate(log_file.size, len(data), log_file.started, time.time()):
+            self._rotate(path, policy)
+            log_file = self._handle(path, indexed)
+        if log_file is None:
+            return 0
+        try:
+            if log_file.index is not None:
+                log_file.index.observe(log_file.size, data)
+            log_file.file.write(data)
+        except OSError as e:
+            self._error(e)
+            self._close_handle(path)
+            return 0
+        log_file.size += len(data)
+        return len(data)
+
+    def _handle(self, path: str, indexed: bool = False):
+        """路径对应的 _LogFile，按需打开（indexed 时同时打开时间戳索引），打开的文件数超过上限时关闭最久未用的"""
+        log_file = self._handles.get(path)
+        if log_file is not None:
+            self._handles.move_to_end(path)
+            return log_file
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handle = open(path, "ab", buffering=self.buffer_size)
+            stat = os.fstat(handle.fileno())
+        except OSError as e:
+            self._error(e)
+            return None
+        index = None
+        if indexed:
+            try:
+                index = TimestampIndexWriter(path, stat.st_size)
+            except OSError as e:
+                self._error(e)
+        # 续写已有的文件时，以它最后一次修改的时刻判断是否已跨过轮转间隔
+        log_file = _LogFile(handle, stat.st_size, stat.st_mtime if stat.st_size else time.time(), index)
+        self._handles[path] = log_file
+        while len(self._handles) > MAX_OPEN_FILES:
+            self._close_handle(next(iter(self._handles)))
+        return log_file
+
+    def _rotate(self, path: str, policy):
+        """关闭当前文件并改名，交给后台线程压缩；改名失败时继续写入原文件"""
+        log_file = self._handles[path]
+        started = log_file.started
+        self._close_handle(path)
+        try:
+            rotated = policy.rotated_path(path, started)
+            os.replace(path, rotated)
+        except Exception as e:
+            self._error(e)
+            return
+        # 不压缩时索引随日志一起改名；压缩后的文件无法按偏移定位，索引删除
+        if policy.compression == "none" and os.path.exists(index_path(path)):
+            try:
+                os.replace(index_path(path), index_path(rotated))
+            except OSError as e:
+                self._error(e)
+        remove_index(path)
+        self.rotation.submit(path, rotated, policy)
+
+    def _close_handle(self, path: str):
+        log_file = self._handles.pop(path, None)
+        if log_file is None:
+            return
+        handle = log_file.file
+        if log_file.index is not None:
+            try:
+                log_file.index.close()
+            except OSError as e:
+                self._error(e)
+        try:
+            handle.flush()
+            if self.fsync != FSYNC_NEVER:
+                os.fsync(handle.fileno())
+        except OSError as e:
+            self._error(e)
+        finally:
+            try:
+                handle.close()
+            except OSError:
+                pass
+
+    def _close_idle(self, close_all: bool):
+        """关闭空闲的句柄，日志路径切换后不再占用旧文件"""
+        deadline = time.monotonic() - self.idle_close
+        for path, log_file in list(self._handles.items()):
+            if close_all or log_file.last_used <= deadline:
+                self._close_handle(path)
+
+    def _error(self, error: Exception):
+        self.errors += 1
+        self.last_error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,495 @@
+"""
+通过 mmap 按行访问超大的日志和抓包文件
+
+大日志页（components.LargeFileViewer）需要在几秒内打开数 GB 的接收日志，不能把整个文件读进
+QTextDocument。这里的文件源只映射文件，在后台线程中建立稀疏的行索引，界面只解码可见的几十行：
+
+MappedTextFile    文本日志。每 16KB 一个块，记录块起始处之前的换行符数（array('Q')），
+                  计数由 bytes.count 完成，不逐行进入 Python。定位第 n 行时二分查找所在的块，
+                  再在块内向后查找换行符，至多扫描一个块。
+MappedCaptureFile 抓包文件（.scap，见 utils.capture），一条记录一行。每 256 条记录采样一次
+                  (文件偏移, 时刻)，定位时从采样点向后跳过至多 255 个记录头。
+
+两者都支持增量索引：文件变长（日志仍在写入）后 refresh() 重新映射，只为新增部分建立索引；
+文件被截短或开头内容变化（清空、轮转）时从头重建。
+"""
+
+import os
+import re
+import mmap
+import codecs
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from utils.capture import MAGIC as CAPTURE_MAGIC, INDEX_MAGIC, FILE_HEADER, RECORD_HEADER, INDEX_ENTRY, TRAILER
+from utils.hex_formatter import hex_string
+from utils.line_store import timestamp_prefix, DIRECTION_TX
+from utils.log_index import TimestampIndex, TimestampMatcher, seek_time
+
+BLOCK_SIZE = 16 * 1024
+# 每次从映射中复制出来计数的字节数，也是报告进度的间隔
+SCAN_CHUNK = 4 * 1024 * 1024
+SEARCH_CHUNK = 8 * 1024 * 1024
+# 显示时每行最多解码的字节数，超出部分截断（没有换行符的二进制文件不会整个解码）
+MAX_LINE_BYTES = 16 * 1024
+MAX_MATCHES = 100000
+RECORD_STRIDE = 256
+# 换行符和 ASCII 字符按单字节编码、多字节字符不含 ASCII 字节的编码，可以直接在字节上匹配 ASCII 正则表达式
+ASCII_ENCODINGS = ("utf-8", "ascii", "iso8859-1", "cp1252")
+# 判断文件是否被替换时比较的文件开头字节数
+HEAD_BYTES = 4096
+
+# refresh() 的结果
+UNCHANGED = 0
+GROWN = 1
+RESET = 2
+
+
+def open_mapped_file(path: str, encoding: str = "utf-8"):
+    """按文件开头的 magic 选择 MappedCaptureFile 或 MappedTextFile"""
+    with open(path, "rb") as f:
+        magic = f.read(len(CAPTURE_MAGIC))
+    if magic == CAPTURE_MAGIC:
+        return MappedCaptureFile(path)
+    return MappedTextFile(path, encoding)
+
+
+class MappedFile(ABC):
+    """
+    映射文件的公共部分：打开、释放、重新映射，以及在后台线程中调用的 build()
+
+    属性：
+    path (str): 文件路径
+    size (int): 映射时的文件大小
+    indexed (int): 已建立索引的字节位置
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0
+        self.indexed = 0
+        self._mmap = None
+        self._head = b""
+        self.reset()
+        self.open()
+
+    # ---- 映射 ----
+
+    def open(self):
+        """映射文件（空文件不映射）"""
+        self.close()
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = size
+
+    def close(self):
+        """释放映射，保留索引（Windows 上映射中的文件不能被改名或截短，离开页面时应释放）"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.size = 0
+
+    def refresh(self) -> int:
+        """
+        重新映射文件，沿用仍然有效的索引
+
+        返回：
+        int: UNCHANGED / GROWN（需要为新增部分建立索引）/ RESET（索引已清空，需要重建）
+        """
+        self.open()
+        head = self._mmap[:HEAD_BYTES] if self._mmap is not None else b""
+        if self.size < self.indexed or head[:len(self._head)] != self._head:
+            self.reset()
+            return RESET
+        return UNCHANGED if self.complete else GROWN
+
+    def reset(self):
+        """清空索引"""
+        self.indexed = 0
+        self._head = b""
+
+    @property
+    def complete(self) -> bool:
+        """索引是否覆盖了整个映射"""
+        return self.indexed >= self.size
+
+    def build(self, cancelled=None, progress=None) -> bool:
+        """
+        为 [indexed, size) 建立索引（可在后台线程中调用）
+
+        参数：
+        cancelled (Callable[[], bool]): 返回 True 时尽快停止
+        progress (Callable[[int], None]): 进度回调，参数为 0~100
+
+        返回：
+        bool: 是否完成（被取消时为 False）
+        """
+        if self._mmap is not None and not self._head:
+            self._head = self._mmap[:HEAD_BYTES]
+        while not self.complete:
+            if cancelled is not None and cancelled():
+                return False
+            self._index_chunk()
+            if progress is not None:
+                progress(self.indexed * 100 // max(self.size, 1))
+        return True
+
+    @abstractmethod
+    def _index_chunk(self):
+        """为下一段数据建立索引，并推进 indexed"""
+
+    # ---- 行 ----
+
+    @property
+    @abstractmethod
+    def row_count(self) -> int:
+        """已建立索引的行数"""
+
+    @abstractmethod
+    def rows(self, first: int, last: int) -> list:
+        """[first, last) 范围内各行的显示文本"""
+
+    @abstractmethod
+    def search(self, regex, cancelled=None, limit: int = MAX_MATCHES) -> list:
+        """匹配 regex 的 (行号, 起始列, 结束列) 列表，最多 limit 个"""
+
+    @abstractmethod
+    def row_for_time(self, timestamp: float, matcher: TimestampMatcher = None) -> int:
+        """第一行时间戳不早于 timestamp 的行"""
+
+
+class MappedTextFile(MappedFile):
+    """
+    按行访问的文本日志
+
+    属性：
+    encoding (str): 文件编码
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.encoding = encoding
+        super().__init__(path)
+
+    def reset(self):
+        super().reset()
+        # 第 b 块起始处之前的换行符数，最后一项为已索引部分的换行符总数
+        self._newlines = array('Q', [0])
+
+    def open(self):
+        super().open()
+        if self.size > self.indexed and self.indexed % BLOCK_SIZE:
+            # 文件变长后最后一个块不再完整，去掉后重新计数
+            del self._newlines[-1]
+            self.indexed = (len(self._newlines) - 1) * BLOCK_SIZE
+
+    def _index_chunk(self):
+        start = self.indexed
+        end = min(start + SCAN_CHUNK, self.size)
+        data = self._mmap[start:end]
+        newlines = self._newlines
+        total = newlines[-1]
+        for position in range(0, len(data), BLOCK_SIZE):
+            total += data.count(b"\n", position, position + BLOCK_SIZE)
+            newlines.append(total)
+        self.indexed = end
+
+    @property
+    def row_count(self) -> int:
+        if not self.indexed or self._mmap is None:
+            return 0
+        # 最后一行没有换行符时也算一行
+        return self._newlines[-1] + (self._mmap[self.indexed - 1] != 0x0A)
+
+    def line_offset(self, row: int) -> int:
+        """第 row 行的行首偏移"""
+        if row <= 0:
+            return 0
+        newlines = self._newlines
+        block = bisect_left(newlines, row) - 1
+        position = block * BLOCK_SIZE
+        for _ in range(row - newlines[block]):
+            position = self._mmap.find(b"\n", position, self.indexed) + 1
+        return position
+
+    def row_at_offset(self, offset: int) -> int:
+        """偏移 offset 所在的行"""
+        offset = min(max(offset, 0), self.indexed)
+        block = min(offset // BLOCK_SIZE, len(self._newlines) - 1)
+        start = block * BLOCK_SIZE
+        return self._newlines[block] + self._mmap[start:offset].count(b"\n")
+
+    def _decode(self, line: bytes) -> str:
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        return line.decode(self.encoding, "replace")
+
+    def rows(self, first: int, last: int) -> list:
+        """[first, last) 范围内各行的文本（不含换行符）"""
+        last = min(last, self.row_count)
+        if first >= last:
+            return []
+        mm = self._mmap
+        end_of_data = self.indexed
+        offset = self.line_offset(first)
+        result = []
+        for row in range(first, last):
+            end = mm.find(b"\n", offset, min(offset + MAX_LINE_BYTES, end_of_data))
+            if end >= 0:
+                result.append(self._decode(mm[offset:end]))
+                offset = end + 1
+            else:
+                # 超长的行截断显示，下一行从索引定位
+                result.append(self._decode(mm[offset:min(offset + MAX_LINE_BYTES, end_of_data)]))
+                offset = self.line_offset(row + 1)
+        return result
+
+    def search(self, regex, cancelled=None, limit: int = MAX_MATCHES) -> list:
+        """
+        在已索引部分中查找
+
+        ASCII 的正则表达式在 ASCII 兼容的编码下直接对映射的字节匹配，不解码整个文件；
+        其他情况按块解码后匹配。两种方式都不逐行进入 Python。
+
+        参数：
+        regex (re.Pattern): 已编译的文本正则表达式
+        cancelled (Callable[[], bool]): 返回 True 时停止，返回已找到的结果
+        limit (int): 最多返回的结果数
+
+        返回：
+        list[tuple[int, int, int]]: (行号, 起始列, 结束列)，跨行的匹配截止到行尾，空匹配被忽略
+        """
+        pattern = self._bytes_pattern(regex)
+        if pattern is None:
+            return self._search_text(regex, cancelled, limit)
+        results = []
+        mm = self._mmap
+        position = 0
+        while position < self.indexed and len(results) < limit:
+            if cancelled is not None and cancelled():
+                break
+            end = self._chunk_end(position)
+            for match in pattern.finditer(mm, position, end):
+                start, stop = match.span()
+                if stop == start:
+                    continue
+                row = self.row_at_offset(start)
+                line_start = mm.rfind(b"\n", max(start - MAX_LINE_BYTES, 0), start) + 1
+                if not line_start and start > MAX_LINE_BYTES:
+                    line_start = self.line_offset(row)
+                line_end = mm.find(b"\n", start, stop)
+                if line_end >= 0:
+                    stop = line_end - (line_end > start and mm[line_end - 1] == 0x0D)
+                column = len(mm[line_start:start].decode(self.encoding, "replace"))
+                results.append((row, column, column + len(mm[start:stop].decode(self.encoding, "replace"))))
+                if len(results) >= limit:
+                    break
+            position = end
+        return results
+
+    def _bytes_pattern(self, regex):
+        """能在字节上等价匹配时返回字节正则表达式，否则为 None"""
+        if not regex.pattern.isascii() or codecs.lookup(self.encoding).name not in ASCII_ENCODINGS:
+            return None
+        try:
+            return re.compile(regex.pattern.encode("ascii"), (regex.flags & ~re.UNICODE) | re.MULTILINE)
+        except re.error:
+            return None
+
+    def _chunk_end(self, position: int) -> int:
+        """从 position 开始的一块的结束位置，在行尾截断，匹配不会跨块"""
+        end = min(position + SEARCH_CHUNK, self.indexed)
+        if end < self.indexed:
+            cut = self._mmap.rfind(b"\n", position, end)
+            end = cut + 1 if cut >= 0 else end
+        return end
+
+    def _search_text(self, regex, cancelled, limit: int) -> list:
+        """按块解码后匹配"""
+        results = []
+        position = 0
+        row = 0
+        while position < self.indexed and len(results) < limit:
+            if cancelled is not None and cancelled():
+                break
+            end = self._chunk_end(position)
+            text = self._mmap[position:end].decode(self.encoding, "replace")
+            counted = 0
+            for match in regex.finditer(text):
+                start, stop = match.span()
+                if stop == start:
+                    continue
+                row += text.count("\n", counted, start)
+                counted = start
+                line_start = text.rfind("\n", 0, start) + 1
+                line_end = text.find("\n", start)
+                if line_end < 0:
+                    line_end = len(text)
+                elif line_end > line_start and text[line_end - 1] == "\r":
+                    line_end -= 1
+                results.append((row, start - line_start, min(stop, line_end) - line_start))
+                if len(results) >= limit:
+                    break
+            row += text.count("\n", counted)
+            position = end
+        return results
+
+    def row_for_time(self, timestamp: float, matcher: TimestampMatcher = None) -> int:
+        """
+        第一行时间戳不早于 timestamp 的行
+
+        有可用的 .tsidx 索引（utils.log_index）时经索引定位，否则在已索引的行中按时间戳二分查找
+        （日志按时间顺序写入，没有时间戳的续行取其后第一行有时间戳的行）。
+        """
+        matcher = matcher or TimestampMatcher()
+        index = TimestampIndex.load(self.path)
+        if index is not None and self.complete:
+            return self.row_at_offset(seek_time(self.path, timestamp, matcher, index))
+        low, high = 0, self.row_count
+        while low < high:
+            middle = (low + high) // 2
+            line_time = self._time_from(middle, high, matcher)
+            if line_time is not None and line_time >= timestamp:
+                high = middle
+            else:
+                low = middle + 1
+        # low 可能是上一行的续行，取其后第一行有时间戳的行
+        return self._timestamped_row(low, self.row_count, matcher)[0]
+
+    def _time_from(self, row: int, last: int, matcher: TimestampMatcher):
+        """从 row 开始第一行有时间戳的行的时间戳"""
+        return self._timestamped_row(row, last, matcher)[1]
+
+    def _timestamped_row(self, row: int, last: int, matcher: TimestampMatcher, probe: int = 64):
+        """从 row 开始第一行有时间戳的行 (行号, 时间戳)，向后至多查看 probe 行，没有时为 (row, None)"""
+        for i, text in enumerate(self.rows(row, min(row + probe, last))):
+            line_time = matcher.timestamp(text.encode(self.encoding, "replace"))
+            if line_time is not None:
+                return row + i, line_time
+        return row, None
+
+
+class MappedCaptureFile(MappedFile):
+    """按记录访问的抓包文件，每条记录显示为一行：时间戳、方向和十六进制数据"""
+
+    def reset(self):
+        super().reset()
+        self.indexed = FILE_HEADER.size
+        self._count = 0
+        # 每 RECORD_STRIDE 条记录采样一次
+        self._offsets = array('Q')
+        self._times = array('q')
+
+    def open(self):
+        super().open()
+        self._data_end = self._read_trailer()
+
+    def _read_trailer(self) -> int:
+        """记录数据的结束位置：正常关闭的文件为索引起始处，否则为文件末尾"""
+        size = self.size
+        if size >= FILE_HEADER.size + TRAILER.size:
+            index_offset, entries, _, magic = TRAILER.unpack_from(self._mmap, size - TRAILER.size)
+            if magic == INDEX_MAGIC and index_offset + entries * INDEX_ENTRY.size == size - TRAILER.size:
+                return index_offset
+        return size
+
+    @property
+    def complete(self) -> bool:
+        # 末尾不完整的记录（仍在写入）不计入
+        return self.size - self.indexed < RECORD_HEADER.size or self.indexed >= self._data_end or \
+            self._record_end(self.indexed) > self._data_end
+
+    def _record_end(self, offset: int) -> int:
+        return offset + RECORD_HEADER.size + RECORD_HEADER.unpack_from(self._mmap, offset)[0]
+
+    def _index_chunk(self):
+        mm = self._mmap
+        offset = self.indexed
+        end = self._data_end
+        limit = min(offset + SCAN_CHUNK, end)
+        header = RECORD_HEADER
+        header_size = header.size
+        count = self._count
+        while offset < limit and offset + header_size <= end:
+            size, timestamp_ns, _ = header.unpack_from(mm, offset)
+            if offset + header_size + size > end:
+                break
+            if count % RECORD_STRIDE == 0:
+                self._offsets.append(offset)
+                self._times.append(timestamp_ns)
+            count += 1
+            offset += header_size + size
+        self._count = count
+        self.indexed = offset
+
+    @property
+    def row_count(self) -> int:
+        return self._count if self._mmap is not None else 0
+
+    def _record_offset(self, row: int) -> int:
+        sample, skip = divmod(row, RECORD_STRIDE)
+        offset = self._offsets[sample]
+        for _ in range(skip):
+            offset = self._record_end(offset)
+        return offset
+
+    def _format(self, offset: int):
+        size, timestamp_ns, direction = RECORD_HEADER.unpack_from(self._mmap, offset)
+        start = offset + RECORD_HEADER.size
+        # 十六进制每字节占 3 个字符
+        data = self._mmap[start:start + min(size, MAX_LINE_BYTES // 3)]
+        marker = "TX " if direction == DIRECTION_TX else "RX "
+        text = timestamp_prefix(timestamp_ns / 1e9) + marker + hex_string(data)
+        return text + " ..." if size > len(data) else text, start + size
+
+    def rows(self, first: int, last: int) -> list:
+        last = min(last, self._count)
+        if first >= last:
+            return []
+        offset = self._record_offset(first)
+        result = []
+        for _ in range(first, last):
+            text, offset = self._format(offset)
+            result.append(text)
+        return result
+
+    def search(self, regex, cancelled=None, limit: int = MAX_MATCHES) -> list:
+        """在各记录格式化后的行中查找，返回值同 MappedTextFile.search"""
+        results = []
+        offset = FILE_HEADER.size
+        for row in range(self._count):
+            if row % RECORD_STRIDE == 0 and cancelled is not None and cancelled():
+                break
+            text, offset = self._format(offset)
+            for match in regex.finditer(text):
+                start, stop = match.span()
+                if stop > start:
+                    results.append((row, start, stop))
+            if len(results) >= limit:
+                del results[limit:]
+                break
+        return results
+
+    def row_for_time(self, timestamp: float, matcher: TimestampMatcher = None) -> int:
+        """第一条时刻不早于 timestamp 的记录"""
+        timestamp_ns = int(timestamp * 1e9)
+        sample = max(bisect_right(self._times, timestamp_ns) - 1, 0)
+        row = sample * RECORD_STRIDE
+        if not self._offsets:
+            return 0
+        offset = self._offsets[sample]
+        while row < self._count:
+            if RECORD_HEADER.unpack_from(self._mmap, offset)[1] >= timestamp_ns:
+                break
+            offset = self._record_end(offset)
+            row += 1
+        return row
+
+
+def compile_search(text: str, regex: bool = False, case_sensitive: bool = False, whole_word: bool = False):
+    """按搜索选项编译正则表达式，与 SearchReplaceDialog 的选项含义相同"""
+    pattern = text if regex else re.escape(text)
+    if whole_word:
+        pattern = rf"\b{pattern}\b"
+    return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
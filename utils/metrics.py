@@ -0,0 +1,278 @@
+"""
+轻量的运行时指标
+
+接收路径上的各个环节（读取线程、处理流水线、显示刷新、日志写入）直接更新模块级的指标对象，
+性能面板（components.PerformancePanel）和指标导出定时读取快照，由两次快照的差值计算速率。
+
+- Counter：单调递增的计数，inc() 只是一次整数加法
+- Gauge：当前值，可以直接 set()，也可以注册一个在读取快照时才调用的函数（如队列长度）
+- Histogram：固定分桶的分布（读取大小、耗时），observe() 只做一次二分查找和两次加法
+
+更新不加锁：每个计数器和直方图应只由一个线程更新（多个线程更新同一计数器时极少数情况下会少计），
+读取快照时不会阻塞更新方。
+
+用法：
+
+    from utils import metrics
+    RX_BYTES = metrics.counter("rx_bytes_total", "Bytes read from the serial port")
+    RX_BYTES.inc(len(chunk))
+    metrics.snapshot()["rx_bytes_total"]
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# 字节数分桶：1 ~ 64 KiB 的 2 的幂
+SIZE_BUCKETS = tuple(2 ** i for i in range(17))
+# 耗时分桶（毫秒）
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Counter:
+    """
+    单调递增的计数
+
+    属性：
+    name (str): 指标名称
+    help (str): 说明
+    value (int | float): 当前计数
+    """
+    kind = COUNTER
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def sample(self):
+        return self.value
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge:
+    """
+    可升可降的当前值；设置了 function 时读取快照时调用它取值，返回 None 表示暂无数据
+
+    属性：
+    name (str): 指标名称
+    help (str): 说明
+    value (int | float | None): 最近一次 set() 的值
+    function (Callable[[], int | float | None] | None): 取值函数
+    """
+    kind = GAUGE
+    __slots__ = ("name", "help", "value", "function")
+
+    def __init__(self, name: str, help: str = "", function=None):
+        self.name = name
+        self.help = help
+        self.value = None
+        self.function = function
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """设置取值函数，为 None 时恢复使用 set() 的值"""
+        self.function = function
+
+    def sample(self):
+        function = self.function
+        if function is None:
+            return self.value
+        try:
+            return function()
+        except Exception:
+            return None
+
+    def reset(self):
+        self.value = None
+
+
+class Histogram:
+    """
+    固定分桶的分布
+
+    属性：
+    name (str): 指标名称
+    help (str): 说明
+    buckets (tuple[float, ...]): 各桶的上界（递增），最后另有一个 +Inf 桶
+    counts (list[int]): 各桶的计数（不累积），长度为 len(buckets) + 1
+    count (int): 观测次数
+    sum (float): 观测值之和
+    max (float): 最大观测值
+    """
+    kind = HISTOGRAM
+    __slots__ = ("name", "help", "buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, name: str, buckets, help: str = ""):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def sample(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "max": self.max, "counts": list(self.counts)}
+
+    def quantile(self, q: float, counts=None):
+        """
+        估算分位数，返回所在桶的上界（落在 +Inf 桶时返回最大观测值）
+
+        参数：
+        q (float): 0~1 之间的分位
+        counts (list[int]): 使用给定的各桶计数（如两次快照的差值），为空时使用累计计数
+
+        返回：
+        float | None: 分位数，没有观测值时为 None
+        """
+        counts = self.counts if counts is None else counts
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    按名称登记指标，同名指标只创建一次，可在任意线程中获取和读取快照
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name!r} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "", function=None) -> Gauge:
+        gauge = self._get(Gauge, name, help)
+        if function is not None:
+            gauge.set_function(function)
+        return gauge
+
+    def histogram(self, name: str, buckets=LATENCY_BUCKETS_MS, help: str = "") -> Histogram:
+        return self._get(Histogram, name, buckets, help)
+
+    def get(self, name: str):
+        """按名称获取已登记的指标，没有时返回 None"""
+        return self._metrics.get(name)
+
+    def metrics(self) -> list:
+        """按登记顺序返回全部指标"""
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> dict:
+        """
+        读取全部指标的当前值
+
+        返回：
+        dict: 指标名称 -> 计数 / 当前值 / 直方图的 {"count", "sum", "max", "counts"}
+        """
+        return {metric.name: metric.sample() for metric in self.metrics()}
+
+    def reset(self):
+        """清零全部计数和分布（取值函数保留）"""
+        for metric in self.metrics():
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+if psutil is not None:
+    _process = psutil.Process(os.getpid())
+    REGISTRY.gauge("process_rss_bytes", "Resident memory of the SCOM process", lambda: _process.memory_info().rss)
+    REGISTRY.gauge("process_cpu_percent", "CPU usage of the SCOM process since the previous sample",
+                   lambda: _process.cpu_percent(None))
+
+
+def counter(name: str, help: str = "") -> Counter:
+    """在全局登记表中获取或创建计数器"""
+    return REGISTRY.counter(name, help)
+
+
+def gauge(name: str, help: str = "", function=None) -> Gauge:
+    """在全局登记表中获取或创建当前值指标，function 不为空时替换取值函数"""
+    return REGISTRY.gauge(name, help, function)
+
+
+def histogram(name: str, buckets=LATENCY_BUCKETS_MS, help: str = "") -> Histogram:
+    """在全局登记表中获取或创建直方图"""
+    return REGISTRY.histogram(name, buckets, help)
+
+
+def snapshot() -> dict:
+    """读取全局登记表中全部指标的当前值"""
+    return REGISTRY.snapshot()
+
+
+def rates(previous: dict, current: dict, seconds: float, registry: MetricsRegistry = None) -> dict:
+    """
+    由两次快照计算计数器和直方图观测次数的每秒速率
+
+    参数：
+    previous (dict): 较早的快照
+    current (dict): 较新的快照
+    seconds (float): 两次快照的间隔（秒）
+    registry (MetricsRegistry): 快照所属的指标登记表，用于区分计数器和当前值，为空时使用全局登记表
+
+    返回：
+    dict: 指标名称 -> 每秒增量（直方图按观测次数计算）
+    """
+    if seconds <= 0:
+        return {}
+    registry = registry or REGISTRY
+    result = {}
+    for name, value in current.items():
+        before = previous.get(name)
+        if isinstance(value, dict):
+            before = before["count"] if isinstance(before, dict) else 0
+            value = value["count"]
+        elif before is None or registry.get(name) is None or registry.get(name).kind != COUNTER:
+            continue
+        # 计数被清零后不报告负速率
+        result[name] = max(value - before, 0) / seconds
+    return result
@@ -0,0 +1,230 @@
+"""
+指标导出（用于长时间运行的测试台）
+
+utils.metrics 中的计数只在读取时才被采样，导出不会给接收循环增加任何开销。两种导出方式：
+
+- MetricsServer：可选的本机 HTTP 端点（标准库 http.server，守护线程），
+  GET /metrics 返回 Prometheus 文本格式，GET /metrics.json 返回 JSON 快照
+- SnapshotWriter：每隔 interval 秒把一份 JSON 快照追加到 logs/ 下的 JSON Lines 文件，
+  经日志写入线程落盘
+
+配置（MoreSettings）：MetricsPort 为 0 时不开启 HTTP 端点；MetricsSnapshotSec 为 0 时不写快照文件。
+"""
+
+import json
+import math
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from middileware.Logger import Logger
+from utils import common, metrics
+from utils.metrics import HISTOGRAM
+
+logger = Logger(
+    app_name="MetricsExport",
+    log_dir="logs",
+    max_bytes=10 * 1024 * 1024,
+    backup_count=3
+).get_logger("MetricsExport")
+
+DEFAULT_PREFIX = "scom_"
+DEFAULT_HOST = "127.0.0.1"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_STARTED = time.time()
+
+
+def _format_value(value) -> str:
+    """按 Prometheus 文本格式输出数值"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def prometheus_text(registry: metrics.MetricsRegistry = None, prefix: str = DEFAULT_PREFIX) -> str:
+    """
+    以 Prometheus 文本格式输出全部指标；没有值的当前值指标只输出 HELP/TYPE
+
+    参数：
+    registry (MetricsRegistry): 指标登记表，为空时使用全局登记表
+    prefix (str): 指标名称前缀
+
+    返回：
+    str: 文本格式的指标
+    """
+    registry = registry or metrics.REGISTRY
+    lines = []
+    for metric in registry.metrics():
+        name = prefix + metric.name
+        if metric.help:
+            lines.append(f"# HELP {name} {_escape_help(metric.help)}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        value = metric.sample()
+        if metric.kind == HISTOGRAM:
+            cumulative = 0
+            for bound, count in zip(metric.buckets, value["counts"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{_format_value(float(bound))}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {value["count"]}')
+            lines.append(f"{name}_sum {_format_value(value['sum'])}")
+            lines.append(f"{name}_count {value['count']}")
+        elif value is not None:
+            lines.append(f"{name} {_format_value(value)}")
+    lines.append(f"# TYPE {prefix}uptime_seconds gauge")
+    lines.append(f"{prefix}uptime_seconds {_format_value(round(time.time() - _STARTED, 3))}")
+    return "\n".join(lines) + "\n"
+
+
+def json_snapshot(registry: metrics.MetricsRegistry = None) -> dict:
+    """
+    生成 JSON 快照：{"time", "uptime", "metrics": {名称: 值}}，直方图附带各桶上界
+
+    参数：
+    registry (MetricsRegistry): 指标登记表，为空时使用全局登记表
+
+    返回：
+    dict: 可直接 json.dumps 的快照
+    """
+    registry = registry or metrics.REGISTRY
+    values = {}
+    for metric in registry.metrics():
+        value = metric.sample()
+        if metric.kind == HISTOGRAM:
+            value["buckets"] = list(metric.buckets)
+        values[metric.name] = value
+    now = time.time()
+    return {"time": round(now, 3), "uptime": round(now - _STARTED, 3), "metrics": values}
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SCOM-Metrics"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        if path in ("/", "/metrics"):
+            body = prometheus_text(self.server.registry, self.server.prefix).encode("utf-8")
+            content_type = PROMETHEUS_CONTENT_TYPE
+        elif path == "/metrics.json":
+            body = json.dumps(json_snapshot(self.server.registry), separators=(",", ":")).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request from {self.address_string()}: {format % args}")
+
+
+class MetricsServer:
+    """
+    在守护线程中提供指标的 HTTP 端点
+
+    属性：
+    host (str): 监听地址，默认只监听本机
+    port (int): 监听端口，传入 0 时启动后为系统分配的端口
+    """
+
+    def __init__(self, port: int, host: str = DEFAULT_HOST, registry: metrics.MetricsRegistry = None,
+                 prefix: str = DEFAULT_PREFIX):
+        self.host = host
+        self.port = port
+        self.registry = registry or metrics.REGISTRY
+        self.prefix = prefix
+        self._server = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        """绑定端口并开始服务，端口被占用时抛出 OSError"""
+        if self._server is not None:
+            return
+        server = ThreadingHTTPServer((self.host, self.port), _MetricsRequestHandler)
+        server.daemon_threads = True
+        server.registry = self.registry
+        server.prefix = self.prefix
+        self._server = server
+        self.port = server.server_address[1]
+        self._thread = threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(2)
+        self._server = None
+        self._thread = None
+
+
+class SnapshotWriter:
+    """
+    定期把 JSON 快照追加到文件（每行一份），在守护线程中计时和采样，写入交给日志写入线程
+
+    属性：
+    path (str): 快照文件路径
+    interval (float): 快照间隔（秒）
+    snapshots (int): 已写入的快照数
+    """
+
+    def __init__(self, path: str, interval: float, registry: metrics.MetricsRegistry = None):
+        if interval <= 0:
+            raise ValueError(f"Snapshot interval must be positive, got {interval}")
+        self.path = path
+        self.interval = interval
+        self.registry = registry or metrics.REGISTRY
+        self.snapshots = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MetricsSnapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, final_snapshot: bool = True):
+        """停止定时写入；final_snapshot 为真时再写一份最终快照"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(2)
+        self._thread = None
+        if final_snapshot:
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """立即写入一份快照"""
+        line = json.dumps(json_snapshot(self.registry), separators=(",", ":"))
+        common.log_write_lines([line], self.path)
+        self.snapshots += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.warning(f"Failed to write metrics snapshot: {e}")
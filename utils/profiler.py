@@ -0,0 +1,234 @@
+"""
+运行时性能分析（cProfile / tracemalloc）
+
+用户反馈“接上某个设备后 SCOM 卡住”时，可以在客户机器上不借助调试器采集性能数据：
+菜单 Tools > Start Profiling 或启动参数 --profile 开始一次分析会话，停止时在 tmps/ 下写入
+
+    profile_<时间>.pstats       全部线程合并的 cProfile 统计（可用 pstats / snakeviz 等工具打开）
+    profile_<时间>.txt          文本摘要：按累计耗时和自身耗时的前 N 个函数、各线程的前 10 个函数、内存增长
+    profile_<时间>_memory_<n>.txt  会话期间手动拍摄的 tracemalloc 快照与会话开始时的差异
+
+cProfile 只分析开启它的线程（Python 3.12 之前），因此工作线程（读取线程、处理流水线、命令执行、
+日志写入线程）在循环中调用 sync()：没有会话时只是一次属性比较；会话开始后在本线程开启各自的分析器，
+会话结束后关闭。空闲而尚未关闭分析器的线程，其统计在停止会话时直接读取。
+Python 3.12 起 cProfile 基于 sys.monitoring，开启线程的一个分析器即覆盖全部线程。
+"""
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import datetime
+import threading
+import tracemalloc
+
+DEFAULT_TOP = 40
+THREAD_TOP = 10
+# Python 3.12 之前每个线程需要单独的分析器；之后同时只能开启一个，它会覆盖全部线程
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+
+class _ThreadState(threading.local):
+    session = None
+    profile = None
+
+
+_local = _ThreadState()
+_session = None
+
+
+def sync(name: str = None):
+    """
+    工作线程在循环中调用：按当前是否有分析会话开启或关闭本线程的 cProfile
+
+    参数：
+    name (str): 摘要中显示的线程名称，为空时使用 threading 的线程名
+    """
+    session = _session
+    local = _local
+    if session is local.session:
+        return
+    if local.profile is not None:
+        local.profile.disable()
+        local.profile = None
+    local.session = session
+    if session is not None and PER_THREAD_PROFILERS:
+        local.profile = session._attach(name)
+
+
+def active_session():
+    """当前的分析会话，没有时为 None"""
+    return _session
+
+
+class ProfileResult:
+    """
+    一次分析会话的输出
+
+    属性：
+    stats_path (str): 合并的 .pstats 文件
+    summary_path (str): 文本摘要
+    duration (float): 会话时长（秒）
+    threads (list[str]): 参与分析的线程名称
+    """
+
+    def __init__(self, stats_path: str, summary_path: str, duration: float, threads: list):
+        self.stats_path = stats_path
+        self.summary_path = summary_path
+        self.duration = duration
+        self.threads = threads
+
+
+class ProfileSession:
+    """
+    一次分析会话，应在同一个线程（GUI线程）中 start() 和 stop()
+
+    属性：
+    directory (str): 输出目录
+    trace_memory (bool): 是否同时用 tracemalloc 跟踪内存分配
+    top (int): 摘要中列出的函数和内存分配位置个数
+    prefix (str): 输出文件名前缀 profile_<开始时间>
+    memory_snapshots (int): 已拍摄的内存快照数
+    """
+
+    def __init__(self, directory: str, trace_memory: bool = True, top: int = DEFAULT_TOP, memory_frames: int = 1):
+        self.directory = directory
+        self.trace_memory = trace_memory
+        self.top = top
+        self.memory_frames = memory_frames
+        self.prefix = None
+        self.memory_snapshots = 0
+        self._lock = threading.Lock()
+        self._profiles = []  # (线程名称, cProfile.Profile)
+        self._started = None
+        self._baseline = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        """开始分析：在调用线程开启 cProfile，按需开始 tracemalloc，工作线程在下一次 sync() 时加入"""
+        global _session
+        if _session is not None:
+            raise RuntimeError("A profiling session is already running")
+        os.makedirs(self.directory, exist_ok=True)
+        self.prefix = datetime.datetime.now().strftime("profile_%Y%m%d_%H%M%S")
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+                self._started_tracemalloc = True
+            self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        _local.session = self
+        _local.profile = self._attach(threading.current_thread().name)
+        _session = self
+
+    def _attach(self, name: str = None) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        profile.enable()
+        with self._lock:
+            self._profiles.append((name or threading.current_thread().name, profile))
+        return profile
+
+    def memory_snapshot(self) -> str:
+        """
+        拍摄一次 tracemalloc 快照，把与会话开始时相比增长最多的分配位置写入文本文件
+
+        返回：
+        str: 文本文件路径
+        """
+        if self._baseline is None or not tracemalloc.is_tracing():
+            raise RuntimeError("Memory tracing is not enabled for this profiling session")
+        self.memory_snapshots += 1
+        path = os.path.join(self.directory, f"{self.prefix}_memory_{self.memory_snapshots}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._memory_report(tracemalloc.take_snapshot()))
+        return path
+
+    def _memory_report(self, snapshot) -> str:
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced memory: current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB",
+                 f"Top {self.top} allocation sites by growth since the session started:"]
+        for stat in snapshot.compare_to(self._baseline, "lineno")[:self.top]:
+            lines.append(f"  {stat}")
+        return "\n".join(lines) + "\n"
+
+    def stop(self) -> ProfileResult:
+        """
+        停止分析，写入 .pstats 和文本摘要
+
+        返回：
+        ProfileResult: 输出文件和会话信息
+        """
+        global _session
+        if _session is not self:
+            raise RuntimeError("This profiling session is not running")
+        _session = None
+        if _local.profile is not None:
+            _local.profile.disable()
+        _local.session = None
+        _local.profile = None
+        duration = time.perf_counter() - self._started
+
+        with self._lock:
+            profiles = list(self._profiles)
+        combined = None
+        per_thread = []
+        for name, profile in profiles:
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:
+                continue  # 开启后没有记录到任何调用
+            per_thread.append((name, stats))
+            if combined is None:
+                combined = pstats.Stats(profile)
+            else:
+                combined.add(profile)
+
+        stats_path = os.path.join(self.directory, self.prefix + ".pstats")
+        summary_path = os.path.join(self.directory, self.prefix + ".txt")
+        if combined is not None:
+            combined.dump_stats(stats_path)
+        else:
+            stats_path = None
+
+        memory = None
+        if self._baseline is not None and tracemalloc.is_tracing():
+            memory = self._memory_report(tracemalloc.take_snapshot())
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self._summary(duration, combined, per_thread, memory))
+        return ProfileResult(stats_path, summary_path, duration, [name for name, _ in per_thread])
+
+    def _summary(self, duration: float, combined, per_thread: list, memory: str) -> str:
+        out = io.StringIO()
+        out.write(f"SCOM profile {self.prefix}, {duration:.1f} s, Python {sys.version.split()[0]}\n")
+        out.write("Threads: " + ", ".join(f"{name} ({stats.total_calls} calls, {stats.total_tt:.3f} s)"
+                                          for name, stats in per_thread) + "\n")
+        if combined is not None:
+            for title, key in (("cumulative time", "cumulative"), ("own time", "tottime")):
+                out.write(f"\n===== Top {self.top} by {title}, all threads =====\n")
+                combined.stream = out
+                combined.sort_stats(key).print_stats(self.top)
+            for name, stats in per_thread:
+                out.write(f"\n===== {name}: top {THREAD_TOP} by own time =====\n")
+                stats.stream = out
+                stats.sort_stats("tottime").print_stats(THREAD_TOP)
+        if memory is not None:
+            out.write("\n===== Memory (tracemalloc) =====\n")
+            out.write(memory)
+        return out.getvalue()
+
+
+def start_profiling(directory: str, trace_memory: bool = True, top: int = DEFAULT_TOP) -> ProfileSession:
+    """开始一次分析会话（快捷方式）"""
+    session = ProfileSession(directory, trace_memory=trace_memory, top=top)
+    session.start()
+    return session
+
+
+def stop_profiling():
+    """停止当前的分析会话，没有会话时返回 None"""
+    session = _session
+    return session.stop() if session is not None else None
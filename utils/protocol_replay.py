@@ -0,0 +1,250 @@
+"""
+抓包回放串口（pyserial URL 处理器）
+
+把 .scap 原始抓包文件（见 utils.capture）中的接收数据当作一个串口读出，数据经过与真实串口完全相同的
+DataReceiver → ReceivePipeline → 接收显示区路径，不需要连接设备即可复现显示和解析问题。
+
+用法（utils.common 已把 "utils" 加入 serial.protocol_handler_packages）：
+    serial.serial_for_url("replay://logs/capture_20240101_120000.scap?speed=1")
+
+选项：
+    speed   回放速度：1 为原始时序（默认），N 为 N 倍速，max 为尽可能快
+    loop    1 时回放结束后从头重新开始
+
+按原始时序或倍速回放时，每条记录在 (记录时刻 - 第一条记录时刻) / speed 之后才可读；尽可能快时
+全部数据立即可读，并以 RTS/CTS 流控的方式呈现（rtscts 为 True），DataReceiver 在环形缓冲区
+写满时暂停读取而不是丢弃数据，因此可以作为整个显示流水线可重复的吞吐量测试。
+发送（write）的数据被丢弃，抓包中的发送记录不回放。
+"""
+
+import time
+import numbers
+from collections import deque
+from urllib.parse import parse_qs, quote, unquote
+from serial.serialutil import SerialBase, SerialException, PortNotOpenError
+from utils.capture import CaptureReader, DIRECTION_RX
+
+SCHEME = "replay://"
+# 尽可能快回放时预先取出的数据上限（相当于串口驱动的接收缓冲区），避免一次把整个文件放入待读队列
+MAX_READ_AHEAD = 64 * 1024
+
+
+class Serial(SerialBase):
+    """
+    从抓包文件回放接收数据的串口
+
+    属性：
+    path (str): 抓包文件路径
+    speed (float | None): 回放倍速，None 表示尽可能快
+    loop (bool): 结束后是否从头开始
+    finished (bool): 已回放完全部数据（loop 时始终为 False）
+    bytes_replayed (int): 已被读出的字节数
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.path = None
+        self.speed = 1.0
+        self.loop = False
+        self.finished = False
+        self.bytes_replayed = 0
+        self._reader = None
+        self._records = None
+        self._next = None  # 下一条尚未到达的记录 (到达时刻, 数据)
+        self._pending = deque()  # 已到达、尚未读出的数据
+        self._pending_bytes = 0
+        self._first_ns = None
+        self._start_time = 0.0
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self._port is None:
+            raise SerialException("Port must be configured before it can be used.")
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        self.from_url(self.port)
+        try:
+            self._reader = CaptureReader(self.path)
+        except (OSError, ValueError) as e:
+            raise SerialException(f"Could not open capture {self.path!r}: {e}")
+        self._reconfigure_port()
+        self.is_open = True
+        self._restart()
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self._pending.clear()
+            self._next = None
+            self._records = None
+            reader, self._reader = self._reader, None
+            reader.close()
+        super().close()
+
+    def _reconfigure_port(self):
+        """回放不使用串口参数，只检查波特率的合法性"""
+        if not isinstance(self._baudrate, numbers.Integral) or not 0 < self._baudrate < 2 ** 32:
+            raise ValueError(f"invalid baudrate: {self._baudrate!r}")
+
+    def from_url(self, url: str):
+        """解析 replay://<文件路径>[?speed=<倍速|max>&loop=<0|1>]"""
+        if not url.startswith(SCHEME):
+            raise SerialException(f'expected a string in the form "replay://<file>[?speed=N|max][&loop=1]": {url!r}')
+        path, _, query = url[len(SCHEME):].partition("?")
+        if not path:
+            raise SerialException(f"Missing capture file in {url!r}")
+        self.path = unquote(path)
+        try:
+            for option, values in parse_qs(query, True).items():
+                value = values[0].strip().lower()
+                if option == "speed":
+                    self.speed = None if value in ("max", "0", "") else float(value)
+                    if self.speed is not None and self.speed <= 0:
+                        raise ValueError(f"invalid speed: {value!r}")
+                elif option == "loop":
+                    self.loop = value in ("1", "true", "yes")
+                else:
+                    raise ValueError(f"unknown option: {option!r}")
+        except ValueError as e:
+            raise SerialException(f'expected a string in the form "replay://<file>[?speed=N|max][&loop=1]": {e}')
+        # 尽可能快时以硬件流控的方式呈现，读取方不会因缓冲区满而丢弃数据
+        self._rtscts = self.speed is None
+
+    # ---- 回放时序 ----
+
+    def _restart(self):
+        self._records = ((timestamp_ns, payload) for timestamp_ns, direction, payload in self._reader.records()
+                         if direction == DIRECTION_RX and len(payload))
+        self._first_ns = None
+        self._start_time = time.monotonic()
+        self._next = None
+        self.finished = False
+        self._fetch_next()
+
+    def _fetch_next(self):
+        record = next(self._records, None)
+        if record is None:
+            self._next = None
+            if self.loop and self._first_ns is not None:
+                self._restart()
+            else:
+                self.finished = True
+            return
+        timestamp_ns, payload = record
+        if self._first_ns is None:
+            self._first_ns = timestamp_ns
+        if self.speed is None:
+            due = 0.0
+        else:
+            due = self._start_time + (timestamp_ns - self._first_ns) / 1e9 / self.speed
+        self._next = (due, payload)
+
+    def _advance(self):
+        """把已到达的记录移入待读队列"""
+        now = time.monotonic()
+        while self._next is not None and self._next[0] <= now and self._pending_bytes < MAX_READ_AHEAD:
+            payload = self._next[1]
+            self._pending.append(payload)
+            self._pending_bytes += len(payload)
+            self._fetch_next()
+
+    # ---- 串口接口 ----
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._advance()
+        return self._pending_bytes
+
+    def read(self, size=1):
+        """
+        读取最多 size 字节；设置了超时时在超时内没有数据到达则返回已读到的部分，回放结束后表现为空闲线路
+        """
+        if not self.is_open:
+            raise PortNotOpenError()
+        deadline = None if self._timeout is None else time.monotonic() + self._timeout
+        data = bytearray()
+        while len(data) < size and self.is_open:
+            self._advance()
+            if self._pending:
+                payload = self._pending[0]
+                take = min(size - len(data), len(payload))
+                data += payload[:take]
+                if take == len(payload):
+                    self._pending.popleft()
+                else:
+                    self._pending[0] = payload[take:]
+                self._pending_bytes -= take
+                continue
+            if data:
+                break  # 与真实串口一致：已有数据时不再等待后续记录
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            wake = deadline if deadline is not None else now + 0.1
+            if self._next is not None:
+                wake = min(wake, self._next[0])
+            time.sleep(max(wake - now, 0.0005))
+        self.bytes_replayed += len(data)
+        return bytes(data)
+
+    def write(self, data):
+        """回放时发送的数据被丢弃"""
+        if not self.is_open:
+            raise PortNotOpenError()
+        return len(data)
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def reset_output_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    def _update_break_state(self):
+        pass
+
+    def _update_rts_state(self):
+        pass
+
+    def _update_dtr_state(self):
+        pass
+
+    @property
+    def cts(self):
+        return True
+
+    @property
+    def dsr(self):
+        return True
+
+    @property
+    def ri(self):
+        return False
+
+    @property
+    def cd(self):
+        return True
+
+
+def replay_url(path: str, speed=1.0, loop: bool = False) -> str:
+    """
+    构造回放串口的 URL
+
+    参数：
+    path (str): 抓包文件路径
+    speed (float | None): 回放倍速，None 表示尽可能快
+    loop (bool): 结束后是否从头开始
+
+    返回：
+    str: replay:// URL
+    """
+    url = SCHEME + quote(path, safe="/\\:") + "?speed=" + ("max" if speed is None else format(speed, "g"))
+    return url + ("&loop=1" if loop else "")
@@ -0,0 +1,169 @@
+"""
+接收历史的记录块与磁盘分段
+
+LineStore 把较旧的记录按几千条一组封装成记录块：块内布局与内存中的并行数组一致，压缩后保存在
+内存中（冷区）；冷区超过内存预算时，最旧的一批压缩块原样写入一个只追加、写完即不再修改的分段
+文件，之后通过 mmap 只读访问。分段只在本进程内使用，数组按本机字节序保存。
+
+记录块布局（所有数组按 8 字节对齐）：
+    count       Q 记录数
+    offsets     array('Q') 记录数+1，相对数据区的起始偏移
+    stream      array('Q') 记录数，数据流偏移
+    times       array('d') 记录数，Unix 时间戳
+    directions  array('B') 记录数
+    carries     array('B') 记录数，补齐到 8 字节
+    data        各记录的原始字节
+
+分段文件布局：
+    头部        magic(8s) 块数(Q)
+    块表        每块 起始序号(Q) 记录数(Q) 压缩方式(Q) 位置(Q) 大小(Q)
+    payload     各块压缩后的数据
+"""
+
+import os
+import lzma
+import mmap
+import zlib
+import struct
+
+MAGIC = b"SCOMSEG3"
+HEADER = struct.Struct("=8sQ")
+BLOCK_ENTRY = struct.Struct("=QQQQQ")
+COUNT = struct.Struct("=Q")
+
+# 压缩方式：名称 -> (编号, 压缩函数, 解压函数)
+CODECS = {
+    "none": (0, bytes, bytes),
+    "zlib": (1, lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (2, lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+CODEC_NAMES = {codec_id: name for name, (codec_id, _, _) in CODECS.items()}
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def encode_records(data, offsets, stream_offsets, times, directions, carries) -> bytes:
+    """
+    把一组记录编码为记录块
+
+    参数：
+    data (bytes-like): 各记录原始字节的拼接
+    offsets (array): 各记录在 data 中的起始偏移，末尾多一项为结束偏移
+    stream_offsets, times, directions, carries (array): 各记录的元数据
+
+    返回：
+    bytes: 未压缩的记录块
+    """
+    parts = [COUNT.pack(len(times))]
+    parts.extend(values.tobytes() for values in (offsets, stream_offsets, times, directions, carries))
+    size = sum(map(len, parts))
+    parts.append(b"\0" * (_padded(size) - size))
+    parts.append(bytes(data))
+    return b"".join(parts)
+
+
+class RecordBlock:
+    """
+    未压缩记录块的只读视图，数组直接引用块内数据，不复制
+
+    属性：
+    count (int): 记录数
+    offsets, stream_offsets, times, directions, carries (memoryview): 并行数组
+    nbytes (int): 块大小
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        (self.count,) = COUNT.unpack_from(view, 0)
+        self.nbytes = len(view)
+        position = COUNT.size
+        self.offsets, position = self._cast(view, position, "Q", self.count + 1)
+        self.stream_offsets, position = self._cast(view, position, "Q", self.count)
+        self.times, position = self._cast(view, position, "d", self.count)
+        self.directions, position = self._cast(view, position, "B", self.count)
+        self.carries, position = self._cast(view, position, "B", self.count)
+        self._data = view[_padded(position):]
+
+    @staticmethod
+    def _cast(view, position, typecode, count):
+        size = struct.calcsize(typecode) * count
+        return view[position:position + size].cast(typecode), position + size
+
+    def data(self, index: int) -> bytes:
+        """第 index 条记录（相对本块）的原始字节"""
+        return self._data[self.offsets[index]:self.offsets[index + 1]].tobytes()
+
+    def length(self, index: int) -> int:
+        return self.offsets[index + 1] - self.offsets[index]
+
+
+class Segment:
+    """
+    一个只读的分段文件，包含若干压缩记录块
+
+    属性：
+    path (str): 文件路径
+    blocks (list[tuple[int, int, int]]): 各块的 (起始序号, 记录数, 压缩方式编号)
+    end (int): 最后一条记录之后的绝对序号
+    nbytes (int): 文件大小
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a scrollback segment: {path}")
+        self.blocks = []
+        self._spans = []
+        for index in range(count):
+            start, records, codec_id, position, size = BLOCK_ENTRY.unpack_from(
+                self._mmap, HEADER.size + index * BLOCK_ENTRY.size)
+            self.blocks.append((start, records, codec_id))
+            self._spans.append((position, size))
+        self.end = self.blocks[-1][0] + self.blocks[-1][1] if self.blocks else 0
+        self.nbytes = len(self._mmap)
+
+    @classmethod
+    def write(cls, path: str, blocks) -> "Segment":
+        """
+        写入一个分段文件并以 mmap 打开
+
+        参数：
+        path (str): 文件路径
+        blocks (list[tuple[int, int, str, bytes]]): 各块的 (起始序号, 记录数, 压缩方式, 压缩数据)
+
+        返回：
+        Segment: 打开的分段
+        """
+        position = HEADER.size + len(blocks) * BLOCK_ENTRY.size
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(blocks)))
+            for start, count, codec, payload in blocks:
+                file.write(BLOCK_ENTRY.pack(start, count, CODECS[codec][0], position, len(payload)))
+                position += len(payload)
+            for _, _, _, payload in blocks:
+                file.write(payload)
+        return cls(path)
+
+    def payload(self, index: int) -> bytes:
+        """第 index 块的压缩数据"""
+        position, size = self._spans[index]
+        return self._mmap[position:position + size]
+
+    def close(self):
+        """关闭映射，之后才能删除文件（Windows 下映射中的文件无法删除）"""
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def remove(self):
+        """关闭并删除分段文件"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,111 @@
+"""
+会话级增量解码器
+
+基于 codecs.getincrementaldecoder，跨数据块保留未完成的多字节字符，避免在读取边界或超时
+输出处把中文等多字节字符切坏。
+
+编码为 Auto 时，在会话开始的前 N 字节内让各候选编码的增量解码器并行解码，遇到非法字节的
+候选被淘汰；达到 N 字节后锁定优先级最高的剩余候选，之后每段数据只解码一次。
+也可以直接指定编码（如 utf-8、gbk），此时不做检测。
+"""
+
+import codecs
+
+ENCODING_AUTO = "auto"
+DEFAULT_DETECT_BYTES = 4 * 1024
+# 自动检测的候选编码，按优先级排列；latin1 不会解码失败，作为兜底
+AUTO_CANDIDATES = ("utf-8", "gbk", "big5", "latin1")
+
+
+class SessionDecoder:
+    """
+    单个串口会话的增量解码器
+
+    属性：
+    encoding (str): 已锁定的编码，检测阶段为 None
+    """
+
+    def __init__(self, encoding: str = ENCODING_AUTO, detect_bytes: int = DEFAULT_DETECT_BYTES,
+                 candidates=AUTO_CANDIDATES, errors: str = "replace"):
+        self.errors = errors
+        self.detect_bytes = detect_bytes
+        self.encoding = None
+        self._decoder = None
+        self._candidates = []  # 检测阶段：[(编码名, 增量解码器)]
+        self._sampled = 0
+        encoding = str(encoding or ENCODING_AUTO).strip().lower()
+        if encoding == ENCODING_AUTO:
+            # strict 模式用于淘汰候选，锁定后切换为 errors 指定的方式
+            self._candidates = [(name, codecs.getincrementaldecoder(name)("strict")) for name in candidates]
+            if detect_bytes <= 0:
+                self._lock()
+        else:
+            codecs.lookup(encoding)  # 未知编码时抛出 LookupError
+            self.encoding = encoding
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors)
+
+    @property
+    def detecting(self) -> bool:
+        """是否仍处于编码检测阶段"""
+        return self.encoding is None
+
+    def decode(self, data, final: bool = False) -> str:
+        """
+        解码一段数据，未完成的多字节字符保留到下一次调用
+
+        参数：
+        data (bytes): 新数据
+        final (bool): 是否为会话最后一段数据，为 True 时输出所有残留字节
+
+        返回：
+        str: 解码后的文本
+        """
+        if self._decoder is not None:
+            return self._decoder.decode(data, final)
+
+        # 检测阶段：每个候选解码器都解码全部数据，保持各自的状态
+        text = None
+        remaining = []
+        for name, decoder in self._candidates:
+            try:
+                decoded = decoder.decode(data, final)
+            except UnicodeDecodeError:
+                continue
+            remaining.append((name, decoder))
+            if text is None:
+                text = decoded  # 输出优先级最高的有效候选的结果
+        self._candidates = remaining
+        self._sampled += len(data)
+        if self._sampled >= self.detect_bytes or len(remaining) <= 1 or final:
+            self._lock()
+        if text is None:
+            return bytes(data).decode("latin1")
+        return text
+
+    @property
+    def pending(self) -> int:
+        """解码器中缓存的未完成多字节字符的字节数，下一段数据的第一个字符从这些字节开始"""
+        if self._decoder is not None:
+            decoder = self._decoder
+        elif self._candidates:
+            decoder = self._candidates[0][1]
+        else:
+            return 0
+        return len(decoder.getstate()[0])
+
+    def reset(self):
+        """丢弃未完成的多字节字符，已锁定的编码保持不变"""
+        if self._decoder is not None:
+            self._decoder.reset()
+        for _, decoder in self._candidates:
+            decoder.reset()
+
+    def _lock(self):
+        """锁定剩余候选中优先级最高的编码"""
+        if self._candidates:
+            self.encoding, self._decoder = self._candidates[0]
+        else:
+            self.encoding = "latin1"
+            self._decoder = codecs.getincrementaldecoder("latin1")()
+        self._decoder.errors = self.errors
+        self._candidates = []
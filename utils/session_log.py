@@ -0,0 +1,161 @@
+"""
+结构化会话日志（JSON Lines）
+
+文本日志只保存格式化后的显示文本，且不记录发送的数据，下游工具只能用正则表达式解析显示文本。
+会话日志每条记录一行 JSON，接收的每一帧和发送的每条命令各一条：
+
+    {"mono_ns": 81234567890123, "time": 1704081600.123456, "dir": "rx", "port": "COM3",
+     "offset": 1024, "len": 13, "b64": "K0NTUTogMjAsOTkNCg==", "text": "+CSQ: 20,99\\r\\n"}
+
+    mono_ns  单调时钟（time.monotonic_ns），同一会话内可直接相减得到间隔
+    time     对应的 Unix 时间戳
+    dir      "rx" / "tx"
+    port     串口名称
+    offset   接收数据流中的偏移（只有接收记录）
+    len      原始字节数
+    b64/hex  原始字节，按 SessionLogData 设置编码为 base64 或十六进制
+    text     解码后的文本（接收按会话锁定的编码，发送按 UTF-8）
+
+每次打开串口时先写入一条 {"event": "open", ...}，关闭时写入 {"event": "close", ...}，
+一个文件中可以有多个会话。格式化在调用线程（接收处理流水线、GUI 线程）中完成，
+写入由 utils.log_writer 的后台线程成批落盘，与接收日志共用同一个写入队列。
+"""
+
+import json
+import time
+import base64
+import binascii
+from utils import common
+from utils.line_store import DIRECTION_RX
+
+DATA_BASE64 = "base64"
+DATA_HEX = "hex"
+# 数据编码 -> 记录中的字段名
+DATA_FIELDS = {DATA_BASE64: "b64", DATA_HEX: "hex"}
+
+EVENT_OPEN = "open"
+EVENT_CLOSE = "close"
+
+
+class SessionLog:
+    """
+    一个串口会话的结构化日志，可在多个线程中调用
+
+    属性：
+    path (str): 日志文件路径
+    port (str): 串口名称
+    data_encoding (str): 原始字节的编码方式，DATA_BASE64 或 DATA_HEX
+    records (int): 已写入队列的数据记录数
+    """
+
+    def __init__(self, path: str, port: str = "", data_encoding: str = DATA_BASE64):
+        data_encoding = str(data_encoding).lower()
+        if data_encoding not in DATA_FIELDS:
+            raise ValueError(f"Unknown session log data encoding: {data_encoding!r}, expected one of {tuple(DATA_FIELDS)}")
+        self.path = path
+        self.port = port
+        self.data_encoding = data_encoding
+        self.records = 0
+        self._field = DATA_FIELDS[data_encoding]
+
+    def _encode_data(self, data) -> str:
+        if self.data_encoding == DATA_HEX:
+            return bytes(data).hex()
+        return base64.b64encode(data).decode("ascii")
+
+    def format_record(self, direction: int, data, timestamp_ns: int = None, text: str = None,
+                      offset: int = None) -> str:
+        """
+        格式化一条数据记录
+
+        参数：
+        direction (int): utils.line_store 中的方向常量
+        data (bytes): 原始字节
+        timestamp_ns (int): 时刻（time.monotonic_ns），为空时取当前时刻
+        text (str): 解码后的文本，为空时按 UTF-8 解码
+        offset (int): 接收数据流中的偏移
+
+        返回：
+        str: 一行 JSON（不含换行符）
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        record = {
+            "mono_ns": timestamp_ns,
+            "time": round(common.monotonic_ns_to_epoch(timestamp_ns), 6),
+            "dir": "rx" if direction == DIRECTION_RX else "tx",
+            "port": self.port,
+        }
+        if offset is not None:
+            record["offset"] = offset
+        record["len"] = len(data)
+        record[self._field] = self._encode_data(data)
+        record["text"] = text if text is not None else bytes(data).decode("utf-8", "replace")
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+    def write(self, direction: int, data, timestamp_ns: int = None, text: str = None, offset: int = None):
+        """写入一条数据记录（如一次发送）"""
+        self.records += 1
+        common.log_write_lines([self.format_record(direction, data, timestamp_ns, text, offset)], self.path)
+
+    def write_frames(self, frames, timestamps_ns, texts):
+        """
+        整批写入接收的帧
+
+        参数：
+        frames (list[tuple[int, bytes]]): (数据流偏移, 帧数据)
+        timestamps_ns (Sequence[int]): 各帧的时刻（time.monotonic_ns）
+        texts (Sequence[str]): 各帧解码后的文本
+        """
+        if not frames:
+            return
+        self.records += len(frames)
+        common.log_write_lines([
+            self.format_record(DIRECTION_RX, frame, timestamp_ns, text, offset)
+            for (offset, frame), timestamp_ns, text in zip(frames, timestamps_ns, texts)
+        ], self.path)
+
+    def event(self, name: str, **fields):
+        """写入一条会话事件（打开、关闭串口等），fields 为附加字段"""
+        timestamp_ns = time.monotonic_ns()
+        record = {
+            "event": name,
+            "mono_ns": timestamp_ns,
+            "time": round(common.monotonic_ns_to_epoch(timestamp_ns), 6),
+            "port": self.port,
+        }
+        record.update(fields)
+        common.log_write_lines([json.dumps(record, ensure_ascii=False, separators=(",", ":"))], self.path)
+
+
+def iter_records(path: str, events: bool = False):
+    """
+    依次读取会话日志中的记录，原始字节解码后放入 "data" 字段
+
+    参数：
+    path (str): 日志文件路径
+    events (bool): 是否同时返回会话事件记录
+
+    返回：
+    Iterator[dict]: 记录，格式不正确的行被跳过
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "event" in record:
+                if events:
+                    yield record
+                continue
+            try:
+                if "b64" in record:
+                    record["data"] = base64.b64decode(record["b64"])
+                elif "hex" in record:
+                    record["data"] = bytes.fromhex(record["hex"])
+                else:
+                    continue
+            except (ValueError, binascii.Error):
+                continue
+            yield record